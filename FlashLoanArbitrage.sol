@@ -24,30 +24,62 @@ interface IUniswapV2Router {
         external view returns (uint[] memory amounts);
 }
 
-interface ISushiswapRouter {
-    function swapExactTokensForTokens(
-        uint amountIn,
-        uint amountOutMin,
-        address[] calldata path,
-        address to,
-        uint deadline
-    ) external returns (uint[] memory amounts);
+interface IUniswapV2Pair {
+    function token0() external view returns (address);
+    function token1() external view returns (address);
+    function swap(uint amount0Out, uint amount1Out, address to, bytes calldata data) external;
+}
+
+interface IUniswapV3Pool {
+    function fee() external view returns (uint24);
+    function swap(
+        address recipient,
+        bool zeroForOne,
+        int256 amountSpecified,
+        uint160 sqrtPriceLimitX96,
+        bytes calldata data
+    ) external returns (int256 amount0, int256 amount1);
+}
+
+interface IUniswapV3Factory {
+    function getPool(address tokenA, address tokenB, uint24 fee) external view returns (address pool);
+}
+
+interface IBalancerVault {
+    function flashLoan(
+        address recipient,
+        address[] memory tokens,
+        uint256[] memory amounts,
+        bytes memory userData
+    ) external;
     
-    function getAmountsOut(uint amountIn, address[] calldata path)
-        external view returns (uint[] memory amounts);
+    function getProtocolFeesCollector() external view returns (address);
+}
+
+interface IBalancerProtocolFeesCollector {
+    function getFlashLoanFeePercentage() external view returns (uint256);
 }
 
 /**
  * @title FlashLoanArbitrage
- * @dev عقد ذكي لتنفيذ المراجحة باستخدام القروض السريعة من Aave
+ * @dev عقد ذكي لتنفيذ المراجحة باستخدام القروض السريعة من Aave أو Balancer أو أزواج V2
  */
 contract FlashLoanArbitrage is FlashLoanSimpleReceiverBase, Ownable, ReentrancyGuard {
     
-    // عناوين الموجهات (Routers)
+    // عناوين الموجهات (Routers) على Ethereum: مدعومة افتراضياً، وبقية الشبكات عبر setRouter
     address public constant UNISWAP_V2_ROUTER = 0x7a250d5630B4cF539739dF2C5dAcb4c659F2488D;
     address public constant SUSHISWAP_ROUTER = 0xd9e1cE17f2641f24aE83637ab66a2cca9C378B9F;
     address public constant WETH = 0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2;
     
+    // مصنع Uniswap V3 (نفس العنوان على Ethereum و Polygon و Arbitrum)
+    address public constant UNISWAP_V3_FACTORY = 0x1F98431c8aD98523631AE4a59f267346ea31F984;
+    // حدود السعر في TickMath (تبادل بدون حد سعر)
+    uint160 private constant MIN_SQRT_RATIO = 4295128739;
+    uint160 private constant MAX_SQRT_RATIO = 1461446703485210103287273052203988822378723970342;
+    
+    // خزنة Balancer V2 (نفس العنوان على Ethereum و Polygon و Arbitrum)
+    address public constant BALANCER_VAULT = 0xBA12222222228d8Ba445958a75a0704d566BF2C8;
+    
     // إعدادات المراجحة
     uint256 public constant MAX_SLIPPAGE = 300; // 3%
     uint256 public constant SLIPPAGE_BASE = 10000;
@@ -61,12 +93,31 @@ contract FlashLoanArbitrage is FlashLoanSimpleReceiverBase, Ownable, ReentrancyG
         address sellDex
     );
     
+    event RouteExecuted(
+        address indexed asset,
+        uint256 amount,
+        uint256 profit,
+        uint256 hops
+    );
+    
+    event BatchExecuted(
+        address indexed asset,
+        uint256 amount,
+        uint256 profit,
+        uint256 routes
+    );
+    
     event FlashLoanExecuted(
         address indexed asset,
         uint256 amount,
         uint256 premium
     );
     
+    event RouterUpdated(
+        address indexed router,
+        bool supported
+    );
+    
     event ProfitWithdrawn(
         address indexed asset,
         uint256 amount,
@@ -83,10 +134,53 @@ contract FlashLoanArbitrage is FlashLoanSimpleReceiverBase, Ownable, ReentrancyG
         uint256 minProfit;
     }
     
+    // مسار دائري متعدد الخطوات: path[0] == path[n] == asset و routers[i] للخطوة i
+    // (موجه V2 مدعوم، أو عنوان مجمع Uniswap V3 للخطوة مباشرة)
+    struct RouteParams {
+        address asset;
+        uint256 amountIn;
+        address[] path;
+        address[] routers;
+        uint256 minProfit;
+    }
+    
+    // عدة مسارات دائرية لنفس الأصل تحت قرض سريع واحد (المبلغ = مجموع amountIn)
+    struct BatchParams {
+        address asset;
+        RouteParams[] routes;
+        uint256 minProfit;
+    }
+    
+    // مصدر القرض السريع: provider أحد PROVIDER_* و lender عنوان الزوج لقروض V2
+    struct FlashSource {
+        uint8 provider;
+        address lender;
+    }
+    
+    // نوع العملية المرمز مع بيانات القرض
+    uint8 private constant MODE_ARBITRAGE = 0;
+    uint8 private constant MODE_ROUTE = 1;
+    uint8 private constant MODE_BATCH = 2;
+    uint8 private constant MODE_DIRECT = 3;
+    
+    // مزودو القروض السريعة (رسوم Aave، بدون رسوم Balancer حالياً، 0.3% لتبادل V2 السريع)
+    uint8 private constant PROVIDER_AAVE = 0;
+    uint8 private constant PROVIDER_BALANCER = 1;
+    uint8 private constant PROVIDER_V2_PAIR = 2;
+    
+    // ترميز المسار المباشر المضغوط:
+    // [asset:20][amountIn:16][minProfit:16][hops:1] ثم لكل خطوة [pair:20][zeroForOne:1][amountOut:16]
+    uint256 private constant DIRECT_HEADER_LENGTH = 53;
+    uint256 private constant DIRECT_HOP_LENGTH = 37;
+    
     // المتغيرات
     mapping(address => bool) public authorizedCallers;
+    // موجهات V2 المسموح بها (واجهة Uniswap V2 نفسها على جميع الشبكات)
+    mapping(address => bool) public supportedRouters;
     uint256 public totalProfits;
     mapping(address => uint256) public tokenProfits;
+    // بصمة القرض الجاري (المقرض وبياناته): ترفض الاستدعاءات الراجعة التي لم يطلبها العقد
+    bytes32 private activeLoan;
     
     modifier onlyAuthorized() {
         require(authorizedCallers[msg.sender] || msg.sender == owner(), "غير مخول");
@@ -97,6 +191,8 @@ contract FlashLoanArbitrage is FlashLoanSimpleReceiverBase, Ownable, ReentrancyG
         FlashLoanSimpleReceiverBase(IPoolAddressesProvider(_addressProvider)) 
     {
         authorizedCallers[msg.sender] = true;
+        supportedRouters[UNISWAP_V2_ROUTER] = true;
+        supportedRouters[SUSHISWAP_ROUTER] = true;
     }
     
     /**
@@ -107,6 +203,33 @@ contract FlashLoanArbitrage is FlashLoanSimpleReceiverBase, Ownable, ReentrancyG
         onlyAuthorized 
         nonReentrant 
     {
+        _executeArbitrage(params);
+    }
+    
+    /**
+     * @dev محاكاة executeArbitrage عبر eth_call (نسخة متفرعة أو تجاوزات الحالة)
+     * تعيد الربح الصافي من فرق رصيد tokenA بعد سداد القرض ورسومه، والغاز المستهلك داخل العقد
+     */
+    function simulateArbitrage(ArbitrageParams calldata params) 
+        external 
+        onlyAuthorized 
+        nonReentrant 
+        returns (uint256 profit, uint256 gasUsed) 
+    {
+        uint256 gasStart = gasleft();
+        uint256 initialBalance = IERC20(params.tokenA).balanceOf(address(this));
+        
+        _executeArbitrage(params);
+        
+        uint256 finalBalance = IERC20(params.tokenA).balanceOf(address(this));
+        profit = finalBalance > initialBalance ? finalBalance - initialBalance : 0;
+        gasUsed = gasStart - gasleft();
+    }
+    
+    /**
+     * @dev التحقق من المعاملات وطلب القرض السريع للمراجحة بين منصتين
+     */
+    function _executeArbitrage(ArbitrageParams calldata params) internal {
         require(params.amountIn > 0, "المبلغ يجب أن يكون أكبر من صفر");
         require(params.tokenA != address(0) && params.tokenB != address(0), "عناوين الرموز غير صحيحة");
         
@@ -115,19 +238,110 @@ contract FlashLoanArbitrage is FlashLoanSimpleReceiverBase, Ownable, ReentrancyG
         require(expectedProfit >= params.minProfit, "الربح المتوقع أقل من الحد الأدنى");
         
         // تنفيذ القرض السريع
-        bytes memory paramsData = abi.encode(params);
+        bytes memory paramsData = abi.encode(MODE_ARBITRAGE, abi.encode(params));
         
-        POOL.flashLoanSimple(
-            address(this),
-            params.tokenA,
-            params.amountIn,
-            paramsData,
-            0
-        );
+        _flashLoan(FlashSource(PROVIDER_AAVE, address(0)), params.tokenA, params.amountIn, paramsData);
+    }
+    
+    /**
+     * @dev تنفيذ مراجحة عبر مسار دائري متعدد الخطوات باستخدام القرض السريع
+     */
+    function executeRoute(RouteParams calldata params, FlashSource calldata source) 
+        external 
+        onlyAuthorized 
+        nonReentrant 
+    {
+        require(params.amountIn > 0, "المبلغ يجب أن يكون أكبر من صفر");
+        _validateRoute(params);
+        
+        // التحقق المسبق للمسارات المسعّرة بالموجهات فقط: خطوات V3 لا تُسعّر هنا،
+        // والحد الأدنى للربح يُتحقق منه بعد التنفيذ داخل القرض لجميع المسارات
+        if (_isRouterPriced(params)) {
+            uint256 expectedProfit = calculateRouteProfit(params, source);
+            require(expectedProfit >= params.minProfit, "الربح المتوقع أقل من الحد الأدنى");
+        }
+        
+        _flashLoan(source, params.asset, params.amountIn, abi.encode(MODE_ROUTE, abi.encode(params)));
     }
     
     /**
-     * @dev تنفيذ العملية بعد استلام القرض السريع
+     * @dev تنفيذ عدة مسارات لنفس الأصل في معاملة وقرض سريع واحد
+     * الحد الأدنى للربح يُتحقق منه بعد التنفيذ من فرق الرصيد (المسارات قد تشترك في مجمعات)
+     */
+    function executeBatch(BatchParams calldata params, FlashSource calldata source) 
+        external 
+        onlyAuthorized 
+        nonReentrant 
+    {
+        uint256 count = params.routes.length;
+        require(count > 0, "لا توجد مسارات");
+        
+        uint256 totalAmount;
+        for (uint256 i = 0; i < count; i++) {
+            require(params.routes[i].asset == params.asset, "أصل المسار مختلف");
+            require(params.routes[i].amountIn > 0, "المبلغ يجب أن يكون أكبر من صفر");
+            _validateRoute(params.routes[i]);
+            totalAmount += params.routes[i].amountIn;
+        }
+        
+        _flashLoan(source, params.asset, totalAmount, abi.encode(MODE_BATCH, abi.encode(params)));
+    }
+    
+    /**
+     * @dev تنفيذ مسار مباشر على عقود الأزواج بمبالغ محسوبة خارج السلسلة (بيانات مضغوطة)
+     * لا موجه ولا مصفوفات مسار ولا موافقات: كل زوج يرسل مخرجاته مباشرة للزوج التالي،
+     * وفحص K في الزوج يرفض أي مبلغ لم يعد صالحاً
+     */
+    function executeDirect(bytes calldata data, FlashSource calldata source) 
+        external 
+        onlyAuthorized 
+        nonReentrant 
+    {
+        require(data.length > DIRECT_HEADER_LENGTH, "مسار غير صالح");
+        uint256 hops = uint8(data[DIRECT_HEADER_LENGTH - 1]);
+        require(hops >= 2 && data.length == DIRECT_HEADER_LENGTH + hops * DIRECT_HOP_LENGTH, "مسار غير صالح");
+        
+        address asset = address(bytes20(data[0:20]));
+        uint256 amountIn = uint128(bytes16(data[20:36]));
+        require(amountIn > 0, "المبلغ يجب أن يكون أكبر من صفر");
+        
+        _flashLoan(source, asset, amountIn, abi.encode(MODE_DIRECT, data));
+    }
+    
+    /**
+     * @dev طلب القرض السريع من المزود المختار (الاختيار الأرخص يتم خارج السلسلة)
+     * قرض زوج V2 يقفل الزوج حتى السداد، لذلك لا يمر المسار بالزوج المقرض
+     */
+    function _flashLoan(FlashSource memory source, address asset, uint256 amount, bytes memory data) internal {
+        if (source.provider == PROVIDER_BALANCER) {
+            address[] memory tokens = new address[](1);
+            uint256[] memory amounts = new uint256[](1);
+            tokens[0] = asset;
+            amounts[0] = amount;
+            
+            activeLoan = keccak256(abi.encode(BALANCER_VAULT, data));
+            IBalancerVault(BALANCER_VAULT).flashLoan(address(this), tokens, amounts, data);
+        } else if (source.provider == PROVIDER_V2_PAIR) {
+            bool isToken0 = IUniswapV2Pair(source.lender).token0() == asset;
+            require(isToken0 || IUniswapV2Pair(source.lender).token1() == asset, "الزوج لا يحتوي الأصل");
+            
+            activeLoan = keccak256(abi.encode(source.lender, data));
+            IUniswapV2Pair(source.lender).swap(
+                isToken0 ? amount : 0,
+                isToken0 ? 0 : amount,
+                address(this),
+                data
+            );
+        } else {
+            require(source.provider == PROVIDER_AAVE, "مزود قرض غير مدعوم");
+            POOL.flashLoanSimple(address(this), asset, amount, data, 0);
+            return;
+        }
+        activeLoan = bytes32(0);
+    }
+    
+    /**
+     * @dev استلام قرض Aave: التنفيذ ثم الموافقة على سحب المبلغ ورسومه
      */
     function executeOperation(
         address asset,
@@ -139,28 +353,82 @@ contract FlashLoanArbitrage is FlashLoanSimpleReceiverBase, Ownable, ReentrancyG
         require(msg.sender == address(POOL), "المرسل غير صحيح");
         require(initiator == address(this), "المبادر غير صحيح");
         
-        // فك تشفير المعاملات
-        ArbitrageParams memory arbParams = abi.decode(params, (ArbitrageParams));
+        _onFlashLoan(asset, amount, premium, params);
+        
+        // الموافقة على سحب المبلغ المستحق
+        IERC20(asset).approve(address(POOL), amount + premium);
+        
+        return true;
+    }
+    
+    /**
+     * @dev استلام قرض Balancer: التنفيذ ثم إعادة المبلغ ورسومه إلى الخزنة
+     */
+    function receiveFlashLoan(
+        address[] memory tokens,
+        uint256[] memory amounts,
+        uint256[] memory feeAmounts,
+        bytes memory userData
+    ) external {
+        require(msg.sender == BALANCER_VAULT, "المرسل غير صحيح");
+        require(activeLoan == keccak256(abi.encode(msg.sender, userData)), "قرض غير مطلوب");
+        
+        _onFlashLoan(tokens[0], amounts[0], feeAmounts[0], userData);
+        
+        IERC20(tokens[0]).transfer(BALANCER_VAULT, amounts[0] + feeAmounts[0]);
+    }
+    
+    /**
+     * @dev استلام تبادل V2 السريع: التنفيذ ثم السداد بنفس الرمز للزوج
+     */
+    function uniswapV2Call(
+        address sender,
+        uint256 amount0,
+        uint256 amount1,
+        bytes calldata data
+    ) external {
+        require(sender == address(this), "المبادر غير صحيح");
+        require(activeLoan == keccak256(abi.encode(msg.sender, data)), "قرض غير مطلوب");
+        
+        address asset = amount0 > 0 ? IUniswapV2Pair(msg.sender).token0() : IUniswapV2Pair(msg.sender).token1();
+        uint256 amount = amount0 > 0 ? amount0 : amount1;
+        // فحص K بعد رسوم 0.3% على الدخل: السداد = amount * 1000 / 997 مقرباً للأعلى
+        uint256 premium = (amount * 1000 + 996) / 997 - amount;
+        
+        _onFlashLoan(asset, amount, premium, data);
+        
+        IERC20(asset).transfer(msg.sender, amount + premium);
+    }
+    
+    /**
+     * @dev تنفيذ العملية بعد استلام القرض السريع (مشترك بين المزودين)
+     */
+    function _onFlashLoan(address asset, uint256 amount, uint256 premium, bytes memory params) internal {
+        // فك تشفير المعاملات حسب نوع العملية
+        (uint8 mode, bytes memory data) = abi.decode(params, (uint8, bytes));
         
         // تنفيذ المراجحة
-        uint256 profit = _performArbitrage(arbParams);
+        uint256 profit;
+        if (mode == MODE_ROUTE) {
+            profit = _performRoute(abi.decode(data, (RouteParams)), amount, premium);
+        } else if (mode == MODE_DIRECT) {
+            profit = _performDirect(data, premium);
+        } else if (mode == MODE_BATCH) {
+            profit = _performBatch(abi.decode(data, (BatchParams)), amount, premium);
+        } else {
+            profit = _performArbitrage(abi.decode(data, (ArbitrageParams)));
+        }
         
         // التأكد من وجود ربح كافي لسداد القرض
-        uint256 totalOwed = amount + premium;
-        require(IERC20(asset).balanceOf(address(this)) >= totalOwed, "رصيد غير كافي لسداد القرض");
-        
-        // الموافقة على سحب المبلغ المستحق
-        IERC20(asset).approve(address(POOL), totalOwed);
+        require(IERC20(asset).balanceOf(address(this)) >= amount + premium, "رصيد غير كافي لسداد القرض");
         
-        // تسجيل الربح
-        if (profit > 0) {
-            tokenProfits[asset] += profit;
-            totalProfits += profit;
+        // تسجيل الربح الصافي بعد رسوم القرض (profit في الأحداث إجمالي قبل الرسوم)
+        if (profit > premium) {
+            tokenProfits[asset] += profit - premium;
+            totalProfits += profit - premium;
         }
         
         emit FlashLoanExecuted(asset, amount, premium);
-        
-        return true;
     }
     
     /**
@@ -211,7 +479,139 @@ contract FlashLoanArbitrage is FlashLoanSimpleReceiverBase, Ownable, ReentrancyG
     }
     
     /**
-     * @dev تبديل الرموز في DEX محدد
+     * @dev تنفيذ خطوات المسار الدائري بالتتابع والتحقق من الربح بعد رسوم القرض
+     * (الأرباح المخزنة في العقد لا تغطي مساراً خاسراً)
+     */
+    function _performRoute(RouteParams memory params, uint256 amount, uint256 premium) 
+        internal 
+        returns (uint256 profit) 
+    {
+        uint256 initialBalance = IERC20(params.asset).balanceOf(address(this));
+        
+        _swapAlongPath(params);
+        
+        uint256 finalBalance = IERC20(params.asset).balanceOf(address(this));
+        require(finalBalance >= initialBalance + premium + params.minProfit, "الربح أقل من الحد الأدنى");
+        
+        profit = finalBalance - initialBalance;
+        emit RouteExecuted(params.asset, amount, profit, params.routers.length);
+        
+        return profit;
+    }
+    
+    /**
+     * @dev تنفيذ مسارات الدفعة بالتتابع والتحقق من الربح الإجمالي بعد رسوم القرض
+     */
+    function _performBatch(BatchParams memory params, uint256 amount, uint256 premium) 
+        internal 
+        returns (uint256 profit) 
+    {
+        uint256 initialBalance = IERC20(params.asset).balanceOf(address(this));
+        
+        for (uint256 i = 0; i < params.routes.length; i++) {
+            _swapAlongPath(params.routes[i]);
+        }
+        
+        uint256 finalBalance = IERC20(params.asset).balanceOf(address(this));
+        require(finalBalance >= initialBalance + premium + params.minProfit, "الربح أقل من الحد الأدنى");
+        
+        profit = finalBalance - initialBalance;
+        emit BatchExecuted(params.asset, amount, profit, params.routes.length);
+        
+        return profit;
+    }
+    
+    /**
+     * @dev تنفيذ المسار المباشر: تحويل واحد للزوج الأول ثم swap متسلسل بين الأزواج
+     */
+    function _performDirect(bytes memory data, uint256 premium) internal returns (uint256 profit) {
+        (address asset, uint256 amountIn, uint256 minProfit, uint256 hops) = _readDirectHeader(data);
+        uint256 initialBalance = IERC20(asset).balanceOf(address(this));
+        
+        (address pair, , ) = _readDirectHop(data, 0);
+        IERC20(asset).transfer(pair, amountIn);
+        
+        for (uint256 i = 0; i < hops; i++) {
+            (address currentPair, bool zeroForOne, uint256 amountOut) = _readDirectHop(data, i);
+            
+            address to = address(this);
+            if (i + 1 < hops) {
+                (to, , ) = _readDirectHop(data, i + 1);
+            }
+            
+            if (zeroForOne) {
+                IUniswapV2Pair(currentPair).swap(0, amountOut, to, new bytes(0));
+            } else {
+                IUniswapV2Pair(currentPair).swap(amountOut, 0, to, new bytes(0));
+            }
+        }
+        
+        uint256 finalBalance = IERC20(asset).balanceOf(address(this));
+        require(finalBalance >= initialBalance + premium + minProfit, "الربح أقل من الحد الأدنى");
+        
+        profit = finalBalance - initialBalance;
+        emit RouteExecuted(asset, amountIn, profit, hops);
+        
+        return profit;
+    }
+    
+    /**
+     * @dev قراءة رأس المسار المباشر من البيانات المضغوطة
+     */
+    function _readDirectHeader(bytes memory data) 
+        internal 
+        pure 
+        returns (address asset, uint256 amountIn, uint256 minProfit, uint256 hops) 
+    {
+        assembly {
+            let word := mload(add(data, 32))
+            asset := shr(96, word)
+            amountIn := shr(128, mload(add(data, 52)))
+            minProfit := shr(128, mload(add(data, 68)))
+            hops := shr(248, mload(add(data, 84)))
+        }
+    }
+    
+    /**
+     * @dev قراءة خطوة من المسار المباشر: (الزوج، اتجاه التبادل، المخرجات)
+     */
+    function _readDirectHop(bytes memory data, uint256 index) 
+        internal 
+        pure 
+        returns (address pair, bool zeroForOne, uint256 amountOut) 
+    {
+        uint256 offset = DIRECT_HEADER_LENGTH + index * DIRECT_HOP_LENGTH;
+        assembly {
+            let start := add(add(data, 32), offset)
+            pair := shr(96, mload(start))
+            zeroForOne := iszero(iszero(shr(248, mload(add(start, 20)))))
+            amountOut := shr(128, mload(add(start, 21)))
+        }
+    }
+    
+    /**
+     * @dev تنفيذ خطوات مسار واحد وإعادة المبلغ النهائي
+     */
+    function _swapAlongPath(RouteParams memory params) internal returns (uint256 amount) {
+        amount = params.amountIn;
+        for (uint256 i = 0; i < params.routers.length; i++) {
+            amount = _swapTokens(params.path[i], params.path[i + 1], amount, params.routers[i]);
+            require(amount > 0, "فشل في إحدى خطوات المسار");
+        }
+        return amount;
+    }
+    
+    /**
+     * @dev التحقق من أن المسار دائري ويبدأ بالأصل المقترض
+     */
+    function _validateRoute(RouteParams memory params) internal pure {
+        uint256 hops = params.routers.length;
+        require(hops >= 2 && params.path.length == hops + 1, "مسار غير صالح");
+        require(params.path[0] == params.asset && params.path[hops] == params.asset, "المسار يجب أن يكون دائرياً");
+    }
+    
+    /**
+     * @dev تبديل الرموز في DEX محدد (أو مجمع V3 إذا لم يكن العنوان موجهاً مدعوماً)
      */
     function _swapTokens(
         address tokenIn,
@@ -220,6 +620,10 @@ contract FlashLoanArbitrage is FlashLoanSimpleReceiverBase, Ownable, ReentrancyG
         address dexRouter
     ) internal returns (uint256 amountOut) {
         
+        if (!supportedRouters[dexRouter]) {
+            return _swapV3(tokenIn, tokenOut, amountIn, dexRouter);
+        }
+        
         IERC20(tokenIn).approve(dexRouter, amountIn);
         
         address[] memory path = new address[](2);
@@ -228,31 +632,64 @@ contract FlashLoanArbitrage is FlashLoanSimpleReceiverBase, Ownable, ReentrancyG
         
         uint256 deadline = block.timestamp + 300; // 5 دقائق
         
-        if (dexRouter == UNISWAP_V2_ROUTER) {
-            uint[] memory amounts = IUniswapV2Router(dexRouter).swapExactTokensForTokens(
-                amountIn,
-                0, // نقبل أي مبلغ من الرموز
-                path,
-                address(this),
-                deadline
-            );
-            amountOut = amounts[1];
-        } else if (dexRouter == SUSHISWAP_ROUTER) {
-            uint[] memory amounts = ISushiswapRouter(dexRouter).swapExactTokensForTokens(
-                amountIn,
-                0,
-                path,
-                address(this),
-                deadline
-            );
-            amountOut = amounts[1];
-        } else {
-            revert("DEX غير مدعوم");
-        }
+        uint[] memory amounts = IUniswapV2Router(dexRouter).swapExactTokensForTokens(
+            amountIn,
+            0, // نقبل أي مبلغ من الرموز
+            path,
+            address(this),
+            deadline
+        );
+        amountOut = amounts[1];
         
         return amountOut;
     }
     
+    /**
+     * @dev تبادل مباشر مع مجمع Uniswap V3 (الدفع في uniswapV3SwapCallback)
+     */
+    function _swapV3(
+        address tokenIn,
+        address tokenOut,
+        uint256 amountIn,
+        address pool
+    ) internal returns (uint256 amountOut) {
+        uint24 fee = IUniswapV3Pool(pool).fee();
+        require(
+            IUniswapV3Factory(UNISWAP_V3_FACTORY).getPool(tokenIn, tokenOut, fee) == pool,
+            "DEX غير مدعوم"
+        );
+        
+        bool zeroForOne = tokenIn < tokenOut;
+        (int256 amount0, int256 amount1) = IUniswapV3Pool(pool).swap(
+            address(this),
+            zeroForOne,
+            int256(amountIn),
+            zeroForOne ? MIN_SQRT_RATIO + 1 : MAX_SQRT_RATIO - 1,
+            abi.encode(tokenIn, tokenOut, fee)
+        );
+        
+        amountOut = uint256(-(zeroForOne ? amount1 : amount0));
+        return amountOut;
+    }
+    
+    /**
+     * @dev دفع دخل تبادل V3 للمجمع (من مجمعات المصنع فقط)
+     */
+    function uniswapV3SwapCallback(
+        int256 amount0Delta,
+        int256 amount1Delta,
+        bytes calldata data
+    ) external {
+        (address tokenIn, address tokenOut, uint24 fee) = abi.decode(data, (address, address, uint24));
+        require(
+            IUniswapV3Factory(UNISWAP_V3_FACTORY).getPool(tokenIn, tokenOut, fee) == msg.sender,
+            "مستدعي غير مصرح له"
+        );
+        
+        uint256 amountToPay = amount0Delta > 0 ? uint256(amount0Delta) : uint256(amount1Delta);
+        IERC20(tokenIn).transfer(msg.sender, amountToPay);
+    }
+    
     /**
      * @dev حساب الربح المحتمل قبل التنفيذ
      */
@@ -266,14 +703,10 @@ contract FlashLoanArbitrage is FlashLoanSimpleReceiverBase, Ownable, ReentrancyG
         buyPath[0] = params.tokenA;
         buyPath[1] = params.tokenB;
         
-        uint256[] memory buyAmounts;
-        if (params.buyDex == UNISWAP_V2_ROUTER) {
-            buyAmounts = IUniswapV2Router(params.buyDex).getAmountsOut(params.amountIn, buyPath);
-        } else if (params.buyDex == SUSHISWAP_ROUTER) {
-            buyAmounts = ISushiswapRouter(params.buyDex).getAmountsOut(params.amountIn, buyPath);
-        } else {
+        if (!supportedRouters[params.buyDex] || !supportedRouters[params.sellDex]) {
             return 0;
         }
+        uint256[] memory buyAmounts = IUniswapV2Router(params.buyDex).getAmountsOut(params.amountIn, buyPath);
         
         uint256 tokenBAmount = buyAmounts[1];
         
@@ -282,14 +715,7 @@ contract FlashLoanArbitrage is FlashLoanSimpleReceiverBase, Ownable, ReentrancyG
         sellPath[0] = params.tokenB;
         sellPath[1] = params.tokenA;
         
-        uint256[] memory sellAmounts;
-        if (params.sellDex == UNISWAP_V2_ROUTER) {
-            sellAmounts = IUniswapV2Router(params.sellDex).getAmountsOut(tokenBAmount, sellPath);
-        } else if (params.sellDex == SUSHISWAP_ROUTER) {
-            sellAmounts = ISushiswapRouter(params.sellDex).getAmountsOut(tokenBAmount, sellPath);
-        } else {
-            return 0;
-        }
+        uint256[] memory sellAmounts = IUniswapV2Router(params.sellDex).getAmountsOut(tokenBAmount, sellPath);
         
         uint256 tokenAReceived = sellAmounts[1];
         
@@ -306,6 +732,71 @@ contract FlashLoanArbitrage is FlashLoanSimpleReceiverBase, Ownable, ReentrancyG
         return expectedProfit;
     }
     
+    /**
+     * @dev التحقق من أن جميع خطوات المسار عبر موجهات V2 (قابلة للتسعير بـ getAmountsOut)
+     */
+    function _isRouterPriced(RouteParams memory params) internal view returns (bool) {
+        for (uint256 i = 0; i < params.routers.length; i++) {
+            if (!supportedRouters[params.routers[i]]) {
+                return false;
+            }
+        }
+        return true;
+    }
+    
+    /**
+     * @dev رسوم القرض لدى المزود بوحدات الأصل (مطابقة لما يُسدد في دوال الاستلام)
+     */
+    function flashFee(FlashSource memory source, uint256 amount) public view returns (uint256) {
+        if (source.provider == PROVIDER_BALANCER) {
+            address collector = IBalancerVault(BALANCER_VAULT).getProtocolFeesCollector();
+            uint256 percentage = IBalancerProtocolFeesCollector(collector).getFlashLoanFeePercentage();
+            // mulUp كما في الخزنة
+            return amount * percentage == 0 ? 0 : (amount * percentage - 1) / 1e18 + 1;
+        }
+        if (source.provider == PROVIDER_V2_PAIR) {
+            return (amount * 1000 + 996) / 997 - amount;
+        }
+        // percentMul في Aave بتقريب النصف للأعلى
+        return (amount * POOL.FLASHLOAN_PREMIUM_TOTAL() + 5000) / 10000;
+    }
+    
+    /**
+     * @dev حساب الربح المحتمل لمسار دائري قبل التنفيذ (بعد رسوم مزود القرض)
+     */
+    function calculateRouteProfit(RouteParams memory params, FlashSource memory source) 
+        public 
+        view 
+        returns (uint256 expectedProfit) 
+    {
+        address[] memory hopPath = new address[](2);
+        uint256 amount = params.amountIn;
+        
+        for (uint256 i = 0; i < params.routers.length; i++) {
+            address router = params.routers[i];
+            // خطوات مجمعات V3 لا تُسعّر هنا (تُسعّر محلياً أو بمحاكاة executeRoute)
+            if (!supportedRouters[router]) {
+                return 0;
+            }
+            
+            hopPath[0] = params.path[i];
+            hopPath[1] = params.path[i + 1];
+            amount = IUniswapV2Router(router).getAmountsOut(amount, hopPath)[1];
+        }
+        
+        // حساب الربح (مع خصم رسوم مزود القرض المختار)
+        if (amount > params.amountIn) {
+            uint256 grossProfit = amount - params.amountIn;
+            uint256 flashLoanFee = flashFee(source, params.amountIn);
+            
+            if (grossProfit > flashLoanFee) {
+                expectedProfit = grossProfit - flashLoanFee;
+            }
+        }
+        
+        return expectedProfit;
+    }
+    
     /**
      * @dev سحب الأرباح
      */
@@ -334,6 +825,15 @@ contract FlashLoanArbitrage is FlashLoanSimpleReceiverBase, Ownable, ReentrancyG
         emit ProfitWithdrawn(token, amount, owner());
     }
     
+    /**
+     * @dev إضافة أو إزالة موجه V2 (موجهات الشبكة عند النشر خارج Ethereum)
+     */
+    function setRouter(address router, bool supported) external onlyOwner {
+        require(router != address(0), "عنوان غير صحيح");
+        supportedRouters[router] = supported;
+        emit RouterUpdated(router, supported);
+    }
+    
     /**
      * @dev إضافة مستخدم مخول
      */
@@ -0,0 +1,192 @@
+"""
+محاكي AMM بمنتج ثابت (Uniswap V2 / Sushiswap) لتسعير الفرص محلياً، مع مجمعات V3 اختيارياً
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from config import Config
+
+# رسوم تبادل V2: 0.3% (مضاعف 997/1000 كما في UniswapV2Library)
+DEFAULT_FEE_NUMERATOR = 997
+DEFAULT_FEE_DENOMINATOR = 1000
+
+# رسوم القرض السريع من Aave كما في العقد (5 / 10000)
+FLASH_LOAN_FEE_BPS = 5
+BPS_BASE = 10000
+
+def get_amount_out(amount_in: int, reserve_in: int, reserve_out: int,
+                   fee_numerator: int = DEFAULT_FEE_NUMERATOR,
+                   fee_denominator: int = DEFAULT_FEE_DENOMINATOR) -> int:
+    """
+    كمية المخرجات لتبادل واحد (مطابقة لـ UniswapV2Library.getAmountOut بأعداد صحيحة)
+    """
+    if amount_in <= 0:
+        raise ValueError("INSUFFICIENT_INPUT_AMOUNT")
+    if reserve_in <= 0 or reserve_out <= 0:
+        raise ValueError("INSUFFICIENT_LIQUIDITY")
+        
+    amount_in_with_fee = amount_in * fee_numerator
+    numerator = amount_in_with_fee * reserve_out
+    denominator = reserve_in * fee_denominator + amount_in_with_fee
+    return numerator // denominator
+
+def get_amounts_out(amount_in: int, hops: List[Tuple[int, int]],
+                    fee_numerator: int = DEFAULT_FEE_NUMERATOR,
+                    fee_denominator: int = DEFAULT_FEE_DENOMINATOR) -> List[int]:
+    """كميات كل خطوة في مسار (مطابقة لـ getAmountsOut) من احتياطيات (الدخل، الخرج)"""
+    amounts = [amount_in]
+    for reserve_in, reserve_out in hops:
+        amounts.append(get_amount_out(amounts[-1], reserve_in, reserve_out,
+                                      fee_numerator, fee_denominator))
+    return amounts
+
+def flash_loan_fee(amount: int) -> int:
+    """رسوم القرض السريع بنفس تقريب العقد"""
+    return (amount * FLASH_LOAN_FEE_BPS) // BPS_BASE
+
+class AMMQuoter:
+    """
+    تسعير محلي لفرص المراجحة بين منصات V2 من الاحتياطيات المخزنة
+    
+    يعيد نتائج calculatePotentialProfit و canExecuteArbitrage في العقد
+    بدون أي استدعاء RPC. مجمعات V3 (إن وُجد مصدرها) تظهر كمنصات منفصلة لكل
+    مستوى رسوم وتُسعّر بعبور الـ ticks.
+    """
+    
+    # منصات V2 المدعومة في العقد ومعاملات رسومها
+    DEX_FEES = {
+        'uniswap_v2': (DEFAULT_FEE_NUMERATOR, DEFAULT_FEE_DENOMINATOR),
+        'sushiswap': (DEFAULT_FEE_NUMERATOR, DEFAULT_FEE_DENOMINATOR),
+        'quickswap': (DEFAULT_FEE_NUMERATOR, DEFAULT_FEE_DENOMINATOR)
+    }
+    
+    def __init__(self, reserve_source=None, dex_configs: Optional[Dict] = None, v3_source=None):
+        self.logger = logging.getLogger(__name__)
+        # مصدر خارجي للاحتياطيات (مثل ذاكرة الاحتياطيات) يوفر get_reserves
+        self.reserve_source = reserve_source
+        # حالة مجمعات V3 (V3PoolCache) للتسعير المحلي
+        self.v3_source = v3_source
+        self.reserves = {}  # (dex, token0, token1) -> (reserve0, reserve1) بترتيب العناوين
+        dex_configs = dex_configs if dex_configs is not None else Config.DEX_CONFIGS
+        self.routers = {
+            config['router_address'].lower(): dex
+            for dex, config in dex_configs.items() if dex in self.DEX_FEES
+        }
+    
+    @staticmethod
+    def _pair_key(dex: str, token_a: str, token_b: str) -> Tuple[str, str, str, bool]:
+        """مفتاح الزوج بترتيب العناوين كما في المصنع، مع اتجاه الطلب"""
+        a, b = token_a.lower(), token_b.lower()
+        if a < b:
+            return dex, a, b, False
+        return dex, b, a, True
+    
+    def is_v3(self, dex: str) -> bool:
+        """التحقق من أن المنصة مجمع V3"""
+        return self.v3_source is not None and self.v3_source.is_v3(dex)
+    
+    def resolve_dex(self, dex_or_router: str) -> Optional[str]:
+        """تحويل عنوان الموجه إلى اسم المنصة (أو None إذا لم تكن مدعومة)"""
+        if dex_or_router in self.DEX_FEES or self.is_v3(dex_or_router):
+            return dex_or_router
+        return self.routers.get(dex_or_router.lower())
+    
+    def fee(self, dex: str) -> Tuple[int, int]:
+        """معاملات رسوم المنصة (البسط، المقام)"""
+        if self.is_v3(dex):
+            return self.v3_source.fee(dex)
+        return self.DEX_FEES[dex]
+    
+    def set_reserves(self, dex: str, token_a: str, token_b: str, reserve_a: int, reserve_b: int):
+        """تخزين احتياطيات زوج"""
+        dex, token0, token1, flipped = self._pair_key(dex, token_a, token_b)
+        self.reserves[(dex, token0, token1)] = (reserve_b, reserve_a) if flipped else (reserve_a, reserve_b)
+    
+    def get_reserves(self, dex: str, token_in: str, token_out: str) -> Optional[Tuple[int, int]]:
+        """احتياطيات (الدخل، الخرج) لاتجاه التبادل (افتراضية للنطاق الحالي في V3)"""
+        if self.is_v3(dex):
+            return self.v3_source.get_reserves(dex, token_in, token_out)
+        if self.reserve_source is not None:
+            return self.reserve_source.get_reserves(dex, token_in, token_out)
+            
+        dex, token0, token1, flipped = self._pair_key(dex, token_in, token_out)
+        reserves = self.reserves.get((dex, token0, token1))
+        if reserves is None:
+            return None
+        return (reserves[1], reserves[0]) if flipped else reserves
+    
+    def list_pools(self) -> List[Tuple[str, str, str]]:
+        """مفاتيح جميع المجمعات المعروفة (dex, token0, token1)"""
+        source = self.reserve_source.reserves if self.reserve_source is not None else self.reserves
+        pools = [key for key in source if key[0] in self.DEX_FEES]
+        if self.v3_source is not None:
+            pools.extend(self.v3_source.list_pools())
+        return pools
+    
+    def has_pair(self, dex_or_router: str, token_a: str, token_b: str) -> bool:
+        """التحقق من توفر احتياطيات زوج"""
+        dex = self.resolve_dex(dex_or_router)
+        return dex is not None and self.get_reserves(dex, token_a, token_b) is not None
+    
+    def quote(self, dex_or_router: str, amount_in: int, token_in: str, token_out: str) -> int:
+        """كمية المخرجات لتبادل واحد على منصة"""
+        dex = self.resolve_dex(dex_or_router)
+        if dex is None:
+            raise ValueError(f"منصة غير مدعومة: {dex_or_router}")
+        if self.is_v3(dex):
+            return self.v3_source.quote(dex, amount_in, token_in, token_out)
+            
+        reserves = self.get_reserves(dex, token_in, token_out)
+        if reserves is None:
+            raise KeyError(f"احتياطيات غير متوفرة: {dex} {token_in}/{token_out}")
+            
+        fee_numerator, fee_denominator = self.DEX_FEES[dex]
+        return get_amount_out(amount_in, reserves[0], reserves[1], fee_numerator, fee_denominator)
+    
+    def calculate_potential_profit(self, params: Dict) -> int:
+        """الربح المتوقع بعد رسوم القرض (مطابق لـ calculatePotentialProfit في العقد)"""
+        if self.resolve_dex(params['buyDex']) is None or self.resolve_dex(params['sellDex']) is None:
+            return 0
+            
+        token_b_amount = self.quote(params['buyDex'], params['amountIn'], params['tokenA'], params['tokenB'])
+        token_a_received = self.quote(params['sellDex'], token_b_amount, params['tokenB'], params['tokenA'])
+        
+        expected_profit = 0
+        if token_a_received > params['amountIn']:
+            gross_profit = token_a_received - params['amountIn']
+            fee = flash_loan_fee(params['amountIn'])
+            if gross_profit > fee:
+                expected_profit = gross_profit - fee
+                
+        return expected_profit
+    
+    def can_execute_arbitrage(self, params: Dict) -> Tuple[bool, int, str]:
+        """التحقق من إمكانية التنفيذ (مطابق لـ canExecuteArbitrage في العقد)"""
+        zero_address = '0x' + '0' * 40
+        
+        if params['amountIn'] == 0:
+            return False, 0, "المبلغ يجب أن يكون أكبر من صفر"
+            
+        if params['tokenA'].lower() == zero_address or params['tokenB'].lower() == zero_address:
+            return False, 0, "عناوين الرموز غير صحيحة"
+            
+        if params['buyDex'].lower() == params['sellDex'].lower():
+            return False, 0, "يجب أن تكون منصات التداول مختلفة"
+            
+        expected_profit = self.calculate_potential_profit(params)
+        
+        if expected_profit < params.get('minProfit', 0):
+            return False, expected_profit, "الربح المتوقع أقل من الحد الأدنى"
+            
+        return True, expected_profit, "يمكن تنفيذ المراجحة"
+    
+    def evaluate_batch(self, candidates: List[Dict]) -> List[Tuple[bool, int, str]]:
+        """تقييم عدد كبير من الفرص محلياً (عمل حسابي فقط دون RPC)"""
+        results = []
+        for params in candidates:
+            try:
+                results.append(self.can_execute_arbitrage(params))
+            except (KeyError, ValueError) as e:
+                results.append((False, 0, str(e)))
+        return results
@@ -29,7 +29,7 @@ class ArbitrageBot:
         
         # تهيئة المكونات
         self.exchange_manager = ExchangeManager()
-        self.risk_manager = RiskManager()
+        self.risk_manager = RiskManager(self.exchange_manager.fee_model)
         
         # متغيرات التحكم
         self.running = False
@@ -74,6 +74,9 @@ class ArbitrageBot:
         self.running = True
         self.stats['start_time'] = datetime.now()
         
+        # مزامنة المخزون الفعلي في المنصات قبل التداول
+        await self.exchange_manager.sync_exposure(self.risk_manager.exposure_tracker)
+        
         try:
             # حلقة التشغيل الرئيسية
             while self.running:
@@ -88,6 +91,9 @@ class ArbitrageBot:
     async def run_arbitrage_cycle(self):
         """تشغيل دورة مراجحة واحدة"""
         try:
+            # تحرير الحجوزات العالقة من مهام توقفت قبل الالتزام
+            self.risk_manager.expire_reservations()
+            
             # جلب الأسعار من جميع المنصات
             self.logger.debug("جلب الأسعار من المنصات...")
             prices = await self.exchange_manager.fetch_all_prices(Config.SUPPORTED_PAIRS)
@@ -151,23 +157,37 @@ class ArbitrageBot:
                 self.logger.warning(f"لا يمكن تنفيذ الصفقة: {execution_message}")
                 return
             
-            # تنفيذ الصفقة
-            self.logger.info(f"تنفيذ صفقة مراجحة: {opportunity['symbol']} - "
-                           f"المبلغ: {trade_amount}")
-            
-            trade_result = await self.exchange_manager.execute_arbitrage_trade(
+            # حجز السعة (الحدود اليومية والمخزون) قبل التنفيذ المتزامن
+            reservation, reservation_message = self.risk_manager.reserve_capacity(
                 opportunity, trade_amount
             )
             
-            # تسجيل النتيجة
-            trade_result.update({
-                'symbol': opportunity['symbol'],
-                'buy_exchange': opportunity['buy_exchange'],
-                'sell_exchange': opportunity['sell_exchange'],
-                'trade_amount': trade_amount
-            })
+            if not reservation:
+                self.logger.warning(f"لا يمكن حجز السعة: {reservation_message}")
+                return
+            
+            # تنفيذ الصفقة
+            self.logger.info(f"تنفيذ صفقة مراجحة: {opportunity['symbol']} - "
+                           f"المبلغ: {trade_amount}")
             
-            self.risk_manager.record_trade(trade_result)
+            try:
+                trade_result = await self.exchange_manager.execute_arbitrage_trade(
+                    opportunity, trade_amount
+                )
+                
+                # تسجيل النتيجة
+                trade_result.update({
+                    'symbol': opportunity['symbol'],
+                    'buy_exchange': opportunity['buy_exchange'],
+                    'sell_exchange': opportunity['sell_exchange'],
+                    'trade_amount': trade_amount
+                })
+                
+                # الالتزام بالحجز: تسوية المخزون وتسجيل الصفقة
+                self.risk_manager.commit_reservation(reservation, trade_result)
+            finally:
+                # تحرير الحجز إذا فشل التنفيذ قبل الالتزام (لا أثر له بعد الالتزام)
+                self.risk_manager.release_reservation(reservation)
             
             if trade_result['success']:
                 self.stats['executed_trades'] += 1
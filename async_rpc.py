@@ -0,0 +1,147 @@
+"""
+عميل JSON-RPC غير متزامن باتصالات دائمة مجمّعة وطلبات دفعية
+"""
+
+import itertools
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+class RPCError(Exception):
+    """خطأ مُعاد من عقدة JSON-RPC"""
+    
+    def __init__(self, code: int, message: str, data: Any = None):
+        super().__init__(f"{code}: {message}")
+        self.code = code
+        self.message = message
+        self.data = data
+
+class AsyncRPCClient:
+    """عميل JSON-RPC عبر جلسة aiohttp واحدة بمجمع اتصالات keep-alive"""
+    
+    def __init__(self, url: str, pool_size: int = 16, timeout: float = 10,
+                 keepalive_timeout: float = 60):
+        self.logger = logging.getLogger(__name__)
+        self.url = url
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.keepalive_timeout = keepalive_timeout
+        self.session = None
+        self._ids = itertools.count(1)
+    
+    async def get_session(self) -> aiohttp.ClientSession:
+        """إنشاء الجلسة عند أول استخدام (داخل حلقة الأحداث) وإعادة استخدامها"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self.session
+    
+    async def close(self):
+        """إغلاق الجلسة ومجمع الاتصالات"""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+    
+    async def _post(self, payload):
+        """إرسال طلب (مفرد أو دفعي) عبر الجلسة المشتركة"""
+        session = await self.get_session()
+        async with session.post(self.url, json=payload) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+    
+    @staticmethod
+    def _unwrap(response: Dict) -> Any:
+        """استخراج النتيجة أو رفع خطأ العقدة"""
+        error = response.get('error')
+        if error:
+            raise RPCError(error.get('code', -1), error.get('message', ''), error.get('data'))
+        return response.get('result')
+    
+    async def call(self, method: str, params: Optional[List] = None) -> Any:
+        """استدعاء طريقة JSON-RPC واحدة"""
+        response = await self._post({
+            'jsonrpc': '2.0',
+            'id': next(self._ids),
+            'method': method,
+            'params': params or []
+        })
+        return self._unwrap(response)
+    
+    async def batch(self, calls: List[Tuple[str, List]], raise_errors: bool = True) -> List[Any]:
+        """
+        تنفيذ عدة استدعاءات في رحلة ذهاب وإياب واحدة
+        
+        النتائج بنفس ترتيب الاستدعاءات (العقدة قد تعيدها بأي ترتيب). عند
+        raise_errors=False يُعاد RPCError في موضع الاستدعاء الفاشل بدلاً من رفعه.
+        """
+        if not calls:
+            return []
+            
+        ids = [next(self._ids) for _ in calls]
+        payload = [
+            {'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params or []}
+            for request_id, (method, params) in zip(ids, calls)
+        ]
+        
+        responses = await self._post(payload)
+        if isinstance(responses, dict):
+            # بعض العقد تعيد خطأ واحداً بدلاً من مصفوفة
+            self._unwrap(responses)
+            raise RPCError(-32603, 'استجابة دفعية غير صالحة')
+            
+        by_id = {response.get('id'): response for response in responses}
+        results = []
+        for request_id in ids:
+            response = by_id.get(request_id)
+            if response is None:
+                error = RPCError(-32603, f'استجابة مفقودة للطلب {request_id}')
+                if raise_errors:
+                    raise error
+                results.append(error)
+                continue
+                
+            try:
+                results.append(self._unwrap(response))
+            except RPCError as e:
+                if raise_errors:
+                    raise
+                results.append(e)
+                
+        return results
+    
+    async def block_number(self) -> int:
+        """رقم أحدث كتلة"""
+        return int(await self.call('eth_blockNumber'), 16)
+    
+    async def chain_id(self) -> int:
+        """معرف الشبكة"""
+        return int(await self.call('eth_chainId'), 16)
+    
+    async def gas_price(self) -> int:
+        """سعر الغاز الحالي (wei)"""
+        return int(await self.call('eth_gasPrice'), 16)
+    
+    async def get_transaction_count(self, address: str, block: str = 'pending') -> int:
+        """عدد معاملات الحساب (nonce التالي)"""
+        return int(await self.call('eth_getTransactionCount', [address, block]), 16)
+    
+    async def eth_call(self, transaction: Dict, block: str = 'latest') -> str:
+        """استدعاء للقراءة فقط"""
+        return await self.call('eth_call', [transaction, block])
+    
+    async def send_raw_transaction(self, raw_transaction) -> str:
+        """إرسال معاملة موقعة وإعادة هاشها"""
+        if isinstance(raw_transaction, (bytes, bytearray)):
+            raw_transaction = '0x' + bytes(raw_transaction).hex()
+        return await self.call('eth_sendRawTransaction', [raw_transaction])
+    
+    async def get_transaction_receipt(self, tx_hash: str) -> Optional[Dict]:
+        """إيصال المعاملة أو None إذا لم تُعدَّن بعد"""
+        return await self.call('eth_getTransactionReceipt', [tx_hash])
@@ -0,0 +1,114 @@
+"""
+سجل مديري القروض السريعة لعدة شبكات مع دورة مستقلة لكل شبكة
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from config import Config
+from chains import configured_chains
+from flash_loan_manager import FlashLoanManager
+
+class ChainRegistry:
+    """
+    مدير قروض سريعة لكل شبكة مهيأة (Ethereum, Polygon, Arbitrum)
+    
+    جميع الشبكات تُفحص بالتوازي على حلقة أحداث واحدة: لكل شبكة مهمة تحدّث
+    الاحتياطيات ورسوم الغاز وتستدعي on_block مرة عند كل كتلة جديدة، بفاصل
+    فحص مناسب لزمن كتلة الشبكة. فهرسة أحداث العقود مهمة خلفية منفصلة لكل
+    شبكة حتى لا يؤخر مسح نطاقات السجلات دورات التداول.
+    """
+    
+    def __init__(self, chains: Optional[Iterable[str]] = None):
+        self.logger = logging.getLogger(__name__)
+        names = list(chains) if chains is not None else configured_chains()
+        self.managers = {name: FlashLoanManager(name) for name in names}
+        self.running = False
+        self.last_blocks = {}  # الشبكة -> آخر كتلة عولجت
+        
+        # العقود المنشورة مسبقاً على كل شبكة
+        for name, manager in self.managers.items():
+            contract_address = Config.FLASH_LOAN_CONTRACTS.get(name)
+            if contract_address and manager.w3:
+                manager.load_contract(contract_address)
+    
+    def get(self, chain: str) -> Optional[FlashLoanManager]:
+        """مدير شبكة بالاسم"""
+        return self.managers.get(chain)
+    
+    @property
+    def chains(self) -> List[str]:
+        """أسماء الشبكات المسجلة"""
+        return list(self.managers)
+    
+    async def _run_chain(self, chain: str, manager: FlashLoanManager,
+                         on_block: Callable[[str, FlashLoanManager], Awaitable]):
+        """دورة شبكة واحدة: معالجة كل كتلة جديدة مرة واحدة"""
+        poll_interval = manager.chain['poll_interval']
+        while self.running:
+            try:
+                await manager.update_reserves()
+                block = manager.reserve_cache.last_block if manager.reserve_cache else None
+                if block is not None and block != self.last_blocks.get(chain):
+                    self.last_blocks[chain] = block
+                    await on_block(chain, manager)
+            except Exception as e:
+                self.logger.error(f"خطأ في دورة شبكة {chain}: {e}")
+            await asyncio.sleep(poll_interval)
+    
+    async def _index_chain(self, chain: str, manager: FlashLoanManager):
+        """فهرسة أحداث عقد شبكة كل EVENTS_INDEX_INTERVAL ثانية"""
+        next_sync = 0.0
+        while self.running:
+            if time.time() >= next_sync:
+                next_sync = time.time() + Config.EVENTS_INDEX_INTERVAL
+                try:
+                    await manager.index_events()
+                except Exception as e:
+                    self.logger.error(f"خطأ في فهرسة أحداث شبكة {chain}: {e}")
+            await asyncio.sleep(manager.chain['poll_interval'])
+    
+    async def run(self, on_block: Callable[[str, FlashLoanManager], Awaitable]):
+        """تشغيل دورات جميع الشبكات المتصلة وفهرسة أحداثها حتى الإيقاف"""
+        self.running = True
+        connected = {chain: manager for chain, manager in self.managers.items() if manager.rpc}
+        if not connected:
+            self.logger.warning("لا توجد شبكات متصلة للقروض السريعة")
+            return
+            
+        self.logger.info(f"بدء فحص {len(connected)} شبكة: {', '.join(connected)}")
+        loop = asyncio.get_running_loop()
+        index_tasks = [
+            loop.create_task(self._index_chain(chain, manager))
+            for chain, manager in connected.items()
+        ]
+        try:
+            await asyncio.gather(*[
+                self._run_chain(chain, manager, on_block) for chain, manager in connected.items()
+            ])
+        finally:
+            # الفهرسة تُستأنف من نقطة الحفظ: الإلغاء لا ينتظر انتهاء نطاق طويل
+            for task in index_tasks:
+                task.cancel()
+            await asyncio.gather(*index_tasks, return_exceptions=True)
+    
+    def stop(self):
+        """إيقاف الدورات بعد الكتلة الحالية"""
+        self.running = False
+    
+    def realized_pnl(self) -> Dict[str, Dict]:
+        """الربح المحقق لكل شبكة ثم لكل أصل من أحداث عقدها المفهرسة"""
+        return {chain: manager.get_realized_pnl() for chain, manager in self.managers.items()}
+    
+    async def network_info(self) -> Dict[str, Dict]:
+        """معلومات جميع الشبكات بالتوازي"""
+        results = await asyncio.gather(*[
+            manager.get_network_info_async() for manager in self.managers.values()
+        ])
+        return dict(zip(self.managers, results))
+    
+    async def close(self):
+        """إغلاق اتصالات جميع المديرين"""
+        await asyncio.gather(*[manager.close() for manager in self.managers.values()])
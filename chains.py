@@ -0,0 +1,123 @@
+"""
+دفاتر العناوين لكل شبكة (الرموز، منصات V2، مزودا Aave و Balancer) للقروض السريعة
+"""
+
+import os
+from typing import Dict, List, Optional
+
+from config import Config
+
+CHAINS = {
+    'ethereum': {
+        'chain_id': 1,
+        'rpc_url_setting': 'ETHEREUM_RPC_URL',
+        'native_symbol': 'ETH',
+        'wrapped_native': 'WETH',  # رمز تحويل تكلفة الغاز إلى وحدات الأصل
+        'aave_pool_addresses_provider': '0x2f39d218133AFaB8F2B819B1066c7E434Ad94E9e',
+        'balancer_vault': '0xBA12222222228d8Ba445958a75a0704d566BF2C8',
+        'min_priority_fee': 0,
+        'poll_interval': 1.0,  # ثواني بين فحوص الكتلة الجديدة (زمن الكتلة 12 ثانية)
+        'tokens': {
+            'WETH': '0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2',
+            'USDC': '0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48',
+            'USDT': '0xdAC17F958D2ee523a2206206994597C13D831ec7',
+            'DAI': '0x6B175474E89094C44Da98b954EedeAC495271d0F',
+            'WBTC': '0x2260FAC5E5542a773Aa44fBCfeDf7C193bc2C599'
+        },
+        'dex_configs': Config.DEX_CONFIGS
+    },
+    'polygon': {
+        'chain_id': 137,
+        'rpc_url_setting': 'POLYGON_RPC_URL',
+        'native_symbol': 'MATIC',
+        'wrapped_native': 'WMATIC',
+        'aave_pool_addresses_provider': '0xa97684ead0e402dC232d5A977953DF7ECBaB3CDb',
+        'balancer_vault': '0xBA12222222228d8Ba445958a75a0704d566BF2C8',
+        'min_priority_fee': 30 * 10**9,  # الحد الأدنى لرسوم الأولوية الذي يقبله المدققون
+        'poll_interval': 1.0,
+        'tokens': {
+            'WMATIC': '0x0d500B1d8E8eF31E21C99d1Db9A6444d3ADf1270',
+            'WETH': '0x7ceB23fD6bC0adD59E62ac25578270cFf1b9f619',
+            'USDC': '0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174',
+            'USDT': '0xc2132D05D31c914a87C6611C10748AEb04B58e8F',
+            'DAI': '0x8f3Cf7ad23Cd3CaDbD9735AFf958023239c6A063',
+            'WBTC': '0x1BFD67037B42Cf73acF2047067bd4F2C47D9BfD6'
+        },
+        'dex_configs': {
+            'uniswap_v3': {
+                'router_address': '0xE592427A0AEce92De3Edee1F18E0157C05861564',
+                'factory_address': '0x1F98431c8aD98523631AE4a59f267346ea31F984'
+            },
+            'quickswap': {
+                'router_address': '0xa5E0829CaCEd8fFDD4De3c43696c57F7D7A678ff',
+                'factory_address': '0x5757371414417b8C6CAad45bAeF941aBc7d3Ab32'
+            },
+            'sushiswap': {
+                'router_address': '0x1b02dA8Cb0d097eB8D57A175b88c7D8b47997506',
+                'factory_address': '0xc35DADB65012eC5796536bD9864eD8773aBc74C4'
+            }
+        }
+    },
+    'arbitrum': {
+        'chain_id': 42161,
+        'rpc_url_setting': 'ARBITRUM_RPC_URL',
+        'native_symbol': 'ETH',
+        'wrapped_native': 'WETH',
+        'aave_pool_addresses_provider': '0xa97684ead0e402dC232d5A977953DF7ECBaB3CDb',
+        'balancer_vault': '0xBA12222222228d8Ba445958a75a0704d566BF2C8',
+        'min_priority_fee': 0,
+        'poll_interval': 0.5,  # زمن الكتلة ~0.25 ثانية
+        'tokens': {
+            'WETH': '0x82aF49447D8a07e3bd95BD0d56f35241523fBab1',
+            'USDC': '0xaf88d065e77c8cC2239327C5EDb3A432268e5831',
+            'USDT': '0xFd086bC7CD5C481DCC9C85ebE478A1C0b69FCbb9',
+            'DAI': '0xDA10009cBd5D07dd0CeCc66161FC93D7c9000da1',
+            'WBTC': '0x2f2a2543B76A4166549F7aaB2e75Bef0aefC5B0f'
+        },
+        'dex_configs': {
+            'uniswap_v3': {
+                'router_address': '0xE592427A0AEce92De3Edee1F18E0157C05861564',
+                'factory_address': '0x1F98431c8aD98523631AE4a59f267346ea31F984'
+            },
+            'uniswap_v2': {
+                'router_address': '0x4752ba5DBc23f44D87826276BF6Fd6b1C372aD24',
+                'factory_address': '0xf1D7CC64Fb4452F05c498126312eBE29f30Fbcf9'
+            },
+            'sushiswap': {
+                'router_address': '0x1b02dA8Cb0d097eB8D57A175b88c7D8b47997506',
+                'factory_address': '0xc35DADB65012eC5796536bD9864eD8773aBc74C4'
+            }
+        }
+    }
+}
+
+def get_chain(name: str) -> Dict:
+    """إعدادات شبكة بالاسم"""
+    if name not in CHAINS:
+        raise ValueError(f"شبكة غير مدعومة: {name}")
+    return CHAINS[name]
+
+def rpc_url(name: str) -> str:
+    """عنوان RPC للشبكة من الإعدادات (فارغ إذا لم يُحدد)"""
+    return getattr(Config, get_chain(name)['rpc_url_setting']) or ''
+
+def rpc_urls(name: str) -> List[str]:
+    """جميع عناوين RPC للشبكة: الأساسي ثم الإضافية دون تكرار"""
+    urls = [rpc_url(name)] + Config.RPC_FALLBACK_URLS.get(name, [])
+    return list(dict.fromkeys(url for url in urls if url))
+
+def configured_chains() -> List[str]:
+    """الشبكات التي حُدد لها عنوان RPC"""
+    return [name for name in CHAINS if rpc_urls(name)]
+
+def events_db_path(name: str) -> str:
+    """ملف فهرس الأحداث للشبكة (ملف منفصل لكل شبكة خارج Ethereum)"""
+    if name == 'ethereum':
+        return Config.EVENTS_DB_PATH
+    root, extension = os.path.splitext(Config.EVENTS_DB_PATH)
+    return f"{root}_{name}{extension}"
+
+def events_start_block(name: str) -> Optional[int]:
+    """كتلة بداية فهرسة أحداث العقد للشبكة من الإعدادات (None إذا لم تُحدد)"""
+    value = Config.EVENTS_START_BLOCKS.get(name)
+    return int(value) if value else None
@@ -31,6 +31,8 @@ class Config:
     MIN_PROFIT_PERCENTAGE = float(os.getenv('MIN_PROFIT_PERCENTAGE', 0.5))
     MAX_TRADE_AMOUNT = float(os.getenv('MAX_TRADE_AMOUNT', 1000))
     MIN_TRADE_AMOUNT = float(os.getenv('MIN_TRADE_AMOUNT', 10))
+    # الحجم المرجعي بعملة التسعير لأسعار المجمعات في لوحة الأسعار الموحدة
+    DEX_QUOTE_NOTIONAL = float(os.getenv('DEX_QUOTE_NOTIONAL', 1000))
     
     # إعدادات الأمان
     MAX_SLIPPAGE = float(os.getenv('MAX_SLIPPAGE', 2.0))
@@ -55,6 +57,39 @@ class Config:
     POLYGON_RPC_URL = os.getenv('POLYGON_RPC_URL')
     ARBITRUM_RPC_URL = os.getenv('ARBITRUM_RPC_URL')
     
+    # عقد RPC إضافية لكل شبكة (مفصولة بفواصل) للتوجيه حسب زمن الاستجابة وتجاوز الأعطال
+    RPC_FALLBACK_URLS = {
+        'ethereum': [url.strip() for url in os.getenv('ETHEREUM_RPC_URLS', '').split(',') if url.strip()],
+        'polygon': [url.strip() for url in os.getenv('POLYGON_RPC_URLS', '').split(',') if url.strip()],
+        'arbitrum': [url.strip() for url in os.getenv('ARBITRUM_RPC_URLS', '').split(',') if url.strip()]
+    }
+    RPC_HEDGE_DELAY = float(os.getenv('RPC_HEDGE_DELAY', 0.25))  # ثوانٍ قبل إرسال القراءة لعقدة ثانية
+    
+    # محاكاة الفرص قبل الإرسال (نسخة متفرعة محلية من hardhat/anvil، أو العقدة نفسها)
+    SIMULATION_ENABLED = os.getenv('SIMULATION_ENABLED', 'true').lower() == 'true'
+    SIMULATION_RPC_URL = os.getenv('SIMULATION_RPC_URL')
+    
+    # فهرس أحداث العقد (قاعدة SQLite محلية وفاصل الفهرسة في الخلفية بالثواني)
+    EVENTS_DB_PATH = os.getenv('EVENTS_DB_PATH', 'arbitrage_events.db')
+    EVENTS_INDEX_INTERVAL = float(os.getenv('EVENTS_INDEX_INTERVAL', 60))
+    
+    # كتلة بداية الفهرسة لكل شبكة (مثل كتلة نشر العقد)، وبدونها من آخر كتلة مؤكدة
+    EVENTS_START_BLOCKS = {
+        'ethereum': os.getenv('ETHEREUM_EVENTS_START_BLOCK'),
+        'polygon': os.getenv('POLYGON_EVENTS_START_BLOCK'),
+        'arbitrum': os.getenv('ARBITRUM_EVENTS_START_BLOCK')
+    }
+    
+    # ذاكرة بيانات الرموز (الرمز والخانات العشرية لكل شبكة)
+    TOKEN_CACHE_PATH = os.getenv('TOKEN_CACHE_PATH', 'token_cache.json')
+    
+    # عناوين عقد القرض السريع المنشور على كل شبكة
+    FLASH_LOAN_CONTRACTS = {
+        'ethereum': os.getenv('ETHEREUM_FLASH_LOAN_CONTRACT'),
+        'polygon': os.getenv('POLYGON_FLASH_LOAN_CONTRACT'),
+        'arbitrum': os.getenv('ARBITRUM_FLASH_LOAN_CONTRACT')
+    }
+    
     # المنصات المدعومة
     SUPPORTED_EXCHANGES = [
         'binance',
@@ -11,8 +11,27 @@ async function main() {
   const balance = await ethers.provider.getBalance(deployer.address);
   console.log("رصيد الحساب:", ethers.formatEther(balance), "ETH");
 
-  // عنوان Aave Pool Address Provider (Mainnet)
-  const AAVE_POOL_ADDRESSES_PROVIDER = "0x2f39d218133AFaB8F2B819B1066c7E434Ad94E9e";
+  // عنوان Aave Pool Address Provider لكل شبكة وموجهات V2 غير المدعومة افتراضياً في العقد
+  const NETWORKS = {
+    polygon: {
+      provider: "0xa97684ead0e402dC232d5A977953DF7ECBaB3CDb",
+      routers: [
+        "0xa5E0829CaCEd8fFDD4De3c43696c57F7D7A678ff", // quickswap
+        "0x1b02dA8Cb0d097eB8D57A175b88c7D8b47997506"  // sushiswap
+      ]
+    },
+    arbitrum: {
+      provider: "0xa97684ead0e402dC232d5A977953DF7ECBaB3CDb",
+      routers: [
+        "0x4752ba5DBc23f44D87826276BF6Fd6b1C372aD24", // uniswap_v2
+        "0x1b02dA8Cb0d097eB8D57A175b88c7D8b47997506"  // sushiswap
+      ]
+    }
+  };
+  const network = NETWORKS[hre.network.name];
+  
+  // Mainnet افتراضياً
+  const AAVE_POOL_ADDRESSES_PROVIDER = network ? network.provider : "0x2f39d218133AFaB8F2B819B1066c7E434Ad94E9e";
   
   // في حالة الاختبار على Sepolia
   // const AAVE_POOL_ADDRESSES_PROVIDER = "0x012bAC54348C0E635dCAc9D5FB99f06F24136C9A";
@@ -32,6 +51,14 @@ async function main() {
     const contractAddress = await flashLoanArbitrage.getAddress();
     console.log("تم نشر FlashLoanArbitrage على العنوان:", contractAddress);
     
+    // تفعيل موجهات الشبكة (العقد يدعم موجهات Mainnet فقط عند النشر)
+    if (network) {
+      for (const router of network.routers) {
+        await (await flashLoanArbitrage.setRouter(router, true)).wait();
+        console.log("تم تفعيل الموجه:", router);
+      }
+    }
+    
     // حفظ معلومات النشر
     const deploymentInfo = {
       contractAddress: contractAddress,
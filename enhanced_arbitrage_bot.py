@@ -15,6 +15,9 @@ from config import Config
 from exchange_manager import ExchangeManager
 from risk_manager import RiskManager
 from flash_loan_manager import FlashLoanManager
+from chain_registry import ChainRegistry
+from token_registry import TokenRegistry
+from price_board import PriceBoard, OnchainVenues, PAIR_CEX_CEX, PAIR_DEX_DEX
 
 class EnhancedArbitrageBot:
     """البرنامج المحسن للمراجحة مع القروض السريعة"""
@@ -30,8 +33,15 @@ class EnhancedArbitrageBot:
         
         # تهيئة المكونات
         self.exchange_manager = ExchangeManager()
-        self.risk_manager = RiskManager()
-        self.flash_loan_manager = FlashLoanManager()
+        self.risk_manager = RiskManager(self.exchange_manager.fee_model)
+        # مدير لكل شبكة مهيأة، ومدير Ethereum لفرص المنصات المركزية
+        self.chain_registry = ChainRegistry()
+        self.flash_loan_manager = self.chain_registry.get('ethereum') or FlashLoanManager()
+        self.chain_task = None
+        
+        # لوحة أسعار موحدة: المنصات المركزية ومجمعات كل شبكة في مرور كشف واحد
+        self.price_board = PriceBoard(self.exchange_manager.fee_model)
+        self.onchain_venues = OnchainVenues(self.chain_registry.managers)
         
         # متغيرات التحكم
         self.running = False
@@ -78,14 +88,23 @@ class EnhancedArbitrageBot:
         self.flash_loan_enabled = enable_flash_loans
         self.stats['start_time'] = datetime.now()
         
+        # مزامنة المخزون الفعلي في المنصات قبل التداول
+        await self.exchange_manager.sync_exposure(self.risk_manager.exposure_tracker)
+        
         if enable_flash_loans:
-            # التحقق من إعداد القروض السريعة
-            network_info = self.flash_loan_manager.get_network_info()
-            if network_info.get('connected'):
-                self.logger.info("تم تفعيل وضع القروض السريعة")
-                self.logger.info(f"معلومات الشبكة: {network_info}")
+            # التحقق من إعداد القروض السريعة على جميع الشبكات المهيأة
+            network_info = await self.chain_registry.network_info()
+            connected = [chain for chain, info in network_info.items() if info.get('connected')]
+            if connected:
+                self.logger.info(f"تم تفعيل وضع القروض السريعة على: {', '.join(connected)}")
+                self.logger.info(f"معلومات الشبكات: {network_info}")
+                
+                # دورة مستقلة لكل شبكة عند كل كتلة جديدة (الاحتياطيات والمسارات)
+                self.chain_task = asyncio.create_task(
+                    self.chain_registry.run(self.process_route_opportunities)
+                )
             else:
-                self.logger.warning("فشل في الاتصال بشبكة Ethereum. سيتم تعطيل القروض السريعة")
+                self.logger.warning("فشل في الاتصال بأي شبكة. سيتم تعطيل القروض السريعة")
                 self.flash_loan_enabled = False
         
         try:
@@ -102,6 +121,9 @@ class EnhancedArbitrageBot:
     async def run_enhanced_arbitrage_cycle(self):
         """تشغيل دورة مراجحة محسنة"""
         try:
+            # تحرير الحجوزات العالقة من مهام توقفت قبل الالتزام
+            self.risk_manager.expire_reservations()
+            
             # جلب الأسعار من جميع المنصات
             self.logger.debug("جلب الأسعار من المنصات...")
             prices = await self.exchange_manager.fetch_all_prices(Config.SUPPORTED_PAIRS)
@@ -110,35 +132,58 @@ class EnhancedArbitrageBot:
                 self.logger.warning("لم يتم جلب أي أسعار")
                 return
             
-            # البحث عن فرص المراجحة
-            opportunities = self.exchange_manager.find_arbitrage_opportunities(
-                Config.MIN_PROFIT_PERCENTAGE
-            )
+            # البحث عن فرص المراجحة بين جميع المنصات (المجمعات تُنشر عند كل كتلة)
+            self.price_board.publish_tickers(prices)
+            opportunities = self.price_board.find_opportunities(Config.MIN_PROFIT_PERCENTAGE)
             
             self.stats['total_opportunities'] += len(opportunities)
             
+            # تحديث بيانات التقلب وزمن الاستجابة لمحرك المخاطر
+            self.risk_manager.risk_engine.record_prices(self.price_board.as_prices())
+            
+            # تصفية دفعية سريعة قبل المعالجة الفردية
+            if opportunities:
+                valid_mask, _ = self.risk_manager.validate_opportunities_batch(opportunities)
+                opportunities = [opp for opp, valid in zip(opportunities, valid_mask) if valid]
+            
+            # تقدير مخاطر جميع الفرص المتبقية في دفعة محاكاة واحدة
+            if opportunities:
+                estimates = self.risk_manager.risk_engine.estimate_batch(opportunities)
+                for i, opp in enumerate(opportunities):
+                    opp['risk_estimate'] = {key: float(values[i]) for key, values in estimates.items()}
+                
             if opportunities:
                 self.logger.info(f"تم العثور على {len(opportunities)} فرصة مراجحة")
                 
-                # تصنيف الفرص حسب الربحية
+                # تصنيف الفرص حسب نوع المنصتين
                 regular_opportunities = []
                 flash_loan_opportunities = []
                 
                 for opp in opportunities[:5]:  # أفضل 5 فرص
-                    if self.flash_loan_enabled and opp['profit_percentage'] > 1.0:
-                        # فرص عالية الربحية للقروض السريعة
-                        flash_loan_opportunities.append(opp)
-                    else:
-                        # فرص عادية
+                    if opp['kind'] == PAIR_CEX_CEX:
+                        # فرص عادية بين منصتين مركزيتين
                         regular_opportunities.append(opp)
+                    elif opp['kind'] == PAIR_DEX_DEX:
+                        # فرص بين مجمعين على نفس الشبكة تُنفذ بقرض سريع
+                        if self.flash_loan_enabled:
+                            flash_loan_opportunities.append(opp)
+                    else:
+                        # لا منفذ للتبادل من المحفظة على السلسلة: مراقبة فقط
+                        self.logger.info(f"فرصة منصة مركزية↔مجمع (مراقبة فقط): {opp['symbol']} "
+                                       f"{opp['buy_exchange']} → {opp['sell_exchange']} "
+                                       f"ربح صافٍ: {opp['net_profit_percentage']:.2f}%")
                 
-                # معالجة الفرص العادية
-                for opportunity in regular_opportunities:
-                    await self.process_regular_opportunity(opportunity)
+                # معالجة الفرص العادية بالتوازي (حجوزات السعة تمنع تجاوز الحدود)
+                await asyncio.gather(*[
+                    self.process_regular_opportunity(opportunity)
+                    for opportunity in regular_opportunities
+                ])
                 
-                # معالجة فرص القروض السريعة
-                for opportunity in flash_loan_opportunities:
-                    await self.process_flash_loan_opportunity(opportunity)
+                # معالجة فرص القروض السريعة بالتوازي (محاكاتها تُجمع في طلب دفعي واحد)
+                await asyncio.gather(*[
+                    self.process_flash_loan_opportunity(opportunity)
+                    for opportunity in flash_loan_opportunities
+                ])
             
             # تحديث الإحصائيات
             self.stats['last_update'] = datetime.now()
@@ -168,6 +213,12 @@ class EnhancedArbitrageBot:
                 opportunity, Config.MAX_TRADE_AMOUNT
             )
             
+            # تقييد الحجم بتقدير المخاطر (القيمة المتوقعة والخسارة في الذيل)
+            if 'risk_estimate' in opportunity:
+                trade_amount = min(trade_amount, self.risk_manager.calculate_position_size(
+                    opportunity, trade_amount * opportunity['buy_price']
+                ))
+            
             if trade_amount < Config.MIN_TRADE_AMOUNT:
                 self.logger.warning(f"حجم التداول صغير جداً: {trade_amount}")
                 return
@@ -181,21 +232,35 @@ class EnhancedArbitrageBot:
                 self.logger.warning(f"لا يمكن تنفيذ الصفقة: {execution_message}")
                 return
             
-            # تنفيذ الصفقة العادية
-            trade_result = await self.exchange_manager.execute_arbitrage_trade(
+            # حجز السعة (الحدود اليومية والمخزون) قبل التنفيذ المتزامن
+            reservation, reservation_message = self.risk_manager.reserve_capacity(
                 opportunity, trade_amount
             )
             
-            # تسجيل النتيجة
-            trade_result.update({
-                'symbol': opportunity['symbol'],
-                'buy_exchange': opportunity['buy_exchange'],
-                'sell_exchange': opportunity['sell_exchange'],
-                'trade_amount': trade_amount,
-                'trade_type': 'regular'
-            })
+            if not reservation:
+                self.logger.warning(f"لا يمكن حجز السعة: {reservation_message}")
+                return
             
-            self.risk_manager.record_trade(trade_result)
+            try:
+                # تنفيذ الصفقة العادية
+                trade_result = await self.exchange_manager.execute_arbitrage_trade(
+                    opportunity, trade_amount
+                )
+                
+                # تسجيل النتيجة
+                trade_result.update({
+                    'symbol': opportunity['symbol'],
+                    'buy_exchange': opportunity['buy_exchange'],
+                    'sell_exchange': opportunity['sell_exchange'],
+                    'trade_amount': trade_amount,
+                    'trade_type': 'regular'
+                })
+                
+                # الالتزام بالحجز: تسوية المخزون وتسجيل الصفقة
+                self.risk_manager.commit_reservation(reservation, trade_result)
+            finally:
+                # تحرير الحجز إذا فشل التنفيذ قبل الالتزام (لا أثر له بعد الالتزام)
+                self.risk_manager.release_reservation(reservation)
             
             if trade_result['success']:
                 self.stats['executed_trades'] += 1
@@ -208,7 +273,7 @@ class EnhancedArbitrageBot:
             self.logger.error(f"خطأ في معالجة الفرصة العادية: {e}")
     
     async def process_flash_loan_opportunity(self, opportunity: Dict):
-        """معالجة فرصة مراجحة بالقرض السريع"""
+        """معالجة فرصة مجمع↔مجمع من لوحة الأسعار بقرض سريع (مسار دائري من خطوتين)"""
         try:
             if not self.flash_loan_enabled:
                 return
@@ -223,109 +288,142 @@ class EnhancedArbitrageBot:
                 self.logger.warning(f"فرصة قرض سريع غير صالحة: {validation_message}")
                 return
             
-            # حساب مبلغ القرض السريع (أكبر من التداول العادي)
-            flash_loan_amount = min(
-                Config.MAX_TRADE_AMOUNT * 10,  # 10 أضعاف الحد الأقصى العادي
-                100000  # حد أقصى للقرض السريع
-            )
-            
-            # تقدير تكلفة الغاز
-            gas_estimate = self.flash_loan_manager.estimate_gas_cost(
-                opportunity['symbol'].split('/')[0], 
-                flash_loan_amount
-            )
-            
-            if not gas_estimate['success']:
-                self.logger.error(f"فشل في تقدير تكلفة الغاز: {gas_estimate.get('error')}")
+            manager = self.chain_registry.get(opportunity['chain'])
+            if manager is None or not manager.async_contract:
+                self.logger.warning(f"لا يوجد عقد قرض سريع على {opportunity['chain']}")
                 return
             
-            # التحقق من أن الربح المتوقع يغطي تكلفة الغاز
-            expected_profit_usd = (opportunity['profit_percentage'] / 100) * flash_loan_amount
-            gas_cost_usd = gas_estimate['total_cost_eth'] * 3000  # تقدير سعر ETH
-            
-            if expected_profit_usd < gas_cost_usd * 2:  # الربح يجب أن يكون ضعف تكلفة الغاز
-                self.logger.warning(f"الربح المتوقع لا يغطي تكلفة الغاز. "
-                                  f"ربح: ${expected_profit_usd:.2f}, غاز: ${gas_cost_usd:.2f}")
+            pair = self.onchain_venues.token_pair(manager, opportunity['symbol'])
+            if pair is None:
+                self.logger.warning(f"رموز الزوج غير معروفة على {opportunity['chain']}: {opportunity['symbol']}")
                 return
             
-            # تحديد الرموز والمنصات
-            token_pair = opportunity['symbol'].split('/')
-            token_a = token_pair[0]
-            token_b = token_pair[1]
-            
-            # تحويل أسماء المنصات إلى عناوين DEX
-            buy_dex = self._get_dex_name(opportunity['buy_exchange'])
-            sell_dex = self._get_dex_name(opportunity['sell_exchange'])
+            # اقتراض عملة التسعير: الشراء من المجمع الأرخص والبيع في الأغلى
+            base, quote = pair
+            buy_dex, sell_dex = opportunity['buy_dex'], opportunity['sell_dex']
+            plan = manager.evaluate_route(((buy_dex, quote, base), (sell_dex, base, quote)))
             
-            if not buy_dex or not sell_dex:
-                self.logger.warning("منصة غير مدعومة للقروض السريعة")
+            if plan is None or plan['net_profit'] <= 0:
+                self.logger.warning(f"لا يوجد حجم قرض مربح بعد الرسوم والغاز: "
+                                  f"{opportunity['symbol']} {buy_dex}→{sell_dex}")
                 return
             
+            # الحد الأدنى = تكلفة الغاز + نصف الربح الصافي كهامش انزلاق
+            min_profit = plan['gas_cost'] + plan['net_profit'] // 2
+            token_registry = manager.token_registry
+            flash_loan_amount = token_registry.from_units(quote, plan['amount_in'])
+            
             # تنفيذ القرض السريع
-            self.logger.info(f"تنفيذ قرض سريع: {flash_loan_amount} {token_a}")
-            
-            flash_result = await self.flash_loan_manager.execute_flash_loan_arbitrage(
-                token_a=token_a,
-                token_b=token_b,
-                amount=int(flash_loan_amount * 10**18),  # تحويل إلى wei
-                buy_dex=buy_dex,
-                sell_dex=sell_dex,
-                min_profit=int(expected_profit_usd * 0.5 * 10**18)  # 50% من الربح المتوقع كحد أدنى
-            )
+            self.logger.info(f"تنفيذ قرض سريع: {flash_loan_amount} {opportunity['symbol'].split('/')[1]} "
+                           f"على {opportunity['chain']}")
             
-            # تسجيل النتيجة
+            # سجل الصفقة يُستكمل عند حسم المعاملة في الخلفية
             trade_result = {
-                'success': flash_result['success'],
                 'symbol': opportunity['symbol'],
                 'buy_exchange': opportunity['buy_exchange'],
                 'sell_exchange': opportunity['sell_exchange'],
-                'trade_amount': flash_loan_amount,
-                'trade_type': 'flash_loan',
-                'tx_hash': flash_result.get('tx_hash'),
-                'gas_used': flash_result.get('gas_used'),
-                'error': flash_result.get('error')
+                'trade_amount': float(flash_loan_amount),
+                'trade_type': 'flash_loan'
             }
             
+            flash_result = await manager.execute_batch(
+                [plan], min_profit,
+                callback=lambda record: self._record_onchain_result(
+                    trade_result, record, 'RouteExecuted', token_registry
+                )
+            )
+            
             if flash_result['success']:
-                # حساب الربح الفعلي من الأحداث
-                events = flash_result.get('events', [])
-                actual_profit = 0
-                
-                for event in events:
-                    if event['type'] == 'ArbitrageExecuted':
-                        actual_profit = event['profit'] / 10**18  # تحويل من wei
-                        break
-                
-                trade_result['profit'] = actual_profit
+                # لا انتظار للتضمين: الحلقة تتابع والنتيجة تُسجل عند الحسم
+                self.logger.info(f"تم إرسال القرض السريع: {flash_result['tx_hash']} "
+                               f"(القرض من {flash_result['flash_provider']})")
+            else:
+                self.logger.error(f"فشل في تنفيذ القرض السريع: {flash_result.get('error')}")
+                trade_result.update({'success': False, 'error': flash_result.get('error')})
+                self.risk_manager.record_trade(trade_result)
+            
+        except Exception as e:
+            self.logger.error(f"خطأ في معالجة فرصة القرض السريع: {e}")
+    
+    async def process_route_opportunities(self, chain: str, manager: FlashLoanManager):
+        """تنفيذ أفضل دفعة مسارات دائرية مربحة بعد رسوم القرض والغاز في معاملة واحدة على شبكة"""
+        try:
+            # أسعار مجمعات الشبكة في لوحة الأسعار من احتياطيات هذه الكتلة
+            self.onchain_venues.publish(self.price_board, chain)
+            
+            if not self.flash_loan_enabled or not manager.async_contract:
+                return
+            
+            # تكلفة الغاز لكل مسار من نموذج شكله وسعر الغاز المخزن
+            routes = manager.get_profitable_routes(limit=10)
+            if not routes:
+                return
+            
+            # مسارات مستقلة لنفس الأصل تحت قرض سريع واحد
+            batches = manager.pack_route_batches(routes)
+            plans = max(batches, key=lambda batch: sum(plan['net_profit'] for plan in batch))
+            
+            hops = ' | '.join(' → '.join(dex for dex, _, _ in plan['route']) for plan in plans)
+            amount_in = sum(plan['amount_in'] for plan in plans)
+            self.logger.info(f"تنفيذ {len(plans)} مسار دائري على {chain} ({hops}) بمبلغ {amount_in}")
+            
+            # الحد الأدنى = تكلفة الغاز + نصف الربح الصافي كهامش انزلاق
+            min_profit = sum(plan['gas_cost'] + plan['net_profit'] // 2 for plan in plans)
+            trade_result = {
+                'symbol': f"route:{chain}:{hops}",
+                'trade_amount': float(manager.token_registry.from_units(plans[0]['asset'], amount_in)),
+                'trade_type': 'flash_loan_route'
+            }
+            
+            event_type = 'RouteExecuted' if len(plans) == 1 else 'BatchExecuted'
+            route_result = await manager.execute_batch(
+                plans, min_profit,
+                callback=lambda record: self._record_onchain_result(
+                    trade_result, record, event_type, manager.token_registry
+                )
+            )
+            
+            if route_result['success']:
+                self.logger.info(f"تم إرسال المسارات: {route_result['tx_hash']} (القرض من {route_result['flash_provider']})")
+            else:
+                self.logger.error(f"فشل في تنفيذ المسارات: {route_result.get('error')}")
                 
+        except Exception as e:
+            self.logger.error(f"خطأ في معالجة المسارات الدائرية: {e}")
+    
+    def _record_onchain_result(self, trade_result: Dict, record: Dict, event_type: str,
+                               token_registry: TokenRegistry):
+        """تسجيل نتيجة معاملة قرض سريع بعد حسمها (تضمين أو إسقاط أو استبدال)"""
+        try:
+            actual_profit = 0
+            for event in record.get('events', []):
+                if event['type'] == event_type:
+                    # الربح بخانات الأصل المقترض
+                    actual_profit = float(token_registry.from_units(event['asset'], event['profit']))
+                    break
+            
+            trade_result.update({
+                'success': record['success'],
+                'tx_hash': record['tx_hash'],
+                'gas_used': record.get('gas_used'),
+                'profit': actual_profit,
+                'error': None if record['success'] else record['status']
+            })
+            
+            if record['success']:
                 self.stats['flash_loan_trades'] += 1
                 self.stats['flash_loan_profit'] += actual_profit
                 self.stats['total_profit'] += actual_profit
                 
                 self.logger.info(f"تم تنفيذ القرض السريع بنجاح. "
-                               f"الربح: {actual_profit:.4f} {token_a}, "
-                               f"TX: {flash_result['tx_hash']}")
+                               f"الربح: {actual_profit:.4f}, TX: {record['tx_hash']}")
             else:
-                self.logger.error(f"فشل في تنفيذ القرض السريع: {flash_result.get('error')}")
+                self.logger.error(f"لم تنجح معاملة القرض السريع ({record['status']}): {record['tx_hash']}")
             
             self.risk_manager.record_trade(trade_result)
             
         except Exception as e:
-            self.logger.error(f"خطأ في معالجة فرصة القرض السريع: {e}")
-    
-    def _get_dex_name(self, exchange_name: str) -> str:
-        """تحويل اسم المنصة إلى اسم DEX"""
-        dex_mapping = {
-            'uniswap': 'uniswap_v2',
-            'sushiswap': 'sushiswap',
-            'pancakeswap': 'pancakeswap'
-        }
-        
-        for dex_key, dex_name in dex_mapping.items():
-            if dex_key in exchange_name.lower():
-                return dex_name
-        
-        return None
+            self.logger.error(f"خطأ في تسجيل نتيجة القرض السريع: {e}")
     
     def print_enhanced_stats(self):
         """طباعة الإحصائيات المحسنة"""
@@ -420,10 +518,22 @@ class EnhancedArbitrageBot:
             final_stats = {
                 'runtime_stats': self.stats,
                 'performance_stats': self.risk_manager.get_performance_stats(),
-                'network_info': self.flash_loan_manager.get_network_info(),
+                'network_info': await self.chain_registry.network_info(),
                 'end_time': datetime.now().isoformat()
             }
             
+            # الأرباح المحققة لكل شبكة من أحداث العقود المفهرسة في الخلفية
+            if self.flash_loan_enabled:
+                final_stats['onchain_pnl'] = self.chain_registry.realized_pnl()
+            
+            # إيقاف دورات الشبكات وإغلاق اتصالات RPC غير المتزامنة
+            self.chain_registry.stop()
+            if self.chain_task:
+                await self.chain_task
+            await self.chain_registry.close()
+            if self.flash_loan_manager not in self.chain_registry.managers.values():
+                await self.flash_loan_manager.close()
+            
             with open('logs/enhanced_final_stats.json', 'w', encoding='utf-8') as f:
                 json.dump(final_stats, f, ensure_ascii=False, indent=2, default=str)
             
@@ -500,7 +610,7 @@ class EnhancedArbitrageBotCLI:
                     self.bot.print_enhanced_stats()
                 
                 elif command == 'network':
-                    network_info = self.bot.flash_loan_manager.get_network_info()
+                    network_info = await self.bot.flash_loan_manager.get_network_info_async()
                     print("معلومات الشبكة:")
                     for key, value in network_info.items():
                         print(f"  {key}: {value}")
@@ -537,9 +647,9 @@ class EnhancedArbitrageBotCLI:
                 print("لا توجد أسعار متاحة")
                 return
             
-            opportunities = self.bot.exchange_manager.find_arbitrage_opportunities(
-                Config.MIN_PROFIT_PERCENTAGE
-            )
+            board = self.bot.price_board
+            board.publish_tickers(prices)
+            opportunities = board.find_opportunities(Config.MIN_PROFIT_PERCENTAGE)
             
             if not opportunities:
                 print("لا توجد فرص مراجحة حالياً")
@@ -547,8 +657,8 @@ class EnhancedArbitrageBotCLI:
             
             print(f"\\n=== الفرص الحالية ({len(opportunities)}) ===")
             for i, opp in enumerate(opportunities[:5], 1):
-                flash_suitable = "✓" if opp['profit_percentage'] > 1.0 else "✗"
-                print(f"{i}. {opp['symbol']} [Flash Loan: {flash_suitable}]")
+                flash_suitable = "✓" if opp['kind'] == PAIR_DEX_DEX else "✗"
+                print(f"{i}. {opp['symbol']} [{opp['kind']}] [Flash Loan: {flash_suitable}]")
                 print(f"   الشراء من: {opp['buy_exchange']} بسعر {opp['buy_price']:.6f}")
                 print(f"   البيع في: {opp['sell_exchange']} بسعر {opp['sell_price']:.6f}")
                 print(f"   الربح: {opp['profit_percentage']:.2f}%")
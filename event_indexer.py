@@ -0,0 +1,292 @@
+"""
+فهرسة أحداث عقد المراجحة من السجلات إلى قاعدة SQLite محلية
+"""
+
+import logging
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+from web3 import Web3
+
+from async_rpc import AsyncRPCClient, RPCError
+
+# الحدث -> (التوقيع، الحقول المفهرسة، حقول البيانات) بترتيب العقد
+CONTRACT_EVENTS = {
+    'ArbitrageExecuted': (
+        'ArbitrageExecuted(address,uint256,uint256,address,address)',
+        ('asset',), ('amount:uint', 'profit:uint', 'buyDex:address', 'sellDex:address')
+    ),
+    'RouteExecuted': (
+        'RouteExecuted(address,uint256,uint256,uint256)',
+        ('asset',), ('amount:uint', 'profit:uint', 'hops:uint')
+    ),
+    'BatchExecuted': (
+        'BatchExecuted(address,uint256,uint256,uint256)',
+        ('asset',), ('amount:uint', 'profit:uint', 'routes:uint')
+    ),
+    'FlashLoanExecuted': (
+        'FlashLoanExecuted(address,uint256,uint256)',
+        ('asset',), ('amount:uint', 'premium:uint')
+    ),
+    'ProfitWithdrawn': (
+        'ProfitWithdrawn(address,uint256,address)',
+        ('asset', 'to'), ('amount:uint',)
+    )
+}
+
+# topic0 -> اسم الحدث
+EVENT_TOPICS = {
+    '0x' + Web3.keccak(text=signature).hex().replace('0x', ''): name
+    for name, (signature, _, _) in CONTRACT_EVENTS.items()
+}
+
+# أحداث التنفيذ التي تحمل الربح
+PROFIT_EVENTS = ('ArbitrageExecuted', 'RouteExecuted', 'BatchExecuted')
+
+def decode_event_log(log: Dict) -> Optional[Dict]:
+    """
+    فك سجل حدث من أحداث العقد بتقطيع الكلمات مباشرة
+    
+    جميع الحقول ثابتة الطول (32 بايت)، فلا حاجة لمفكك ABI عام.
+    """
+    topics = log.get('topics') or []
+    name = EVENT_TOPICS.get(topics[0].lower()) if topics else None
+    if name is None:
+        return None
+        
+    _, indexed, fields = CONTRACT_EVENTS[name]
+    event = {
+        'event': name,
+        'block_number': int(log['blockNumber'], 16),
+        'tx_hash': log['transactionHash'],
+        'log_index': int(log['logIndex'], 16)
+    }
+    for field, topic in zip(indexed, topics[1:]):
+        event[field] = '0x' + topic[-40:].lower()
+        
+    data = log['data'][2:]
+    for i, spec in enumerate(fields):
+        field, kind = spec.split(':')
+        word = data[i * 64:(i + 1) * 64]
+        event[field] = '0x' + word[-40:].lower() if kind == 'address' else int(word, 16)
+    return event
+
+class EventIndexer:
+    """
+    فهرس أحداث العقد عبر eth_getLogs مرشحة بـ topic0 على نطاقات كتل مجزأة
+    
+    تُفهرس الكتل المؤكدة فقط (confirmations خلف الرأس) لتجنب التراجع عند إعادة
+    تنظيم السلسلة، وتُحفظ نقطة الاستئناف مع أحداث كل نطاق في نفس المعاملة.
+    عند رفض العقدة لنطاق كبير (عدد سجلات زائد) يُقسم النطاق إلى النصف.
+    بدون نقطة استئناف تبدأ الفهرسة من start_block (مثل كتلة نشر العقد)، أو من
+    آخر كتلة مؤكدة إذا لم تُحدد بدلاً من المسح من كتلة البداية.
+    """
+    
+    def __init__(self, rpc: AsyncRPCClient, contract_address: str, db_path: str = 'arbitrage_events.db',
+                 start_block: Optional[int] = None, max_block_range: int = 2000, confirmations: int = 12):
+        self.logger = logging.getLogger(__name__)
+        self.rpc = rpc
+        self.contract_address = contract_address.lower()
+        self.start_block = start_block
+        self.max_block_range = max_block_range
+        self.confirmations = confirmations
+        
+        self.db = sqlite3.connect(db_path)
+        self._create_tables()
+    
+    def _create_tables(self):
+        """إنشاء الجداول عند أول استخدام"""
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS events (
+                contract TEXT NOT NULL,
+                tx_hash TEXT NOT NULL,
+                log_index INTEGER NOT NULL,
+                block_number INTEGER NOT NULL,
+                event TEXT NOT NULL,
+                asset TEXT,
+                amount TEXT,
+                profit TEXT,
+                premium TEXT,
+                details TEXT,
+                PRIMARY KEY (tx_hash, log_index)
+            );
+            CREATE INDEX IF NOT EXISTS events_block ON events (contract, block_number);
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                contract TEXT PRIMARY KEY,
+                last_block INTEGER NOT NULL
+            );
+        ''')
+        self.db.commit()
+    
+    def close(self):
+        """إغلاق قاعدة البيانات"""
+        self.db.close()
+    
+    @property
+    def last_block(self) -> Optional[int]:
+        """آخر كتلة مفهرسة لهذا العقد"""
+        row = self.db.execute(
+            'SELECT last_block FROM checkpoints WHERE contract = ?', (self.contract_address,)
+        ).fetchone()
+        return row[0] if row else None
+    
+    def store(self, events: List[Dict], to_block: int):
+        """حفظ أحداث نطاق ونقطة الاستئناف معاً"""
+        rows = []
+        for event in events:
+            # الأعداد الكبيرة نصية (SQLite يدعم 64 بت فقط)
+            details = {k: v for k, v in event.items() if k not in (
+                'event', 'block_number', 'tx_hash', 'log_index', 'asset', 'amount', 'profit', 'premium'
+            )}
+            rows.append((
+                self.contract_address, event['tx_hash'], event['log_index'], event['block_number'],
+                event['event'], event.get('asset'),
+                str(event['amount']) if 'amount' in event else None,
+                str(event['profit']) if 'profit' in event else None,
+                str(event['premium']) if 'premium' in event else None,
+                ','.join(f"{k}={v}" for k, v in sorted(details.items())) or None
+            ))
+            
+        with self.db:
+            self.db.executemany('INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            self.db.execute(
+                'INSERT OR REPLACE INTO checkpoints (contract, last_block) VALUES (?, ?)',
+                (self.contract_address, to_block)
+            )
+    
+    async def _get_logs(self, from_block: int, to_block: int) -> List[Dict]:
+        """سجلات أحداث العقد لنطاق كتل"""
+        return await self.rpc.call('eth_getLogs', [{
+            'fromBlock': hex(from_block),
+            'toBlock': hex(to_block),
+            'address': self.contract_address,
+            'topics': [list(EVENT_TOPICS)]
+        }])
+    
+    async def sync(self, head: Optional[int] = None) -> int:
+        """فهرسة الكتل المؤكدة منذ آخر نقطة استئناف وإعادة عدد الأحداث الجديدة"""
+        try:
+            if head is None:
+                head = await self.rpc.block_number()
+            target = head - self.confirmations
+            
+            last_block = self.last_block
+            if last_block is not None:
+                from_block = last_block + 1
+            elif self.start_block is not None:
+                from_block = self.start_block
+            else:
+                from_block = max(0, target)
+            block_range = self.max_block_range
+            
+            indexed = 0
+            while from_block <= target:
+                to_block = min(target, from_block + block_range - 1)
+                try:
+                    logs = await self._get_logs(from_block, to_block)
+                except RPCError as e:
+                    if to_block == from_block:
+                        raise
+                    # نطاق كبير جداً للعقدة: التقسيم ثم المتابعة
+                    block_range = max(1, (to_block - from_block + 1) // 2)
+                    self.logger.warning(f"تقليص نطاق السجلات إلى {block_range} كتلة: {e}")
+                    continue
+                    
+                events = [event for event in map(decode_event_log, logs) if event is not None]
+                self.store(events, to_block)
+                indexed += len(events)
+                from_block = to_block + 1
+                
+            if indexed:
+                self.logger.info(f"تمت فهرسة {indexed} حدث حتى الكتلة {self.last_block}")
+            return indexed
+            
+        except Exception as e:
+            self.logger.error(f"خطأ في فهرسة الأحداث: {e}")
+            return 0
+    
+    def events(self, event: Optional[str] = None, from_block: int = 0,
+               to_block: Optional[int] = None) -> List[Dict]:
+        """الأحداث المفهرسة مرتبة حسب الكتلة"""
+        query = 'SELECT event, block_number, tx_hash, log_index, asset, amount, profit, premium, details ' \
+                'FROM events WHERE contract = ? AND block_number >= ?'
+        params = [self.contract_address, from_block]
+        if to_block is not None:
+            query += ' AND block_number <= ?'
+            params.append(to_block)
+        if event is not None:
+            query += ' AND event = ?'
+            params.append(event)
+        query += ' ORDER BY block_number, log_index'
+        
+        results = []
+        for name, block_number, tx_hash, log_index, asset, amount, profit, premium, details in \
+                self.db.execute(query, params):
+            results.append({
+                'event': name,
+                'block_number': block_number,
+                'tx_hash': tx_hash,
+                'log_index': log_index,
+                'asset': asset,
+                'amount': int(amount) if amount is not None else None,
+                'profit': int(profit) if profit is not None else None,
+                'premium': int(premium) if premium is not None else None,
+                'details': details
+            })
+        return results
+    
+    def realized_pnl(self, from_block: int = 0, to_block: Optional[int] = None) -> Dict[str, Dict]:
+        """
+        الربح المحقق لكل أصل من الأحداث المفهرسة (بالوحدات الأساسية)
+        
+        profit في أحداث التنفيذ إجمالي قبل رسوم القرض، فيُطرح premium من
+        FlashLoanExecuted في نفس المعاملة.
+        """
+        pnl = {}
+        for event in self.events(from_block=from_block, to_block=to_block):
+            summary = pnl.setdefault(event['asset'], {
+                'trades': 0, 'volume': 0, 'gross_profit': 0, 'premiums': 0, 'net_profit': 0, 'withdrawn': 0
+            })
+            if event['event'] in PROFIT_EVENTS:
+                summary['trades'] += 1
+                summary['volume'] += event['amount']
+                summary['gross_profit'] += event['profit']
+            elif event['event'] == 'FlashLoanExecuted':
+                summary['premiums'] += event['premium']
+            elif event['event'] == 'ProfitWithdrawn':
+                summary['withdrawn'] += event['amount']
+                
+        for summary in pnl.values():
+            summary['net_profit'] = summary['gross_profit'] - summary['premiums']
+        return pnl
+    
+    def profit_by_transaction(self) -> Dict[str, int]:
+        """الربح المسجل على السلسلة لكل معاملة"""
+        profits = {}
+        for event in self.events():
+            if event['event'] in PROFIT_EVENTS:
+                profits[event['tx_hash']] = profits.get(event['tx_hash'], 0) + event['profit']
+        return profits
+    
+    def reconcile(self, recorded: Dict[str, int], tolerance: int = 0) -> Dict[str, List]:
+        """
+        مطابقة الأرباح المسجلة محلياً (هاش المعاملة -> الربح بالوحدات الأساسية)
+        مع الأحداث المفهرسة
+        
+        تُعاد المعاملات الناقصة من كل جانب والمعاملات ذات الفرق الأكبر من tolerance.
+        """
+        onchain = self.profit_by_transaction()
+        indexed_to = self.last_block
+        
+        mismatched: List[Tuple[str, int, int]] = []
+        for tx_hash, profit in recorded.items():
+            actual = onchain.get(tx_hash)
+            if actual is not None and abs(actual - profit) > tolerance:
+                mismatched.append((tx_hash, profit, actual))
+                
+        return {
+            'missing_onchain': [tx_hash for tx_hash in recorded if tx_hash not in onchain],
+            'missing_local': [tx_hash for tx_hash in onchain if tx_hash not in recorded],
+            'mismatched': mismatched,
+            'indexed_to_block': indexed_to
+        }
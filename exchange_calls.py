@@ -0,0 +1,18 @@
+"""
+استدعاء طرق ccxt من الكود غير المتزامن
+"""
+
+import asyncio
+import functools
+import inspect
+
+async def call_exchange(method, *args, **kwargs):
+    """
+    استدعاء طريقة ccxt دون حجب حلقة الأحداث
+    
+    عملاء ccxt المتزامنة (المستخدمة في ExchangeManager) تعمل في منفذ خيوط،
+    وطرق ccxt.async_support تُنتظر مباشرة.
+    """
+    if inspect.iscoroutinefunction(method):
+        return await method(*args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(method, *args, **kwargs))
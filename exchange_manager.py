@@ -10,6 +10,8 @@ import logging
 from datetime import datetime
 import time
 from config import Config
+from fee_model import FeeModel
+from exchange_calls import call_exchange
 
 class ExchangeManager:
     """مدير المنصات للتداول والمراجحة"""
@@ -20,6 +22,7 @@ class ExchangeManager:
         self.last_update = {}
         self.logger = logging.getLogger(__name__)
         self._initialize_exchanges()
+        self.fee_model = FeeModel(self.exchanges)
     
     def _initialize_exchanges(self):
         """تهيئة المنصات المدعومة"""
@@ -80,6 +83,7 @@ class ExchangeManager:
                 return None
             
             exchange = self.exchanges[exchange_name]
+            started = time.perf_counter()
             ticker = await exchange.fetch_ticker(symbol)
             
             return {
@@ -89,7 +93,8 @@ class ExchangeManager:
                 'ask': ticker['ask'],
                 'last': ticker['last'],
                 'timestamp': ticker['timestamp'],
-                'datetime': ticker['datetime']
+                'datetime': ticker['datetime'],
+                'latency': time.perf_counter() - started
             }
             
         except Exception as e:
@@ -100,6 +105,9 @@ class ExchangeManager:
         """جلب الأسعار من جميع المنصات لجميع الأزواج"""
         all_prices = {}
         
+        # تحديث الرسوم منتهية الصلاحية فقط
+        await self.fee_model.refresh_stale()
+        
         tasks = []
         for exchange_name in self.exchanges.keys():
             for symbol in symbols:
@@ -128,51 +136,62 @@ class ExchangeManager:
         return all_prices
     
     def find_arbitrage_opportunities(self, min_profit_percentage: float = 0.5) -> List[Dict]:
-        """البحث عن فرص المراجحة"""
+        """البحث عن فرص المراجحة (بعد خصم رسوم التداول)"""
         opportunities = []
         
         for symbol, exchange_prices in self.prices.items():
             if len(exchange_prices) < 2:
                 continue
             
-            # العثور على أقل سعر شراء وأعلى سعر بيع
+            # العثور على أقل سعر شراء صافٍ وأعلى سعر بيع صافٍ
             min_ask = float('inf')
             max_bid = 0
+            min_net_ask = float('inf')
+            max_net_bid = 0
             min_exchange = None
             max_exchange = None
             
             for exchange_name, price_data in exchange_prices.items():
                 if price_data and price_data.get('ask') and price_data.get('bid'):
-                    ask = price_data['ask']
-                    bid = price_data['bid']
+                    buy_multiplier, sell_multiplier = self.fee_model.get_net_multipliers(
+                        exchange_name, symbol
+                    )
+                    net_ask = price_data['ask'] * buy_multiplier
+                    net_bid = price_data['bid'] * sell_multiplier
                     
-                    if ask < min_ask:
-                        min_ask = ask
+                    if net_ask < min_net_ask:
+                        min_net_ask = net_ask
+                        min_ask = price_data['ask']
                         min_exchange = exchange_name
                     
-                    if bid > max_bid:
-                        max_bid = bid
+                    if net_bid > max_net_bid:
+                        max_net_bid = net_bid
+                        max_bid = price_data['bid']
                         max_exchange = exchange_name
             
-            # حساب الربح المحتمل
-            if min_ask < float('inf') and max_bid > 0 and min_exchange != max_exchange:
-                profit_percentage = ((max_bid - min_ask) / min_ask) * 100
+            # حساب الربح الصافي المحتمل
+            if min_net_ask < float('inf') and max_net_bid > 0 and min_exchange != max_exchange:
+                net_profit_percentage = ((max_net_bid - min_net_ask) / min_net_ask) * 100
                 
-                if profit_percentage >= min_profit_percentage:
+                # استبعاد الفرص السالبة بعد الرسوم قبل أي عمل لاحق
+                if net_profit_percentage >= min_profit_percentage:
                     opportunity = {
                         'symbol': symbol,
                         'buy_exchange': min_exchange,
                         'sell_exchange': max_exchange,
                         'buy_price': min_ask,
                         'sell_price': max_bid,
-                        'profit_percentage': profit_percentage,
+                        'profit_percentage': ((max_bid - min_ask) / min_ask) * 100,
+                        'net_profit_percentage': net_profit_percentage,
                         'profit_amount': max_bid - min_ask,
+                        'buy_fee_rate': self.fee_model.get_fee(min_exchange, symbol),
+                        'sell_fee_rate': self.fee_model.get_fee(max_exchange, symbol),
                         'timestamp': datetime.now()
                     }
                     opportunities.append(opportunity)
         
-        # ترتيب الفرص حسب نسبة الربح
-        opportunities.sort(key=lambda x: x['profit_percentage'], reverse=True)
+        # ترتيب الفرص حسب نسبة الربح الصافي
+        opportunities.sort(key=lambda x: x['net_profit_percentage'], reverse=True)
         
         return opportunities
     
@@ -277,6 +296,36 @@ class ExchangeManager:
             self.logger.error(f"خطأ في جلب الرصيد: {e}")
             return 0
     
+    async def fetch_all_balances(self) -> Dict[str, Dict[str, float]]:
+        """جلب الأرصدة المتاحة من جميع المنصات المزودة بمفاتيح API"""
+        all_balances = {}
+        
+        for exchange_name, exchange in self.exchanges.items():
+            if not getattr(exchange, 'apiKey', None):
+                continue
+            
+            try:
+                balance = await call_exchange(exchange.fetch_balance)
+                all_balances[exchange_name] = {
+                    currency: float(amount)
+                    for currency, amount in (balance.get('free') or {}).items()
+                    if amount is not None
+                }
+            except Exception as e:
+                self.logger.error(f"خطأ في جلب أرصدة {exchange_name}: {e}")
+        
+        return all_balances
+    
+    async def sync_exposure(self, exposure_tracker) -> int:
+        """مزامنة متتبع التعرض مع أرصدة المنصات"""
+        all_balances = await self.fetch_all_balances()
+        
+        for exchange_name, balances in all_balances.items():
+            exposure_tracker.sync_balances(exchange_name, balances)
+        
+        self.logger.info(f"تمت مزامنة أرصدة {len(all_balances)} منصة")
+        return len(all_balances)
+    
     def get_supported_symbols(self, exchange_name: str) -> List[str]:
         """الحصول على الأزواج المدعومة في منصة معينة"""
         try:
@@ -0,0 +1,155 @@
+"""
+متتبع المخزون والتعرض عبر المنصات
+"""
+
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+class ExposureTracker:
+    """تتبع أرصدة كل (منصة، أصل) والمبالغ المحجوزة وصافي التعرض لكل أصل"""
+    
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.balances = {}  # (exchange, asset) -> الرصيد الكلي
+        self.reserved = {}  # (exchange, asset) -> المحجوز للأوامر الجارية
+        self.asset_totals = {}  # asset -> مجموع الأرصدة عبر المنصات
+        self.asset_targets = {}  # asset -> المخزون المستهدف
+        self._lock = threading.Lock()
+    
+    def has_balance(self, exchange: str, asset: str) -> bool:
+        """التحقق من وجود رصيد معروف لمنصة وأصل"""
+        return (exchange, asset) in self.balances
+    
+    def available(self, exchange: str, asset: str) -> float:
+        """الرصيد المتاح (الكلي ناقص المحجوز)"""
+        key = (exchange, asset)
+        return self.balances.get(key, 0.0) - self.reserved.get(key, 0.0)
+    
+    def net_exposure(self, asset: str) -> float:
+        """صافي التعرض لأصل (المجموع ناقص المخزون المستهدف)"""
+        return self.asset_totals.get(asset, 0.0) - self.asset_targets.get(asset, 0.0)
+    
+    def set_target(self, asset: str, amount: float):
+        """تحديد المخزون المستهدف لأصل"""
+        self.asset_targets[asset] = amount
+    
+    def set_balance(self, exchange: str, asset: str, amount: float):
+        """تعيين رصيد (منصة، أصل) مع تحديث المجموع تدريجياً"""
+        with self._lock:
+            self._apply_delta(exchange, asset, amount - self.balances.get((exchange, asset), 0.0))
+    
+    def sync_balances(self, exchange: str, balances: Dict[str, float]):
+        """مزامنة أرصدة منصة من لقطة كاملة"""
+        with self._lock:
+            for asset, amount in balances.items():
+                self._apply_delta(exchange, asset, amount - self.balances.get((exchange, asset), 0.0))
+    
+    def _apply_delta(self, exchange: str, asset: str, delta: float):
+        """تطبيق تغيير على الرصيد ومجموع الأصل (يُستدعى داخل القفل)"""
+        key = (exchange, asset)
+        self.balances[key] = self.balances.get(key, 0.0) + delta
+        self.asset_totals[asset] = self.asset_totals.get(asset, 0.0) + delta
+    
+    def reserve(self, exchange: str, asset: str, amount: float) -> bool:
+        """حجز مبلغ للأوامر الجارية (فحص وحجز ذري)"""
+        with self._lock:
+            key = (exchange, asset)
+            if self.balances.get(key, 0.0) - self.reserved.get(key, 0.0) < amount:
+                return False
+            self.reserved[key] = self.reserved.get(key, 0.0) + amount
+            return True
+    
+    def release(self, exchange: str, asset: str, amount: float):
+        """تحرير مبلغ محجوز"""
+        with self._lock:
+            self._release(exchange, asset, amount)
+    
+    def _release(self, exchange: str, asset: str, amount: float):
+        """تحرير مبلغ محجوز (يُستدعى داخل القفل)"""
+        key = (exchange, asset)
+        remaining = self.reserved.get(key, 0.0) - amount
+        if remaining > 1e-12:
+            self.reserved[key] = remaining
+        else:
+            self.reserved.pop(key, None)
+    
+    def apply_fill(self, exchange: str, asset: str, delta: float, reserved_amount: float = 0.0):
+        """تطبيق تنفيذ أمر: تغيير الرصيد وتحرير الجزء المحجوز المقابل"""
+        with self._lock:
+            self._apply_delta(exchange, asset, delta)
+            if reserved_amount:
+                self._release(exchange, asset, reserved_amount)
+    
+    def reserve_for_trade(self, opportunity: Dict, trade_amount: float,
+                          buy_fee_rate: float = 0.0) -> Optional[Dict]:
+        """
+        حجز رصيد الشراء (العملة المقابلة) ورصيد البيع (الأصل) لصفقة مراجحة
+        
+        يعيد بيانات الحجز أو None إذا لم يكفِ الرصيد في أي من المنصتين
+        """
+        base, quote = opportunity['symbol'].split('/')
+        buy_key = (opportunity['buy_exchange'], quote)
+        sell_key = (opportunity['sell_exchange'], base)
+        quote_amount = trade_amount * opportunity['buy_price'] * (1 + buy_fee_rate)
+        
+        with self._lock:
+            if (self.balances.get(buy_key, 0.0) - self.reserved.get(buy_key, 0.0) < quote_amount or
+                    self.balances.get(sell_key, 0.0) - self.reserved.get(sell_key, 0.0) < trade_amount):
+                return None
+                
+            self.reserved[buy_key] = self.reserved.get(buy_key, 0.0) + quote_amount
+            self.reserved[sell_key] = self.reserved.get(sell_key, 0.0) + trade_amount
+            
+        return {
+            'buy': buy_key + (quote_amount,),
+            'sell': sell_key + (trade_amount,)
+        }
+    
+    def release_trade(self, reservation: Dict):
+        """تحرير حجز صفقة لم تُنفذ"""
+        with self._lock:
+            for exchange, asset, amount in (reservation['buy'], reservation['sell']):
+                self._release(exchange, asset, amount)
+    
+    def settle_trade(self, reservation: Dict, buy_order: Optional[Dict], sell_order: Optional[Dict]):
+        """تحديث الأرصدة تدريجياً من أوامر الشراء والبيع المنفذة وتحرير الحجز"""
+        buy_exchange, quote, quote_reserved = reservation['buy']
+        sell_exchange, base, base_reserved = reservation['sell']
+        
+        with self._lock:
+            if buy_order:
+                self._apply_delta(buy_exchange, quote, -float(buy_order.get('cost') or 0))
+                self._apply_delta(buy_exchange, base, float(buy_order.get('filled') or 0))
+            if sell_order:
+                self._apply_delta(sell_exchange, base, -float(sell_order.get('filled') or 0))
+                self._apply_delta(sell_exchange, quote, float(sell_order.get('cost') or 0))
+                
+            self._release(buy_exchange, quote, quote_reserved)
+            self._release(sell_exchange, base, base_reserved)
+    
+    def trade_capacity(self, opportunity: Dict, buy_fee_rate: float = 0.0) -> Tuple[float, bool]:
+        """
+        أقصى كمية يمكن تداولها من الأرصدة المتاحة في المنصتين
+        
+        يعيد (الكمية، هل الأرصدة معروفة)
+        """
+        base, quote = opportunity['symbol'].split('/')
+        buy_exchange = opportunity['buy_exchange']
+        sell_exchange = opportunity['sell_exchange']
+        
+        if not (self.has_balance(buy_exchange, quote) and self.has_balance(sell_exchange, base)):
+            return 0.0, False
+            
+        by_quote = self.available(buy_exchange, quote) / (opportunity['buy_price'] * (1 + buy_fee_rate))
+        by_base = self.available(sell_exchange, base)
+        return max(0.0, min(by_quote, by_base)), True
+    
+    def get_snapshot(self) -> Dict:
+        """لقطة من الأرصدة والحجوزات وصافي التعرض"""
+        with self._lock:
+            return {
+                'balances': {f"{e}:{a}": v for (e, a), v in self.balances.items()},
+                'reserved': {f"{e}:{a}": v for (e, a), v in self.reserved.items()},
+                'net_exposure': {a: self.net_exposure(a) for a in self.asset_totals}
+            }
@@ -0,0 +1,122 @@
+"""
+نموذج رسوم التداول الحي للمنصات المركزية
+"""
+
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+from exchange_calls import call_exchange
+
+class FeeModel:
+    """نموذج رسوم Maker/Taker لكل منصة وزوج مع تخزين مؤقت بمدة صلاحية"""
+    
+    # رسوم افتراضية (Taker) عند تعذر جلب الرسوم من المنصة
+    DEFAULT_FEE_RATES = {
+        'binance': 0.001,  # 0.1%
+        'coinbase': 0.005,  # 0.5%
+        'kraken': 0.0026,  # 0.26%
+        'kucoin': 0.001,  # 0.1%
+        'huobi': 0.002  # 0.2%
+    }
+    DEFAULT_FEE_RATE = 0.002
+    
+    def __init__(self, exchanges: Optional[Dict] = None, ttl_seconds: int = 3600):
+        self.logger = logging.getLogger(__name__)
+        self.exchanges = exchanges if exchanges is not None else {}
+        self.ttl_seconds = ttl_seconds
+        
+        # (exchange, symbol) -> {'maker': float, 'taker': float}
+        self.fees = {}
+        # exchange -> {'maker': float, 'taker': float} (مستوى الحساب)
+        self.tier_fees = {}
+        # (exchange, symbol) -> (مضاعف الشراء, مضاعف البيع) محسوبة مسبقاً
+        self.net_multipliers = {}
+        self.last_refresh = {}
+    
+    def is_stale(self, exchange_name: str) -> bool:
+        """التحقق من انتهاء صلاحية رسوم منصة"""
+        last = self.last_refresh.get(exchange_name)
+        return last is None or time.time() - last > self.ttl_seconds
+    
+    async def refresh(self, exchange_name: str) -> bool:
+        """
+        تحميل رسوم منصة من الأسواق ومستوى الحساب
+        
+        يُسجل وقت المحاولة حتى عند الفشل فلا تُعاد محاولة منصة معطلة في كل دورة
+        من refresh_stale، وتبقى الرسوم الافتراضية مستخدمة حتى المحاولة التالية.
+        """
+        try:
+            exchange = self.exchanges.get(exchange_name)
+            if exchange is None:
+                return False
+            self.last_refresh[exchange_name] = time.time()
+                
+            # رسوم الأسواق العامة (maker/taker لكل زوج)
+            markets = getattr(exchange, 'markets', None)
+            if not markets:
+                markets = await call_exchange(exchange.load_markets)
+            for symbol, market in markets.items():
+                maker = market.get('maker')
+                taker = market.get('taker')
+                if taker is not None:
+                    self._set_fee(exchange_name, symbol,
+                                  maker if maker is not None else taker, taker)
+                                
+            # رسوم مستوى الحساب (تتطلب مفاتيح API)
+            if exchange.has.get('fetchTradingFees') and getattr(exchange, 'apiKey', None):
+                trading_fees = await call_exchange(exchange.fetch_trading_fees)
+                for symbol, fee in trading_fees.items():
+                    if isinstance(fee, dict) and fee.get('taker') is not None:
+                        taker = fee['taker']
+                        maker = fee.get('maker', taker)
+                        self._set_fee(exchange_name, symbol, maker, taker)
+                        self.tier_fees[exchange_name] = {'maker': maker, 'taker': taker}
+                        
+            self.last_refresh[exchange_name] = time.time()
+            self.logger.info(f"تم تحديث رسوم {exchange_name}")
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"خطأ في تحديث رسوم {exchange_name}: {e}")
+            return False
+    
+    async def refresh_stale(self):
+        """تحديث رسوم المنصات منتهية الصلاحية فقط"""
+        for exchange_name in list(self.exchanges.keys()):
+            if self.is_stale(exchange_name):
+                await self.refresh(exchange_name)
+    
+    def _set_fee(self, exchange_name: str, symbol: str, maker: float, taker: float):
+        """تخزين رسوم زوج وتحديث المضاعفات الصافية"""
+        self.fees[(exchange_name, symbol)] = {'maker': maker, 'taker': taker}
+        self.net_multipliers[(exchange_name, symbol)] = (1 + taker, 1 - taker)
+    
+    def set_venue_fee(self, exchange_name: str, taker: float, maker: Optional[float] = None):
+        """تحديد رسوم منصة لجميع أزواجها (مثل المجمعات التي تتضمن أسعارها رسومها)"""
+        self.tier_fees[exchange_name] = {'maker': maker if maker is not None else taker, 'taker': taker}
+    
+    def get_fee(self, exchange_name: str, symbol: str, side: str = 'taker') -> float:
+        """الحصول على نسبة الرسوم لمنصة وزوج"""
+        fee = self.fees.get((exchange_name, symbol))
+        if fee is not None:
+            return fee[side]
+            
+        tier = self.tier_fees.get(exchange_name)
+        if tier is not None:
+            return tier[side]
+            
+        return self.DEFAULT_FEE_RATES.get(exchange_name, self.DEFAULT_FEE_RATE)
+    
+    def get_net_multipliers(self, exchange_name: str, symbol: str) -> Tuple[float, float]:
+        """
+        الحصول على مضاعفات السعر الصافية (شراء، بيع) لأوامر Taker
+        
+        سعر الشراء الفعلي = ask * مضاعف الشراء، وسعر البيع الفعلي = bid * مضاعف البيع
+        """
+        multipliers = self.net_multipliers.get((exchange_name, symbol))
+        if multipliers is not None:
+            return multipliers
+            
+        taker = self.get_fee(exchange_name, symbol)
+        return 1 + taker, 1 - taker
@@ -2,67 +2,315 @@
 مدير القروض السريعة للتفاعل مع العقود الذكية
 """
 
+import inspect
 import json
 import logging
-from typing import Dict, List, Optional, Tuple
-from web3 import Web3
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from web3 import Web3, AsyncWeb3
+from web3.exceptions import TimeExhausted
 from web3.contract import Contract
 from eth_account import Account
 import asyncio
 from datetime import datetime
 
 from config import Config
+from async_rpc import AsyncRPCClient
+from rpc_pool import RPCPool, RPCPoolProvider
+from nonce_manager import NonceManager
+from amm_quoter import AMMQuoter
+from reserve_cache import ReserveCache
+from v3_quoter import V3PoolCache, V3_DEXES
+from multicall import Multicall
+from flash_loan_optimizer import FlashLoanOptimizer
+from route_finder import RouteFinder, encode_direct_route, pack_batches
+from tx_tracker import TxTracker
+from gas_oracle import GasOracle
+from gas_model import GasModel
+from simulation import Simulator
+from event_indexer import EventIndexer, decode_event_log
+from token_registry import TokenRegistry
+from flash_providers import FlashLoanProviders
+from chains import get_chain, rpc_urls, events_db_path, events_start_block
 
 class FlashLoanManager:
-    """مدير القروض السريعة"""
+    """مدير القروض السريعة (مدير مستقل لكل شبكة بدفتر عناوينها)"""
     
-    def __init__(self):
+    # مهلة الانتظار المتزامن للعمليات الإدارية (النشر والسحب)
+    RECEIPT_TIMEOUT = 120
+    
+    # سرعة التضمين المستهدفة لمعاملات المراجحة (نسبة رسوم الأولوية)
+    GAS_SPEED = 'fast'
+    
+    def __init__(self, chain: str = 'ethereum'):
         self.logger = logging.getLogger(__name__)
+        self.chain_name = chain
+        self.chain = get_chain(chain)
         self.w3 = None
         self.account = None
         self.contract = None
         self.contract_address = None
         
-        # عناوين الرموز الشائعة على Ethereum
-        self.token_addresses = {
-            'WETH': '0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2',
-            'USDC': '0xA0b86a33E6417c8C4c7c5c4c4c4c4c4c4c4c4c4c',
-            'USDT': '0xdAC17F958D2ee523a2206206994597C13D831ec7',
-            'DAI': '0x6B175474E89094C44Da98b954EedeAC495271d0F',
-            'WBTC': '0x2260FAC5E5542a773Aa44fBCfeDf7C193bc2C599'
-        }
+        # مسار غير متزامن (لا يحجب حلقة الأحداث) عبر مجمع عقد RPC
+        self.async_w3 = None
+        self.async_contract = None
+        self.rpc = None
+        self.chain_id = None
+        
+        # توزيع الـ nonce محلياً (قراءة واحدة عند البدء)
+        self.nonce_manager = NonceManager()
+        # تتبع المعاملات المرسلة في الخلفية دون انتظار التضمين
+        self.tx_tracker = None
+        self.gas_oracle = None
+        # استهلاك الغاز المتعلم لكل شكل مسار
+        self.gas_model = GasModel()
+        # محاكاة الفرص عبر eth_call قبل الإرسال
+        self.simulator = None
+        self.simulation_rpc = None
+        # فهرس أحداث العقد من السجلات (للأرباح المحققة والمطابقة)
+        self.event_indexer = None
         
-        # عناوين DEX routers
+        # تسعير محلي من الاحتياطيات المخزنة بدلاً من eth_call لكل فرصة
+        self.amm_quoter = AMMQuoter(dex_configs=self.chain['dex_configs'])
+        self.flash_loan_optimizer = FlashLoanOptimizer(self.amm_quoter)
+        self.reserve_cache = None
+        self.v3_cache = None
+        self.multicall = None
+        
+        # بيانات الرموز (الخانات العشرية من السلسلة مع ذاكرة على القرص)
+        self.token_registry = TokenRegistry(self.chain_name, self.chain['tokens'])
+        
+        # عناوين الرموز الشائعة على الشبكة
+        self.token_addresses = self.token_registry.addresses()
+        
+        # عناوين DEX routers (منصات V2 المدعومة في العقد)
         self.dex_routers = {
-            'uniswap_v2': '0x7a250d5630B4cF539739dF2C5dAcb4c659F2488D',
-            'sushiswap': '0xd9e1cE17f2641f24aE83637ab66a2cca9C378B9F'
+            dex: config['router_address'] for dex, config in self.chain['dex_configs'].items()
+            if dex in AMMQuoter.DEX_FEES
         }
         
+        # مصادر القرض السريع (أرخص مزود لكل أصل ومبلغ، سيولة مخزنة لكل كتلة)
+        self.flash_providers = FlashLoanProviders(None, self.chain, self.token_addresses.values())
+        
+        # مسارات دائرية تبدأ بالأصول القابلة للاقتراض
+        self.route_finder = RouteFinder(self.amm_quoter, self.token_addresses.values())
+        self.route_finder.flash_providers = self.flash_providers
+        
         self._initialize_web3()
     
     def _initialize_web3(self):
         """تهيئة اتصال Web3"""
         try:
-            if not Config.ETHEREUM_RPC_URL:
-                self.logger.error("عنوان RPC غير محدد")
+            urls = rpc_urls(self.chain_name)
+            if not urls:
+                self.logger.error(f"عنوان RPC غير محدد لشبكة {self.chain_name}")
                 return
             
-            self.w3 = Web3(Web3.HTTPProvider(Config.ETHEREUM_RPC_URL))
+            # المسار المتزامن على أول عقدة متاحة
+            for url in urls:
+                self.w3 = Web3(Web3.HTTPProvider(url))
+                if self.w3.is_connected():
+                    break
+            connected = self.w3.is_connected()
             
-            if not self.w3.is_connected():
-                self.logger.error("فشل في الاتصال بشبكة Ethereum")
-                return
+            # الطلبات غير المتزامنة عبر جميع العقد (أسرعها، مع تجاوز الأعطال)
+            self.rpc = RPCPool(urls, hedge_delay=Config.RPC_HEDGE_DELAY)
+            self.async_w3 = AsyncWeb3(RPCPoolProvider(self.rpc))
+            self.multicall = Multicall(self.rpc)
+            self.token_registry.multicall = self.multicall
+            self.gas_oracle = GasOracle(self.rpc, min_priority_fee=self.chain['min_priority_fee'])
+            if Config.SIMULATION_RPC_URL:
+                self.simulation_rpc = AsyncRPCClient(Config.SIMULATION_RPC_URL)
+            
+            # احتياطيات أزواج V2 للرموز المعروفة كمصدر للتسعير المحلي
+            self.reserve_cache = ReserveCache(self.rpc, self.chain['dex_configs'])
+            # مجمعات V3 لنفس الأزواج (سعر وسيولة وticks من الأحداث)
+            if any(dex in V3_DEXES for dex in self.chain['dex_configs']):
+                self.v3_cache = V3PoolCache(self.rpc, self.multicall, self.chain['dex_configs'])
+                self.amm_quoter.v3_source = self.v3_cache
+            token_list = list(self.token_addresses.values())
+            for i, token_a in enumerate(token_list):
+                for token_b in token_list[i + 1:]:
+                    self.reserve_cache.watch(token_a, token_b)
+                    if self.v3_cache:
+                        self.v3_cache.watch(token_a, token_b)
+            self.amm_quoter.reserve_source = self.reserve_cache
+            
+            self.flash_providers.multicall = self.multicall
+            self.flash_providers.pairs = self.reserve_cache
             
-            # تحميل الحساب
+            if not connected:
+                # لا استسلام: مجمع العقد يعيد المحاولة مع الطلبات التالية
+                self.logger.error(f"فشل في الاتصال بشبكة {self.chain_name} عند البدء")
+            
+            # تحميل الحساب (الـ nonce من الشبكة الآن، أو قبل أول معاملة إذا تعذر الاتصال)
             if Config.PRIVATE_KEY:
                 self.account = Account.from_key(Config.PRIVATE_KEY)
                 self.logger.info(f"تم تحميل الحساب: {self.account.address}")
+                if connected:
+                    self.nonce_manager.sync(
+                        self.w3.eth.get_transaction_count(self.account.address, 'pending')
+                    )
+                self.tx_tracker = TxTracker(
+                    self.rpc, self.nonce_manager, self.account.address, self._broadcast_async
+                )
             
             self.logger.info("تم تهيئة Web3 بنجاح")
             
         except Exception as e:
             self.logger.error(f"خطأ في تهيئة Web3: {e}")
     
+    async def update_reserves(self) -> int:
+        """تحديث احتياطيات الأزواج من أحداث Sync (تهيئة كاملة في أول استدعاء)"""
+        if not self.reserve_cache:
+            return 0
+            
+        # خانات الرموز مرة واحدة (لا استدعاء RPC بعد تحميلها أو قراءتها من الذاكرة)
+        await self.token_registry.ensure_loaded()
+        applied = await self.reserve_cache.poll()
+        if self.v3_cache:
+            applied += await self.v3_cache.poll()
+        # سيولة ورسوم مزودي القروض مرة لكل كتلة
+        changed_assets = await self.flash_providers.refresh(self.reserve_cache.last_block)
+        
+        # رسوم الغاز مرة واحدة لكل كتلة جديدة، وإعادة تقدير الأشكال القديمة
+        await self.gas_oracle.refresh(self.reserve_cache.last_block)
+        await self.refresh_gas_model()
+        
+        # إعادة تقييم المسارات المتأثرة فقط
+        changed, full_refresh = self.reserve_cache.pop_changed()
+        if self.v3_cache:
+            v3_changed, v3_full_refresh = self.v3_cache.pop_changed()
+            changed |= v3_changed
+            full_refresh = full_refresh or v3_full_refresh
+        if changed or full_refresh or changed_assets:
+            self.route_finder.update(changed, full_refresh, changed_assets)
+        return applied
+    
+    async def close(self):
+        """إغلاق الاتصالات غير المتزامنة"""
+        if self.tx_tracker:
+            await self.tx_tracker.stop()
+        if self.simulation_rpc:
+            await self.simulation_rpc.close()
+        if self.rpc:
+            await self.rpc.close()
+        if self.event_indexer:
+            self.event_indexer.close()
+    
+    def _set_contract(self, address: str, abi: List, start_block: Optional[int] = None):
+        """تحميل نسختي العقد المتزامنة وغير المتزامنة (start_block: كتلة نشر العقد إن عُرفت)"""
+        self.contract = self.w3.eth.contract(address=address, abi=abi)
+        if self.async_w3:
+            self.async_contract = self.async_w3.eth.contract(address=address, abi=abi)
+            
+        if Config.SIMULATION_ENABLED and self.account and self.rpc:
+            self.simulator = Simulator(self.simulation_rpc or self.rpc, address, self.account.address)
+            
+        if self.rpc:
+            if self.event_indexer:
+                self.event_indexer.close()
+            if start_block is None:
+                start_block = events_start_block(self.chain_name)
+            self.event_indexer = EventIndexer(
+                self.rpc, address, events_db_path(self.chain_name), start_block=start_block
+            )
+    
+    async def _fetch_send_state(self) -> Dict:
+        """حقول رسوم المعاملة من الأوراكل (ومعرف الشبكة أول مرة)"""
+        
+        if self.chain_id is None:
+            self.chain_id = await self.rpc.chain_id()
+        if not self.nonce_manager.initialized:
+            self.nonce_manager.sync(
+                await self.rpc.get_transaction_count(self.account.address, 'pending')
+            )
+        if not self.gas_oracle.ready:
+            await self.gas_oracle.refresh()
+            
+        return self.gas_oracle.transaction_fees(self.GAS_SPEED)
+    
+    def _sync_fee_fields(self) -> Dict:
+        """حقول الرسوم للمسارات المتزامنة (القيم المخزنة، أو سعر الغاز الحالي)"""
+        if self.gas_oracle and self.gas_oracle.ready:
+            return self.gas_oracle.transaction_fees(self.GAS_SPEED)
+        return {'gasPrice': self.w3.eth.gas_price}
+    
+    async def refresh_gas_model(self) -> int:
+        """إعادة تقدير الغاز للأشكال القديمة عبر eth_estimateGas في طلب دفعي واحد"""
+        stale = self.gas_model.stale_shapes()
+        if not stale:
+            return 0
+            
+        results = await self.rpc.batch([
+            ('eth_estimateGas', [{
+                key: hex(value) if isinstance(value, int) else value
+                for key, value in transaction.items()
+            }]) for _, transaction in stale
+        ], raise_errors=False)
+        
+        refreshed = 0
+        for (shape, _), result in zip(stale, results):
+            if isinstance(result, str):
+                self.gas_model.record_estimate(shape, int(result, 16))
+                refreshed += 1
+            else:
+                # الاستدعاء يرتد عند زوال الفرصة: المحاولة في الدورة التالية
+                self.gas_model.mark_refreshed(shape)
+        return refreshed
+    
+    async def reconcile_nonce(self) -> Dict:
+        """مطابقة الـ nonce المحلي مع الشبكة (كشف المعاملات المُسقطة والفجوات)"""
+        
+        latest_count, pending_count = await self.rpc.batch([
+            ('eth_getTransactionCount', [self.account.address, 'latest']),
+            ('eth_getTransactionCount', [self.account.address, 'pending'])
+        ])
+        return self.nonce_manager.reconcile(int(latest_count, 16), int(pending_count, 16))
+    
+    @staticmethod
+    def _is_nonce_error(error: Exception) -> bool:
+        """التحقق من أن خطأ الإرسال سببه تعارض الـ nonce"""
+        message = str(error).lower()
+        return 'nonce' in message or 'replacement transaction' in message or 'already known' in message
+    
+    def _send_transaction(self, transaction: Dict) -> str:
+        """توقيع وإرسال معاملة بالـ nonce المحجوز وتسجيلها"""
+        nonce = transaction['nonce']
+        try:
+            signed_txn = self.w3.eth.account.sign_transaction(transaction, Config.PRIVATE_KEY)
+            tx_hash = Web3.to_hex(self.w3.eth.send_raw_transaction(signed_txn.raw_transaction))
+        except Exception as e:
+            self.nonce_manager.release(nonce)
+            if self._is_nonce_error(e):
+                # العداد المحلي غير متزامن: إعادة القراءة من الشبكة
+                self.nonce_manager.sync(
+                    self.w3.eth.get_transaction_count(self.account.address, 'pending')
+                )
+            raise
+            
+        self.nonce_manager.mark_sent(nonce, tx_hash)
+        return tx_hash
+    
+    async def _broadcast_async(self, transaction: Dict) -> str:
+        """توقيع وبث معاملة جاهزة (تستخدم أيضاً لإعادة البث بنفس الـ nonce)"""
+        signed_txn = self.w3.eth.account.sign_transaction(transaction, Config.PRIVATE_KEY)
+        return await self.rpc.send_raw_transaction(signed_txn.raw_transaction)
+    
+    async def _send_transaction_async(self, transaction: Dict) -> str:
+        """توقيع وإرسال معاملة بالـ nonce المحجوز دون حجب حلقة الأحداث"""
+        nonce = transaction['nonce']
+        try:
+            tx_hash = await self._broadcast_async(transaction)
+        except Exception as e:
+            self.nonce_manager.release(nonce)
+            if self._is_nonce_error(e):
+                # كشف الفجوات وإعادة ضبط العداد من الشبكة
+                await self.reconcile_nonce()
+            raise
+            
+        self.nonce_manager.mark_sent(nonce, tx_hash)
+        return tx_hash
+    
     def deploy_contract(self, constructor_args: List = None) -> Optional[str]:
         """نشر العقد الذكي"""
         try:
@@ -86,32 +334,39 @@ class FlashLoanManager:
                 bytecode=contract_data['bytecode']
             )
             
-            # تحضير المعاملة
-            constructor_args = constructor_args or [Config.AAVE_POOL_ADDRESS]
-            
-            transaction = contract.constructor(*constructor_args).build_transaction({
-                'from': self.account.address,
-                'gas': 3000000,
-                'gasPrice': self.w3.to_wei('20', 'gwei'),
-                'nonce': self.w3.eth.get_transaction_count(self.account.address)
-            })
+            # تحضير المعاملة (العقد يتوقع مزود عناوين Aave للشبكة)
+            constructor_args = constructor_args or [self.chain['aave_pool_addresses_provider']]
             
+            nonce = self.nonce_manager.allocate()
+            try:
+                transaction = contract.constructor(*constructor_args).build_transaction({
+                    'from': self.account.address,
+                    'gas': 3000000,
+                    'nonce': nonce,
+                    **self._sync_fee_fields()
+                })
+            except Exception:
+                self.nonce_manager.release(nonce)
+                raise
+                
             # توقيع وإرسال المعاملة
-            signed_txn = self.w3.eth.account.sign_transaction(transaction, Config.PRIVATE_KEY)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+            tx_hash = self._send_transaction(transaction)
             
-            # انتظار التأكيد
-            tx_receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            # انتظار التأكيد بمهلة محددة (عنوان العقد مطلوب من الإيصال)
+            tx_receipt = self._wait_for_receipt(tx_hash, transaction, 'نشر العقد')
+            if tx_receipt is None:
+                return None
             
             if tx_receipt.status == 1:
                 self.contract_address = tx_receipt.contractAddress
                 self.logger.info(f"تم نشر العقد بنجاح: {self.contract_address}")
                 
                 # تحميل العقد
-                self.contract = self.w3.eth.contract(
-                    address=self.contract_address,
-                    abi=contract_data['abi']
-                )
+                self._set_contract(self.contract_address, contract_data['abi'],
+                                   start_block=tx_receipt.blockNumber)
+                
+                # العقد يدعم موجهات Ethereum افتراضياً: تفعيل موجهات الشبكة
+                self.configure_routers()
                 
                 return self.contract_address
             else:
@@ -122,6 +377,27 @@ class FlashLoanManager:
             self.logger.error(f"خطأ في نشر العقد: {e}")
             return None
     
+    def _wait_for_receipt(self, tx_hash: str, transaction: Dict, label: str):
+        """انتظار متزامن بمهلة محددة، ثم تسليم المعاملة للمتتبع إذا لم تُضمّن"""
+        try:
+            tx_receipt = self.w3.eth.wait_for_transaction_receipt(
+                tx_hash, timeout=self.RECEIPT_TIMEOUT
+            )
+        except TimeExhausted:
+            self.logger.warning(f"لم تُضمّن معاملة {label} خلال {self.RECEIPT_TIMEOUT} ثانية: {tx_hash}")
+            if self.tx_tracker:
+                self.tx_tracker.track(tx_hash, transaction, label=label)
+                try:
+                    self.tx_tracker.start()
+                except RuntimeError:
+                    # لا حلقة أحداث: الـ nonce يبقى معلقاً حتى يُشغَّل المتتبع من مسار غير متزامن
+                    self.logger.warning(f"لا توجد حلقة أحداث لمتابعة معاملة {label}: {tx_hash} "
+                                        f"غير متتبعة حتى تشغيل المتتبع")
+            return None
+            
+        self.nonce_manager.confirm(transaction['nonce'])
+        return tx_receipt
+    
     def load_contract(self, contract_address: str, abi_path: str = None) -> bool:
         """تحميل عقد موجود"""
         try:
@@ -138,10 +414,7 @@ class FlashLoanManager:
                 # استخدام ABI افتراضي مبسط
                 abi = self._get_default_abi()
             
-            self.contract = self.w3.eth.contract(
-                address=Web3.to_checksum_address(contract_address),
-                abi=abi
-            )
+            self._set_contract(Web3.to_checksum_address(contract_address), abi)
             
             self.contract_address = contract_address
             self.logger.info(f"تم تحميل العقد: {contract_address}")
@@ -159,11 +432,12 @@ class FlashLoanManager:
         amount: int,
         buy_dex: str,
         sell_dex: str,
-        min_profit: int = 0
+        min_profit: int = 0,
+        callback: Optional[Callable] = None
     ) -> Dict:
-        """تنفيذ مراجحة باستخدام القرض السريع"""
+        """تنفيذ مراجحة باستخدام القرض السريع (تعود بعد الإرسال، والنتيجة عبر callback)"""
         try:
-            if not self.contract or not self.account:
+            if not self.async_contract or not self.account:
                 return {'success': False, 'error': 'العقد أو الحساب غير مهيأ'}
             
             # تحضير معاملات المراجحة
@@ -182,61 +456,400 @@ class FlashLoanManager:
             if not can_execute:
                 return {'success': False, 'error': reason, 'expected_profit': expected_profit}
             
-            # تحضير المعاملة
-            transaction = self.contract.functions.executeArbitrage(
-                (
-                    arbitrage_params['tokenA'],
-                    arbitrage_params['tokenB'],
-                    arbitrage_params['amountIn'],
-                    arbitrage_params['buyDex'],
-                    arbitrage_params['sellDex'],
-                    arbitrage_params['minProfit']
-                )
-            ).build_transaction({
+            shape = self.gas_model.shape((buy_dex, sell_dex), arbitrage_params['tokenA'])
+            
+            # المحاكاة على أحدث كتلة: لا يُرسل إلا ما ينجح فعلياً
+            if self.simulator:
+                simulation = await self.simulator.simulate(arbitrage_params)
+                if not simulation['success']:
+                    return {
+                        'success': False,
+                        'error': f"فشلت المحاكاة: {simulation['revert_reason']}",
+                        'expected_profit': expected_profit,
+                        'simulation': simulation
+                    }
+                expected_profit = simulation['profit']
+                self.gas_model.record_estimate(shape, simulation['gas_used'])
+            
+            result = await self._submit_contract_call(
+                self.async_contract.functions.executeArbitrage(
+                    (
+                        arbitrage_params['tokenA'],
+                        arbitrage_params['tokenB'],
+                        arbitrage_params['amountIn'],
+                        arbitrage_params['buyDex'],
+                        arbitrage_params['sellDex'],
+                        arbitrage_params['minProfit']
+                    )
+                ),
+                shape=shape,
+                label='القرض السريع',
+                callback=callback
+            )
+            result['expected_profit'] = expected_profit
+            return result
+            
+        except Exception as e:
+            self.logger.error(f"خطأ في تنفيذ القرض السريع: {e}")
+            return {'success': False, 'error': str(e)}
+    
+    async def simulate_arbitrages(self, candidates: List[Dict]) -> List[Dict]:
+        """
+        محاكاة مجموعة فرص (معاملات ArbitrageParams بالعناوين) على نفس الكتلة
+        
+        لكل فرصة: success و profit (بوحدات tokenA) و gas_used و revert_reason.
+        """
+        if not self.simulator:
+            return [{'success': False, 'profit': 0, 'gas_used': None, 'revert_reason': 'المحاكاة غير مهيأة'}
+                    for _ in candidates]
+        return await self.simulator.simulate_many(candidates)
+    
+    async def index_events(self) -> int:
+        """فهرسة أحداث العقد في الكتل المؤكدة الجديدة"""
+        if not self.event_indexer:
+            return 0
+        return await self.event_indexer.sync()
+    
+    def get_realized_pnl(self) -> Dict[str, Dict]:
+        """الربح المحقق لكل أصل من الأحداث المفهرسة"""
+        if not self.event_indexer:
+            return {}
+        return self.event_indexer.realized_pnl()
+    
+    def gas_cost_in_token(self, token: str, gas_cost_wei: int) -> Optional[int]:
+        """تحويل تكلفة الغاز (wei) إلى وحدات الرمز الأساسية بسعر مجمع العملة الأصلية المغلفة الفوري"""
+        native = self.token_addresses[self.chain['wrapped_native']]
+        token_address = self.token_addresses.get(token, token)
+        if token_address.lower() == native.lower():
+            return gas_cost_wei
+            
+        for dex in self.amm_quoter.DEX_FEES:
+            reserves = self.amm_quoter.get_reserves(dex, native, token_address)
+            if reserves and reserves[0] > 0:
+                return gas_cost_wei * reserves[1] // reserves[0]
+        return None
+    
+    def optimize_flash_loan(self, token_a: str, token_b: str, buy_dex: str, sell_dex: str,
+                            gas_cost_wei: int = 0, max_amount: Optional[int] = None) -> Optional[Dict]:
+        """
+        مبلغ القرض الأمثل من احتياطيات المجمعين (None إذا لم تتوفر الاحتياطيات)
+        
+        المبالغ بوحدات tokenA الأساسية، والربح الصافي بعد رسوم القرض والغاز.
+        """
+        token_a_address = self.token_addresses.get(token_a, token_a)
+        token_b_address = self.token_addresses.get(token_b, token_b)
+        if not (self.amm_quoter.has_pair(buy_dex, token_a_address, token_b_address) and
+                self.amm_quoter.has_pair(sell_dex, token_b_address, token_a_address)):
+            return None
+            
+        gas_cost = self.gas_cost_in_token(token_a, gas_cost_wei) if gas_cost_wei else 0
+        plan = self.flash_loan_optimizer.optimize(
+            token_a_address, token_b_address,
+            self.amm_quoter.resolve_dex(buy_dex), self.amm_quoter.resolve_dex(sell_dex),
+            gas_cost or 0, max_amount
+        )
+        plan['gas_cost_known'] = gas_cost is not None
+        return plan
+    
+    async def _submit_contract_call(self, contract_function, shape: Tuple, label: str,
+                                    callback: Optional[Callable] = None) -> Dict:
+        """
+        بناء وتوقيع وإرسال استدعاء للعقد والعودة فوراً بعد الإرسال
+        
+        يُحسم التضمين في الخلفية عبر متتبع المعاملات، وتُمرر النتيجة (مع الأحداث
+        المحللة عند النجاح) إلى callback.
+        """
+        fee_fields = await self._fetch_send_state()
+        
+        # تحضير المعاملة (الـ nonce من العداد المحلي دون رحلة RPC)
+        nonce = self.nonce_manager.allocate()
+        try:
+            transaction = await contract_function.build_transaction({
                 'from': self.account.address,
-                'gas': 1000000,  # حد الغاز
-                'gasPrice': await self._get_optimal_gas_price(),
-                'nonce': self.w3.eth.get_transaction_count(self.account.address)
+                'gas': self.gas_model.gas_limit(shape),
+                'nonce': nonce,
+                'chainId': self.chain_id,
+                **fee_fields
             })
+        except Exception:
+            self.nonce_manager.release(nonce)
+            raise
             
-            # توقيع وإرسال المعاملة
-            signed_txn = self.w3.eth.account.sign_transaction(transaction, Config.PRIVATE_KEY)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+        # توقيع وإرسال المعاملة
+        tx_hash = await self._send_transaction_async(transaction)
+        
+        self.logger.info(f"تم إرسال معاملة {label}: {tx_hash}")
+        
+        self.gas_model.remember_transaction(shape, transaction)
+        
+        async def on_settled(record: Dict):
+            record['events'] = []
+            try:
+                if record['success']:
+                    self.gas_model.record_receipt(shape, record['gas_used'])
+                    # الأحداث من الإيصال الذي جلبه المتتبع عبر مجمع العقد (بدون طلب إضافي)
+                    record['events'] = self._parse_transaction_events(record.get('receipt'))
+            finally:
+                # تسجيل النتيجة دائماً حتى لو تعذر تحليل الأحداث
+                if callback:
+                    result = callback(record)
+                    if inspect.isawaitable(result):
+                        await result
+                    
+        self.tx_tracker.track(tx_hash, transaction, callback=on_settled, label=label)
+        self.tx_tracker.start()
+        
+        return {
+            'success': True,
+            'pending': True,
+            'tx_hash': tx_hash,
+            'nonce': nonce
+        }
+    
+    async def speed_up_transaction(self, nonce: int, bump: float = 1.125) -> Optional[str]:
+        """إعادة بث معاملة معلقة بسعر غاز أعلى"""
+        if not self.tx_tracker:
+            return None
+        return await self.tx_tracker.speed_up(nonce, bump)
+    
+    async def cancel_transaction(self, nonce: int, bump: float = 1.125) -> Optional[str]:
+        """إلغاء معاملة معلقة باستبدالها بتحويل فارغ"""
+        if not self.tx_tracker:
+            return None
+        return await self.tx_tracker.cancel(nonce, bump)
+    
+    def _current_gas_price(self, gas_price: Optional[int] = None) -> Optional[int]:
+        """سعر الغاز الممرر أو المخزن في مراقب الغاز"""
+        if gas_price is None and self.gas_oracle and self.gas_oracle.ready:
+            gas_price = self.gas_oracle.effective_gas_price(self.GAS_SPEED)
+        return gas_price
+    
+    def _net_of_gas(self, result: Dict, gas_price: Optional[int]) -> Optional[Dict]:
+        """خطة المسار مع تكلفة الغاز والربح الصافي بوحدات الأصل (None إذا تعذر تحويل الغاز)"""
+        shape = self.gas_model.shape([dex for dex, _, _ in result['route']], result['asset'], kind='route')
+        gas_cost_wei = self.gas_model.estimate(shape) * gas_price if gas_price else 0
+        gas_cost = self.gas_cost_in_token(result['asset'], gas_cost_wei) if gas_cost_wei else 0
+        if gas_cost is None:
+            return None
+        return dict(result, gas_cost=gas_cost, net_profit=result['expected_profit'] - gas_cost)
+    
+    def get_profitable_routes(self, gas_price: Optional[int] = None, limit: int = 5) -> List[Dict]:
+        """أفضل المسارات الدائرية المربحة بعد رسوم القرض والغاز (بوحدات الأصل المقترض)"""
+        gas_price = self._current_gas_price(gas_price)
+            
+        routes = []
+        for result in self.route_finder.best_routes(limit=limit * 4):
+            plan = self._net_of_gas(result, gas_price)
+            if plan is not None and plan['net_profit'] > 0:
+                routes.append(plan)
+                
+        routes.sort(key=lambda r: r['net_profit'], reverse=True)
+        return routes[:limit]
+    
+    def evaluate_route(self, route: Tuple, gas_price: Optional[int] = None) -> Optional[Dict]:
+        """
+        المبلغ الأمثل والربح الصافي لمسار محدد (مثل فرصة مجمع↔مجمع من لوحة الأسعار)
+        
+        route خطوات (dex, token_in, token_out) تبدأ وتنتهي بالأصل المقترض. None
+        إذا لم يكن المسار مربحاً قبل الغاز أو تعذر تحويل تكلفة الغاز.
+        """
+        try:
+            result = self.route_finder.evaluate(tuple(route))
+            if result['expected_profit'] <= 0:
+                return None
+            return self._net_of_gas(result, self._current_gas_price(gas_price))
+        except Exception as e:
+            self.logger.error(f"خطأ في تقييم المسار: {e}")
+            return None
+    
+    async def _simulation_rejection(self, function_name: str, args: Tuple,
+                                    expected_profit: int) -> Optional[Dict]:
+        """
+        محاكاة استدعاء تنفيذ للعقد على أحدث كتلة قبل إرساله
+        
+        تعيد نتيجة الرفض إذا ارتد الاستدعاء (شاملاً شرط الحد الأدنى للربح)، و None
+        إذا نجح أو لم تُهيأ المحاكاة. الاستدعاءات المتزامنة تُجمع في طلب دفعي واحد.
+        """
+        if not self.simulator:
+            return None
+        calldata = Web3.to_bytes(hexstr=self.async_contract.encode_abi(function_name, args=list(args)))
+        simulation = await self.simulator.simulate_call(calldata)
+        if simulation['success']:
+            return None
+        return {
+            'success': False,
+            'error': f"فشلت المحاكاة: {simulation['revert_reason']}",
+            'expected_profit': expected_profit,
+            'simulation': simulation
+        }
+    
+    async def execute_route(self, route_plan: Dict, min_profit: int = 0,
+                            callback: Optional[Callable] = None) -> Dict:
+        """تنفيذ مسار دائري متعدد الخطوات بقرض سريع واحد (تعود بعد الإرسال)"""
+        try:
+            if not self.async_contract or not self.account:
+                return {'success': False, 'error': 'العقد أو الحساب غير مهيأ'}
             
-            self.logger.info(f"تم إرسال معاملة القرض السريع: {tx_hash.hex()}")
+            asset, amount_in, path, routers, _ = self._route_params(route_plan)
+            source = self.select_flash_source([route_plan])
+            if source is None:
+                return {'success': False, 'error': 'لا يوجد مصدر قرض يغطي المبلغ'}
             
-            # انتظار التأكيد
-            tx_receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=300)
+            args = ((asset, amount_in, path, routers, min_profit), self._flash_source_param(source))
+            rejection = await self._simulation_rejection('executeRoute', args, route_plan['expected_profit'])
+            if rejection is not None:
+                return rejection
             
-            if tx_receipt.status == 1:
-                # تحليل الأحداث
-                events = self._parse_transaction_events(tx_receipt)
+            result = await self._submit_contract_call(
+                self.async_contract.functions.executeRoute(*args),
+                shape=self.gas_model.shape([dex for dex, _, _ in route_plan['route']], asset, kind='route'),
+                label='المسار الدائري',
+                callback=callback
+            )
+            result.update(expected_profit=route_plan['expected_profit'], flash_provider=source['name'])
+            return result
+            
+        except Exception as e:
+            self.logger.error(f"خطأ في تنفيذ المسار: {e}")
+            return {'success': False, 'error': str(e)}
+    
+    def select_flash_source(self, route_plans: List[Dict]) -> Optional[Dict]:
+        """
+        أرخص مصدر قرض لمجموع مبالغ المسارات (نفس الأصل) من سيولة آخر كتلة
+        
+        لا يُقترض من زوج تمر به أي من المسارات. None إذا لم يغطِ أي مصدر المبلغ.
+        """
+        asset = route_plans[0]['asset']
+        amount = sum(plan['amount_in'] for plan in route_plans)
+        pools = {RouteFinder.pool_key(hop) for plan in route_plans for hop in plan['route']}
+        return self.flash_providers.select(asset, amount, pools)
+    
+    @staticmethod
+    def _flash_source_param(source: Dict) -> Tuple[int, str]:
+        """ترميز مصدر القرض كـ FlashSource للعقد"""
+        return (source['provider'], Web3.to_checksum_address(source['lender']))
+    
+    def _route_params(self, route_plan: Dict) -> Tuple:
+        """ترميز خطة مسار كـ RouteParams للعقد (minProfit لكل مسار = 0 داخل الدفعة)"""
+        route = route_plan['route']
+        path = [Web3.to_checksum_address(route[0][1])] + [
+            Web3.to_checksum_address(token_out) for _, _, token_out in route
+        ]
+        routers = [self._hop_router(dex, token_in, token_out) for dex, token_in, token_out in route]
+        return (path[0], route_plan['amount_in'], path, routers, 0)
+    
+    def _hop_router(self, dex: str, token_in: str, token_out: str) -> str:
+        """موجه خطوة المسار في العقد (عنوان المجمع نفسه لخطوات V3)"""
+        if self.amm_quoter.is_v3(dex):
+            return Web3.to_checksum_address(self.v3_cache.pool_address(dex, token_in, token_out))
+        return Web3.to_checksum_address(self.dex_routers[dex])
+    
+    def direct_hops(self, route_plan: Dict) -> Optional[List[Tuple[str, bool, int]]]:
+        """خطوات المسار المباشر (الزوج، الاتجاه، المخرجات المحسوبة محلياً) إن كانت الأزواج معروفة"""
+        if not self.reserve_cache:
+            return None
+            
+        hops = []
+        amount = route_plan['amount_in']
+        for dex, token_in, token_out in route_plan['route']:
+            pair = self.reserve_cache.pair_address(dex, token_in, token_out)
+            if pair is None:
+                return None
+            amount = self.amm_quoter.quote(dex, amount, token_in, token_out)
+            hops.append((pair, token_in.lower() < token_out.lower(), amount))
+        return hops
+    
+    async def execute_direct(self, route_plan: Dict, min_profit: int = 0,
+                             callback: Optional[Callable] = None) -> Dict:
+        """تنفيذ مسار بالتبادل المباشر مع عقود الأزواج وبيانات مضغوطة (تعود بعد الإرسال)"""
+        try:
+            if not self.async_contract or not self.account:
+                return {'success': False, 'error': 'العقد أو الحساب غير مهيأ'}
                 
-                return {
-                    'success': True,
-                    'tx_hash': tx_hash.hex(),
-                    'gas_used': tx_receipt.gasUsed,
-                    'events': events,
-                    'expected_profit': expected_profit
-                }
-            else:
-                return {
-                    'success': False,
-                    'error': 'فشلت المعاملة',
-                    'tx_hash': tx_hash.hex()
-                }
+            hops = self.direct_hops(route_plan)
+            if hops is None:
+                return {'success': False, 'error': 'عناوين الأزواج غير معروفة'}
                 
+            source = self.select_flash_source([route_plan])
+            if source is None:
+                return {'success': False, 'error': 'لا يوجد مصدر قرض يغطي المبلغ'}
+                
+            asset = Web3.to_checksum_address(route_plan['asset'])
+            data = encode_direct_route(asset, route_plan['amount_in'], min_profit, hops)
+            args = (data, self._flash_source_param(source))
+            rejection = await self._simulation_rejection('executeDirect', args, route_plan['expected_profit'])
+            if rejection is not None:
+                return rejection
+            
+            result = await self._submit_contract_call(
+                self.async_contract.functions.executeDirect(*args),
+                shape=self.gas_model.shape([dex for dex, _, _ in route_plan['route']], asset, kind='direct'),
+                label='المسار المباشر',
+                callback=callback
+            )
+            result.update(expected_profit=route_plan['expected_profit'], flash_provider=source['name'])
+            return result
+            
         except Exception as e:
-            self.logger.error(f"خطأ في تنفيذ القرض السريع: {e}")
+            self.logger.error(f"خطأ في تنفيذ المسار المباشر: {e}")
+            return {'success': False, 'error': str(e)}
+    
+    def pack_route_batches(self, plans: List[Dict], max_routes: int = 5) -> List[List[Dict]]:
+        """تجميع المسارات المستقلة (دون مجمعات مشتركة) لنفس الأصل في دفعات"""
+        return pack_batches(plans, max_routes)
+    
+    async def execute_batch(self, route_plans: List[Dict], min_profit: int = 0,
+                            callback: Optional[Callable] = None) -> Dict:
+        """تنفيذ عدة مسارات لنفس الأصل تحت قرض سريع واحد في معاملة واحدة (تعود بعد الإرسال)"""
+        try:
+            if not self.async_contract or not self.account:
+                return {'success': False, 'error': 'العقد أو الحساب غير مهيأ'}
+            
+            if len(route_plans) == 1:
+                # مسار واحد: التبادل المباشر مع الأزواج أرخص من مسار الموجه
+                if self.direct_hops(route_plans[0]) is not None:
+                    return await self.execute_direct(route_plans[0], min_profit, callback)
+                return await self.execute_route(route_plans[0], min_profit, callback)
+                
+            source = self.select_flash_source(route_plans)
+            if source is None:
+                return {'success': False, 'error': 'لا يوجد مصدر قرض يغطي مبلغ الدفعة'}
+                
+            asset = Web3.to_checksum_address(route_plans[0]['asset'])
+            routes = [self._route_params(plan) for plan in route_plans]
+            dexes = [dex for plan in route_plans for dex, _, _ in plan['route']]
+            expected_profit = sum(plan['expected_profit'] for plan in route_plans)
+            
+            args = ((asset, routes, min_profit), self._flash_source_param(source))
+            rejection = await self._simulation_rejection('executeBatch', args, expected_profit)
+            if rejection is not None:
+                return rejection
+            
+            result = await self._submit_contract_call(
+                self.async_contract.functions.executeBatch(*args),
+                shape=self.gas_model.shape(dexes, asset, kind='batch'),
+                label=f'دفعة {len(routes)} مسارات',
+                callback=callback
+            )
+            result.update(expected_profit=expected_profit, flash_provider=source['name'])
+            return result
+            
+        except Exception as e:
+            self.logger.error(f"خطأ في تنفيذ الدفعة: {e}")
             return {'success': False, 'error': str(e)}
     
     async def _can_execute_arbitrage(self, params: Dict) -> Tuple[bool, int, str]:
         """التحقق من إمكانية تنفيذ المراجحة"""
         try:
-            if not self.contract:
+            # حساب محلي مطابق للعقد عند توفر احتياطيات المنصتين
+            if (self.amm_quoter.has_pair(params['buyDex'], params['tokenA'], params['tokenB']) and
+                    self.amm_quoter.has_pair(params['sellDex'], params['tokenB'], params['tokenA'])):
+                return self.amm_quoter.can_execute_arbitrage(params)
+            
+            if not self.async_contract:
                 return False, 0, "العقد غير محمل"
             
-            result = self.contract.functions.canExecuteArbitrage(
+            result = await self.async_contract.functions.canExecuteArbitrage(
                 (
                     params['tokenA'],
                     params['tokenB'],
@@ -254,49 +867,40 @@ class FlashLoanManager:
             self.logger.error(f"خطأ في التحقق من إمكانية التنفيذ: {e}")
             return False, 0, str(e)
     
-    async def _get_optimal_gas_price(self) -> int:
+    async def _get_optimal_gas_price(self) -> Optional[int]:
         """الحصول على سعر الغاز الأمثل"""
         try:
-            # الحصول على سعر الغاز الحالي
-            gas_price = self.w3.eth.gas_price
-            
-            # زيادة 10% للتأكد من التنفيذ السريع
-            optimal_price = int(gas_price * 1.1)
-            
-            return optimal_price
+            # الرسوم الأساسية للكتلة التالية + رسوم أولوية بالنسبة المستهدفة
+            if not self.gas_oracle.ready:
+                await self.gas_oracle.refresh()
+                
+            return self.gas_oracle.effective_gas_price(self.GAS_SPEED)
             
         except Exception as e:
             self.logger.error(f"خطأ في الحصول على سعر الغاز: {e}")
-            return self.w3.to_wei('20', 'gwei')  # سعر افتراضي
+            return None
     
-    def _parse_transaction_events(self, tx_receipt) -> List[Dict]:
-        """تحليل أحداث المعاملة"""
+    def _parse_transaction_events(self, tx_receipt: Optional[Dict]) -> List[Dict]:
+        """تحليل أحداث العقد من إيصال JSON-RPC خام (كما يعيده متتبع المعاملات)"""
         events = []
         
         try:
-            if not self.contract:
+            if not tx_receipt or not self.contract_address:
                 return events
             
-            # تحليل أحداث المراجحة
-            arbitrage_events = self.contract.events.ArbitrageExecuted().process_receipt(tx_receipt)
-            for event in arbitrage_events:
-                events.append({
-                    'type': 'ArbitrageExecuted',
-                    'asset': event.args.asset,
-                    'amount': event.args.amount,
-                    'profit': event.args.profit,
-                    'buyDex': event.args.buyDex,
-                    'sellDex': event.args.sellDex
-                })
-            
-            # تحليل أحداث القرض السريع
-            flash_loan_events = self.contract.events.FlashLoanExecuted().process_receipt(tx_receipt)
-            for event in flash_loan_events:
+            contract_address = self.contract_address.lower()
+            for log in tx_receipt.get('logs', []):
+                if log.get('address', '').lower() != contract_address:
+                    continue
+                event = decode_event_log(log)
+                if event is None:
+                    continue
+                    
+                # نفس صيغة الأحداث السابقة: النوع ثم حقول الحدث
                 events.append({
-                    'type': 'FlashLoanExecuted',
-                    'asset': event.args.asset,
-                    'amount': event.args.amount,
-                    'premium': event.args.premium
+                    'type': event['event'],
+                    **{key: value for key, value in event.items()
+                       if key not in ('event', 'block_number', 'tx_hash', 'log_index')}
                 })
                 
         except Exception as e:
@@ -326,24 +930,31 @@ class FlashLoanManager:
             if not self.contract or not self.account:
                 return {'success': False, 'error': 'العقد أو الحساب غير مهيأ'}
             
-            transaction = self.contract.functions.withdrawProfits(
-                Web3.to_checksum_address(token_address),
-                amount
-            ).build_transaction({
-                'from': self.account.address,
-                'gas': 100000,
-                'gasPrice': self.w3.to_wei('20', 'gwei'),
-                'nonce': self.w3.eth.get_transaction_count(self.account.address)
-            })
-            
-            signed_txn = self.w3.eth.account.sign_transaction(transaction, Config.PRIVATE_KEY)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+            nonce = self.nonce_manager.allocate()
+            try:
+                transaction = self.contract.functions.withdrawProfits(
+                    Web3.to_checksum_address(token_address),
+                    amount
+                ).build_transaction({
+                    'from': self.account.address,
+                    'gas': 100000,
+                    'nonce': nonce,
+                    **self._sync_fee_fields()
+                })
+            except Exception:
+                self.nonce_manager.release(nonce)
+                raise
+                
+            tx_hash = self._send_transaction(transaction)
             
-            tx_receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            tx_receipt = self._wait_for_receipt(tx_hash, transaction, 'سحب الأرباح')
+            if tx_receipt is None:
+                return {'success': False, 'pending': True, 'tx_hash': tx_hash,
+                        'error': 'لم تُضمّن المعاملة خلال المهلة'}
             
             return {
                 'success': tx_receipt.status == 1,
-                'tx_hash': tx_hash.hex(),
+                'tx_hash': tx_hash,
                 'gas_used': tx_receipt.gasUsed
             }
             
@@ -351,6 +962,43 @@ class FlashLoanManager:
             self.logger.error(f"خطأ في سحب الأرباح: {e}")
             return {'success': False, 'error': str(e)}
     
+    def configure_routers(self) -> List[str]:
+        """تفعيل موجهات الشبكة غير المدعومة في العقد وإعادة ما تم تفعيله"""
+        enabled = []
+        try:
+            if not self.contract or not self.account:
+                return enabled
+            
+            for dex, router in self.dex_routers.items():
+                router = Web3.to_checksum_address(router)
+                if self.contract.functions.supportedRouters(router).call():
+                    continue
+                    
+                nonce = self.nonce_manager.allocate()
+                try:
+                    transaction = self.contract.functions.setRouter(router, True).build_transaction({
+                        'from': self.account.address,
+                        'gas': 60000,
+                        'nonce': nonce,
+                        **self._sync_fee_fields()
+                    })
+                except Exception:
+                    self.nonce_manager.release(nonce)
+                    raise
+                    
+                tx_hash = self._send_transaction(transaction)
+                tx_receipt = self._wait_for_receipt(tx_hash, transaction, f'تفعيل موجه {dex}')
+                if tx_receipt is not None and tx_receipt.status == 1:
+                    enabled.append(dex)
+                    
+            if enabled:
+                self.logger.info(f"تم تفعيل موجهات {self.chain_name}: {', '.join(enabled)}")
+            
+        except Exception as e:
+            self.logger.error(f"خطأ في تفعيل الموجهات: {e}")
+        
+        return enabled
+    
     def get_token_profits(self, token_address: str) -> int:
         """الحصول على أرباح رمز معين"""
         try:
@@ -377,6 +1025,86 @@ class FlashLoanManager:
                 "stateMutability": "nonpayable",
                 "type": "function"
             },
+            {
+                "inputs": [{
+                    "type": "tuple",
+                    "name": "params",
+                    "components": [
+                        {"type": "address", "name": "asset"},
+                        {"type": "uint256", "name": "amountIn"},
+                        {"type": "address[]", "name": "path"},
+                        {"type": "address[]", "name": "routers"},
+                        {"type": "uint256", "name": "minProfit"}
+                    ]
+                }, {
+                    "type": "tuple",
+                    "name": "source",
+                    "components": [
+                        {"type": "uint8", "name": "provider"},
+                        {"type": "address", "name": "lender"}
+                    ]
+                }],
+                "name": "executeRoute",
+                "outputs": [],
+                "stateMutability": "nonpayable",
+                "type": "function"
+            },
+            {
+                "inputs": [{
+                    "type": "tuple",
+                    "name": "params",
+                    "components": [
+                        {"type": "address", "name": "asset"},
+                        {
+                            "type": "tuple[]",
+                            "name": "routes",
+                            "components": [
+                                {"type": "address", "name": "asset"},
+                                {"type": "uint256", "name": "amountIn"},
+                                {"type": "address[]", "name": "path"},
+                                {"type": "address[]", "name": "routers"},
+                                {"type": "uint256", "name": "minProfit"}
+                            ]
+                        },
+                        {"type": "uint256", "name": "minProfit"}
+                    ]
+                }, {
+                    "type": "tuple",
+                    "name": "source",
+                    "components": [
+                        {"type": "uint8", "name": "provider"},
+                        {"type": "address", "name": "lender"}
+                    ]
+                }],
+                "name": "executeBatch",
+                "outputs": [],
+                "stateMutability": "nonpayable",
+                "type": "function"
+            },
+            {
+                "inputs": [{"type": "bytes", "name": "data"}, {
+                    "type": "tuple",
+                    "name": "source",
+                    "components": [
+                        {"type": "uint8", "name": "provider"},
+                        {"type": "address", "name": "lender"}
+                    ]
+                }],
+                "name": "executeDirect",
+                "outputs": [],
+                "stateMutability": "nonpayable",
+                "type": "function"
+            },
+            {
+                "inputs": [{"type": "tuple", "name": "params"}],
+                "name": "simulateArbitrage",
+                "outputs": [
+                    {"type": "uint256", "name": "profit"},
+                    {"type": "uint256", "name": "gasUsed"}
+                ],
+                "stateMutability": "nonpayable",
+                "type": "function"
+            },
             {
                 "inputs": [{"type": "tuple", "name": "params"}],
                 "name": "canExecuteArbitrage",
@@ -394,18 +1122,40 @@ class FlashLoanManager:
                 "outputs": [{"type": "uint256", "name": "balance"}],
                 "stateMutability": "view",
                 "type": "function"
+            },
+            {
+                "inputs": [{"type": "address", "name": "router"}],
+                "name": "supportedRouters",
+                "outputs": [{"type": "bool", "name": ""}],
+                "stateMutability": "view",
+                "type": "function"
+            },
+            {
+                "inputs": [{"type": "address", "name": "router"}, {"type": "bool", "name": "supported"}],
+                "name": "setRouter",
+                "outputs": [],
+                "stateMutability": "nonpayable",
+                "type": "function"
             }
         ]
     
-    def estimate_gas_cost(self, token_a: str, amount: int) -> Dict:
+    def estimate_gas_cost(self, token_a: str, amount: int, dexes: Sequence[str] = ('uniswap_v2', 'sushiswap'),
+                          kind: str = 'arbitrage') -> Dict:
         """تقدير تكلفة الغاز للمعاملة"""
         try:
             if not self.w3:
                 return {'success': False, 'error': 'Web3 غير مهيأ'}
             
-            # تقدير الغاز للقرض السريع
-            estimated_gas = 800000  # تقدير تقريبي
-            gas_price = self.w3.eth.gas_price
+            # تقدير الغاز من نموذج شكل المسار (متعلم من الإيصالات السابقة)
+            token = self.token_addresses.get(token_a, token_a)
+            estimated_gas = self.gas_model.estimate(self.gas_model.shape(dexes, token, kind))
+            
+            # القيم المخزنة للكتلة الحالية دون استدعاء RPC لكل فرصة
+            gas_price = None
+            if self.gas_oracle and self.gas_oracle.ready:
+                gas_price = self.gas_oracle.effective_gas_price(self.GAS_SPEED)
+            if gas_price is None:
+                gas_price = self.w3.eth.gas_price
             
             total_cost_wei = estimated_gas * gas_price
             total_cost_eth = self.w3.from_wei(total_cost_wei, 'ether')
@@ -442,4 +1192,59 @@ class FlashLoanManager:
         except Exception as e:
             self.logger.error(f"خطأ في الحصول على معلومات الشبكة: {e}")
             return {}
-
+    
+    async def get_network_info_async(self) -> Dict:
+        """معلومات الشبكة في طلب دفعي واحد بدلاً من خمسة استدعاءات"""
+        try:
+            if not self.rpc:
+                return {}
+            
+            calls = [
+                ('eth_chainId', []),
+                ('eth_blockNumber', []),
+                ('eth_gasPrice', [])
+            ]
+            if self.account:
+                calls.append(('eth_getBalance', [self.account.address, 'latest']))
+            
+            results = await self.rpc.batch(calls)
+            
+            return {
+                'connected': True,
+                'chain_id': int(results[0], 16),
+                'latest_block': int(results[1], 16),
+                'gas_price_gwei': float(Web3.from_wei(int(results[2], 16), 'gwei')),
+                'account_address': self.account.address if self.account else None,
+                'account_balance_eth': float(Web3.from_wei(int(results[3], 16), 'ether')) if self.account else 0,
+                'rpc_endpoints': self.rpc.status(),
+                'flash_loan_liquidity': self.flash_providers.status()
+            }
+            
+        except Exception as e:
+            self.logger.error(f"خطأ في الحصول على معلومات الشبكة: {e}")
+            return {'connected': False, 'rpc_endpoints': self.rpc.status() if self.rpc else []}
+    
+    async def get_contract_state(self, tokens: Optional[List[str]] = None) -> Dict:
+        """أرصدة العقد وأرباحه لجميع الرموز في eth_call واحد عبر Multicall"""
+        try:
+            if not self.contract_address or not self.multicall:
+                return {}
+            
+            tokens = tokens or list(self.token_addresses.keys())
+            addresses = [self.token_addresses.get(token, token) for token in tokens]
+            
+            specs = []
+            for address in addresses:
+                specs.append((self.contract_address, 'getTokenBalance(address)', [address], ['uint256']))
+                specs.append((self.contract_address, 'tokenProfits(address)', [address], ['uint256']))
+            
+            results = await self.multicall.call(specs)
+            
+            return {
+                token: {'balance': results[2 * i] or 0, 'profits': results[2 * i + 1] or 0}
+                for i, token in enumerate(tokens)
+            }
+            
+        except Exception as e:
+            self.logger.error(f"خطأ في قراءة حالة العقد: {e}")
+            return {}
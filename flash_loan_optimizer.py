@@ -0,0 +1,126 @@
+"""
+حساب مبلغ القرض السريع الأمثل لمراجحة بين مجمعين بمنتج ثابت
+"""
+
+import logging
+import math
+from itertools import permutations
+from typing import Dict, List, Optional, Tuple
+
+from config import Config
+from amm_quoter import (AMMQuoter, DEFAULT_FEE_DENOMINATOR, DEFAULT_FEE_NUMERATOR,
+                        flash_loan_fee, get_amount_out)
+
+V2_FEE = (DEFAULT_FEE_NUMERATOR, DEFAULT_FEE_DENOMINATOR)
+
+def optimal_amount_in(reserve_a_buy: int, reserve_b_buy: int, reserve_b_sell: int, reserve_a_sell: int,
+                      buy_fee: Tuple[int, int] = V2_FEE, sell_fee: Tuple[int, int] = V2_FEE,
+                      flash_fee: float = Config.FLASH_LOAN_FEE) -> float:
+    """
+    الحل التحليلي لمبلغ الدخل الذي يعظم الربح (0 إذا لم تكن المراجحة مربحة)
+    
+    المخرجات المركبة للمسار A→B→A هي z(x) = A·x / (B + C·x) حيث:
+    A = γ1·γ2·b1·a2، B = a1·b2، C = γ1·b2 + γ1·γ2·b1، و γ = نسبة ما بعد رسوم التبادل.
+    بمساواة المشتقة بـ (1 + رسوم القرض): x* = (√(A·B / (1 + f)) − B) / C
+    """
+    gamma_buy = buy_fee[0] / buy_fee[1]
+    gamma_sell = sell_fee[0] / sell_fee[1]
+    a = gamma_buy * gamma_sell * reserve_b_buy * reserve_a_sell
+    b = reserve_a_buy * reserve_b_sell
+    c = gamma_buy * reserve_b_sell + gamma_buy * gamma_sell * reserve_b_buy
+    
+    # السعر الحدي عند الصفر يجب أن يتجاوز تكلفة الاقتراض
+    if b <= 0 or c <= 0 or a <= b * (1 + flash_fee):
+        return 0.0
+        
+    return (math.sqrt(a * b / (1 + flash_fee)) - b) / c
+
+def exact_profit(amount_in: int, reserve_a_buy: int, reserve_b_buy: int, reserve_b_sell: int,
+                 reserve_a_sell: int, buy_fee: Tuple[int, int] = V2_FEE,
+                 sell_fee: Tuple[int, int] = V2_FEE) -> int:
+    """الربح بعد رسوم القرض بحساب صحيح مطابق للعقد (قد يكون سالباً)"""
+    if amount_in <= 0:
+        return 0
+    token_b_amount = get_amount_out(amount_in, reserve_a_buy, reserve_b_buy, *buy_fee)
+    if token_b_amount <= 0:
+        return -amount_in
+    token_a_received = get_amount_out(token_b_amount, reserve_b_sell, reserve_a_sell, *sell_fee)
+    return token_a_received - amount_in - flash_loan_fee(amount_in)
+
+class FlashLoanOptimizer:
+    """تحديد حجم القرض الأمثل لكل زوج مجمعات من الاحتياطيات المخزنة"""
+    
+    def __init__(self, quoter: AMMQuoter):
+        self.logger = logging.getLogger(__name__)
+        self.quoter = quoter
+    
+    @staticmethod
+    def refine(amount: int, profit_fn, max_amount: Optional[int] = None) -> int:
+        """تحسين الحل التحليلي على الأعداد الصحيحة (تسلق تلال بخطوات متناقصة)"""
+        upper = max_amount if max_amount is not None else amount * 2 + 1
+        amount = max(1, min(amount, upper))
+        best_profit = profit_fn(amount)
+        step = max(1, amount // 10 ** 6)
+        
+        while True:
+            improved = False
+            for candidate in (amount - step, amount + step):
+                if 1 <= candidate <= upper:
+                    profit = profit_fn(candidate)
+                    if profit > best_profit:
+                        amount, best_profit = candidate, profit
+                        improved = True
+            if not improved:
+                if step == 1:
+                    return amount
+                step //= 2
+    
+    def optimize(self, token_a: str, token_b: str, buy_dex: str, sell_dex: str,
+                 gas_cost: int = 0, max_amount: Optional[int] = None) -> Dict:
+        """
+        مبلغ القرض الأمثل لشراء B بـ A على buy_dex وبيعه على sell_dex
+        
+        gas_cost بوحدات A الأساسية، ويُطرح من الربح لتحديد الجدوى فقط (لا يغير المبلغ الأمثل).
+        """
+        result = {
+            'token_a': token_a, 'token_b': token_b,
+            'buy_dex': buy_dex, 'sell_dex': sell_dex,
+            'amount_in': 0, 'expected_profit': 0, 'net_profit': -gas_cost, 'profitable': False
+        }
+        
+        buy = self.quoter.get_reserves(buy_dex, token_a, token_b)
+        sell = self.quoter.get_reserves(sell_dex, token_b, token_a)
+        if buy is None or sell is None:
+            return result
+            
+        buy_fee = self.quoter.DEX_FEES.get(buy_dex, V2_FEE)
+        sell_fee = self.quoter.DEX_FEES.get(sell_dex, V2_FEE)
+        
+        analytic = optimal_amount_in(buy[0], buy[1], sell[0], sell[1], buy_fee, sell_fee)
+        if analytic < 1:
+            return result
+            
+        def profit_fn(amount: int) -> int:
+            return exact_profit(amount, buy[0], buy[1], sell[0], sell[1], buy_fee, sell_fee)
+            
+        amount = self.refine(int(analytic), profit_fn, max_amount)
+        profit = profit_fn(amount)
+        
+        result.update({
+            'amount_in': amount,
+            'expected_profit': max(profit, 0),
+            'net_profit': profit - gas_cost,
+            'profitable': profit - gas_cost > 0
+        })
+        return result
+    
+    def best_for_pair(self, token_a: str, token_b: str, dexes: Optional[List[str]] = None,
+                      gas_cost: int = 0, max_amount: Optional[int] = None) -> Optional[Dict]:
+        """أفضل مراجحة مربحة لزوج عبر جميع أزواج المنصات المتاحة"""
+        dexes = dexes or list(self.quoter.DEX_FEES)
+        best = None
+        for buy_dex, sell_dex in permutations(dexes, 2):
+            result = self.optimize(token_a, token_b, buy_dex, sell_dex, gas_cost, max_amount)
+            if result['profitable'] and (best is None or result['net_profit'] > best['net_profit']):
+                best = result
+        return best
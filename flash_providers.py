@@ -0,0 +1,239 @@
+"""
+مزودو القروض السريعة (Aave، خزنة Balancer، تبادل V2 السريع) واختيار أرخص مصدر لكل أصل ومبلغ
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional, Set
+
+from amm_quoter import AMMQuoter, BPS_BASE, FLASH_LOAN_FEE_BPS
+from multicall import Multicall
+
+# معرفات المزودين في FlashSource بالعقد
+PROVIDER_AAVE = 0
+PROVIDER_BALANCER = 1
+PROVIDER_V2_PAIR = 2
+
+PROVIDER_NAMES = {
+    PROVIDER_AAVE: 'aave',
+    PROVIDER_BALANCER: 'balancer',
+    PROVIDER_V2_PAIR: 'v2_pair'
+}
+
+ZERO_ADDRESS = '0x' + '0' * 40
+
+# مقياس نسبة رسوم Balancer (10^18 = 100%)
+BALANCER_FEE_SCALE = 10 ** 18
+
+# بتات إعدادات الاحتياطي في Aave V3 (ReserveConfiguration)
+AAVE_ACTIVE_BIT = 56
+AAVE_PAUSED_BIT = 60
+AAVE_FLASHLOAN_ENABLED_BIT = 63
+
+# مخرجات getReserveData في Aave V3 (عنوان aToken في الحقل 8)
+AAVE_RESERVE_DATA = ['uint256', 'uint128', 'uint128', 'uint128', 'uint128', 'uint128', 'uint40', 'uint16',
+                     'address', 'address', 'address', 'address', 'uint128', 'uint128', 'uint128']
+AAVE_A_TOKEN_FIELD = 8
+
+def aave_premium(amount: int, premium_bps: int = FLASH_LOAN_FEE_BPS) -> int:
+    """رسوم قرض Aave (percentMul بتقريب النصف للأعلى كما في المجمع)"""
+    return (amount * premium_bps + BPS_BASE // 2) // BPS_BASE
+
+def balancer_fee(amount: int, fee_percentage: int) -> int:
+    """رسوم قرض Balancer (mulUp كما في الخزنة)"""
+    return -(-amount * fee_percentage // BALANCER_FEE_SCALE)
+
+def v2_flash_fee(amount: int) -> int:
+    """رسوم تبادل V2 السريع عند السداد بنفس الرمز (مطابقة لـ uniswapV2Call في العقد)"""
+    return (amount * 1000 + 996) // 997 - amount
+
+class FlashLoanProviders:
+    """
+    مصادر القرض السريع لأصول شبكة واحدة واختيار الأرخص لكل مبلغ
+    
+    السيولة المتاحة (رصيد الأصل لدى aToken في Aave ولدى خزنة Balancer) ورسوم
+    المزودين تُقرأ مرة لكل كتلة في eth_call واحد عبر Multicall، وسيولة أزواج
+    V2 من احتياطيات الذاكرة دون RPC. قبل أول تحديث يُفترض Aave برسومه
+    الافتراضية دون قيد سيولة.
+    """
+    
+    def __init__(self, multicall: Optional[Multicall], chain: Dict, assets: Iterable[str], pairs=None):
+        self.logger = logging.getLogger(__name__)
+        self.multicall = multicall
+        self.addresses_provider = chain.get('aave_pool_addresses_provider')
+        self.balancer_vault = chain.get('balancer_vault')
+        self.assets = [asset.lower() for asset in assets]
+        # مصدر أزواج V2 (ReserveCache): reserves و pairs بمفتاح (dex, token0, token1)
+        self.pairs = pairs
+        
+        self.aave_pool = None
+        self.a_tokens = {}  # الأصل -> عنوان aToken (None إذا لم يكن القرض متاحاً)
+        self.fee_collector = None  # جامع رسوم Balancer (مصدر نسبة رسوم القرض)
+        self.aave_premium_bps = FLASH_LOAN_FEE_BPS
+        self.balancer_fee_percentage = 0
+        
+        self.liquidity = {}  # (المزود، الأصل) -> السيولة المتاحة في آخر كتلة
+        self.block = None
+    
+    @property
+    def loaded(self) -> bool:
+        """التحقق من قراءة السيولة من السلسلة مرة على الأقل"""
+        return self.block is not None
+    
+    @staticmethod
+    def _a_token(reserve_data) -> Optional[str]:
+        """عنوان aToken لاحتياطي نشط غير موقوف ويسمح بالقروض السريعة"""
+        if reserve_data is None:
+            return None
+        configuration, a_token = reserve_data[0], reserve_data[AAVE_A_TOKEN_FIELD]
+        if a_token.lower() == ZERO_ADDRESS:
+            return None
+        if not (configuration >> AAVE_ACTIVE_BIT) & 1 or (configuration >> AAVE_PAUSED_BIT) & 1:
+            return None
+        if not (configuration >> AAVE_FLASHLOAN_ENABLED_BIT) & 1:
+            return None
+        return a_token
+    
+    async def _load_static(self):
+        """العناوين الثابتة مرة واحدة: مجمع Aave وعقود aToken وجامع رسوم Balancer"""
+        if self.addresses_provider and self.aave_pool is None:
+            self.aave_pool = (await self.multicall.call([
+                (self.addresses_provider, 'getPool()', [], ['address'])
+            ]))[0]
+            if self.aave_pool:
+                reserves = await self.multicall.call([
+                    (self.aave_pool, 'getReserveData(address)', [asset], AAVE_RESERVE_DATA)
+                    for asset in self.assets
+                ])
+                self.a_tokens = {asset: self._a_token(data) for asset, data in zip(self.assets, reserves)}
+                
+        if self.balancer_vault and self.fee_collector is None:
+            self.fee_collector = (await self.multicall.call([
+                (self.balancer_vault, 'getProtocolFeesCollector()', [], ['address'])
+            ]))[0]
+    
+    async def refresh(self, block: Optional[int] = None) -> Set[str]:
+        """
+        قراءة السيولة والرسوم مرة لكل كتلة
+        
+        تعيد الأصول التي تغير أرخص معدل رسوم لها (تؤثر على عتبة ربحية مساراتها).
+        """
+        if self.multicall is None or (block is not None and block == self.block):
+            return set()
+            
+        try:
+            await self._load_static()
+            
+            specs, keys = [], []
+            for asset in self.assets:
+                a_token = self.a_tokens.get(asset)
+                if a_token:
+                    specs.append((asset, 'balanceOf(address)', [a_token], ['uint256']))
+                    keys.append((PROVIDER_AAVE, asset))
+                if self.balancer_vault:
+                    specs.append((asset, 'balanceOf(address)', [self.balancer_vault], ['uint256']))
+                    keys.append((PROVIDER_BALANCER, asset))
+                    
+            fee_specs = []
+            if self.aave_pool:
+                fee_specs.append((self.aave_pool, 'FLASHLOAN_PREMIUM_TOTAL()', [], ['uint128']))
+            if self.fee_collector:
+                fee_specs.append((self.fee_collector, 'getFlashLoanFeePercentage()', [], ['uint256']))
+                
+            results = await self.multicall.call(specs + fee_specs, block)
+            rates_before = {asset: self.fee_rate(asset) for asset in self.assets}
+            
+            self.liquidity = {
+                key: value for key, value in zip(keys, results) if value
+            }
+            fees = results[len(specs):]
+            if self.aave_pool and fees[0] is not None:
+                self.aave_premium_bps = fees[0]
+            if self.fee_collector and fees[-1] is not None:
+                self.balancer_fee_percentage = fees[-1]
+            self.block = block if block is not None else self.multicall.cache_block
+            
+            return {asset for asset in self.assets if self.fee_rate(asset) != rates_before[asset]}
+            
+        except Exception as e:
+            self.logger.error(f"خطأ في تحديث سيولة القروض السريعة: {e}")
+            return set()
+    
+    def sources(self, asset: str, exclude: Iterable = ()) -> List[Dict]:
+        """
+        مصادر القرض المتاحة لأصل: {'provider', 'lender', 'available'}
+        
+        exclude مفاتيح مجمعات (dex, token0, token1) يمر بها المسار: الزوج المقرض
+        يبقى مقفلاً حتى السداد فلا يصلح للاقتراض منه.
+        """
+        asset = asset.lower()
+        if not self.loaded:
+            return [{'provider': PROVIDER_AAVE, 'lender': ZERO_ADDRESS, 'available': None}]
+            
+        sources = []
+        for provider in (PROVIDER_AAVE, PROVIDER_BALANCER):
+            available = self.liquidity.get((provider, asset), 0)
+            if available > 0:
+                sources.append({'provider': provider, 'lender': ZERO_ADDRESS, 'available': available})
+                
+        if self.pairs is not None:
+            exclude = set(exclude)
+            for key, reserves in self.pairs.reserves.items():
+                dex, token0, token1 = key
+                if dex not in AMMQuoter.DEX_FEES or key in exclude or asset not in (token0, token1):
+                    continue
+                lender = self.pairs.pairs.get(key)
+                # يبقى واحد على الأقل في الزوج بعد الاقتراض
+                available = (reserves[0] if asset == token0 else reserves[1]) - 1
+                if lender and available > 0:
+                    sources.append({'provider': PROVIDER_V2_PAIR, 'lender': lender, 'available': available})
+        return sources
+    
+    def fee(self, provider: int, amount: int) -> int:
+        """رسوم القرض لدى مزود بوحدات الأصل الأساسية"""
+        if provider == PROVIDER_BALANCER:
+            return balancer_fee(amount, self.balancer_fee_percentage)
+        if provider == PROVIDER_V2_PAIR:
+            return v2_flash_fee(amount)
+        return aave_premium(amount, self.aave_premium_bps)
+    
+    def rate(self, provider: int) -> float:
+        """معدل رسوم المزود كنسبة من المبلغ (للحساب التحليلي)"""
+        if provider == PROVIDER_BALANCER:
+            return self.balancer_fee_percentage / BALANCER_FEE_SCALE
+        if provider == PROVIDER_V2_PAIR:
+            return 1000 / 997 - 1
+        return self.aave_premium_bps / BPS_BASE
+    
+    def fee_rate(self, asset: str, exclude: Iterable = ()) -> Optional[float]:
+        """أقل معدل رسوم بين المصادر المتاحة للأصل (None إذا لم يوجد مصدر)"""
+        rates = [self.rate(source['provider']) for source in self.sources(asset, exclude)]
+        return min(rates) if rates else None
+    
+    def max_available(self, asset: str, exclude: Iterable = ()) -> Optional[int]:
+        """أكبر مبلغ يمكن اقتراضه من مصدر واحد (None قبل أول تحديث)"""
+        if not self.loaded:
+            return None
+        return max((source['available'] for source in self.sources(asset, exclude)), default=0)
+    
+    def select(self, asset: str, amount: int, exclude: Iterable = ()) -> Optional[Dict]:
+        """
+        أرخص مصدر يغطي المبلغ: {'provider', 'name', 'lender', 'available', 'fee'}
+        
+        عند تساوي الرسوم يُفضل الترتيب Aave ثم Balancer ثم أزواج V2، وبين
+        الأزواج الأعمق سيولة. None إذا لم يغطِ أي مصدر المبلغ.
+        """
+        candidates = [
+            dict(source, name=PROVIDER_NAMES[source['provider']], fee=self.fee(source['provider'], amount))
+            for source in self.sources(asset, exclude)
+            if source['available'] is None or source['available'] >= amount
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda c: (c['fee'], c['provider'], -(c['available'] or 0)))
+    
+    def status(self) -> Dict[str, Dict]:
+        """السيولة المتاحة لكل أصل ومزود (للسجلات ومعلومات الشبكة)"""
+        status = {}
+        for (provider, asset), available in self.liquidity.items():
+            status.setdefault(asset, {})[PROVIDER_NAMES[provider]] = available
+        return status
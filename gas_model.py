@@ -0,0 +1,113 @@
+"""
+نموذج استهلاك الغاز حسب شكل المسار (المنصات، عدد الخطوات، الرمز)
+"""
+
+import logging
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# شكل المسار: (النوع، المنصات بالترتيب، عدد الخطوات، الرمز المقترض)
+RouteShape = Tuple[str, Tuple[str, ...], int, str]
+
+class GasModel:
+    """
+    تقدير الغاز لكل شكل مسار يتعلم من eth_estimateGas ومن gasUsed الفعلي
+    
+    القيمة المعتمدة هي المتوسط المتحرك الأسي لـ gasUsed من الإيصالات، وإن لم
+    تتوفر فآخر نتيجة eth_estimateGas، وإلا تقدير افتراضي خطي بعدد الخطوات.
+    تُعاد تقديرات الأشكال القديمة دورياً من قالب آخر معاملة لها.
+    """
+    
+    # تقدير افتراضي: تكلفة القرض السريع الثابتة + تكلفة كل تبادل
+    BASE_GAS = 300000
+    PER_HOP_GAS = 150000
+    
+    def __init__(self, alpha: float = 0.3, limit_margin: float = 1.3,
+                 refresh_interval: float = 600):
+        self.logger = logging.getLogger(__name__)
+        self.alpha = alpha  # وزن العينة الجديدة في المتوسط
+        self.limit_margin = limit_margin  # هامش حد الغاز فوق الاستهلاك المتوقع
+        self.refresh_interval = refresh_interval
+        
+        self.entries = {}  # شكل المسار -> بيانات التعلم
+    
+    @staticmethod
+    def shape(dexes: Sequence[str], token: str, kind: str = 'arbitrage') -> RouteShape:
+        """مفتاح شكل المسار"""
+        return (kind, tuple(dexes), len(dexes), token.lower())
+    
+    def default(self, shape: RouteShape) -> int:
+        """التقدير الافتراضي قبل أي عينة"""
+        return self.BASE_GAS + self.PER_HOP_GAS * shape[2]
+    
+    def _entry(self, shape: RouteShape) -> Dict:
+        """بيانات شكل المسار (تُنشأ عند أول استخدام)"""
+        entry = self.entries.get(shape)
+        if entry is None:
+            entry = self.entries[shape] = {
+                'used': None,  # المتوسط المتحرك لـ gasUsed
+                'samples': 0,
+                'estimated': None,  # آخر نتيجة eth_estimateGas
+                'updated_at': 0.0,
+                'transaction': None  # قالب آخر معاملة لإعادة التقدير
+            }
+        return entry
+    
+    def estimate(self, shape: RouteShape) -> int:
+        """الغاز المتوقع استهلاكه (لحساب التكلفة)"""
+        entry = self.entries.get(shape)
+        if entry is not None:
+            if entry['used'] is not None:
+                return int(entry['used'])
+            if entry['estimated'] is not None:
+                return entry['estimated']
+                
+        # شكل غير معروف: أقرب شكل بنفس النوع وعدد الخطوات
+        similar = [
+            int(e['used']) for s, e in self.entries.items()
+            if s[0] == shape[0] and s[2] == shape[2] and e['used'] is not None
+        ]
+        if similar:
+            return max(similar)
+        return self.default(shape)
+    
+    def gas_limit(self, shape: RouteShape) -> int:
+        """حد الغاز للمعاملة"""
+        entry = self.entries.get(shape)
+        if entry is not None and entry['estimated'] is not None:
+            # eth_estimateGas يغطي استرداد التخزين والحد الأدنى للاستدعاءات الفرعية
+            return max(int(entry['estimated'] * 1.1), int(self.estimate(shape) * self.limit_margin))
+        return int(self.estimate(shape) * self.limit_margin)
+    
+    def remember_transaction(self, shape: RouteShape, transaction: Dict):
+        """حفظ قالب المعاملة لإعادة التقدير الدوري"""
+        template = {k: v for k, v in transaction.items() if k in ('from', 'to', 'data', 'value')}
+        self._entry(shape)['transaction'] = template
+    
+    def record_estimate(self, shape: RouteShape, gas: int):
+        """تسجيل نتيجة eth_estimateGas"""
+        entry = self._entry(shape)
+        entry['estimated'] = gas
+        entry['updated_at'] = time.time()
+    
+    def record_receipt(self, shape: RouteShape, gas_used: int):
+        """تسجيل gasUsed الفعلي من إيصال معاملة ناجحة"""
+        entry = self._entry(shape)
+        if entry['used'] is None:
+            entry['used'] = float(gas_used)
+        else:
+            entry['used'] += self.alpha * (gas_used - entry['used'])
+        entry['samples'] += 1
+        entry['updated_at'] = time.time()
+    
+    def stale_shapes(self, now: Optional[float] = None) -> List[Tuple[RouteShape, Dict]]:
+        """الأشكال التي تحتاج إعادة تقدير مع قوالب معاملاتها"""
+        now = now if now is not None else time.time()
+        return [
+            (shape, entry['transaction']) for shape, entry in self.entries.items()
+            if entry['transaction'] is not None and now - entry['updated_at'] >= self.refresh_interval
+        ]
+    
+    def mark_refreshed(self, shape: RouteShape):
+        """تأجيل إعادة التقدير التالية (حتى عند فشل eth_estimateGas)"""
+        self._entry(shape)['updated_at'] = time.time()
@@ -0,0 +1,129 @@
+"""
+أوراكل أسعار الغاز من eth_feeHistory (EIP-1559) مع تخزين لكل كتلة
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+from async_rpc import AsyncRPCClient
+
+class GasOracle:
+    """
+    رسوم الغاز المحدثة مرة لكل كتلة من eth_feeHistory
+    
+    يحتفظ بالرسوم الأساسية للكتلة التالية ونسب رسوم الأولوية المئوية عبر آخر
+    block_count كتلة، وتُقرأ القيم المخزنة دون أي استدعاء RPC لكل فرصة. على
+    الشبكات التي لا تدعم EIP-1559 يعود إلى gasPrice التقليدي.
+    """
+    
+    # سرعة التضمين -> النسبة المئوية لرسوم الأولوية
+    SPEEDS = {'slow': 10, 'standard': 50, 'fast': 90}
+    
+    # هامش الرسوم الأساسية في maxFeePerGas (تحمل ارتفاع 12.5% لعدة كتل متتالية)
+    BASE_FEE_MULTIPLIER = 2
+    
+    def __init__(self, rpc: AsyncRPCClient, block_count: int = 20, min_priority_fee: int = 0):
+        self.logger = logging.getLogger(__name__)
+        self.rpc = rpc
+        self.block_count = block_count
+        self.min_priority_fee = min_priority_fee  # حد الشبكة الأدنى (مثل Polygon)
+        
+        self.block_number = None
+        self.base_fee = None  # الرسوم الأساسية المتوقعة للكتلة التالية
+        self.priority_fees = {}  # النسبة المئوية -> رسوم الأولوية (wei)
+        self.gas_price = None  # سعر الغاز التقليدي (للشبكات دون EIP-1559)
+        self.supports_eip1559 = True
+    
+    @property
+    def ready(self) -> bool:
+        """التحقق من وجود قيم مخزنة"""
+        return self.base_fee is not None or self.gas_price is not None
+    
+    @staticmethod
+    def _median(values: List[int]) -> int:
+        """الوسيط لقائمة أعداد صحيحة"""
+        ordered = sorted(values)
+        middle = len(ordered) // 2
+        if len(ordered) % 2:
+            return ordered[middle]
+        return (ordered[middle - 1] + ordered[middle]) // 2
+    
+    def apply_fee_history(self, history: Dict):
+        """تحديث القيم المخزنة من نتيجة eth_feeHistory"""
+        base_fees = [int(fee, 16) for fee in history.get('baseFeePerGas') or []]
+        rewards = history.get('reward') or []
+        
+        self.block_number = int(history['oldestBlock'], 16) + max(len(base_fees) - 2, 0)
+        self.supports_eip1559 = bool(base_fees) and base_fees[-1] > 0
+        if not self.supports_eip1559:
+            self.base_fee = None
+            return
+            
+        # العنصر الأخير هو الرسوم الأساسية للكتلة التالية
+        self.base_fee = base_fees[-1]
+        
+        percentiles = sorted(self.SPEEDS.values())
+        self.priority_fees = {}
+        for column, percentile in enumerate(percentiles):
+            values = [int(block[column], 16) for block in rewards if len(block) > column]
+            self.priority_fees[percentile] = self._median(values) if values else 0
+    
+    async def refresh(self, block_number: Optional[int] = None) -> bool:
+        """
+        تحديث الرسوم إذا تغيرت الكتلة (بدون RPC إذا كانت القيم لنفس الكتلة)
+        
+        block_number: رقم الكتلة الحالية إذا كان معروفاً مسبقاً لدى المستدعي.
+        """
+        if block_number is not None and block_number == self.block_number:
+            return True
+            
+        try:
+            history = await self.rpc.call('eth_feeHistory', [
+                hex(self.block_count), 'latest', sorted(self.SPEEDS.values())
+            ])
+            self.apply_fee_history(history)
+            
+            if not self.supports_eip1559:
+                self.gas_price = await self.rpc.gas_price()
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"خطأ في تحديث رسوم الغاز: {e}")
+            # الشبكات القديمة: سعر الغاز التقليدي
+            try:
+                self.gas_price = await self.rpc.gas_price()
+                self.supports_eip1559 = False
+                self.block_number = block_number
+                return True
+            except Exception as e:
+                self.logger.error(f"خطأ في الحصول على سعر الغاز: {e}")
+                return False
+    
+    def priority_fee(self, speed: str = 'standard') -> int:
+        """رسوم الأولوية لسرعة التضمين المطلوبة"""
+        return max(self.priority_fees.get(self.SPEEDS[speed], 0), self.min_priority_fee)
+    
+    def effective_gas_price(self, speed: str = 'standard') -> Optional[int]:
+        """السعر المتوقع دفعه لكل وحدة غاز (لحساب الربحية)"""
+        if not self.ready:
+            return None
+        if not self.supports_eip1559:
+            return self.gas_price
+        return self.base_fee + self.priority_fee(speed)
+    
+    def transaction_fees(self, speed: str = 'standard') -> Dict:
+        """حقول الرسوم للمعاملة: EIP-1559 أو gasPrice التقليدي"""
+        if not self.supports_eip1559:
+            return {'gasPrice': self.gas_price}
+            
+        priority_fee = self.priority_fee(speed)
+        return {
+            'type': 2,
+            'maxPriorityFeePerGas': priority_fee,
+            'maxFeePerGas': self.base_fee * self.BASE_FEE_MULTIPLIER + priority_fee
+        }
+    
+    def estimate_cost(self, gas: int, speed: str = 'standard') -> Optional[int]:
+        """تكلفة كمية غاز بالـ wei من القيم المخزنة"""
+        gas_price = self.effective_gas_price(speed)
+        return gas * gas_price if gas_price is not None else None
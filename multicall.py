@@ -0,0 +1,130 @@
+"""
+تجميع استدعاءات القراءة عبر Multicall3 في eth_call واحد
+"""
+
+import logging
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from eth_abi import decode, encode
+from web3 import Web3
+
+from async_rpc import AsyncRPCClient
+
+# عنوان Multicall3 الموحد على معظم الشبكات
+MULTICALL3_ADDRESS = '0xcA11bde05977b3631167028862bE2a173976CA11'
+
+_selector_cache = {}
+
+def function_selector(signature: str) -> bytes:
+    """أول 4 بايت من keccak لتوقيع الدالة"""
+    selector = _selector_cache.get(signature)
+    if selector is None:
+        selector = _selector_cache[signature] = bytes(Web3.keccak(text=signature)[:4])
+    return selector
+
+def encode_call(signature: str, args: Sequence = ()) -> bytes:
+    """ترميز استدعاء دالة من توقيعها، مثل 'balanceOf(address)'"""
+    arg_types = signature[signature.index('(') + 1:-1]
+    if '(' in arg_types:
+        raise ValueError(f"الأنواع المركبة غير مدعومة في التوقيع: {signature}")
+    types = [t for t in arg_types.split(',') if t]
+    return function_selector(signature) + (encode(types, list(args)) if types else b'')
+
+class Multicall:
+    """
+    تجميع استدعاءات view في eth_call واحد لكل كتلة مع ذاكرة نتائج قصيرة
+    
+    كل استدعاء يُوصف بـ (العنوان، التوقيع، المعاملات، أنواع المخرجات)، وتُعاد
+    النتائج مفكوكة بنفس الترتيب (None للاستدعاء الفاشل).
+    """
+    
+    AGGREGATE3 = 'aggregate3((address,bool,bytes)[])'
+    GET_BLOCK_NUMBER = 'getBlockNumber()'
+    
+    def __init__(self, rpc: AsyncRPCClient, address: str = MULTICALL3_ADDRESS,
+                 cache_ttl: float = 2.0, max_calls: int = 500):
+        self.logger = logging.getLogger(__name__)
+        self.rpc = rpc
+        self.address = address
+        self.cache_ttl = cache_ttl
+        self.max_calls = max_calls
+        
+        self.cache = {}  # (target, calldata) -> (نجاح، البيانات الخام)
+        self.cache_block = None
+        self.cache_time = 0.0
+    
+    def encode_aggregate(self, calls: List[Tuple[str, bytes]]) -> Dict:
+        """معاملة eth_call لـ aggregate3 (تسمح بفشل الاستدعاءات الفردية)"""
+        data = function_selector(self.AGGREGATE3) + encode(
+            ['(address,bool,bytes)[]'],
+            [[(Web3.to_checksum_address(target), True, calldata) for target, calldata in calls]]
+        )
+        return {'to': self.address, 'data': '0x' + data.hex()}
+    
+    @staticmethod
+    def decode_aggregate(result: str) -> List[Tuple[bool, bytes]]:
+        """فك نتيجة aggregate3 إلى (نجاح، بيانات) لكل استدعاء"""
+        raw = bytes.fromhex(result[2:] if result.startswith('0x') else result)
+        return list(decode(['(bool,bytes)[]'], raw)[0])
+    
+    def _cache_valid(self, block: Optional[int]) -> bool:
+        """صلاحية الذاكرة: نفس الكتلة المطلوبة، أو حديثة بما يكفي لـ latest"""
+        if self.cache_block is None:
+            return False
+        if block is not None:
+            return block == self.cache_block
+        return time.time() - self.cache_time < self.cache_ttl
+    
+    async def call(self, specs: List[Tuple[str, str, Sequence, List[str]]],
+                   block: Optional[int] = None) -> List[Optional[Any]]:
+        """
+        تنفيذ مجموعة استدعاءات view وإعادة النتائج مفكوكة
+        
+        الاستدعاءات المخزنة للكتلة الحالية لا تُعاد، والباقي يُرسل في eth_call
+        واحد (أو أكثر إذا تجاوز العدد max_calls) مع رقم الكتلة.
+        """
+        if not self._cache_valid(block):
+            self.cache = {}
+            self.cache_block = None
+            
+        encoded = [(target.lower(), encode_call(signature, args)) for target, signature, args, _ in specs]
+        requested = list(dict.fromkeys(encoded))
+        missing = [key for key in requested if key not in self.cache]
+        
+        block_tag = hex(block) if block is not None else 'latest'
+        while missing:
+            chunk = missing[:self.max_calls]
+            # رقم الكتلة في نفس الاستدعاء لربط النتائج بها
+            calls = chunk + [(self.address, function_selector(self.GET_BLOCK_NUMBER))]
+            results = self.decode_aggregate(
+                await self.rpc.call('eth_call', [self.encode_aggregate(calls), block_tag])
+            )
+            
+            result_block = decode(['uint256'], results[-1][1])[0]
+            if result_block != self.cache_block:
+                # latest تقدم: نتائج الكتلة السابقة لا تُخلط مع الجديدة
+                self.cache = {}
+                self.cache_block = result_block
+            self.cache_time = time.time()
+            
+            for key, (success, data) in zip(chunk, results[:-1]):
+                self.cache[key] = (success, data)
+                
+            # بقية الاستدعاءات (وما أُفرغ من الذاكرة) على نفس الكتلة
+            block_tag = hex(result_block)
+            missing = [key for key in requested if key not in self.cache]
+                
+        decoded = []
+        for key, (_, _, _, output_types) in zip(encoded, specs):
+            success, data = self.cache.get(key, (False, b''))
+            if not success or (output_types and not data):
+                decoded.append(None)
+                continue
+            try:
+                values = decode(output_types, data)
+                decoded.append(values[0] if len(values) == 1 else values)
+            except Exception:
+                decoded.append(None)
+                
+        return decoded
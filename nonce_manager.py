@@ -0,0 +1,134 @@
+"""
+مدير الـ nonce المحلي لمعاملات الحساب
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+class NonceManager:
+    """
+    توزيع الـ nonce محلياً وبشكل ذري بعد قراءة واحدة من الشبكة
+    
+    يتتبع المعاملات المرسلة غير المؤكدة، ويكتشف الفجوات (معاملات مُسقطة أو
+    nonce مُحرر) عند المطابقة مع عدد معاملات الحساب على الشبكة.
+    """
+    
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.next_nonce = None
+        self.pending = {}  # nonce -> {'tx_hash': str, 'sent_at': float}
+        self.released = set()  # nonce أُعيدت دون إرسال (فجوات محلية)
+        self.allocated = set()  # nonce محجوزة لم تُرسل بعد
+        self._lock = threading.Lock()
+    
+    @property
+    def initialized(self) -> bool:
+        """التحقق من قراءة الـ nonce الأولي"""
+        return self.next_nonce is not None
+    
+    def sync(self, chain_nonce: int):
+        """
+        تهيئة أو إعادة ضبط العداد من عدد المعاملات المعلقة على الشبكة
+        
+        الحجوزات الأقل من chain_nonce تُلغى (استخدمتها الشبكة)، أما الحجوزات
+        الأعلى فتبقى لمعاملات قيد البناء فلا تُوزع مرة ثانية: العداد يستأنف بعد
+        أكبرها، والأرقام الخالية بين chain_nonce وبينها تُعاد للتوزيع.
+        """
+        with self._lock:
+            self.allocated = {n for n in self.allocated if n >= chain_nonce}
+            self.next_nonce = max([chain_nonce] + [n + 1 for n in self.allocated])
+            self.pending = {n: tx for n, tx in self.pending.items() if n < chain_nonce}
+            self.released = set(range(chain_nonce, self.next_nonce)) - self.allocated
+        self.logger.info(f"تمت مزامنة الـ nonce: {chain_nonce}")
+    
+    def allocate(self) -> int:
+        """حجز الـ nonce التالي (يُعاد استخدام أصغر nonce مُحرر أولاً)"""
+        with self._lock:
+            if self.next_nonce is None:
+                raise RuntimeError("مدير الـ nonce غير مهيأ")
+                
+            if self.released:
+                nonce = min(self.released)
+                self.released.discard(nonce)
+            else:
+                nonce = self.next_nonce
+                self.next_nonce += 1
+                
+            self.allocated.add(nonce)
+            return nonce
+    
+    def mark_sent(self, nonce: int, tx_hash: str):
+        """تسجيل معاملة مرسلة بالـ nonce المحجوز"""
+        with self._lock:
+            self.allocated.discard(nonce)
+            self.pending[nonce] = {'tx_hash': tx_hash, 'sent_at': time.time()}
+    
+    def release(self, nonce: int):
+        """إعادة nonce لم تُرسل معاملته (فشل التوقيع أو الإرسال)"""
+        with self._lock:
+            self.pending.pop(nonce, None)
+            self.allocated.discard(nonce)
+            if nonce == self.next_nonce - 1:
+                self.next_nonce = nonce
+                # تقليص العداد عبر الفجوات المحررة المتتالية
+                while self.next_nonce - 1 in self.released:
+                    self.next_nonce -= 1
+                    self.released.discard(self.next_nonce)
+            else:
+                self.released.add(nonce)
+    
+    def confirm(self, nonce: int):
+        """إزالة معاملة بعد تعدينها"""
+        with self._lock:
+            self.pending.pop(nonce, None)
+    
+    def reconcile(self, latest_count: int, pending_count: int) -> Dict:
+        """
+        مطابقة الحالة المحلية مع الشبكة
+        
+        latest_count: عدد المعاملات المعدنة، pending_count: العدد مع المعاملات
+        المتتالية في mempool. أي nonce محلي >= pending_count لا تعرفه العقدة
+        (مُسقط أو خلف فجوة) ويجب إعادة إرساله أو إلغاؤه.
+        """
+        with self._lock:
+            if self.next_nonce is None:
+                self.next_nonce = pending_count
+                return {'mined': [], 'stuck': [], 'gap': None, 'resynced': True}
+                
+            # المعاملات المعدنة أو المستبدلة
+            mined = [n for n in self.pending if n < latest_count]
+            for n in mined:
+                del self.pending[n]
+            self.released = {n for n in self.released if n >= pending_count}
+            
+            # معاملات أُرسلت من خارج هذا المدير
+            if pending_count > self.next_nonce:
+                self.next_nonce = pending_count
+                
+            stuck = sorted(n for n in self.pending if n >= pending_count)
+            gap = pending_count if pending_count < self.next_nonce else None
+            
+            resynced = False
+            if gap is not None and not stuck and not self.allocated:
+                # لا توجد معاملات محلية خلف الفجوة: إعادة ضبط العداد
+                self.next_nonce = pending_count
+                self.released = set()
+                gap = None
+                resynced = True
+                
+        if stuck:
+            self.logger.warning(f"فجوة nonce عند {gap}، معاملات عالقة: {stuck}")
+            
+        return {'mined': mined, 'stuck': stuck, 'gap': gap, 'resynced': resynced}
+    
+    def get_pending(self) -> List[int]:
+        """قائمة الـ nonce المرسلة غير المؤكدة"""
+        with self._lock:
+            return sorted(self.pending)
+    
+    def get_tx_hash(self, nonce: int) -> Optional[str]:
+        """هاش المعاملة المرسلة بـ nonce معين"""
+        entry = self.pending.get(nonce)
+        return entry['tx_hash'] if entry else None
@@ -0,0 +1,255 @@
+"""
+لوحة أسعار موحدة للمنصات المركزية ومجمعات السلسلة وكشف فروق الأسعار بينها
+"""
+
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import Config
+
+# أنواع المنصات
+VENUE_CEX = 'cex'
+VENUE_DEX = 'dex'
+
+# أنواع الفرص حسب منصتي الشراء والبيع
+PAIR_CEX_CEX = 'cex_cex'
+PAIR_CEX_DEX = 'cex_dex'
+PAIR_DEX_DEX = 'dex_dex'
+
+def dex_venue_name(chain: str, dex: str) -> str:
+    """اسم منصة المجمع في اللوحة (المنصة ومستوى الرسوم على شبكة)"""
+    return f"{dex}@{chain}"
+
+class PriceBoard:
+    """
+    أسعار جميع المنصات بصيغة واحدة: {الزوج: {المنصة: عرض السعر}}
+    
+    المنصات المركزية تنشر أفضل bid/ask من التيكر وتُخصم رسوم Taker من نموذج
+    الرسوم، والمجمعات تنشر أسعاراً قابلة للتنفيذ لحجم مرجعي تتضمن رسوم المجمع
+    والانزلاق فتُسجل برسوم صفرية. الكشف في مرور واحد على جميع أزواج المنصات
+    (مركزية↔مركزية، مركزية↔مجمع، مجمع↔مجمع على نفس الشبكة).
+    """
+    
+    def __init__(self, fee_model, max_age: float = 30.0):
+        self.logger = logging.getLogger(__name__)
+        self.fee_model = fee_model
+        self.max_age = max_age  # أقصى عمر للعرض بالثواني قبل تجاهله
+        
+        self.venues = {}  # المنصة -> {'kind', 'chain', 'dex'}
+        self.quotes = {}  # الزوج -> المنصة -> عرض السعر
+    
+    def register_venue(self, name: str, kind: str = VENUE_CEX, chain: Optional[str] = None,
+                       dex: Optional[str] = None):
+        """تسجيل منصة (أسعار المجمعات صافية من رسومها فتُسجل برسوم صفرية)"""
+        self.venues[name] = {'kind': kind, 'chain': chain, 'dex': dex}
+        if kind == VENUE_DEX:
+            self.fee_model.set_venue_fee(name, 0.0)
+    
+    def venue(self, name: str) -> Dict:
+        """بيانات منصة (المنصات غير المسجلة مركزية)"""
+        return self.venues.get(name, {'kind': VENUE_CEX, 'chain': None, 'dex': None})
+    
+    def publish(self, venue: str, symbol: str, bid: float, ask: float, size: Optional[float] = None,
+                timestamp: Optional[float] = None, latency: Optional[float] = None):
+        """نشر عرض سعر منصة لزوج مع السعرين الصافيين بعد رسوم Taker"""
+        if not bid or not ask:
+            return
+        buy_multiplier, sell_multiplier = self.fee_model.get_net_multipliers(venue, symbol)
+        received = time.time()
+        self.quotes.setdefault(symbol, {})[venue] = {
+            'bid': bid,
+            'ask': ask,
+            'net_bid': bid * sell_multiplier,
+            'net_ask': ask * buy_multiplier,
+            'size': size,  # الكمية القابلة للتنفيذ بالسعر (None إذا لم تكن معروفة)
+            'timestamp': timestamp if timestamp is not None else received * 1000,
+            'latency': latency,
+            'received': received
+        }
+    
+    def publish_tickers(self, prices: Dict[str, Dict[str, Dict]]) -> int:
+        """نشر أسعار المنصات المركزية بصيغة ExchangeManager.fetch_all_prices"""
+        published = 0
+        for symbol, exchange_prices in prices.items():
+            for exchange_name, price_data in exchange_prices.items():
+                if price_data and price_data.get('bid') and price_data.get('ask'):
+                    self.publish(exchange_name, symbol, price_data['bid'], price_data['ask'],
+                                 timestamp=price_data.get('timestamp'), latency=price_data.get('latency'))
+                    published += 1
+        return published
+    
+    def fresh_quotes(self, symbol: str, now: Optional[float] = None) -> Dict[str, Dict]:
+        """عروض الزوج التي لم يتجاوز عمرها max_age"""
+        now = now if now is not None else time.time()
+        return {
+            venue: quote for venue, quote in self.quotes.get(symbol, {}).items()
+            if now - quote['received'] <= self.max_age
+        }
+    
+    def as_prices(self) -> Dict[str, Dict[str, Dict]]:
+        """العروض الحديثة بصيغة fetch_all_prices (لمحرك المخاطر)"""
+        now = time.time()
+        prices = {}
+        for symbol in self.quotes:
+            quotes = self.fresh_quotes(symbol, now)
+            if quotes:
+                prices[symbol] = {
+                    venue: {'bid': quote['bid'], 'ask': quote['ask'], 'timestamp': quote['timestamp'],
+                            'latency': quote['latency']}
+                    for venue, quote in quotes.items()
+                }
+        return prices
+    
+    def pair_kind(self, buy_venue: str, sell_venue: str) -> Optional[str]:
+        """نوع الفرصة بين منصتين (None لمجمعين على شبكتين مختلفتين)"""
+        buy, sell = self.venue(buy_venue), self.venue(sell_venue)
+        if buy['kind'] == VENUE_CEX and sell['kind'] == VENUE_CEX:
+            return PAIR_CEX_CEX
+        if buy['kind'] == VENUE_DEX and sell['kind'] == VENUE_DEX:
+            return PAIR_DEX_DEX if buy['chain'] == sell['chain'] else None
+        return PAIR_CEX_DEX
+    
+    def _opportunity(self, symbol: str, kind: str, buy_venue: str, sell_venue: str,
+                     buy: Dict, sell: Dict, net_profit_percentage: float) -> Dict:
+        """فرصة بصيغة ExchangeManager.find_arbitrage_opportunities مع بيانات المنصات"""
+        buy_info, sell_info = self.venue(buy_venue), self.venue(sell_venue)
+        sizes = [size for size in (buy['size'], sell['size']) if size is not None]
+        return {
+            'symbol': symbol,
+            'kind': kind,
+            'buy_exchange': buy_venue,
+            'sell_exchange': sell_venue,
+            'buy_price': buy['ask'],
+            'sell_price': sell['bid'],
+            'profit_percentage': ((sell['bid'] - buy['ask']) / buy['ask']) * 100,
+            'net_profit_percentage': net_profit_percentage,
+            'profit_amount': sell['bid'] - buy['ask'],
+            'buy_fee_rate': self.fee_model.get_fee(buy_venue, symbol),
+            'sell_fee_rate': self.fee_model.get_fee(sell_venue, symbol),
+            'chain': buy_info['chain'] or sell_info['chain'],
+            'buy_dex': buy_info['dex'],
+            'sell_dex': sell_info['dex'],
+            'size': min(sizes) if sizes else None,
+            'timestamp': datetime.now()
+        }
+    
+    def find_opportunities(self, min_profit_percentage: float = 0.5) -> List[Dict]:
+        """
+        أفضل فرصة لكل زوج ونوع بعد الرسوم من جميع أزواج المنصات في مرور واحد
+        
+        مرتبة حسب نسبة الربح الصافي.
+        """
+        now = time.time()
+        opportunities = []
+        
+        for symbol in self.quotes:
+            quotes = self.fresh_quotes(symbol, now)
+            best = {}  # النوع -> أفضل فرصة
+            
+            for buy_venue, buy in quotes.items():
+                for sell_venue, sell in quotes.items():
+                    if buy_venue == sell_venue:
+                        continue
+                    kind = self.pair_kind(buy_venue, sell_venue)
+                    if kind is None:
+                        continue
+                        
+                    net_profit_percentage = ((sell['net_bid'] - buy['net_ask']) / buy['net_ask']) * 100
+                    if net_profit_percentage < min_profit_percentage:
+                        continue
+                    if kind in best and net_profit_percentage <= best[kind]['net_profit_percentage']:
+                        continue
+                    best[kind] = self._opportunity(symbol, kind, buy_venue, sell_venue,
+                                                   buy, sell, net_profit_percentage)
+                                                
+            opportunities.extend(best.values())
+            
+        opportunities.sort(key=lambda x: x['net_profit_percentage'], reverse=True)
+        return opportunities
+
+class OnchainVenues:
+    """
+    مجمعات الشبكات كمنصات في لوحة الأسعار (منصة لكل منصة V2 أو مستوى رسوم V3)
+    
+    السعر قابل للتنفيذ لحجم مرجعي بعملة التسعير ويُحسب محلياً من الاحتياطيات
+    وحالة الـ ticks دون RPC: سعر الشراء من تبادل الحجم المرجعي بالرمز الأساسي،
+    وسعر البيع من بيع الكمية نفسها.
+    """
+    
+    # رموز المنصات المركزية -> الرمز المغلف على السلسلة
+    WRAPPED_SYMBOLS = {'BTC': 'WBTC', 'ETH': 'WETH', 'MATIC': 'WMATIC'}
+    
+    def __init__(self, managers: Dict, symbols: Iterable[str] = Config.SUPPORTED_PAIRS,
+                 notional: float = Config.DEX_QUOTE_NOTIONAL):
+        self.logger = logging.getLogger(__name__)
+        self.managers = managers  # الشبكة -> FlashLoanManager
+        self.symbols = list(symbols)
+        self.notional = notional
+    
+    def token_pair(self, manager, symbol: str) -> Optional[Tuple[str, str]]:
+        """عنوانا (الأساسي، التسعير) لزوج على شبكة المدير (None إذا لم يكن الرمزان معروفين)"""
+        base, quote = symbol.split('/')
+        registry = manager.token_registry
+        base_address = registry.address(self.WRAPPED_SYMBOLS.get(base, base))
+        quote_address = registry.address(self.WRAPPED_SYMBOLS.get(quote, quote))
+        if not base_address or not quote_address:
+            return None
+        return base_address.lower(), quote_address.lower()
+    
+    def quote_pool(self, manager, dex: str, base: str, quote: str) -> Optional[Dict]:
+        """سعرا الشراء والبيع لمجمع بالحجم المرجعي: {'bid', 'ask', 'size'}"""
+        registry = manager.token_registry
+        quoter = manager.amm_quoter
+        try:
+            base_out = quoter.quote(dex, registry.to_units(quote, self.notional), quote, base)
+            if base_out <= 0:
+                return None
+            quote_out = quoter.quote(dex, base_out, base, quote)
+            size = float(registry.from_units(base, base_out))
+            return {
+                'ask': self.notional / size,
+                'bid': float(registry.from_units(quote, quote_out)) / size,
+                'size': size
+            }
+        except (KeyError, ValueError, ZeroDivisionError):
+            return None
+    
+    def publish(self, board: PriceBoard, chain: str) -> int:
+        """نشر أسعار جميع مجمعات الأزواج المدعومة على شبكة"""
+        manager = self.managers.get(chain)
+        if manager is None:
+            return 0
+            
+        try:
+            symbols = {}  # (token0, token1) -> (الزوج، الأساسي، التسعير)
+            for symbol in self.symbols:
+                pair = self.token_pair(manager, symbol)
+                if pair is not None:
+                    symbols[tuple(sorted(pair))] = (symbol,) + pair
+                    
+            published = 0
+            for dex, token0, token1 in manager.amm_quoter.list_pools():
+                entry = symbols.get((token0, token1))
+                if entry is None:
+                    continue
+                symbol, base, quote = entry
+                prices = self.quote_pool(manager, dex, base, quote)
+                if prices is None:
+                    continue
+                    
+                venue = dex_venue_name(chain, dex)
+                if venue not in board.venues:
+                    board.register_venue(venue, VENUE_DEX, chain, dex)
+                board.publish(venue, symbol, prices['bid'], prices['ask'], size=prices['size'])
+                published += 1
+            return published
+            
+        except Exception as e:
+            self.logger.error(f"خطأ في نشر أسعار مجمعات {chain}: {e}")
+            return 0
+    
+    def publish_all(self, board: PriceBoard) -> int:
+        """نشر أسعار مجمعات جميع الشبكات"""
+        return sum(self.publish(board, chain) for chain in self.managers)
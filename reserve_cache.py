@@ -0,0 +1,246 @@
+"""
+ذاكرة احتياطيات أزواج DEX محدثة من أحداث Sync
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from web3 import Web3
+
+from config import Config
+from async_rpc import AsyncRPCClient
+
+# Sync(uint112 reserve0, uint112 reserve1) من UniswapV2Pair
+SYNC_TOPIC = '0x' + Web3.keccak(text='Sync(uint112,uint112)').hex().replace('0x', '')
+GET_PAIR_SELECTOR = '0xe6a43905'  # getPair(address,address)
+GET_RESERVES_SELECTOR = '0x0902f1ac'  # getReserves()
+ZERO_ADDRESS = '0x' + '0' * 40
+
+# منصات V2 التي يوفر مصنعها getPair وتصدر أزواجها Sync
+V2_DEXES = ('uniswap_v2', 'sushiswap', 'quickswap')
+
+def _encode_address(address: str) -> str:
+    """ترميز عنوان كمعامل ABI بطول 32 بايت"""
+    return address.lower().replace('0x', '').rjust(64, '0')
+
+def _decode_words(data: str) -> List[int]:
+    """فك ترميز بيانات ABI إلى كلمات 32 بايت"""
+    data = data[2:] if data.startswith('0x') else data
+    return [int(data[i:i + 64], 16) for i in range(0, len(data), 64)]
+
+class ReserveCache:
+    """
+    احتياطيات جميع الأزواج المراقبة، تُهيأ من المصانع ثم تُحدّث تدريجياً
+    من سجلات Sync لكل كتلة جديدة عبر eth_getLogs
+    
+    يحتفظ بسجل للقيم السابقة لكل كتلة حتى عمق max_reorg_depth، وعند إعادة
+    تنظيم السلسلة يتراجع إلى آخر كتلة لا يزال هاشها مطابقاً.
+    """
+    
+    def __init__(self, rpc: AsyncRPCClient, dex_configs: Optional[Dict] = None,
+                 max_reorg_depth: int = 64, max_block_range: int = 2000):
+        self.logger = logging.getLogger(__name__)
+        self.rpc = rpc
+        self.dex_configs = dex_configs if dex_configs is not None else Config.DEX_CONFIGS
+        self.max_reorg_depth = max_reorg_depth
+        self.max_block_range = max_block_range
+        
+        self.watched = set()  # (token0, token1) بترتيب العناوين
+        self.pairs = {}  # (dex, token0, token1) -> عنوان الزوج
+        self.pair_index = {}  # عنوان الزوج -> (dex, token0, token1)
+        self.reserves = {}  # (dex, token0, token1) -> (reserve0, reserve1)
+        
+        self.last_block = None
+        self.block_hashes = {}  # رقم الكتلة -> الهاش (للكتل المعالجة الأخيرة)
+        self.journal = {}  # رقم الكتلة -> {مفتاح الزوج: الاحتياطيات قبل الكتلة}
+        self.changed = set()  # الأزواج المحدثة منذ آخر pop_changed
+        self.full_refresh = False  # تغيرت مجموعة الأزواج بالكامل (تهيئة)
+    
+    @staticmethod
+    def _sort_tokens(token_a: str, token_b: str) -> Tuple[str, str, bool]:
+        """ترتيب العنوانين كما في المصنع مع اتجاه الطلب"""
+        a, b = token_a.lower(), token_b.lower()
+        return (a, b, False) if a < b else (b, a, True)
+    
+    def watch(self, token_a: str, token_b: str):
+        """إضافة زوج للمراقبة على جميع منصات V2"""
+        token0, token1, _ = self._sort_tokens(token_a, token_b)
+        self.watched.add((token0, token1))
+    
+    def get_reserves(self, dex: str, token_in: str, token_out: str) -> Optional[Tuple[int, int]]:
+        """احتياطيات (الدخل، الخرج) لاتجاه التبادل (واجهة مصدر AMMQuoter)"""
+        token0, token1, flipped = self._sort_tokens(token_in, token_out)
+        reserves = self.reserves.get((dex, token0, token1))
+        if reserves is None:
+            return None
+        return (reserves[1], reserves[0]) if flipped else reserves
+    
+    def pair_address(self, dex: str, token_a: str, token_b: str) -> Optional[str]:
+        """عنوان عقد الزوج على منصة (أو None إذا لم يكن معروفاً)"""
+        token0, token1, _ = self._sort_tokens(token_a, token_b)
+        return self.pairs.get((dex, token0, token1))
+    
+    def pop_changed(self) -> Tuple[set, bool]:
+        """الأزواج المحدثة منذ آخر استدعاء، وهل أُعيد تحميل الكل"""
+        changed, full_refresh = self.changed, self.full_refresh
+        self.changed = set()
+        self.full_refresh = False
+        return changed, full_refresh
+    
+    async def bootstrap(self) -> int:
+        """اكتشاف عناوين الأزواج من المصانع وقراءة الاحتياطيات عند كتلة واحدة"""
+        try:
+            head = await self.rpc.call('eth_getBlockByNumber', ['latest', False])
+            block_tag = head['number']
+            
+            # عناوين الأزواج من جميع المصانع في طلب دفعي واحد
+            keys = []
+            calls = []
+            for dex in V2_DEXES:
+                factory = self.dex_configs.get(dex, {}).get('factory_address')
+                if not factory:
+                    continue
+                for token0, token1 in sorted(self.watched):
+                    keys.append((dex, token0, token1))
+                    calls.append(('eth_call', [{
+                        'to': factory,
+                        'data': GET_PAIR_SELECTOR + _encode_address(token0) + _encode_address(token1)
+                    }, block_tag]))
+                    
+            results = await self.rpc.batch(calls, raise_errors=False)
+            self.pairs = {}
+            self.pair_index = {}
+            for key, result in zip(keys, results):
+                if isinstance(result, Exception) or not result or result == '0x':
+                    continue
+                pair_address = '0x' + result[-40:].lower()
+                if pair_address != ZERO_ADDRESS:
+                    self.pairs[key] = pair_address
+                    self.pair_index[pair_address] = key
+                    
+            # الاحتياطيات عند نفس الكتلة
+            keys = list(self.pairs)
+            results = await self.rpc.batch([
+                ('eth_call', [{'to': self.pairs[key], 'data': GET_RESERVES_SELECTOR}, block_tag])
+                for key in keys
+            ], raise_errors=False)
+            
+            self.reserves = {}
+            for key, result in zip(keys, results):
+                if isinstance(result, Exception) or not result or result == '0x':
+                    continue
+                reserve0, reserve1 = _decode_words(result)[:2]
+                self.reserves[key] = (reserve0, reserve1)
+                
+            self.last_block = int(block_tag, 16)
+            self.block_hashes = {self.last_block: head['hash']}
+            self.journal = {}
+            self.full_refresh = True
+            
+            self.logger.info(f"تم تحميل احتياطيات {len(self.reserves)} زوج عند الكتلة {self.last_block}")
+            return len(self.reserves)
+            
+        except Exception as e:
+            self.logger.error(f"خطأ في تهيئة ذاكرة الاحتياطيات: {e}")
+            return 0
+    
+    def apply_logs(self, logs: List[Dict]) -> int:
+        """تطبيق سجلات Sync مرتبة مع حفظ القيم السابقة لكل كتلة في السجل"""
+        applied = 0
+        for log in sorted(logs, key=lambda l: (int(l['blockNumber'], 16), int(l['logIndex'], 16))):
+            if log.get('removed'):
+                continue
+            key = self.pair_index.get(log['address'].lower())
+            if key is None or not log.get('topics') or log['topics'][0].lower() != SYNC_TOPIC:
+                continue
+                
+            block_number = int(log['blockNumber'], 16)
+            changes = self.journal.setdefault(block_number, {})
+            if key not in changes:
+                changes[key] = self.reserves.get(key)
+                
+            reserve0, reserve1 = _decode_words(log['data'])[:2]
+            self.reserves[key] = (reserve0, reserve1)
+            self.changed.add(key)
+            applied += 1
+            
+        return applied
+    
+    def rollback(self, block_number: int):
+        """التراجع عن جميع التحديثات بعد كتلة معينة"""
+        for number in sorted((n for n in self.journal if n > block_number), reverse=True):
+            for key, previous in self.journal.pop(number).items():
+                self.changed.add(key)
+                if previous is None:
+                    self.reserves.pop(key, None)
+                else:
+                    self.reserves[key] = previous
+                    
+        self.block_hashes = {n: h for n, h in self.block_hashes.items() if n <= block_number}
+        self.last_block = block_number
+        self.logger.warning(f"تم التراجع إلى الكتلة {block_number} بسبب إعادة تنظيم السلسلة")
+    
+    def _prune(self):
+        """حذف السجلات الأقدم من عمق إعادة التنظيم"""
+        floor = self.last_block - self.max_reorg_depth
+        self.journal = {n: c for n, c in self.journal.items() if n > floor}
+        self.block_hashes = {n: h for n, h in self.block_hashes.items() if n > floor}
+    
+    async def _find_common_ancestor(self) -> Optional[int]:
+        """أحدث كتلة مخزنة لا يزال هاشها مطابقاً للسلسلة الحالية"""
+        numbers = sorted(self.block_hashes, reverse=True)
+        blocks = await self.rpc.batch(
+            [('eth_getBlockByNumber', [hex(n), False]) for n in numbers], raise_errors=False
+        )
+        for number, block in zip(numbers, blocks):
+            if isinstance(block, dict) and block.get('hash') == self.block_hashes[number]:
+                return number
+        return None
+    
+    async def poll(self) -> int:
+        """معالجة الكتل الجديدة منذ آخر تحديث وإعادة عدد السجلات المطبقة"""
+        try:
+            if self.last_block is None:
+                await self.bootstrap()
+                return 0
+                
+            head, last = await self.rpc.batch([
+                ('eth_getBlockByNumber', ['latest', False]),
+                ('eth_getBlockByNumber', [hex(self.last_block), False])
+            ])
+            
+            # كشف إعادة التنظيم: تغير هاش آخر كتلة معالجة
+            expected_hash = self.block_hashes.get(self.last_block)
+            if expected_hash is not None and (last is None or last.get('hash') != expected_hash):
+                ancestor = await self._find_common_ancestor()
+                if ancestor is None:
+                    # أعمق من السجل المحفوظ: إعادة التحميل الكامل
+                    await self.bootstrap()
+                    return 0
+                self.rollback(ancestor)
+                
+            head_number = int(head['number'], 16)
+            if head_number <= self.last_block or not self.pair_index:
+                return 0
+                
+            applied = 0
+            from_block = self.last_block + 1
+            while from_block <= head_number:
+                to_block = min(head_number, from_block + self.max_block_range - 1)
+                logs = await self.rpc.call('eth_getLogs', [{
+                    'fromBlock': hex(from_block),
+                    'toBlock': hex(to_block),
+                    'address': list(self.pair_index),
+                    'topics': [SYNC_TOPIC]
+                }])
+                applied += self.apply_logs(logs)
+                from_block = to_block + 1
+                
+            self.last_block = head_number
+            self.block_hashes[head_number] = head['hash']
+            self._prune()
+            return applied
+            
+        except Exception as e:
+            self.logger.error(f"خطأ في تحديث الاحتياطيات: {e}")
+            return 0
@@ -0,0 +1,153 @@
+"""
+محرك تقدير المخاطر بطريقة مونت كارلو للصفقات المعلقة
+"""
+
+import logging
+import math
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+class MonteCarloRiskEngine:
+    """تقدير توزيع ربح/خسارة الصفقة خلال نافذة تنفيذ الساقين"""
+    
+    DEFAULT_VOLATILITY = 0.0005  # انحراف العائد اللوغاريتمي لكل جذر ثانية
+    DEFAULT_LATENCY = 0.5  # ثواني
+    MIN_TICKS = 10
+    
+    def __init__(self, num_paths: int = 4096, confidence: float = 0.95,
+                 window: int = 300, correlation: float = 0.9, seed: Optional[int] = None):
+        self.logger = logging.getLogger(__name__)
+        self.num_paths = num_paths
+        self.confidence = confidence
+        self.correlation = correlation
+        self.rng = np.random.default_rng(seed)
+        
+        self.ticks = {}  # (exchange, symbol) -> deque[(timestamp, mid)]
+        self.window = window
+        self.latencies = {}  # exchange -> متوسط أسي لزمن الاستجابة (ثواني)
+        self._volatility_cache = {}
+    
+    def record_tick(self, exchange: str, symbol: str, bid: float, ask: float,
+                    timestamp: Optional[float] = None):
+        """تسجيل سعر جديد لمنصة وزوج"""
+        if not bid or not ask:
+            return
+            
+        key = (exchange, symbol)
+        ticks = self.ticks.get(key)
+        if ticks is None:
+            ticks = self.ticks[key] = deque(maxlen=self.window)
+            
+        timestamp = timestamp if timestamp is not None else time.time()
+        if ticks and timestamp <= ticks[-1][0]:
+            return
+            
+        ticks.append((timestamp, (bid + ask) / 2))
+        self._volatility_cache.pop(key, None)
+    
+    def record_latency(self, exchange: str, seconds: float, alpha: float = 0.2):
+        """تحديث تقدير زمن الاستجابة لمنصة (متوسط أسي)"""
+        previous = self.latencies.get(exchange)
+        self.latencies[exchange] = seconds if previous is None else (1 - alpha) * previous + alpha * seconds
+    
+    def record_prices(self, all_prices: Dict[str, Dict[str, Dict]]):
+        """تسجيل دفعة أسعار بصيغة ExchangeManager.fetch_all_prices"""
+        for symbol, exchange_prices in all_prices.items():
+            for exchange_name, price_data in exchange_prices.items():
+                timestamp = price_data.get('timestamp')
+                self.record_tick(exchange_name, symbol, price_data.get('bid'), price_data.get('ask'),
+                                 timestamp / 1000 if timestamp else None)
+                if price_data.get('latency') is not None:
+                    self.record_latency(exchange_name, price_data['latency'])
+    
+    def volatility(self, exchange: str, symbol: str) -> float:
+        """تقلب العائد اللوغاريتمي لكل جذر ثانية من الأسعار الأخيرة"""
+        key = (exchange, symbol)
+        cached = self._volatility_cache.get(key)
+        if cached is not None:
+            return cached
+            
+        ticks = self.ticks.get(key)
+        if not ticks or len(ticks) < self.MIN_TICKS:
+            return self.DEFAULT_VOLATILITY
+            
+        data = np.array(ticks, dtype=np.float64)
+        dt = np.diff(data[:, 0])
+        returns = np.diff(np.log(data[:, 1])) / np.sqrt(dt)
+        sigma = float(np.sqrt(np.mean(returns ** 2)))
+        
+        self._volatility_cache[key] = sigma
+        return sigma
+    
+    def latency(self, exchange: str) -> float:
+        """زمن الاستجابة المقدر لمنصة"""
+        return self.latencies.get(exchange, self.DEFAULT_LATENCY)
+    
+    def has_data(self, exchange: str, symbol: str) -> bool:
+        """التحقق من كفاية الأسعار لتقدير التقلب"""
+        ticks = self.ticks.get((exchange, symbol))
+        return ticks is not None and len(ticks) >= self.MIN_TICKS
+    
+    def estimate_batch(self, opportunities: List[Dict]) -> Dict[str, np.ndarray]:
+        """
+        محاكاة ربح/خسارة الوحدة لجميع الفرص في دفعة NumPy واحدة
+        
+        ساق الشراء تُنفذ بعد زمن استجابة منصة الشراء، وساق البيع بعد انتهاء
+        الشراء وزمن استجابة منصة البيع. يعيد القيمة المتوقعة والقيمة المعرضة
+        للخطر (VaR) والخسارة المتوقعة في الذيل (CVaR) واحتمال الخسارة لكل وحدة.
+        """
+        count = len(opportunities)
+        if count == 0:
+            empty = np.zeros(0)
+            return {'expected_pnl': empty, 'var': empty, 'cvar': empty, 'loss_probability': empty}
+            
+        buy_prices = np.empty(count)
+        sell_prices = np.empty(count)
+        buy_fees = np.empty(count)
+        sell_fees = np.empty(count)
+        buy_sigma = np.empty(count)
+        sell_sigma = np.empty(count)
+        buy_horizon = np.empty(count)
+        sell_horizon = np.empty(count)
+        
+        for i, opp in enumerate(opportunities):
+            buy_prices[i] = opp['buy_price']
+            sell_prices[i] = opp['sell_price']
+            buy_fees[i] = opp.get('buy_fee_rate', 0.0)
+            sell_fees[i] = opp.get('sell_fee_rate', 0.0)
+            buy_sigma[i] = self.volatility(opp['buy_exchange'], opp['symbol'])
+            sell_sigma[i] = self.volatility(opp['sell_exchange'], opp['symbol'])
+            buy_horizon[i] = self.latency(opp['buy_exchange'])
+            sell_horizon[i] = buy_horizon[i] + self.latency(opp['sell_exchange'])
+            
+        # صدمات مترابطة بين المنصتين (نفس الأصل)
+        shocks = self.rng.standard_normal((2, count, self.num_paths))
+        buy_shock = shocks[0]
+        sell_shock = self.correlation * shocks[0] + math.sqrt(1 - self.correlation ** 2) * shocks[1]
+        
+        buy_scale = (buy_sigma * np.sqrt(buy_horizon))[:, None]
+        sell_scale = (sell_sigma * np.sqrt(sell_horizon))[:, None]
+        
+        buy_fill = buy_prices[:, None] * np.exp(buy_scale * buy_shock - 0.5 * buy_scale ** 2)
+        sell_fill = sell_prices[:, None] * np.exp(sell_scale * sell_shock - 0.5 * sell_scale ** 2)
+        
+        pnl = sell_fill * (1 - sell_fees)[:, None] - buy_fill * (1 + buy_fees)[:, None]
+        
+        # الذيل الأيسر عبر partition بدلاً من الترتيب الكامل
+        tail_size = max(1, int(self.num_paths * (1 - self.confidence)))
+        tail = np.partition(pnl, tail_size - 1, axis=1)[:, :tail_size]
+        
+        return {
+            'expected_pnl': pnl.mean(axis=1),
+            'var': -tail.max(axis=1),
+            'cvar': -tail.mean(axis=1),
+            'loss_probability': (pnl < 0).mean(axis=1)
+        }
+    
+    def estimate(self, opportunity: Dict) -> Dict[str, float]:
+        """تقدير مخاطر فرصة واحدة"""
+        result = self.estimate_batch([opportunity])
+        return {key: float(values[0]) for key, values in result.items()}
@@ -3,23 +3,97 @@
 """
 
 import logging
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
 import json
+import itertools
+import threading
+import time
+import numpy as np
 from config import Config
+from fee_model import FeeModel
+from exposure_tracker import ExposureTracker
+from risk_engine import MonteCarloRiskEngine
+
+class ValidationReason:
+    """رموز أسباب الرفض في التحقق الدفعي (أعداد صحيحة بدلاً من النصوص)"""
+    
+    VALID = 0
+    INVALID_DATA = 1
+    LOW_PROFIT = 2
+    BLACKLISTED = 3
+    COOLDOWN = 4
+    DAILY_TRADES_LIMIT = 5
+    DAILY_LOSS_LIMIT = 6
+    SUSPICIOUS_SPREAD = 7
+    TRADE_SIZE_TOO_SMALL = 8
+    TRADE_SIZE_TOO_LARGE = 9
+    LOW_NET_PROFIT = 10
+    
+    # وصف الرموز للتسجيل فقط
+    DESCRIPTIONS = {
+        VALID: "الفرصة صالحة",
+        INVALID_DATA: "بيانات غير صالحة",
+        LOW_PROFIT: "نسبة الربح أقل من الحد الأدنى",
+        BLACKLISTED: "الزوج في القائمة السوداء",
+        COOLDOWN: "الزوج في فترة تهدئة",
+        DAILY_TRADES_LIMIT: "تم الوصول للحد الأقصى للصفقات اليومية",
+        DAILY_LOSS_LIMIT: "تم الوصول للحد الأقصى للخسائر اليومية",
+        SUSPICIOUS_SPREAD: "انتشار السعر مشبوه",
+        TRADE_SIZE_TOO_SMALL: "حجم الصفقة أقل من الحد الأدنى",
+        TRADE_SIZE_TOO_LARGE: "حجم الصفقة أكبر من الحد الأقصى",
+        LOW_NET_PROFIT: "الربح الصافي أقل من الحد الأدنى بعد الرسوم"
+    }
+    
+    @classmethod
+    def describe(cls, code: int) -> str:
+        """الحصول على وصف رمز السبب"""
+        return cls.DESCRIPTIONS.get(int(code), "سبب غير معروف")
+
+def opportunities_to_arrays(opportunities: List[Dict]) -> Dict[str, np.ndarray]:
+    """تحويل قائمة الفرص إلى مصفوفات أعمدة للتحقق الدفعي"""
+    arrays = {
+        'symbol': np.array([o['symbol'] for o in opportunities], dtype=object),
+        'buy_exchange': np.array([o['buy_exchange'] for o in opportunities], dtype=object),
+        'sell_exchange': np.array([o['sell_exchange'] for o in opportunities], dtype=object),
+        'buy_price': np.array([o['buy_price'] for o in opportunities], dtype=np.float64),
+        'sell_price': np.array([o['sell_price'] for o in opportunities], dtype=np.float64),
+        'profit_percentage': np.array([o['profit_percentage'] for o in opportunities],
+                                      dtype=np.float64)
+    }
+    
+    # أعمدة الرسوم التي يحسبها الماسح مسبقاً
+    if opportunities and all('buy_fee_rate' in o and 'sell_fee_rate' in o for o in opportunities):
+        arrays['buy_fee_rate'] = np.array([o['buy_fee_rate'] for o in opportunities], dtype=np.float64)
+        arrays['sell_fee_rate'] = np.array([o['sell_fee_rate'] for o in opportunities], dtype=np.float64)
+        
+    return arrays
 
 class RiskManager:
     """مدير المخاطر والأمان"""
     
-    def __init__(self):
+    MAX_SPREAD_PERCENTAGE = 10  # انتشار أكبر من 10% مشبوه
+    
+    def __init__(self, fee_model: Optional[FeeModel] = None):
         self.logger = logging.getLogger(__name__)
+        self.fee_model = fee_model or FeeModel()
         self.trade_history = []
         self.daily_losses = {}
-        self.position_sizes = {}
+        self.exposure_tracker = ExposureTracker()
+        self.risk_engine = MonteCarloRiskEngine()
         self.blacklisted_pairs = set()
         self.max_daily_trades = 100
         self.max_daily_loss = 1000  # USDT
         self.cooldown_periods = {}  # فترات التهدئة للأزواج
+        self.daily_trade_counts = {}  # عدد الصفقات لكل يوم
+        
+        # حجوزات السعة للتنفيذ المتزامن
+        self.reservations = {}
+        self.pending_trades = 0
+        self.pending_loss_budget = 0.0
+        self.inflight_symbols = {}  # symbol -> عدد الحجوزات الجارية
+        self._reservation_lock = threading.Lock()
+        self._reservation_ids = itertools.count(1)
         
     def validate_opportunity(self, opportunity: Dict) -> Tuple[bool, str]:
         """التحقق من صحة فرصة المراجحة"""
@@ -38,8 +112,7 @@ class RiskManager:
             
             # التحقق من الحد الأقصى للصفقات اليومية
             today = datetime.now().date()
-            daily_trades = len([t for t in self.trade_history 
-                              if t['timestamp'].date() == today])
+            daily_trades = self.daily_trade_counts.get(today, 0) + self.pending_trades
             
             if daily_trades >= self.max_daily_trades:
                 return False, "تم الوصول للحد الأقصى للصفقات اليومية"
@@ -53,7 +126,7 @@ class RiskManager:
             spread_percentage = ((opportunity['sell_price'] - opportunity['buy_price']) / 
                                opportunity['buy_price']) * 100
             
-            if spread_percentage > 10:  # انتشار أكبر من 10% مشبوه
+            if spread_percentage > self.MAX_SPREAD_PERCENTAGE:
                 return False, f"انتشار السعر مشبوه: {spread_percentage:.2f}%"
             
             return True, "الفرصة صالحة"
@@ -62,18 +135,42 @@ class RiskManager:
             self.logger.error(f"خطأ في التحقق من الفرصة: {e}")
             return False, f"خطأ في التحقق: {str(e)}"
     
-    def calculate_position_size(self, opportunity: Dict, available_balance: float) -> float:
+    def calculate_position_size(self, opportunity: Dict, available_balance: Optional[float] = None) -> float:
         """حساب حجم المركز الآمن"""
         try:
+            # الرصيد المتاح فعلياً في منصتي الشراء والبيع
+            capacity, capacity_known = 0.0, False
+            if 'buy_exchange' in opportunity and 'sell_exchange' in opportunity:
+                buy_fee_rate = self.fee_model.get_fee(opportunity['buy_exchange'], opportunity['symbol'])
+                capacity, capacity_known = self.exposure_tracker.trade_capacity(opportunity, buy_fee_rate)
+            
+            if available_balance is None:
+                if not capacity_known:
+                    return 0
+                available_balance = capacity * opportunity['buy_price']
+            
             # الحد الأقصى للمخاطرة لكل صفقة (2% من الرصيد)
             max_risk_per_trade = available_balance * 0.02
             
-            # حساب المخاطرة المحتملة (بناءً على الانزلاق المحتمل)
-            potential_slippage = Config.MAX_SLIPPAGE / 100
-            risk_amount = opportunity['buy_price'] * potential_slippage
+            risk_estimate = self._get_risk_estimate(opportunity)
+            
+            if risk_estimate is not None:
+                # رفض الصفقات ذات القيمة المتوقعة السالبة خلال نافذة التنفيذ
+                if risk_estimate['expected_pnl'] <= 0:
+                    return 0
+                
+                # المخاطرة لكل وحدة = الخسارة المتوقعة في الذيل (CVaR)
+                risk_amount = risk_estimate['cvar']
+            else:
+                # حساب المخاطرة المحتملة (بناءً على الانزلاق المحتمل)
+                potential_slippage = Config.MAX_SLIPPAGE / 100
+                risk_amount = opportunity['buy_price'] * potential_slippage
             
             # حساب الحد الأقصى للكمية بناءً على المخاطرة
-            max_quantity_by_risk = max_risk_per_trade / risk_amount
+            if risk_amount > 0:
+                max_quantity_by_risk = max_risk_per_trade / risk_amount
+            else:
+                max_quantity_by_risk = float('inf')
             
             # الحد الأقصى بناءً على التكوين
             max_by_config = min(Config.MAX_TRADE_AMOUNT, available_balance * 0.1)
@@ -85,6 +182,10 @@ class RiskManager:
                 Config.MAX_TRADE_AMOUNT
             )
             
+            # لا يتجاوز المخزون المتاح غير المحجوز
+            if capacity_known:
+                position_size = min(position_size, capacity)
+            
             # التأكد من الحد الأدنى
             if position_size < Config.MIN_TRADE_AMOUNT:
                 return 0
@@ -95,6 +196,26 @@ class RiskManager:
             self.logger.error(f"خطأ في حساب حجم المركز: {e}")
             return 0
     
+    def _get_risk_estimate(self, opportunity: Dict) -> Optional[Dict]:
+        """تقدير مخاطر الفرصة من المحاكاة (محسوب مسبقاً أو عند توفر بيانات التقلب)"""
+        risk_estimate = opportunity.get('risk_estimate')
+        if risk_estimate is not None:
+            return risk_estimate
+        
+        if 'buy_exchange' not in opportunity or 'sell_exchange' not in opportunity:
+            return None
+        
+        symbol = opportunity['symbol']
+        if not (self.risk_engine.has_data(opportunity['buy_exchange'], symbol) and
+                self.risk_engine.has_data(opportunity['sell_exchange'], symbol)):
+            return None
+        
+        return self.risk_engine.estimate(dict(
+            opportunity,
+            buy_fee_rate=self.fee_model.get_fee(opportunity['buy_exchange'], symbol),
+            sell_fee_rate=self.fee_model.get_fee(opportunity['sell_exchange'], symbol)
+        ))
+    
     def validate_trade_execution(self, opportunity: Dict, trade_amount: float) -> Tuple[bool, str]:
         """التحقق من صحة تنفيذ الصفقة"""
         try:
@@ -105,6 +226,12 @@ class RiskManager:
             if trade_amount > Config.MAX_TRADE_AMOUNT:
                 return False, f"حجم الصفقة أكبر من الحد الأقصى: {trade_amount}"
             
+            # التحقق من المخزون المتاح في المنصتين
+            buy_fee_rate = self.fee_model.get_fee(opportunity['buy_exchange'], opportunity['symbol'])
+            capacity, capacity_known = self.exposure_tracker.trade_capacity(opportunity, buy_fee_rate)
+            if capacity_known and trade_amount > capacity:
+                return False, f"الرصيد المتاح غير كافٍ: {capacity:.6f}"
+            
             # التحقق من نسبة الربح المتوقعة بعد الرسوم
             estimated_fees = self._estimate_trading_fees(opportunity, trade_amount)
             net_profit = (opportunity['profit_amount'] * trade_amount) - estimated_fees
@@ -119,19 +246,97 @@ class RiskManager:
             self.logger.error(f"خطأ في التحقق من تنفيذ الصفقة: {e}")
             return False, f"خطأ في التحقق: {str(e)}"
     
+    def validate_opportunities_batch(
+        self,
+        candidates: Union[List[Dict], Dict[str, np.ndarray]],
+        trade_amounts: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        التحقق الدفعي من مجموعة فرص في تمريرة واحدة
+        
+        يطبق نفس فحوصات validate_opportunity و validate_trade_execution
+        وبنفس الترتيب، ويعيد قناع القبول ورموز الأسباب (ValidationReason)
+        """
+        if isinstance(candidates, list):
+            candidates = opportunities_to_arrays(candidates)
+            
+        symbols = np.asarray(candidates['symbol'], dtype=object)
+        count = len(symbols)
+        reasons = np.zeros(count, dtype=np.int8)
+        
+        if count == 0:
+            return np.zeros(0, dtype=bool), reasons
+            
+        buy_prices = np.asarray(candidates['buy_price'], dtype=np.float64)
+        sell_prices = np.asarray(candidates['sell_price'], dtype=np.float64)
+        profit_percentages = np.asarray(candidates['profit_percentage'], dtype=np.float64)
+        
+        def reject(condition: np.ndarray, code: int):
+            # يحتفظ كل مرشح بأول سبب رفض فقط
+            reasons[(reasons == ValidationReason.VALID) & condition] = code
+            
+        reject(~np.isfinite(buy_prices) | ~np.isfinite(sell_prices) | (buy_prices <= 0)
+               | ~np.isfinite(profit_percentages), ValidationReason.INVALID_DATA)
+               
+        # التحقق من الحد الأدنى للربح
+        reject(profit_percentages < Config.MIN_PROFIT_PERCENTAGE, ValidationReason.LOW_PROFIT)
+        
+        # التحقق من القائمة السوداء وفترة التهدئة (مجموعتان صغيرتان تُحسبان مرة واحدة)
+        if self.blacklisted_pairs:
+            reject(np.fromiter((s in self.blacklisted_pairs for s in symbols), dtype=bool, count=count),
+                   ValidationReason.BLACKLISTED)
+        
+        now = datetime.now()
+        cooling = {s for s, end in self.cooldown_periods.items() if now < end}
+        if cooling:
+            reject(np.fromiter((s in cooling for s in symbols), dtype=bool, count=count),
+                   ValidationReason.COOLDOWN)
+        
+        # الحدود اليومية مشتركة بين جميع المرشحين
+        today = now.date()
+        daily_trades = self.daily_trade_counts.get(today, 0) + self.pending_trades
+        if daily_trades >= self.max_daily_trades:
+            reject(np.ones(count, dtype=bool), ValidationReason.DAILY_TRADES_LIMIT)
+            
+        if self.daily_losses.get(today, 0) >= self.max_daily_loss:
+            reject(np.ones(count, dtype=bool), ValidationReason.DAILY_LOSS_LIMIT)
+            
+        # التحقق من انتشار السعر (Spread)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spread_percentages = (sell_prices - buy_prices) / buy_prices * 100
+        reject(spread_percentages > self.MAX_SPREAD_PERCENTAGE, ValidationReason.SUSPICIOUS_SPREAD)
+        
+        # التحقق من حجم الصفقة عند توفره
+        if trade_amounts is not None:
+            trade_amounts = np.asarray(trade_amounts, dtype=np.float64)
+            reject(trade_amounts < Config.MIN_TRADE_AMOUNT, ValidationReason.TRADE_SIZE_TOO_SMALL)
+            reject(trade_amounts > Config.MAX_TRADE_AMOUNT, ValidationReason.TRADE_SIZE_TOO_LARGE)
+            
+        # الربح الصافي بعد الرسوم (مستقل عن حجم الصفقة)
+        # يمكن للماسح تمرير أعمدة الرسوم محسوبة مسبقاً لتجنب البحث
+        buy_fee_rates = candidates.get('buy_fee_rate')
+        if buy_fee_rates is None:
+            buy_fee_rates = self._fee_rates_for(candidates['buy_exchange'], symbols)
+        sell_fee_rates = candidates.get('sell_fee_rate')
+        if sell_fee_rates is None:
+            sell_fee_rates = self._fee_rates_for(candidates['sell_exchange'], symbols)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            net_profit_percentages = ((sell_prices * (1 - sell_fee_rates)
+                                       - buy_prices * (1 + buy_fee_rates)) / buy_prices) * 100
+        reject(net_profit_percentages < Config.MIN_PROFIT_PERCENTAGE,
+               ValidationReason.LOW_NET_PROFIT)
+               
+        return reasons == ValidationReason.VALID, reasons
+    
+    def _fee_rates_for(self, exchanges: np.ndarray, symbols: np.ndarray) -> np.ndarray:
+        """جلب نسب الرسوم لمصفوفة منصات"""
+        return np.fromiter(map(self.fee_model.get_fee, exchanges, symbols),
+                           dtype=np.float64, count=len(exchanges))
+    
     def _estimate_trading_fees(self, opportunity: Dict, trade_amount: float) -> float:
         """تقدير رسوم التداول"""
-        # رسوم تقديرية للمنصات المختلفة
-        fee_rates = {
-            'binance': 0.001,  # 0.1%
-            'coinbasepro': 0.005,  # 0.5%
-            'kraken': 0.0026,  # 0.26%
-            'kucoin': 0.001,  # 0.1%
-            'huobi': 0.002  # 0.2%
-        }
-        
-        buy_fee_rate = fee_rates.get(opportunity['buy_exchange'], 0.002)
-        sell_fee_rate = fee_rates.get(opportunity['sell_exchange'], 0.002)
+        buy_fee_rate = self.fee_model.get_fee(opportunity['buy_exchange'], opportunity['symbol'])
+        sell_fee_rate = self.fee_model.get_fee(opportunity['sell_exchange'], opportunity['symbol'])
         
         buy_fee = opportunity['buy_price'] * trade_amount * buy_fee_rate
         sell_fee = opportunity['sell_price'] * trade_amount * sell_fee_rate
@@ -155,6 +360,7 @@ class RiskManager:
             
             # تحديث الخسائر اليومية
             today = datetime.now().date()
+            self.daily_trade_counts[today] = self.daily_trade_counts.get(today, 0) + 1
             if trade_record['profit'] < 0:
                 if today not in self.daily_losses:
                     self.daily_losses[today] = 0
@@ -169,6 +375,116 @@ class RiskManager:
         except Exception as e:
             self.logger.error(f"خطأ في تسجيل الصفقة: {e}")
     
+    def reserve_capacity(self, opportunity: Dict, trade_amount: float) -> Tuple[Optional[Dict], str]:
+        """
+        حجز السعة قبل التنفيذ: خانة من الصفقات اليومية، ميزانية خسارة، والرصيد
+        
+        الفحص والحجز يتمان تحت قفل قصير بدون أي await، لذا لا يمكن لمهمتين
+        متزامنتين تجاوز نفس الحد. الحجز قاموس بسيط قابل للتسلسل (pickle)
+        يمكن تمريره لعمال مجمع العمليات، أما الالتزام والتحرير فيتمان في
+        العملية المالكة لمدير المخاطر فقط.
+        """
+        symbol = opportunity['symbol']
+        buy_fee_rate = self.fee_model.get_fee(opportunity['buy_exchange'], symbol)
+        # أسوأ خسارة متوقعة للصفقة بناءً على الانزلاق الأقصى
+        loss_budget = trade_amount * opportunity['buy_price'] * Config.MAX_SLIPPAGE / 100
+        
+        with self._reservation_lock:
+            today = datetime.now().date()
+            
+            if symbol in self.blacklisted_pairs:
+                return None, f"الزوج {symbol} في القائمة السوداء"
+            
+            if self._is_in_cooldown(symbol):
+                return None, f"الزوج {symbol} في فترة تهدئة"
+            
+            if self.inflight_symbols.get(symbol):
+                return None, f"توجد صفقة جارية للزوج {symbol}"
+            
+            if self.daily_trade_counts.get(today, 0) + self.pending_trades >= self.max_daily_trades:
+                return None, "تم الوصول للحد الأقصى للصفقات اليومية"
+            
+            daily_loss = self.daily_losses.get(today, 0)
+            if daily_loss + self.pending_loss_budget + loss_budget > self.max_daily_loss:
+                return None, "ميزانية الخسائر اليومية محجوزة بالكامل"
+            
+            inventory = None
+            if self.exposure_tracker.has_balance(opportunity['buy_exchange'], symbol.split('/')[1]):
+                inventory = self.exposure_tracker.reserve_for_trade(opportunity, trade_amount, buy_fee_rate)
+                if inventory is None:
+                    return None, "الرصيد المتاح غير كافٍ"
+            
+            reservation = {
+                'id': next(self._reservation_ids),
+                'symbol': symbol,
+                'trade_amount': trade_amount,
+                'loss_budget': loss_budget,
+                'inventory': inventory,
+                'created_at': time.time()
+            }
+            
+            self.reservations[reservation['id']] = reservation
+            self.pending_trades += 1
+            self.pending_loss_budget += loss_budget
+            self.inflight_symbols[symbol] = self.inflight_symbols.get(symbol, 0) + 1
+            
+        return reservation, "تم حجز السعة"
+    
+    def _pop_reservation(self, reservation: Dict) -> Optional[Dict]:
+        """إزالة حجز وتحرير عداداته (يُستدعى داخل القفل)"""
+        reservation = self.reservations.pop(reservation['id'], None)
+        if reservation is None:
+            return None
+        
+        self.pending_trades -= 1
+        self.pending_loss_budget = max(0.0, self.pending_loss_budget - reservation['loss_budget'])
+        
+        symbol = reservation['symbol']
+        remaining = self.inflight_symbols.get(symbol, 0) - 1
+        if remaining > 0:
+            self.inflight_symbols[symbol] = remaining
+        else:
+            self.inflight_symbols.pop(symbol, None)
+        
+        return reservation
+    
+    def commit_reservation(self, reservation: Dict, trade_result: Dict):
+        """الالتزام بالحجز بعد التنفيذ: تسوية المخزون وتسجيل الصفقة"""
+        with self._reservation_lock:
+            reservation = self._pop_reservation(reservation)
+            if reservation is None:
+                self.logger.warning("محاولة الالتزام بحجز غير موجود")
+                return
+            
+            inventory = reservation['inventory']
+            if inventory is not None:
+                if trade_result.get('success'):
+                    self.exposure_tracker.settle_trade(
+                        inventory, trade_result.get('buy_order'), trade_result.get('sell_order')
+                    )
+                else:
+                    self.exposure_tracker.release_trade(inventory)
+            
+            self.record_trade(trade_result)
+    
+    def release_reservation(self, reservation: Dict):
+        """تحرير حجز لم يُنفذ"""
+        with self._reservation_lock:
+            reservation = self._pop_reservation(reservation)
+            if reservation is not None and reservation['inventory'] is not None:
+                self.exposure_tracker.release_trade(reservation['inventory'])
+    
+    def expire_reservations(self, max_age_seconds: float = 300) -> int:
+        """تحرير الحجوزات القديمة التي لم يُلتزم بها (مثل مهام توقفت)"""
+        cutoff = time.time() - max_age_seconds
+        expired = [r for r in list(self.reservations.values()) if r['created_at'] < cutoff]
+        
+        for reservation in expired:
+            self.logger.warning(f"انتهت صلاحية الحجز {reservation['id']} للزوج {reservation['symbol']}")
+            self.release_reservation(reservation)
+        
+        return len(expired)
+    
     def _is_in_cooldown(self, symbol: str) -> bool:
         """التحقق من فترة التهدئة"""
         if symbol not in self.cooldown_periods:
@@ -259,6 +575,10 @@ class RiskManager:
         if yesterday in self.daily_losses:
             del self.daily_losses[yesterday]
         
+        # إزالة عدادات الصفقات للأيام السابقة
+        self.daily_trade_counts = {day: count for day, count in self.daily_trade_counts.items()
+                                   if day >= today}
+        
         # تنظيف سجل التداول القديم (الاحتفاظ بآخر 30 يوم)
         cutoff_date = datetime.now() - timedelta(days=30)
         self.trade_history = [t for t in self.trade_history 
@@ -0,0 +1,232 @@
+"""
+البحث عن مسارات مراجحة دائرية متعددة الخطوات عبر جميع المجمعات المخزنة
+"""
+
+import logging
+import math
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from config import Config
+from amm_quoter import AMMQuoter, flash_loan_fee
+from flash_loan_optimizer import FlashLoanOptimizer
+
+# خطوة المسار: (dex, token_in, token_out)
+Hop = Tuple[str, str, str]
+
+# طول رأس المسار المباشر وطول كل خطوة بالبايت (مطابق لـ executeDirect في العقد)
+DIRECT_HEADER_LENGTH = 53
+DIRECT_HOP_LENGTH = 37
+
+def encode_direct_route(asset: str, amount_in: int, min_profit: int,
+                        hops: List[Tuple[str, bool, int]]) -> bytes:
+    """
+    ترميز مضغوط لمسار مباشر على عقود الأزواج
+    
+    [asset:20][amountIn:16][minProfit:16][hops:1] ثم لكل خطوة
+    [pair:20][zeroForOne:1][amountOut:16]
+    """
+    if not 2 <= len(hops) <= 255:
+        raise ValueError("عدد خطوات غير صالح")
+        
+    data = bytes.fromhex(asset[2:]) + amount_in.to_bytes(16, 'big') + min_profit.to_bytes(16, 'big')
+    data += bytes([len(hops)])
+    for pair, zero_for_one, amount_out in hops:
+        data += bytes.fromhex(pair[2:]) + bytes([1 if zero_for_one else 0]) + amount_out.to_bytes(16, 'big')
+    return data
+
+def pack_batches(plans: List[Dict], max_routes: int = 5) -> List[List[Dict]]:
+    """
+    تجميع المسارات المربحة في دفعات لقرض سريع واحد لكل أصل
+    
+    المسارات مرتبة حسب الربح، ولا يُضم مسار يشترك في مجمع مع مسار آخر في نفس
+    الدفعة (تنفيذه بعده يغير الاحتياطيات التي بُني عليها التسعير المحلي).
+    """
+    batches = {}  # الأصل -> [(المسارات، المجمعات المستخدمة)]
+    for plan in sorted(plans, key=lambda p: p.get('net_profit', p['expected_profit']), reverse=True):
+        pools = {RouteFinder.pool_key(hop) for hop in plan['route']}
+        for batch, used in batches.setdefault(plan['asset'], []):
+            if len(batch) < max_routes and not pools & used:
+                batch.append(plan)
+                used |= pools
+                break
+        else:
+            batches[plan['asset']].append(([plan], pools))
+            
+    return [batch for groups in batches.values() for batch, _ in groups]
+
+class RouteFinder:
+    """
+    فهرس المسارات الدائرية (حتى max_hops خطوات) التي تبدأ وتنتهي بأصل قابل
+    للاقتراض، مع تقييم محلي بالمحاكي وإعادة تقييم المسارات المتأثرة فقط عند
+    تحديث احتياطيات مجمع.
+    """
+    
+    def __init__(self, quoter: AMMQuoter, start_tokens: Iterable[str], max_hops: int = 3,
+                 flash_fee: float = Config.FLASH_LOAN_FEE):
+        self.logger = logging.getLogger(__name__)
+        self.quoter = quoter
+        self.start_tokens = [token.lower() for token in start_tokens]
+        self.max_hops = max_hops
+        self.flash_fee = flash_fee
+        # مزودو القروض السريعة (FlashLoanProviders): أرخص مصدر لكل أصل ومبلغ بدل رسوم Aave الثابتة
+        self.flash_providers = None
+        
+        self.pools = set()  # مفاتيح المجمعات المفهرسة
+        self.routes = []  # قائمة المسارات (كل مسار tuple من الخطوات)
+        self.routes_by_pool = {}  # مفتاح المجمع -> مجموعة أرقام المسارات
+        self.results = {}  # رقم المسار -> نتيجة التقييم
+    
+    @staticmethod
+    def pool_key(hop: Hop) -> Tuple[str, str, str]:
+        """مفتاح المجمع لخطوة (بترتيب العناوين)"""
+        dex, token_in, token_out = hop
+        return (dex, token_in, token_out) if token_in < token_out else (dex, token_out, token_in)
+    
+    def _build_graph(self) -> Dict[str, List[Tuple[str, str]]]:
+        """رسم الرموز: token -> [(dex, الرمز المقابل)]"""
+        graph = {}
+        for dex, token0, token1 in self.pools:
+            graph.setdefault(token0, []).append((dex, token1))
+            graph.setdefault(token1, []).append((dex, token0))
+        return graph
+    
+    def rebuild(self):
+        """تعداد جميع المسارات الدائرية من الرسم الحالي وتقييمها"""
+        self.pools = set(self.quoter.list_pools())
+        graph = self._build_graph()
+        
+        routes = []
+        for start in self.start_tokens:
+            # بحث بالعمق دون تكرار مجمع أو رمز وسيط
+            stack = [(start, (), {start}, set())]
+            while stack:
+                token, hops, visited, used_pools = stack.pop()
+                for dex, next_token in graph.get(token, ()):
+                    hop = (dex, token, next_token)
+                    key = self.pool_key(hop)
+                    if key in used_pools:
+                        continue
+                    route = hops + (hop,)
+                    if next_token == start:
+                        if len(route) >= 2:
+                            routes.append(route)
+                    elif len(route) < self.max_hops and next_token not in visited:
+                        stack.append((next_token, route, visited | {next_token}, used_pools | {key}))
+                        
+        self.routes = routes
+        self.routes_by_pool = {}
+        for index, route in enumerate(routes):
+            for hop in route:
+                self.routes_by_pool.setdefault(self.pool_key(hop), set()).add(index)
+                
+        self.results = {index: self.evaluate(route) for index, route in enumerate(routes)}
+        self.logger.info(f"تم فهرسة {len(routes)} مسار عبر {len(self.pools)} مجمع")
+    
+    def update(self, changed_pools: Optional[Set] = None, full_refresh: bool = False,
+               changed_assets: Optional[Set] = None) -> int:
+        """
+        إعادة تقييم المسارات التي تمر بالمجمعات المحدثة فقط (أو إعادة البناء عند تغير الرسم)
+        
+        changed_assets: أصول تغيرت رسوم اقتراضها، فيُعاد تقييم جميع مساراتها.
+        """
+        if full_refresh or not self.routes or set(self.quoter.list_pools()) != self.pools:
+            self.rebuild()
+            return len(self.routes)
+            
+        affected = set()
+        for key in changed_pools or ():
+            affected |= self.routes_by_pool.get(key, set())
+        if changed_assets:
+            assets = {asset.lower() for asset in changed_assets}
+            affected |= {index for index, route in enumerate(self.routes) if route[0][1] in assets}
+        for index in affected:
+            self.results[index] = self.evaluate(self.routes[index])
+        return len(affected)
+    
+    def _virtual_reserves(self, route: Tuple[Hop, ...]) -> Optional[Tuple[float, float, float]]:
+        """
+        دمج خطوات المسار في مجمع افتراضي واحد (Ea, Eb, γ)
+        
+        مخرجات المسار = γ·Eb·x / (Ea + γ·x). دمج مجمع (a2, b2, γ2) بعده:
+        Ea' = a2·Ea / (a2 + γ2·Eb)، Eb' = γ2·Eb·b2 / (a2 + γ2·Eb)
+        """
+        virtual = None
+        for dex, token_in, token_out in route:
+            reserves = self.quoter.get_reserves(dex, token_in, token_out)
+            if reserves is None or reserves[0] <= 0 or reserves[1] <= 0:
+                return None
+            fee_numerator, fee_denominator = self.quoter.fee(dex)
+            gamma = fee_numerator / fee_denominator
+            reserve_in, reserve_out = float(reserves[0]), float(reserves[1])
+            
+            if virtual is None:
+                virtual = (reserve_in, reserve_out, gamma)
+            else:
+                ea, eb, gamma0 = virtual
+                denominator = reserve_in + gamma * eb
+                virtual = (reserve_in * ea / denominator, gamma * eb * reserve_out / denominator, gamma0)
+        return virtual
+    
+    def route_output(self, route: Tuple[Hop, ...], amount_in: int) -> int:
+        """مخرجات المسار بحساب صحيح مطابق للعقد"""
+        amount = amount_in
+        for dex, token_in, token_out in route:
+            amount = self.quoter.quote(dex, amount, token_in, token_out)
+            if amount <= 0:
+                return 0
+        return amount
+    
+    def loan_fee(self, asset: str, amount: int, exclude: Set = frozenset()) -> Optional[int]:
+        """رسوم أرخص مصدر يغطي المبلغ (None إذا لم يغطه أي مصدر)"""
+        if self.flash_providers is None:
+            return flash_loan_fee(amount)
+        source = self.flash_providers.select(asset, amount, exclude)
+        return source['fee'] if source else None
+    
+    def evaluate(self, route: Tuple[Hop, ...]) -> Dict:
+        """المبلغ الأمثل والربح المتوقع لمسار (بعد رسوم أرخص مصدر للقرض)"""
+        asset = route[0][1]
+        result = {'route': route, 'asset': asset, 'amount_in': 0, 'expected_profit': 0}
+        
+        virtual = self._virtual_reserves(route)
+        if virtual is None:
+            return result
+            
+        # مجمعات المسار لا تصلح مقرضاً (الزوج المقرض مقفل حتى السداد)
+        pools = {self.pool_key(hop) for hop in route}
+        flash_fee, max_amount = self.flash_fee, None
+        if self.flash_providers is not None:
+            flash_fee = self.flash_providers.fee_rate(asset, pools)
+            max_amount = self.flash_providers.max_available(asset, pools)
+            if flash_fee is None:
+                return result
+            
+        ea, eb, gamma = virtual
+        # السعر الحدي عند الصفر يجب أن يتجاوز تكلفة الاقتراض
+        if gamma * eb <= ea * (1 + flash_fee):
+            return result
+            
+        analytic = (math.sqrt(gamma * ea * eb / (1 + flash_fee)) - ea) / gamma
+        if analytic < 1:
+            return result
+        
+        def profit_fn(amount: int) -> int:
+            fee = self.loan_fee(asset, amount, pools)
+            if fee is None:
+                return -amount
+            try:
+                return self.route_output(route, amount) - amount - fee
+            except (KeyError, ValueError):
+                return -amount
+                
+        amount = FlashLoanOptimizer.refine(int(analytic), profit_fn, max_amount)
+        profit = profit_fn(amount)
+        if profit > 0:
+            result.update({'amount_in': amount, 'expected_profit': profit})
+        return result
+    
+    def best_routes(self, limit: int = 10, min_profit: int = 0) -> List[Dict]:
+        """أفضل المسارات المربحة مرتبة حسب الربح المتوقع"""
+        profitable = [r for r in self.results.values() if r['expected_profit'] > min_profit]
+        profitable.sort(key=lambda r: r['expected_profit'], reverse=True)
+        return profitable[:limit]
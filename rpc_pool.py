@@ -0,0 +1,281 @@
+"""
+مجمع عقد JSON-RPC لنفس الشبكة مع توجيه حسب زمن الاستجابة وتجاوز الأعطال
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import aiohttp
+from web3._utils.encoding import Web3JsonEncoder
+from web3.providers.async_base import AsyncBaseProvider
+
+from async_rpc import AsyncRPCClient, RPCError
+
+class RPCPool(AsyncRPCClient):
+    """
+    عدة عقد RPC بواجهة AsyncRPCClient نفسها
+    
+    القراءات تُرسل إلى أسرع عقدة سليمة (متوسط متحرك لزمن الاستجابة)، وإذا لم
+    تُجب خلال hedge_delay يُرسل نفس الطلب إلى العقدة التالية ويُعتمد أول رد.
+    العقدة السليمة: خارج فترة التهدئة بعد أخطاء الاتصال، ونسبة أخطائها مقبولة،
+    ولا تتأخر عن أعلى كتلة معروفة بأكثر من max_lag. المعاملات الموقعة تُبث
+    إلى جميع العقد. أخطاء JSON-RPC (مثل ارتداد eth_call) رد صحيح من العقدة
+    ولا تُعاد على عقدة أخرى.
+    """
+    
+    # طرق تُرسل إلى جميع العقد بدلاً من أسرعها
+    BROADCAST_METHODS = ('eth_sendRawTransaction',)
+    
+    # أقصى فترة تهدئة بعد أخطاء متتالية (ثوانٍ)
+    MAX_COOLDOWN = 60.0
+    
+    def __init__(self, urls: Sequence[str], timeout: float = 10, hedge_delay: float = 0.25,
+                 max_lag: int = 2, max_error_rate: float = 0.5, cooldown: float = 2.0,
+                 health_interval: float = 10.0, alpha: float = 0.2):
+        if not urls:
+            raise ValueError("مجمع RPC يحتاج عنواناً واحداً على الأقل")
+        super().__init__(urls[0], timeout=timeout)
+        self.logger = logging.getLogger(__name__)
+        self.hedge_delay = hedge_delay
+        self.max_lag = max_lag
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self.health_interval = health_interval
+        self.alpha = alpha  # وزن العينة الجديدة في المتوسطات
+        
+        self.endpoints = [
+            {
+                'url': url,
+                'client': AsyncRPCClient(url, timeout=timeout),
+                'latency': None,  # المتوسط المتحرك لزمن الاستجابة (ثوانٍ)
+                'error_rate': 0.0,
+                'failures': 0,  # أخطاء اتصال متتالية
+                'down_until': 0.0,
+                'head': None,  # آخر كتلة أبلغت عنها العقدة
+                'requests': 0
+            }
+            for url in dict.fromkeys(urls)
+        ]
+        self.hedged = 0  # عدد الطلبات التي أُرسلت لعقدة ثانية
+        self.last_health_check = 0.0
+        self._health_task = None
+    
+    async def get_session(self) -> aiohttp.ClientSession:
+        """جلسة العقدة الأولى (للمشاركة مع مزود AsyncWeb3)"""
+        return await self.endpoints[0]['client'].get_session()
+    
+    async def close(self):
+        """إغلاق جلسات جميع العقد"""
+        if self._health_task is not None and not self._health_task.done():
+            self._health_task.cancel()
+        await asyncio.gather(*[endpoint['client'].close() for endpoint in self.endpoints])
+    
+    @property
+    def head(self) -> Optional[int]:
+        """أعلى كتلة معروفة بين العقد"""
+        heads = [endpoint['head'] for endpoint in self.endpoints if endpoint['head'] is not None]
+        return max(heads) if heads else None
+    
+    def lag(self, endpoint: Dict) -> int:
+        """تأخر العقدة بالكتل عن أعلى كتلة معروفة"""
+        head = self.head
+        if head is None or endpoint['head'] is None:
+            return 0
+        return head - endpoint['head']
+    
+    def is_healthy(self, endpoint: Dict, now: Optional[float] = None) -> bool:
+        """التحقق من صلاحية العقدة للقراءة"""
+        now = now if now is not None else time.time()
+        return (endpoint['down_until'] <= now and
+                endpoint['error_rate'] <= self.max_error_rate and
+                self.lag(endpoint) <= self.max_lag)
+    
+    def ranked(self) -> List[Dict]:
+        """العقد السليمة حسب زمن الاستجابة، ثم البقية كملاذ أخير"""
+        now = time.time()
+        healthy = [endpoint for endpoint in self.endpoints if self.is_healthy(endpoint, now)]
+        # العقدة بلا قياسات تُجرب أولاً لقياس زمنها
+        healthy.sort(key=lambda endpoint: endpoint['latency'] or 0.0)
+        others = [endpoint for endpoint in self.endpoints if endpoint not in healthy]
+        others.sort(key=lambda endpoint: (endpoint['down_until'], self.lag(endpoint)))
+        return healthy + others
+    
+    def _observe(self, endpoint: Dict, latency: Optional[float] = None, error: bool = False):
+        """تحديث إحصاءات العقدة بعد طلب"""
+        endpoint['requests'] += 1
+        endpoint['error_rate'] += self.alpha * ((1.0 if error else 0.0) - endpoint['error_rate'])
+        
+        if error:
+            endpoint['failures'] += 1
+            backoff = min(self.MAX_COOLDOWN, self.cooldown * 2 ** (endpoint['failures'] - 1))
+            endpoint['down_until'] = time.time() + backoff
+            return
+            
+        endpoint['failures'] = 0
+        if latency is not None:
+            if endpoint['latency'] is None:
+                endpoint['latency'] = latency
+            else:
+                endpoint['latency'] += self.alpha * (latency - endpoint['latency'])
+    
+    async def _attempt(self, endpoint: Dict, operation: Callable[[AsyncRPCClient], Awaitable]) -> Any:
+        """تنفيذ طلب على عقدة واحدة مع تسجيل زمنه أو فشله"""
+        started = time.time()
+        try:
+            result = await operation(endpoint['client'])
+        except RPCError:
+            # العقدة أجابت: الخطأ من الطلب نفسه
+            self._observe(endpoint, time.time() - started)
+            raise
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._observe(endpoint, error=True)
+            self.logger.warning(f"فشل طلب RPC على {endpoint['url']}: {e}")
+            raise
+        self._observe(endpoint, time.time() - started)
+        return result
+    
+    def _schedule_health_check(self):
+        """فحص رؤوس العقد في الخلفية كل health_interval"""
+        if time.time() - self.last_health_check < self.health_interval:
+            return
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.get_running_loop().create_task(self.check_health())
+    
+    async def check_health(self) -> Dict[str, Optional[int]]:
+        """قراءة رقم الكتلة من جميع العقد بالتوازي (رؤوس وأزمنة استجابة)"""
+        self.last_health_check = time.time()
+        results = await asyncio.gather(*[
+            self._attempt(endpoint, lambda client: client.block_number())
+            for endpoint in self.endpoints
+        ], return_exceptions=True)
+        
+        for endpoint, result in zip(self.endpoints, results):
+            if isinstance(result, int):
+                endpoint['head'] = result
+        return {endpoint['url']: endpoint['head'] for endpoint in self.endpoints}
+    
+    async def _read(self, operation: Callable[[AsyncRPCClient], Awaitable]) -> Any:
+        """
+        قراءة من أسرع عقدة مع التحوط: إذا لم تُجب خلال hedge_delay يُرسل الطلب
+        للعقدة التالية، وعند فشل الاتصال ينتقل فوراً للتالية
+        """
+        self._schedule_health_check()
+        candidates = self.ranked()
+        pending = {}  # المهمة -> (العقدة، وقت البدء)
+        errors = []
+        next_index = 0
+        
+        def launch():
+            nonlocal next_index
+            endpoint = candidates[next_index]
+            next_index += 1
+            task = asyncio.get_running_loop().create_task(self._attempt(endpoint, operation))
+            pending[task] = (endpoint, time.time())
+            
+        launch()
+        try:
+            while pending:
+                timeout = self.hedge_delay if next_index < len(candidates) else None
+                done, _ = await asyncio.wait(list(pending), timeout=timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # العقدة بطيئة: نفس الطلب على العقدة التالية
+                    self.hedged += 1
+                    launch()
+                    continue
+                    
+                for task in done:
+                    pending.pop(task)
+                    error = task.exception()
+                    if error is None or isinstance(error, RPCError):
+                        return task.result()
+                    errors.append(error)
+                    
+                if not pending and next_index < len(candidates):
+                    launch()
+                    
+            raise errors[-1]
+            
+        finally:
+            # الطلبات الخاسرة: إلغاء، وزمن انتظارها حد أدنى لزمن استجابة العقدة الحالي
+            now = time.time()
+            for task, (endpoint, started) in pending.items():
+                task.cancel()
+                endpoint['latency'] = max(endpoint['latency'] or 0.0, now - started)
+    
+    async def _broadcast(self, operation: Callable[[AsyncRPCClient], Awaitable]) -> Any:
+        """إرسال إلى جميع العقد وإعادة أول نتيجة ناجحة"""
+        results = await asyncio.gather(*[
+            self._attempt(endpoint, operation) for endpoint in self.endpoints
+        ], return_exceptions=True)
+        
+        for result in results:
+            if not isinstance(result, BaseException):
+                return result
+        # جميع العقد رفضت: خطأ العقدة (مثل nonce) أولى من خطأ الاتصال
+        rpc_errors = [result for result in results if isinstance(result, RPCError)]
+        raise rpc_errors[0] if rpc_errors else results[0]
+    
+    async def call(self, method: str, params: Optional[List] = None) -> Any:
+        """استدعاء طريقة JSON-RPC واحدة (البث للمعاملات)"""
+        if method in self.BROADCAST_METHODS:
+            return await self._broadcast(lambda client: client.call(method, params))
+        return await self._read(lambda client: client.call(method, params))
+    
+    async def batch(self, calls: List[Tuple[str, List]], raise_errors: bool = True) -> List[Any]:
+        """طلب دفعي على عقدة واحدة (نفس الكتلة لجميع الاستدعاءات)"""
+        if not calls:
+            return []
+        return await self._read(lambda client: client.batch(calls, raise_errors))
+    
+    def status(self) -> List[Dict]:
+        """حالة العقد (للسجلات ومعلومات الشبكة)"""
+        now = time.time()
+        return [
+            {
+                'url': endpoint['url'],
+                'healthy': self.is_healthy(endpoint, now),
+                'latency_ms': round(endpoint['latency'] * 1000, 1) if endpoint['latency'] is not None else None,
+                'error_rate': round(endpoint['error_rate'], 3),
+                'lag': self.lag(endpoint),
+                'requests': endpoint['requests']
+            }
+            for endpoint in self.endpoints
+        ]
+
+class RPCPoolProvider(AsyncBaseProvider):
+    """
+    مزود AsyncWeb3 يمرر طلباته عبر عميل RPC (مجمع العقد عادة)
+    
+    استدعاءات العقود وبناء المعاملات تحصل بذلك على التوجيه والتحوط وتجاوز
+    الأعطال نفسها بدلاً من مزود HTTP مرتبط بعقدة واحدة.
+    """
+    
+    def __init__(self, client: AsyncRPCClient):
+        super().__init__()
+        self.client = client
+    
+    async def make_request(self, method, params) -> Dict:
+        """طلب واحد بصيغة استجابة JSON-RPC (أخطاء العقدة تُعاد كحقل error)"""
+        # ترميز أنواع web3 (HexBytes وغيرها) كما يفعل مزود HTTP
+        params = json.loads(json.dumps(list(params or []), cls=Web3JsonEncoder))
+        try:
+            result = await self.client.call(method, params)
+        except RPCError as e:
+            return {'jsonrpc': '2.0', 'id': 0, 'error': {'code': e.code, 'message': e.message, 'data': e.data}}
+        return {'jsonrpc': '2.0', 'id': 0, 'result': result}
+    
+    async def is_connected(self, show_traceback: bool = False) -> bool:
+        """التحقق من استجابة عقدة واحدة على الأقل"""
+        try:
+            await self.client.block_number()
+            return True
+        except Exception:
+            if show_traceback:
+                raise
+            return False
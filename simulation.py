@@ -0,0 +1,219 @@
+"""
+محاكاة دفعية لفرص القروض السريعة عبر eth_call مع تجاوزات الحالة
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from eth_abi import decode, encode
+from web3 import Web3
+
+from async_rpc import AsyncRPCClient, RPCError
+from multicall import function_selector
+
+# نوع ArbitrageParams في العقد
+ARBITRAGE_PARAMS_TYPE = '(address,address,uint256,address,address,uint256)'
+
+# محددات أخطاء Solidity القياسية
+ERROR_SELECTOR = bytes.fromhex('08c379a0')  # Error(string)
+PANIC_SELECTOR = bytes.fromhex('4e487b71')  # Panic(uint256)
+
+def decode_revert_reason(data: Any) -> Optional[str]:
+    """سبب الارتداد من بيانات الخطأ المعادة (نص Error أو رمز Panic أو البيانات الخام)"""
+    if isinstance(data, dict):
+        data = data.get('data')
+    if not isinstance(data, str) or not data.startswith('0x') or len(data) < 10:
+        return None
+        
+    raw = bytes.fromhex(data[2:])
+    try:
+        if raw[:4] == ERROR_SELECTOR:
+            return decode(['string'], raw[4:])[0]
+        if raw[:4] == PANIC_SELECTOR:
+            return f"Panic(0x{decode(['uint256'], raw[4:])[0]:02x})"
+    except Exception:
+        pass
+    return data
+
+def intrinsic_gas(calldata: bytes) -> int:
+    """الغاز الأساسي للمعاملة وبيانات الاستدعاء (خارج تنفيذ العقد)"""
+    zero_bytes = calldata.count(0)
+    return 21000 + 4 * zero_bytes + 16 * (len(calldata) - zero_bytes)
+
+class Simulator:
+    """
+    محاكاة simulateArbitrage في العقد عبر eth_call على نسخة متفرعة محلية
+    (hardhat/anvil) أو على العقدة نفسها
+    
+    الفرص المطلوبة في نفس دورة حلقة الأحداث تُجمع في طلب دفعي واحد مثبت على
+    رقم كتلة واحد، وتُعاد لكل فرصة الربح الصافي والغاز المستهلك وسبب الارتداد.
+    استدعاءات التنفيذ الكاملة (executeRoute/executeDirect/executeBatch) تُحاكى
+    بنفس الطريقة، ونتيجتها النجاح أو سبب الارتداد فقط.
+    تجاوزات الحالة تمنح المرسل رصيداً للغاز، ويمكنها استبدال كود العقد بإصدار
+    محلي لم يُنشر بعد (لاختبارات التكامل دون شبكة).
+    """
+    
+    SIMULATE_ARBITRAGE = f'simulateArbitrage({ARBITRAGE_PARAMS_TYPE})'
+    
+    # رصيد المرسل في المحاكاة (يكفي لأي حد غاز)
+    SENDER_BALANCE = 10**24
+    
+    def __init__(self, rpc: AsyncRPCClient, contract_address: str, sender: str,
+                 contract_code: Optional[str] = None, gas_limit: int = 3000000,
+                 max_batch: int = 50):
+        self.logger = logging.getLogger(__name__)
+        self.rpc = rpc
+        self.contract_address = Web3.to_checksum_address(contract_address)
+        self.sender = Web3.to_checksum_address(sender)
+        self.contract_code = contract_code  # كود العقد المنشور البديل (اختياري)
+        self.gas_limit = gas_limit
+        self.max_batch = max_batch
+        
+        self._queue = []  # (المعاملات، Future) بانتظار الدفعة التالية
+        self._flush_task = None
+    
+    def state_overrides(self) -> Dict:
+        """تجاوزات الحالة المطبقة على كل استدعاء"""
+        overrides = {self.sender: {'balance': hex(self.SENDER_BALANCE)}}
+        if self.contract_code:
+            overrides[self.contract_address] = {'code': self.contract_code}
+        return overrides
+    
+    @staticmethod
+    def params_tuple(params: Dict) -> Tuple:
+        """ArbitrageParams كـ tuple بترتيب حقول العقد"""
+        return (
+            Web3.to_checksum_address(params['tokenA']),
+            Web3.to_checksum_address(params['tokenB']),
+            int(params['amountIn']),
+            Web3.to_checksum_address(params['buyDex']),
+            Web3.to_checksum_address(params['sellDex']),
+            int(params['minProfit'])
+        )
+    
+    def encode_candidate(self, params: Dict) -> bytes:
+        """بيانات استدعاء simulateArbitrage لفرصة"""
+        return function_selector(self.SIMULATE_ARBITRAGE) + encode(
+            [ARBITRAGE_PARAMS_TYPE], [self.params_tuple(params)]
+        )
+    
+    def decode_result(self, calldata: bytes, result: Any, returns_profit: bool = True) -> Dict:
+        """
+        نتيجة المحاكاة من استجابة eth_call (قيمة أو RPCError)
+        
+        returns_profit=False لاستدعاءات التنفيذ التي لا تعيد قيمة: الربح والغاز None.
+        """
+        if isinstance(result, RPCError):
+            return {
+                'success': False,
+                'profit': 0,
+                'gas_used': None,
+                'revert_reason': decode_revert_reason(result.data) or result.message
+            }
+        if not returns_profit:
+            return {'success': True, 'profit': None, 'gas_used': None, 'revert_reason': None}
+            
+        try:
+            profit, gas_used = decode(['uint256', 'uint256'], bytes.fromhex(result[2:]))
+        except Exception as e:
+            return {'success': False, 'profit': 0, 'gas_used': None, 'revert_reason': f"نتيجة غير صالحة: {e}"}
+            
+        return {
+            'success': True,
+            'profit': profit,
+            'gas_used': gas_used + intrinsic_gas(calldata),
+            'revert_reason': None
+        }
+    
+    async def simulate_many(self, candidates: Sequence[Dict],
+                            block: Optional[int] = None) -> List[Dict]:
+        """محاكاة مجموعة فرص simulateArbitrage على نفس الكتلة"""
+        return await self._simulate([(self.encode_candidate(params), True) for params in candidates], block)
+    
+    async def simulate_calls(self, calldatas: Sequence[bytes],
+                             block: Optional[int] = None) -> List[Dict]:
+        """محاكاة استدعاءات تنفيذ كاملة للعقد على نفس الكتلة (النجاح أو سبب الارتداد)"""
+        return await self._simulate([(calldata, False) for calldata in calldatas], block)
+    
+    async def _simulate(self, entries: Sequence[Tuple[bytes, bool]],
+                        block: Optional[int] = None) -> List[Dict]:
+        """
+        تنفيذ eth_call لبيانات استدعاء (مع علم فك الربح لكل منها) على نفس الكتلة
+        
+        الاستدعاءات تُقسم إلى دفعات بحجم max_batch تُرسل بالتوازي.
+        """
+        if not entries:
+            return []
+            
+        try:
+            if block is None:
+                block = await self.rpc.block_number()
+            block_tag = hex(block)
+            overrides = self.state_overrides()
+            
+            encoded = [calldata for calldata, _ in entries]
+            calls = [
+                ('eth_call', [{
+                    'from': self.sender,
+                    'to': self.contract_address,
+                    'gas': hex(self.gas_limit),
+                    'data': '0x' + calldata.hex()
+                }, block_tag, overrides])
+                for calldata in encoded
+            ]
+            
+            chunks = await asyncio.gather(*[
+                self.rpc.batch(calls[start:start + self.max_batch], raise_errors=False)
+                for start in range(0, len(calls), self.max_batch)
+            ])
+            results = [result for chunk in chunks for result in chunk]
+            
+        except Exception as e:
+            self.logger.error(f"خطأ في محاكاة الفرص: {e}")
+            return [
+                {'success': False, 'profit': 0, 'gas_used': None, 'revert_reason': str(e), 'block_number': block}
+                for _ in entries
+            ]
+            
+        simulations = []
+        for (calldata, returns_profit), result in zip(entries, results):
+            simulation = self.decode_result(calldata, result, returns_profit)
+            simulation['block_number'] = block
+            simulations.append(simulation)
+            
+        passed = sum(1 for simulation in simulations if simulation['success'])
+        self.logger.info(f"محاكاة {len(simulations)} استدعاء على الكتلة {block}: {passed} ناجحة")
+        return simulations
+    
+    async def simulate(self, params: Dict) -> Dict:
+        """
+        محاكاة فرصة واحدة (تُجمع مع الطلبات المتزامنة الأخرى في دفعة واحدة)
+        """
+        return await self._enqueue(self.encode_candidate(params), True)
+    
+    async def simulate_call(self, calldata: bytes) -> Dict:
+        """محاكاة استدعاء تنفيذ واحد (يُجمع مع الطلبات المتزامنة الأخرى في دفعة واحدة)"""
+        return await self._enqueue(calldata, False)
+    
+    async def _enqueue(self, calldata: bytes, returns_profit: bool) -> Dict:
+        """إضافة استدعاء لدفعة المحاكاة التالية وانتظار نتيجته"""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append(((calldata, returns_profit), future))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush())
+        return await future
+    
+    async def _flush(self):
+        """إرسال الطلبات المتراكمة بعد إتاحة الفرصة لبقية المهام لإضافة طلباتها"""
+        await asyncio.sleep(0)
+        queue, self._queue = self._queue, []
+        
+        simulations = await self._simulate([entry for entry, _ in queue])
+        for (_, future), simulation in zip(queue, simulations):
+            if not future.done():
+                future.set_result(simulation)
+                
+        # طلبات وصلت أثناء انتظار الدفعة الحالية
+        if self._queue:
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush())
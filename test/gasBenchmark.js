@@ -0,0 +1,123 @@
+const { expect } = require("chai");
+const { ethers } = require("hardhat");
+
+// مقارنة استهلاك الغاز بين مسار الموجه (executeRoute) والتبادل المباشر مع الأزواج (executeDirect)
+// يعمل على نسخة mainnet المتفرعة في hardhat.config.js
+
+const AAVE_POOL_ADDRESSES_PROVIDER = "0x2f39d218133AFaB8F2B819B1066c7E434Ad94E9e";
+const WETH = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2";
+const DAI = "0x6B175474E89094C44Da98b954EedeAC495271d0F";
+const UNISWAP_V2_ROUTER = "0x7a250d5630B4cF539739dF2C5dAcb4c659F2488D";
+const SUSHISWAP_ROUTER = "0xd9e1cE17f2641f24aE83637ab66a2cca9C378B9F";
+const UNISWAP_V2_FACTORY = "0x5C69bEe701ef814a2B6a3EDD4B1652CB9cc5aA6f";
+const SUSHISWAP_FACTORY = "0xC0AEe478e3658e2610c5F7A4A2E1777cE9e4f2Ac";
+
+// مصادر القرض السريع (FlashSource في العقد)
+const AAVE_SOURCE = { provider: 0, lender: ethers.ZeroAddress };
+const BALANCER_SOURCE = { provider: 1, lender: ethers.ZeroAddress };
+
+const FACTORY_ABI = ["function getPair(address,address) view returns (address)"];
+const PAIR_ABI = [
+  "function getReserves() view returns (uint112,uint112,uint32)",
+  "function token0() view returns (address)"
+];
+const ROUTER_ABI = [
+  "function swapExactETHForTokens(uint256,address[],address,uint256) payable returns (uint256[])"
+];
+
+// نفس صيغة UniswapV2Library.getAmountOut
+function getAmountOut(amountIn, reserveIn, reserveOut) {
+  const amountInWithFee = amountIn * 997n;
+  return (amountInWithFee * reserveOut) / (reserveIn * 1000n + amountInWithFee);
+}
+
+// [asset:20][amountIn:16][minProfit:16][hops:1] ثم لكل خطوة [pair:20][zeroForOne:1][amountOut:16]
+function encodeDirectRoute(asset, amountIn, minProfit, hops) {
+  const types = ["address", "uint128", "uint128", "uint8"];
+  const values = [asset, amountIn, minProfit, hops.length];
+  for (const hop of hops) {
+    types.push("address", "bool", "uint128");
+    values.push(hop.pair, hop.zeroForOne, hop.amountOut);
+  }
+  return ethers.solidityPacked(types, values);
+}
+
+async function directHop(factoryAddress, tokenIn, tokenOut, amountIn) {
+  const factory = await ethers.getContractAt(FACTORY_ABI, factoryAddress);
+  const pairAddress = await factory.getPair(tokenIn, tokenOut);
+  const pair = await ethers.getContractAt(PAIR_ABI, pairAddress);
+
+  const [reserve0, reserve1] = await pair.getReserves();
+  const zeroForOne = (await pair.token0()).toLowerCase() === tokenIn.toLowerCase();
+  const [reserveIn, reserveOut] = zeroForOne ? [reserve0, reserve1] : [reserve1, reserve0];
+
+  return { pair: pairAddress, zeroForOne, amountOut: getAmountOut(amountIn, reserveIn, reserveOut) };
+}
+
+describe("FlashLoanArbitrage gas benchmark", function () {
+  const amountIn = ethers.parseEther("1");
+  let arbitrage;
+
+  before(async function () {
+    const [owner] = await ethers.getSigners();
+
+    const FlashLoanArbitrage = await ethers.getContractFactory("FlashLoanArbitrage");
+    arbitrage = await FlashLoanArbitrage.deploy(AAVE_POOL_ADDRESSES_PROVIDER);
+    await arbitrage.waitForDeployment();
+
+    // فجوة سعرية: بيع ETH مقابل DAI على sushiswap يجعل DAI أغلى هناك
+    // فيصبح المسار WETH → DAI (uniswap) → WETH (sushiswap) مربحاً للمسارين
+    const sushi = await ethers.getContractAt(ROUTER_ABI, SUSHISWAP_ROUTER);
+    const block = await ethers.provider.getBlock("latest");
+    await sushi.swapExactETHForTokens(0, [WETH, DAI], owner.address, block.timestamp + 300, {
+      value: ethers.parseEther("300")
+    });
+
+    // العقد يشترط أن يغطي المسار نفسه رسوم القرض (الرصيد المسبق لا يُحتسب):
+    // الفجوة يجب أن تتسع لرسوم Aave في التنفيذات الثلاثة المتتالية
+    const first = await directHop(UNISWAP_V2_FACTORY, WETH, DAI, amountIn * 3n);
+    const second = await directHop(SUSHISWAP_FACTORY, DAI, WETH, first.amountOut);
+    const premium = await arbitrage.flashFee(AAVE_SOURCE, amountIn * 3n);
+    expect(second.amountOut).to.be.greaterThan(amountIn * 3n + premium);
+  });
+
+  it("executeDirect uses less gas than executeRoute for the same route", async function () {
+    const routeTx = await arbitrage.executeRoute({
+      asset: WETH,
+      amountIn,
+      path: [WETH, DAI, WETH],
+      routers: [UNISWAP_V2_ROUTER, SUSHISWAP_ROUTER],
+      minProfit: 0
+    }, AAVE_SOURCE);
+    const routeGas = (await routeTx.wait()).gasUsed;
+
+    // المبالغ محسوبة خارج السلسلة من الاحتياطيات الحالية
+    const first = await directHop(UNISWAP_V2_FACTORY, WETH, DAI, amountIn);
+    const second = await directHop(SUSHISWAP_FACTORY, DAI, WETH, first.amountOut);
+    const data = encodeDirectRoute(WETH, amountIn, 0, [first, second]);
+
+    const directTx = await arbitrage.executeDirect(data, AAVE_SOURCE);
+    const directGas = (await directTx.wait()).gasUsed;
+
+    console.log(`      executeRoute:  ${routeGas} gas`);
+    console.log(`      executeDirect: ${directGas} gas`);
+    console.log(`      التوفير: ${routeGas - directGas} gas (${(Number(routeGas - directGas) * 100 / Number(routeGas)).toFixed(1)}%)`);
+
+    expect(directGas).to.be.lessThan(routeGas);
+  });
+
+  it("Balancer flash loan repays without the Aave premium", async function () {
+    const first = await directHop(UNISWAP_V2_FACTORY, WETH, DAI, amountIn);
+    const second = await directHop(SUSHISWAP_FACTORY, DAI, WETH, first.amountOut);
+    const data = encodeDirectRoute(WETH, amountIn, 0, [first, second]);
+
+    const receipt = await (await arbitrage.executeDirect(data, BALANCER_SOURCE)).wait();
+    const executed = receipt.logs
+      .map((log) => { try { return arbitrage.interface.parseLog(log); } catch { return null; } })
+      .find((event) => event && event.name === "FlashLoanExecuted");
+
+    console.log(`      executeDirect (Balancer): ${receipt.gasUsed} gas`);
+
+    expect(executed.args.premium).to.equal(0n);
+  });
+});
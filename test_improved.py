@@ -6,14 +6,16 @@ import unittest
 import asyncio
 import sys
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # إضافة مجلد src إلى المسار
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from config import Config
 from exchange_manager import ExchangeManager
-from risk_manager import RiskManager
+from fee_model import FeeModel
+from risk_manager import RiskManager, ValidationReason
+from risk_engine import MonteCarloRiskEngine
 
 class TestImprovedFunctionality(unittest.TestCase):
     """اختبارات محسنة للوظائف الأساسية"""
@@ -265,7 +267,262 @@ class TestImprovedFunctionality(unittest.TestCase):
         self.assertEqual(len(eth_opportunities), 0, "لا يجب العثور على فرص للأسعار المتساوية")
         
         print(f"✓ تم اكتشاف {len(opportunities)} فرصة مراجحة صحيحة")
-
+    
+    def test_batch_opportunity_validation(self):
+        """اختبار التحقق الدفعي من الفرص ورموز الأسباب"""
+        base = {
+            'symbol': 'BTC/USDT',
+            'buy_exchange': 'binance',
+            'sell_exchange': 'kraken',
+            'buy_price': 43000.0,
+            'sell_price': 43400.0,
+            'profit_percentage': 0.93,
+            'profit_amount': 400.0,
+            'timestamp': datetime.now()
+        }
+        
+        low_profit = dict(base, sell_price=43040.0, profit_percentage=0.1, profit_amount=40.0)
+        blacklisted = dict(base, symbol='TEST/USDT')
+        suspicious = dict(base, sell_price=50000.0, profit_percentage=16.3, profit_amount=7000.0)
+        fee_negative = dict(base, sell_price=43250.0, profit_percentage=0.58, profit_amount=250.0)
+        
+        self.risk_manager.add_to_blacklist('TEST/USDT', "اختبار")
+        candidates = [base, low_profit, blacklisted, suspicious, fee_negative]
+        mask, reasons = self.risk_manager.validate_opportunities_batch(candidates)
+        
+        self.assertEqual(mask.tolist(), [True, False, False, False, False])
+        self.assertEqual(reasons.tolist(), [
+            ValidationReason.VALID,
+            ValidationReason.LOW_PROFIT,
+            ValidationReason.BLACKLISTED,
+            ValidationReason.SUSPICIOUS_SPREAD,
+            ValidationReason.LOW_NET_PROFIT
+        ])
+        
+        # يجب أن تتطابق النتيجة مع التحقق الفردي
+        for candidate, accepted in zip(candidates, mask):
+            is_valid, _ = self.risk_manager.validate_opportunity(candidate)
+            if is_valid:
+                is_valid, _ = self.risk_manager.validate_trade_execution(candidate, Config.MIN_TRADE_AMOUNT)
+            self.assertEqual(is_valid, bool(accepted))
+        
+        print("✓ تم اختبار التحقق الدفعي من الفرص")
+    
+    def test_net_of_fee_opportunity_detection(self):
+        """اختبار استبعاد الفرص السالبة بعد الرسوم عند الاكتشاف"""
+        self.exchange_manager.fee_model._set_fee('exchange_low', 'BTC/USDT', 0.001, 0.004)
+        self.exchange_manager.fee_model._set_fee('exchange_high', 'BTC/USDT', 0.001, 0.004)
+        
+        # انتشار إجمالي 0.7% لكن صافيه بعد 0.8% رسوم سالب
+        self.exchange_manager.prices = {
+            'BTC/USDT': {
+                'exchange_low': {'bid': 42950.0, 'ask': 43000.0},
+                'exchange_high': {'bid': 43301.0, 'ask': 43350.0}
+            }
+        }
+        self.assertEqual(self.exchange_manager.find_arbitrage_opportunities(0.1), [])
+        
+        # رسوم منخفضة تجعل الفرصة مربحة صافياً
+        self.exchange_manager.fee_model._set_fee('exchange_low', 'BTC/USDT', 0.0, 0.0005)
+        self.exchange_manager.fee_model._set_fee('exchange_high', 'BTC/USDT', 0.0, 0.0005)
+        opportunities = self.exchange_manager.find_arbitrage_opportunities(0.1)
+        self.assertEqual(len(opportunities), 1)
+        self.assertAlmostEqual(opportunities[0]['net_profit_percentage'], 0.6, places=1)
+        
+        # مفتاح coinbase يطابق اسم المنصة في ExchangeManager
+        self.assertEqual(self.risk_manager.fee_model.get_fee('coinbase', 'BTC/USDT'), 0.005)
+        
+        print("✓ تم اختبار اكتشاف الفرص بعد الرسوم")
+    
+    def test_fee_refresh_with_sync_client(self):
+        """اختبار تحديث الرسوم من عميل ccxt متزامن وتسجيل المحاولة الفاشلة"""
+        class SyncExchange:
+            has = {'fetchTradingFees': False}
+            markets = None
+            
+            def load_markets(self):
+                return {'BTC/USDT': {'maker': 0.0008, 'taker': 0.0009}}
+        
+        class BrokenExchange(SyncExchange):
+            def load_markets(self):
+                raise ConnectionError("timeout")
+        
+        fee_model = FeeModel({'sync': SyncExchange(), 'broken': BrokenExchange()})
+        
+        # الطريقة المتزامنة تُستدعى في منفذ دون await على قيمتها
+        self.assertTrue(asyncio.run(fee_model.refresh('sync')))
+        self.assertEqual(fee_model.get_fee('sync', 'BTC/USDT'), 0.0009)
+        
+        # الفشل يسجل وقت المحاولة فلا تُعاد في كل دورة
+        self.assertFalse(asyncio.run(fee_model.refresh('broken')))
+        self.assertFalse(fee_model.is_stale('broken'))
+        self.assertEqual(fee_model.get_fee('broken', 'BTC/USDT'), FeeModel.DEFAULT_FEE_RATE)
+        
+        print("✓ تم اختبار تحديث الرسوم من عميل متزامن")
+    
+    def test_exposure_tracking_and_reservations(self):
+        """اختبار تتبع المخزون وحجز الأرصدة عبر المنصات"""
+        tracker = self.risk_manager.exposure_tracker
+        tracker.sync_balances('binance', {'USDT': 50000.0, 'BTC': 0.0})
+        tracker.sync_balances('kraken', {'USDT': 0.0, 'BTC': 1.5})
+        
+        opportunity = {
+            'symbol': 'BTC/USDT',
+            'buy_exchange': 'binance',
+            'sell_exchange': 'kraken',
+            'buy_price': 40000.0,
+            'sell_price': 40400.0
+        }
+        
+        # السعة محدودة برصيد USDT في منصة الشراء
+        capacity, known = tracker.trade_capacity(opportunity)
+        self.assertTrue(known)
+        self.assertAlmostEqual(capacity, 1.25)
+        
+        # الحجز الأول ينجح والثاني يُرفض لمنع الصرف المزدوج
+        reservation = tracker.reserve_for_trade(opportunity, 1.0)
+        self.assertIsNotNone(reservation)
+        self.assertIsNone(tracker.reserve_for_trade(opportunity, 1.0))
+        self.assertAlmostEqual(tracker.available('binance', 'USDT'), 10000.0)
+        
+        # التسوية تحدث الأرصدة وصافي التعرض تدريجياً
+        tracker.settle_trade(
+            reservation,
+            {'filled': 1.0, 'cost': 40000.0},
+            {'filled': 1.0, 'cost': 40400.0}
+        )
+        self.assertEqual(tracker.reserved, {})
+        self.assertAlmostEqual(tracker.available('binance', 'BTC'), 1.0)
+        self.assertAlmostEqual(tracker.available('kraken', 'USDT'), 40400.0)
+        self.assertAlmostEqual(tracker.asset_totals['USDT'], 50400.0)
+        self.assertAlmostEqual(tracker.net_exposure('BTC'), 1.5)
+        
+        print("✓ تم اختبار تتبع المخزون والحجوزات")
+    
+    def test_balance_sync_with_sync_client(self):
+        """اختبار وصول أرصدة عميل ccxt متزامن إلى متتبع التعرض"""
+        class SyncExchange:
+            apiKey = 'key'
+            
+            def fetch_balance(self):
+                return {'free': {'USDT': 1200.0, 'BTC': 0.5, 'ETH': None}}
+        
+        self.exchange_manager.exchanges = {'binance': SyncExchange()}
+        tracker = self.risk_manager.exposure_tracker
+        
+        synced = asyncio.run(self.exchange_manager.sync_exposure(tracker))
+        self.assertEqual(synced, 1)
+        self.assertTrue(tracker.has_balance('binance', 'USDT'))
+        self.assertAlmostEqual(tracker.available('binance', 'USDT'), 1200.0)
+        self.assertAlmostEqual(tracker.available('binance', 'BTC'), 0.5)
+        self.assertFalse(tracker.has_balance('binance', 'ETH'))
+        
+        print("✓ تم اختبار مزامنة الأرصدة من عميل متزامن")
+    
+    def test_capacity_reservations(self):
+        """اختبار حجز السعة للتنفيذ المتزامن"""
+        self.risk_manager.max_daily_trades = 1
+        opportunity = {
+            'symbol': 'ETH/USDT',
+            'buy_exchange': 'binance',
+            'sell_exchange': 'kraken',
+            'buy_price': 2000.0,
+            'sell_price': 2020.0,
+            'profit_percentage': 1.0,
+            'profit_amount': 20.0
+        }
+        
+        # الحجز الأول يستهلك الخانة اليومية الوحيدة
+        reservation, _ = self.risk_manager.reserve_capacity(opportunity, 1.0)
+        self.assertIsNotNone(reservation)
+        
+        second, message = self.risk_manager.reserve_capacity(dict(opportunity, symbol='BTC/USDT'), 1.0)
+        self.assertIsNone(second)
+        self.assertIn("للصفقات اليومية", message)
+        
+        is_valid, _ = self.risk_manager.validate_opportunity(opportunity)
+        self.assertFalse(is_valid)
+        
+        # التحرير يعيد السعة
+        self.risk_manager.release_reservation(reservation)
+        self.assertEqual(self.risk_manager.pending_trades, 0)
+        reservation, _ = self.risk_manager.reserve_capacity(opportunity, 1.0)
+        self.assertIsNotNone(reservation)
+        
+        # الالتزام يسجل الصفقة ويستهلك الحد اليومي
+        self.risk_manager.commit_reservation(reservation, {'symbol': 'ETH/USDT', 'success': True, 'profit': 5.0})
+        self.assertEqual(self.risk_manager.pending_trades, 0)
+        self.assertEqual(len(self.risk_manager.trade_history), 1)
+        self.assertIsNone(self.risk_manager.reserve_capacity(opportunity, 1.0)[0])
+        
+        print("✓ تم اختبار حجوزات السعة")
+    
+    def test_stale_reservations_and_daily_counts(self):
+        """اختبار تحرير الحجوزات العالقة وتنظيف عدادات الأيام السابقة"""
+        opportunity = {
+            'symbol': 'ETH/USDT',
+            'buy_exchange': 'binance',
+            'sell_exchange': 'kraken',
+            'buy_price': 2000.0,
+            'sell_price': 2020.0,
+            'profit_percentage': 1.0,
+            'profit_amount': 20.0
+        }
+        
+        # حجز لم يُلتزم به يُحرر بعد انتهاء صلاحيته
+        reservation, _ = self.risk_manager.reserve_capacity(opportunity, 1.0)
+        self.assertIsNotNone(reservation)
+        self.assertEqual(self.risk_manager.expire_reservations(max_age_seconds=300), 0)
+        self.assertEqual(self.risk_manager.expire_reservations(max_age_seconds=-1), 1)
+        self.assertEqual(self.risk_manager.pending_trades, 0)
+        self.assertEqual(self.risk_manager.inflight_symbols, {})
+        
+        # التحرير بعد الإزالة لا أثر له
+        self.risk_manager.release_reservation(reservation)
+        self.assertEqual(self.risk_manager.pending_trades, 0)
+        
+        # إعادة التعيين تزيل عدادات الأيام السابقة فقط
+        today = datetime.now().date()
+        self.risk_manager.daily_trade_counts = {today - timedelta(days=3): 7, today: 2}
+        self.risk_manager.reset_daily_limits()
+        self.assertEqual(self.risk_manager.daily_trade_counts, {today: 2})
+        
+        print("✓ تم اختبار تحرير الحجوزات العالقة وتنظيف العدادات اليومية")
+    
+    def test_monte_carlo_risk_estimation(self):
+        """اختبار تقدير المخاطر بمحاكاة مونت كارلو"""
+        engine = MonteCarloRiskEngine(num_paths=2048, seed=7)
+        self.risk_manager.risk_engine = engine
+        
+        # أسعار متذبذبة لبناء تقدير التقلب
+        for i in range(20):
+            mid = 100 * (1 + 0.01 * (-1) ** i)
+            engine.record_tick('binance', 'ETH/USDT', mid - 0.01, mid + 0.01, timestamp=1000 + i)
+            engine.record_tick('kraken', 'ETH/USDT', mid - 0.01, mid + 0.01, timestamp=1000 + i)
+        engine.record_latency('binance', 1.0)
+        engine.record_latency('kraken', 1.0)
+        
+        self.assertTrue(engine.has_data('binance', 'ETH/USDT'))
+        self.assertGreater(engine.volatility('binance', 'ETH/USDT'), engine.DEFAULT_VOLATILITY)
+        
+        profitable = {
+            'symbol': 'ETH/USDT', 'buy_exchange': 'binance', 'sell_exchange': 'kraken',
+            'buy_price': 100.0, 'sell_price': 105.0, 'buy_fee_rate': 0.001, 'sell_fee_rate': 0.001
+        }
+        losing = dict(profitable, sell_price=100.05)
+        
+        estimates = engine.estimate_batch([profitable, losing])
+        self.assertGreater(estimates['expected_pnl'][0], 0)
+        self.assertLess(estimates['expected_pnl'][1], 0)
+        self.assertTrue((estimates['cvar'] >= estimates['var']).all())
+        self.assertGreater(estimates['loss_probability'][1], estimates['loss_probability'][0])
+        
+        # الفرصة ذات القيمة المتوقعة السالبة لا تحصل على حجم
+        self.assertEqual(self.risk_manager.calculate_position_size(losing, 10000), 0)
+        self.assertGreater(self.risk_manager.calculate_position_size(profitable, 10000), 0)
+        
+        print("✓ تم اختبار تقدير المخاطر بمحاكاة مونت كارلو")
+    
 def run_improved_tests():
     """تشغيل الاختبارات المحسنة"""
     print("=== بدء الاختبارات المحسنة ===")
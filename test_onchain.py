@@ -0,0 +1,1421 @@
+"""
+اختبارات مكونات السلسلة (RPC غير المتزامن والعقود)
+"""
+
+import unittest
+import os
+import socket
+import time
+from urllib.parse import urlparse
+
+from aiohttp import web
+
+from async_rpc import AsyncRPCClient, RPCError
+from web3 import AsyncWeb3
+from rpc_pool import RPCPool, RPCPoolProvider
+from nonce_manager import NonceManager
+from amm_quoter import AMMQuoter, get_amount_out, flash_loan_fee
+from reserve_cache import ReserveCache, SYNC_TOPIC
+from multicall import Multicall, function_selector
+from flash_loan_optimizer import FlashLoanOptimizer, exact_profit, optimal_amount_in
+from route_finder import RouteFinder, encode_direct_route, pack_batches
+from tx_tracker import TxTracker
+from gas_oracle import GasOracle
+from gas_model import GasModel
+from simulation import Simulator, decode_revert_reason
+from event_indexer import EventIndexer, EVENT_TOPICS
+from chains import CHAINS, get_chain
+from token_registry import TokenRegistry, to_base_units, from_base_units
+from v3_quoter import (V3PoolCache, compute_swap_step, get_sqrt_ratio_at_tick, get_tick_at_sqrt_ratio,
+                       MIN_TICK, MAX_TICK, MIN_SQRT_RATIO, MAX_SQRT_RATIO, MINT_TOPIC, BURN_TOPIC, SWAP_TOPIC)
+from flash_providers import (FlashLoanProviders, aave_premium, v2_flash_fee,
+                             AAVE_ACTIVE_BIT, AAVE_FLASHLOAN_ENABLED_BIT)
+from chain_registry import ChainRegistry
+from flash_loan_manager import FlashLoanManager
+from fee_model import FeeModel
+from price_board import PriceBoard, OnchainVenues, VENUE_DEX, PAIR_CEX_CEX, PAIR_CEX_DEX, PAIR_DEX_DEX
+from config import Config
+
+# عقدة hardhat/anvil المحلية (npx hardhat node أو anvil)
+LOCAL_NODE_URL = os.getenv('LOCAL_NODE_URL', 'http://127.0.0.1:8545')
+
+def local_node_available() -> bool:
+    """التحقق من تشغيل عقدة محلية"""
+    url = urlparse(LOCAL_NODE_URL)
+    try:
+        with socket.create_connection((url.hostname, url.port or 80), timeout=0.5):
+            return True
+    except OSError:
+        return False
+
+class TestAsyncRPCClient(unittest.IsolatedAsyncioTestCase):
+    """اختبارات عميل JSON-RPC عبر خادم HTTP محلي"""
+    
+    async def asyncSetUp(self):
+        """تشغيل خادم JSON-RPC بسيط على منفذ عشوائي"""
+        self.requests = []
+        self.connections = set()
+        
+        async def handle(request):
+            self.connections.add(request.transport)
+            payload = await request.json()
+            self.requests.append(payload)
+            
+            def answer(item):
+                if item['method'] == 'eth_fail':
+                    return {'jsonrpc': '2.0', 'id': item['id'], 'error': {'code': -32000, 'message': 'reverted'}}
+                return {'jsonrpc': '2.0', 'id': item['id'], 'result': hex(len(item['params']) + 1)}
+                
+            if isinstance(payload, list):
+                # إعادة النتائج بترتيب معكوس للتحقق من المطابقة بالمعرف
+                return web.json_response([answer(item) for item in reversed(payload)])
+            return web.json_response(answer(payload))
+            
+        app = web.Application()
+        app.router.add_post('/', handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.client = AsyncRPCClient(f'http://127.0.0.1:{port}/')
+    
+    async def asyncTearDown(self):
+        """إغلاق العميل والخادم"""
+        await self.client.close()
+        await self.runner.cleanup()
+    
+    async def test_batch_and_keepalive(self):
+        """اختبار الطلبات الدفعية وإعادة استخدام الاتصال"""
+        results = await self.client.batch([
+            ('eth_a', []),
+            ('eth_b', [1]),
+            ('eth_c', [1, 2])
+        ])
+        
+        # رحلة واحدة والنتائج بترتيب الاستدعاءات
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(results, ['0x1', '0x2', '0x3'])
+        
+        # الأخطاء تُرفع أو تُعاد في موضعها
+        with self.assertRaises(RPCError):
+            await self.client.batch([('eth_a', []), ('eth_fail', [])])
+        mixed = await self.client.batch([('eth_a', []), ('eth_fail', [])], raise_errors=False)
+        self.assertEqual(mixed[0], '0x1')
+        self.assertIsInstance(mixed[1], RPCError)
+        
+        # الطلبات المتتالية تستخدم نفس الاتصال
+        for _ in range(5):
+            await self.client.call('eth_a')
+        self.assertEqual(len(self.connections), 1)
+        
+        print("✓ تم اختبار الطلبات الدفعية واتصالات keep-alive")
+
+class TestRPCPool(unittest.IsolatedAsyncioTestCase):
+    """اختبارات مجمع عقد RPC عبر ثلاث عقد محلية"""
+    
+    async def asyncSetUp(self):
+        """تشغيل ثلاث عقد بزمن استجابة ورأس كتلة قابلين للتعديل"""
+        import asyncio
+        self.nodes = {}
+        self.runners = []
+        urls = []
+        
+        for name in ('a', 'b', 'c'):
+            node = self.nodes[name] = {'delay': 0.0, 'head': 100, 'down': False, 'methods': []}
+            
+            async def handle(request, node=node, name=name):
+                payload = await request.json()
+                node['methods'].append(payload['method'])
+                if node['down']:
+                    return web.Response(status=503)
+                await asyncio.sleep(node['delay'])
+                if payload['method'] == 'eth_blockNumber':
+                    result = hex(node['head'])
+                elif payload['method'] == 'eth_sendRawTransaction':
+                    result = '0x' + 'ab' * 32
+                elif payload['method'] == 'eth_fail':
+                    return web.json_response({'jsonrpc': '2.0', 'id': payload['id'],
+                                              'error': {'code': 3, 'message': 'execution reverted'}})
+                else:
+                    result = name
+                return web.json_response({'jsonrpc': '2.0', 'id': payload['id'], 'result': result})
+                
+            app = web.Application()
+            app.router.add_post('/', handle)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, '127.0.0.1', 0)
+            await site.start()
+            self.runners.append(runner)
+            urls.append(f'http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/')
+            
+        self.pool = RPCPool(urls, hedge_delay=0.25, cooldown=5.0)
+    
+    async def asyncTearDown(self):
+        """إغلاق المجمع والعقد"""
+        await self.pool.close()
+        for runner in self.runners:
+            await runner.cleanup()
+    
+    async def test_routing_hedging_failover_and_broadcast(self):
+        """اختبار التوجيه لأسرع عقدة سليمة والتحوط وتجاوز الأعطال والبث"""
+        import time
+        a, b, c = self.pool.endpoints
+        
+        # c متأخرة 10 كتل و a أبطأ من b
+        self.nodes['a']['delay'] = 0.03
+        self.nodes['c']['head'] = 90
+        await self.pool.check_health()
+        self.assertFalse(self.pool.is_healthy(c))
+        self.assertEqual(self.pool.ranked()[:2], [b, a])
+        self.assertEqual(await self.pool.call('eth_x'), 'b')
+        
+        # خطأ JSON-RPC رد من العقدة ولا يُعاد على غيرها
+        with self.assertRaises(RPCError):
+            await self.pool.call('eth_fail')
+        self.assertEqual(self.nodes['a']['methods'].count('eth_fail'), 0)
+        
+        # b بطيئة: الطلب يُرسل لـ a بعد مهلة التحوط ويُعتمد أول رد
+        # (المهلة أطول من توقف جمع المهملات حتى لا يُرسل الطلب لـ c أيضاً)
+        self.nodes['b']['delay'] = 1.0
+        started = time.time()
+        self.assertEqual(await self.pool.call('eth_x'), 'a')
+        self.assertLess(time.time() - started, 0.5)
+        self.assertEqual(self.pool.hedged, 1)
+        self.assertEqual(self.pool.ranked()[0], a)
+        
+        # a معطلة: انتقال فوري إلى b وفترة تهدئة لـ a
+        self.nodes['b']['delay'] = 0.0
+        self.nodes['a']['down'] = True
+        self.assertEqual(await self.pool.call('eth_x'), 'b')
+        self.assertGreater(a['down_until'], time.time())
+        self.assertEqual(self.pool.ranked()[0], b)
+        
+        # المعاملة تُبث لجميع العقد وتنجح رغم تعطل إحداها
+        tx_hash = await self.pool.send_raw_transaction(b'\x01')
+        self.assertEqual(tx_hash, '0x' + 'ab' * 32)
+        for node in self.nodes.values():
+            self.assertIn('eth_sendRawTransaction', node['methods'])
+        
+        # AsyncWeb3 عبر المجمع: نفس تجاوز الأعطال لاستدعاءات العقود وبناء المعاملات
+        w3 = AsyncWeb3(RPCPoolProvider(self.pool))
+        self.assertTrue(await w3.is_connected())
+        self.assertEqual(await w3.eth.block_number, 100)
+        self.assertEqual(self.nodes['a']['methods'].count('eth_blockNumber'), 1)
+            
+        print("✓ تم اختبار مجمع عقد RPC")
+
+class TestNonceManager(unittest.TestCase):
+    """اختبارات مدير الـ nonce المحلي"""
+    
+    def test_allocation_and_gap_recovery(self):
+        """اختبار التوزيع الذري وكشف الفجوات وإعادة المزامنة"""
+        manager = NonceManager()
+        with self.assertRaises(RuntimeError):
+            manager.allocate()
+            
+        manager.sync(7)
+        nonces = [manager.allocate() for _ in range(3)]
+        self.assertEqual(nonces, [7, 8, 9])
+        
+        # فشل إرسال الأخير يعيد العداد، وفشل الأوسط يترك فجوة يُعاد استخدامها
+        manager.mark_sent(7, '0xa')
+        manager.release(9)
+        self.assertEqual(manager.next_nonce, 9)
+        manager.release(8)
+        self.assertEqual(manager.next_nonce, 8)
+        
+        a, b = manager.allocate(), manager.allocate()
+        manager.mark_sent(a, '0xb')
+        manager.mark_sent(b, '0xc')
+        
+        # المعاملة 7 عُدّنت والمعاملة 8 أُسقطت من mempool
+        result = manager.reconcile(latest_count=8, pending_count=8)
+        self.assertEqual(result['mined'], [7])
+        self.assertEqual(result['gap'], 8)
+        self.assertEqual(result['stuck'], [8, 9])
+        
+        # بدون معاملات محلية خلف الفجوة يُعاد ضبط العداد
+        manager.confirm(8)
+        manager.confirm(9)
+        result = manager.reconcile(latest_count=8, pending_count=8)
+        self.assertTrue(result['resynced'])
+        self.assertEqual(manager.allocate(), 8)
+        
+        # معاملات مرسلة من خارج المدير
+        manager.reconcile(latest_count=12, pending_count=12)
+        self.assertEqual(manager.allocate(), 12)
+        
+        # خطأ nonce عند الإرسال: المزامنة تلغي الحجز العالق فلا تمنع ضبط فجوة لاحقة
+        manager = NonceManager()
+        manager.sync(5)
+        manager.allocate()
+        manager.sync(10)
+        self.assertEqual(manager.allocated, set())
+        result = manager.reconcile(latest_count=8, pending_count=8)
+        self.assertEqual((result['gap'], result['resynced']), (None, True))
+        self.assertEqual(manager.allocate(), 8)
+        
+        # الحجوزات فوق nonce الشبكة لمعاملات قيد البناء لا تُوزع مرة ثانية
+        manager = NonceManager()
+        manager.sync(10)
+        building = [manager.allocate() for _ in range(3)]
+        manager.release(building[0])
+        manager.release(building[1])
+        manager.sync(10)
+        self.assertEqual(manager.allocated, {12})
+        self.assertEqual(manager.next_nonce, 13)
+        self.assertEqual([manager.allocate() for _ in range(3)], [10, 11, 13])
+        
+        print("✓ تم اختبار مدير الـ nonce")
+
+class TestAMMQuoter(unittest.TestCase):
+    """اختبارات محاكي AMM المحلي"""
+    
+    WETH = '0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2'
+    DAI = '0x6B175474E89094C44Da98b954EedeAC495271d0F'
+    
+    def test_integer_quotes_match_contract(self):
+        """اختبار مطابقة الحساب الصحيح لـ getAmountOut و calculatePotentialProfit"""
+        # قيم محسوبة يدوياً من صيغة UniswapV2Library
+        self.assertEqual(get_amount_out(10 ** 18, 100 * 10 ** 18, 200000 * 10 ** 18),
+                         (10 ** 18 * 997 * 200000 * 10 ** 18) // (100 * 10 ** 18 * 1000 + 10 ** 18 * 997))
+        self.assertEqual(flash_loan_fee(10 ** 18), 5 * 10 ** 14)
+        with self.assertRaises(ValueError):
+            get_amount_out(1, 0, 10)
+            
+        quoter = AMMQuoter()
+        quoter.set_reserves('uniswap_v2', self.WETH, self.DAI, 1000 * 10 ** 18, 2000000 * 10 ** 18)
+        quoter.set_reserves('sushiswap', self.DAI, self.WETH, 1900000 * 10 ** 18, 1000 * 10 ** 18)
+        
+        amount_in = 10 ** 18
+        dai_out = get_amount_out(amount_in, 1000 * 10 ** 18, 2000000 * 10 ** 18)
+        weth_back = get_amount_out(dai_out, 1900000 * 10 ** 18, 1000 * 10 ** 18)
+        expected = weth_back - amount_in - flash_loan_fee(amount_in)
+        
+        # الموجهات بالعناوين كما يستقبلها العقد
+        params = {
+            'tokenA': self.WETH, 'tokenB': self.DAI, 'amountIn': amount_in,
+            'buyDex': Config.DEX_CONFIGS['uniswap_v2']['router_address'],
+            'sellDex': Config.DEX_CONFIGS['sushiswap']['router_address'],
+            'minProfit': 0
+        }
+        self.assertEqual(quoter.calculate_potential_profit(params), expected)
+        self.assertEqual(quoter.can_execute_arbitrage(params), (True, expected, "يمكن تنفيذ المراجحة"))
+        
+        # الاتجاه المعاكس خاسر، ومنصة غير مدعومة تعطي صفراً كما في العقد
+        reverse = dict(params, buyDex=params['sellDex'], sellDex=params['buyDex'])
+        self.assertEqual(quoter.calculate_potential_profit(reverse), 0)
+        self.assertEqual(quoter.calculate_potential_profit(dict(params, sellDex='0x' + '1' * 40)), 0)
+        self.assertFalse(quoter.can_execute_arbitrage(dict(params, sellDex=params['buyDex']))[0])
+        
+        # آلاف الفرص دون أي RPC
+        started = time.perf_counter()
+        results = quoter.evaluate_batch([dict(params, amountIn=amount_in + i) for i in range(5000)])
+        self.assertEqual(len(results), 5000)
+        self.assertLess(time.perf_counter() - started, 1.0)
+        
+        print("✓ تم اختبار محاكي AMM المحلي")
+
+class TestFlashLoanOptimizer(unittest.TestCase):
+    """اختبارات حساب مبلغ القرض الأمثل"""
+    
+    def test_closed_form_matches_search(self):
+        """اختبار مطابقة الحل التحليلي والتحسين الصحيح للبحث الشامل"""
+        weth, dai = TestAMMQuoter.WETH, TestAMMQuoter.DAI
+        buy = (1000 * 10 ** 18, 2000000 * 10 ** 18)  # WETH → DAI
+        sell = (1900000 * 10 ** 18, 1000 * 10 ** 18)  # DAI → WETH
+        
+        analytic = optimal_amount_in(buy[0], buy[1], sell[0], sell[1])
+        self.assertGreater(analytic, 0)
+        
+        # بحث شامل بخطوة 0.01 WETH حول الحل
+        grid = range(int(analytic) - 10 ** 18, int(analytic) + 10 ** 18, 10 ** 16)
+        best_grid = max(exact_profit(x, buy[0], buy[1], sell[0], sell[1]) for x in grid)
+        
+        quoter = AMMQuoter()
+        quoter.set_reserves('uniswap_v2', weth, dai, *buy)
+        quoter.set_reserves('sushiswap', dai, weth, *sell)
+        optimizer = FlashLoanOptimizer(quoter)
+        
+        plan = optimizer.optimize(weth, dai, 'uniswap_v2', 'sushiswap')
+        self.assertTrue(plan['profitable'])
+        self.assertGreaterEqual(plan['expected_profit'], best_grid)
+        self.assertLess(abs(plan['amount_in'] - analytic), 10 ** 15)
+        
+        # الاتجاه المعاكس غير مربح، والغاز الكبير يلغي الجدوى
+        self.assertFalse(optimizer.optimize(weth, dai, 'sushiswap', 'uniswap_v2')['profitable'])
+        self.assertFalse(optimizer.optimize(weth, dai, 'uniswap_v2', 'sushiswap',
+                                            gas_cost=plan['expected_profit'])['profitable'])
+        self.assertEqual(optimizer.best_for_pair(weth, dai)['buy_dex'], 'uniswap_v2')
+        
+        # حد أقصى للمبلغ
+        capped = optimizer.optimize(weth, dai, 'uniswap_v2', 'sushiswap', max_amount=10 ** 18)
+        self.assertLessEqual(capped['amount_in'], 10 ** 18)
+        
+        print("✓ تم اختبار حساب مبلغ القرض الأمثل")
+
+class TestRouteFinder(unittest.TestCase):
+    """اختبارات البحث عن المسارات الدائرية متعددة الخطوات"""
+    
+    USDC = '0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48'
+    
+    def test_triangular_route(self):
+        """اختبار تعداد المسارات وإيجاد مسار مثلثي مربح وإعادة التقييم الجزئية"""
+        weth, dai, usdc = TestAMMQuoter.WETH, TestAMMQuoter.DAI, self.USDC
+        quoter = AMMQuoter()
+        # WETH رخيص مقابل USDC: المسار WETH → USDC → DAI → WETH مربح
+        quoter.set_reserves('uniswap_v2', weth, dai, 1000 * 10 ** 18, 2000000 * 10 ** 18)
+        quoter.set_reserves('uniswap_v2', dai, usdc, 1000000 * 10 ** 18, 1000000 * 10 ** 18)
+        quoter.set_reserves('uniswap_v2', usdc, weth, 2100000 * 10 ** 18, 1000 * 10 ** 18)
+        quoter.set_reserves('sushiswap', weth, dai, 1000 * 10 ** 18, 2000000 * 10 ** 18)
+        
+        finder = RouteFinder(quoter, [weth])
+        finder.update()
+        
+        # مساران لكل اتجاه عبر المثلث (مجمعا WETH/DAI) + الدائرة بين المنصتين في الاتجاهين
+        self.assertEqual(len(finder.routes), 6)
+        self.assertTrue(all(route[0][1] == weth.lower() and route[-1][2] == weth.lower()
+                            for route in finder.routes))
+        
+        best = finder.best_routes(limit=1)[0]
+        self.assertEqual([hop[2] for hop in best['route']], [usdc.lower(), dai.lower(), weth.lower()])
+        self.assertGreater(best['expected_profit'], 0)
+        self.assertEqual(best['expected_profit'],
+                         finder.route_output(best['route'], best['amount_in'])
+                         - best['amount_in'] - flash_loan_fee(best['amount_in']))
+        
+        # المبلغ المحسن أفضل من المبالغ المجاورة
+        for amount in (best['amount_in'] * 9 // 10, best['amount_in'] * 11 // 10):
+            self.assertGreaterEqual(best['expected_profit'],
+                                    finder.route_output(best['route'], amount) - amount - flash_loan_fee(amount))
+        
+        # تحديث مجمع sushiswap يعيد تقييم المسارات المارة به فقط
+        quoter.set_reserves('sushiswap', weth, dai, 1000 * 10 ** 18, 1900000 * 10 ** 18)
+        sushi_key = RouteFinder.pool_key(('sushiswap', weth.lower(), dai.lower()))
+        self.assertEqual(finder.update({sushi_key}), len(finder.routes_by_pool[sushi_key]))
+        self.assertLess(len(finder.routes_by_pool[sushi_key]), len(finder.routes))
+        
+        # إغلاق الفجوة يلغي المسار المثلثي على uniswap_v2
+        quoter.set_reserves('uniswap_v2', usdc, weth, 2000000 * 10 ** 18, 1000 * 10 ** 18)
+        usdc_key = RouteFinder.pool_key(('uniswap_v2', usdc.lower(), weth.lower()))
+        finder.update({usdc_key})
+        self.assertFalse(any(all(hop[0] == 'uniswap_v2' for hop in r['route']) for r in finder.best_routes()))
+        
+        print("✓ تم اختبار البحث عن المسارات الدائرية")
+    
+    def test_pack_independent_routes(self):
+        """اختبار تجميع المسارات في دفعات دون مجمعات مشتركة ولكل أصل على حدة"""
+        weth, dai, usdc = TestAMMQuoter.WETH.lower(), TestAMMQuoter.DAI.lower(), self.USDC.lower()
+        wbtc = '0x2260fac5e5542a773aa44fbcfedf7c193bc2c599'
+        
+        def plan(route, profit):
+            return {'route': route, 'asset': route[0][1], 'amount_in': 10 ** 18, 'expected_profit': profit}
+            
+        best = plan((('uniswap_v2', weth, dai), ('sushiswap', dai, weth)), 50)
+        shared = plan((('sushiswap', weth, dai), ('uniswap_v2', dai, weth)), 40)  # نفس المجمعين
+        independent = plan((('uniswap_v2', weth, usdc), ('sushiswap', usdc, weth)), 30)
+        other_asset = plan((('uniswap_v2', dai, usdc), ('sushiswap', usdc, dai)), 20)
+        
+        batches = pack_batches([independent, shared, other_asset, best])
+        self.assertEqual(batches, [[best, independent], [shared], [other_asset]])
+        
+        # حد عدد المسارات لكل دفعة
+        third = plan((('uniswap_v2', weth, wbtc), ('sushiswap', wbtc, weth)), 10)
+        self.assertEqual(pack_batches([best, independent, third], max_routes=2),
+                         [[best, independent], [third]])
+        
+        print("✓ تم اختبار تجميع المسارات في دفعات")
+    
+    def test_encode_direct_route(self):
+        """اختبار الترميز المضغوط للمسار المباشر (مطابق لتخطيط executeDirect)"""
+        weth = TestAMMQuoter.WETH
+        pair_a, pair_b = '0x' + 'aa' * 20, '0x' + 'bb' * 20
+        data = encode_direct_route(weth, 10 ** 18, 5, [(pair_a, True, 2000), (pair_b, False, 10 ** 18 + 7)])
+        
+        self.assertEqual(len(data), 53 + 2 * 37)
+        self.assertEqual('0x' + data[:20].hex(), weth.lower())
+        self.assertEqual(int.from_bytes(data[20:36], 'big'), 10 ** 18)
+        self.assertEqual(int.from_bytes(data[36:52], 'big'), 5)
+        self.assertEqual(data[52], 2)
+        self.assertEqual('0x' + data[53:73].hex(), pair_a)
+        self.assertEqual(data[73], 1)
+        self.assertEqual(int.from_bytes(data[74:90], 'big'), 2000)
+        self.assertEqual(data[90 + 20], 0)
+        self.assertEqual(int.from_bytes(data[-16:], 'big'), 10 ** 18 + 7)
+        
+        with self.assertRaises(ValueError):
+            encode_direct_route(weth, 1, 0, [(pair_a, True, 1)])
+        
+        print("✓ تم اختبار ترميز المسار المباشر")
+
+class TestReserveCache(unittest.TestCase):
+    """اختبارات ذاكرة الاحتياطيات"""
+    
+    PAIR = '0x' + 'ab' * 20
+    
+    def sync_log(self, block_number: int, log_index: int, reserve0: int, reserve1: int) -> dict:
+        """إنشاء سجل Sync بصيغة eth_getLogs"""
+        return {
+            'address': self.PAIR,
+            'topics': [SYNC_TOPIC],
+            'data': '0x' + hex(reserve0)[2:].rjust(64, '0') + hex(reserve1)[2:].rjust(64, '0'),
+            'blockNumber': hex(block_number),
+            'logIndex': hex(log_index)
+        }
+    
+    def test_sync_updates_and_reorg_rollback(self):
+        """اختبار تطبيق أحداث Sync والتراجع عند إعادة التنظيم"""
+        cache = ReserveCache(rpc=None)
+        weth, dai = TestAMMQuoter.WETH, TestAMMQuoter.DAI
+        token0, token1, _ = cache._sort_tokens(weth, dai)
+        key = ('uniswap_v2', token0, token1)
+        cache.pairs[key] = self.PAIR
+        cache.pair_index[self.PAIR] = key
+        cache.reserves[key] = (100, 200)
+        cache.last_block = 10
+        
+        # آخر حدث في الكتلة هو المعتمد حتى لو وصلت السجلات بغير ترتيب
+        applied = cache.apply_logs([
+            self.sync_log(12, 3, 130, 170),
+            self.sync_log(11, 0, 110, 190),
+            self.sync_log(12, 1, 120, 180)
+        ])
+        self.assertEqual(applied, 3)
+        self.assertEqual(cache.reserves[key], (130, 170))
+        
+        # الاتجاه حسب ترتيب العناوين
+        self.assertEqual(cache.get_reserves('uniswap_v2', token1, token0), (170, 130))
+        
+        # إعادة تنظيم تلغي الكتلة 12
+        cache.rollback(11)
+        self.assertEqual(cache.reserves[key], (110, 190))
+        self.assertEqual(cache.last_block, 11)
+        cache.rollback(10)
+        self.assertEqual(cache.reserves[key], (100, 200))
+        
+        # مصدر احتياطيات للمحاكي
+        quoter = AMMQuoter(cache)
+        self.assertTrue(quoter.has_pair('uniswap_v2', weth, dai))
+        self.assertFalse(quoter.has_pair('sushiswap', weth, dai))
+        
+        print("✓ تم اختبار ذاكرة الاحتياطيات")
+
+class TestMulticall(unittest.IsolatedAsyncioTestCase):
+    """اختبارات تجميع الاستدعاءات عبر Multicall3"""
+    
+    async def test_aggregate_and_block_cache(self):
+        """اختبار تجميع الاستدعاءات في eth_call واحد وذاكرة الكتلة"""
+        from eth_abi import decode, encode
+        
+        class LocalAggregator:
+            """تنفيذ aggregate3 محلياً لاختبار الترميز"""
+            
+            def __init__(self):
+                self.requests = 0
+                self.block = 42  # آخر كتلة (latest)
+                self.tags = []
+            
+            async def call(self, method, params):
+                self.requests += 1
+                self.tags.append(params[1])
+                block = self.block if params[1] == 'latest' else int(params[1], 16)
+                calls = decode(['(address,bool,bytes)[]'], bytes.fromhex(params[0]['data'][10:]))[0]
+                results = []
+                for target, _, calldata in calls:
+                    if calldata == function_selector('getBlockNumber()'):
+                        results.append((True, encode(['uint256'], [block])))
+                    elif calldata[:4] == function_selector('fail()'):
+                        results.append((False, b''))
+                    else:
+                        # الرصيد = آخر بايت من العنوان المطلوب + 100 لكل كتلة بعد 42
+                        results.append((True, encode(['uint256'], [calldata[-1] + (block - 42) * 100])))
+                return '0x' + encode(['(bool,bytes)[]'], [results]).hex()
+            
+        rpc = LocalAggregator()
+        multicall = Multicall(rpc)
+        token = '0x' + '11' * 20
+        specs = [
+            (token, 'balanceOf(address)', ['0x' + '00' * 19 + '07'], ['uint256']),
+            (token, 'balanceOf(address)', ['0x' + '00' * 19 + '09'], ['uint256']),
+            (token, 'fail()', [], ['uint256'])
+        ]
+        
+        self.assertEqual(await multicall.call(specs), [7, 9, None])
+        self.assertEqual(rpc.requests, 1)
+        self.assertEqual(multicall.cache_block, 42)
+        
+        # نفس الكتلة: من الذاكرة دون أي طلب
+        self.assertEqual(await multicall.call(specs[:2], block=42), [7, 9])
+        self.assertEqual(rpc.requests, 1)
+        
+        # كتلة مختلفة: طلب جديد واحد
+        await multicall.call(specs, block=43)
+        self.assertEqual(rpc.requests, 2)
+        
+        # latest تقدم خلال مدة الصلاحية: لا خلط بين نتائج كتلتين في نفس القائمة
+        rpc.block = 44
+        balances = await multicall.call(specs[:1] + [(token, 'balanceOf(address)', ['0x' + '00' * 19 + '05'], ['uint256'])])
+        self.assertEqual(balances, [207, 205])
+        self.assertEqual((multicall.cache_block, rpc.tags[-1]), (44, hex(44)))
+        
+        print("✓ تم اختبار تجميع الاستدعاءات عبر Multicall3")
+
+class TestGasOracle(unittest.IsolatedAsyncioTestCase):
+    """اختبارات أوراكل رسوم الغاز"""
+    
+    async def test_fee_history_and_block_cache(self):
+        """اختبار نسب رسوم الأولوية وبناء حقول EIP-1559 والتخزين لكل كتلة"""
+        gwei = 10 ** 9
+        
+        class LocalFeeHistory:
+            """نتيجة eth_feeHistory لثلاث كتل تنتهي بالكتلة 102"""
+            
+            def __init__(self):
+                self.requests = 0
+                self.legacy = False
+            
+            async def call(self, method, params):
+                self.requests += 1
+                self.last_call = (method, params)
+                base_fees = [0, 0, 0, 0] if self.legacy else [20 * gwei, 22 * gwei, 21 * gwei, 24 * gwei]
+                return {
+                    'oldestBlock': hex(100),
+                    'baseFeePerGas': [hex(fee) for fee in base_fees],
+                    'reward': [[hex(1 * gwei), hex(2 * gwei), hex(5 * gwei)],
+                               [hex(1 * gwei), hex(3 * gwei), hex(9 * gwei)],
+                               [hex(2 * gwei), hex(2 * gwei), hex(7 * gwei)]]
+                }
+            
+            async def gas_price(self):
+                self.requests += 1
+                return 30 * gwei
+            
+        rpc = LocalFeeHistory()
+        oracle = GasOracle(rpc, block_count=3)
+        self.assertFalse(oracle.ready)
+        
+        await oracle.refresh()
+        self.assertEqual(rpc.last_call, ('eth_feeHistory', ['0x3', 'latest', [10, 50, 90]]))
+        self.assertEqual(oracle.block_number, 102)
+        self.assertEqual(oracle.base_fee, 24 * gwei)
+        self.assertEqual(oracle.priority_fee('slow'), 1 * gwei)
+        self.assertEqual(oracle.priority_fee('standard'), 2 * gwei)
+        self.assertEqual(oracle.priority_fee('fast'), 7 * gwei)
+        
+        self.assertEqual(oracle.transaction_fees('fast'), {
+            'type': 2, 'maxPriorityFeePerGas': 7 * gwei, 'maxFeePerGas': 55 * gwei
+        })
+        self.assertEqual(oracle.estimate_cost(100000, 'standard'), 100000 * 26 * gwei)
+        
+        # نفس الكتلة: من الذاكرة دون أي طلب
+        await oracle.refresh(102)
+        self.assertEqual(rpc.requests, 1)
+        
+        # شبكة دون EIP-1559: gasPrice التقليدي
+        rpc.legacy = True
+        await oracle.refresh(103)
+        self.assertEqual(oracle.transaction_fees(), {'gasPrice': 30 * gwei})
+        self.assertEqual(oracle.effective_gas_price(), 30 * gwei)
+        
+        print("✓ تم اختبار أوراكل رسوم الغاز")
+
+class TestGasModel(unittest.TestCase):
+    """اختبارات نموذج الغاز حسب شكل المسار"""
+    
+    def test_learns_from_estimates_and_receipts(self):
+        """اختبار التقدير الافتراضي والتعلم من eth_estimateGas و gasUsed"""
+        model = GasModel(alpha=0.5, refresh_interval=60)
+        weth = TestAMMQuoter.WETH
+        two_hop = model.shape(('uniswap_v2', 'sushiswap'), weth)
+        three_hop = model.shape(('uniswap_v2', 'uniswap_v2', 'sushiswap'), weth, kind='route')
+        
+        # افتراضي خطي بعدد الخطوات
+        self.assertEqual(model.estimate(two_hop), GasModel.BASE_GAS + 2 * GasModel.PER_HOP_GAS)
+        self.assertGreater(model.estimate(three_hop), model.estimate(two_hop))
+        
+        # قالب المعاملة يجعل الشكل مستحقاً لإعادة التقدير
+        model.remember_transaction(two_hop, {'from': '0x01', 'to': '0x02', 'data': '0xabcd', 'gas': 10 ** 6, 'nonce': 3})
+        stale = model.stale_shapes()
+        self.assertEqual(stale, [(two_hop, {'from': '0x01', 'to': '0x02', 'data': '0xabcd'})])
+        
+        model.record_estimate(two_hop, 400000)
+        self.assertEqual(model.estimate(two_hop), 400000)
+        self.assertEqual(model.stale_shapes(), [])
+        self.assertEqual(len(model.stale_shapes(now=model.entries[two_hop]['updated_at'] + 60)), 1)
+        
+        # الإيصالات لها الأولوية (متوسط متحرك)
+        model.record_receipt(two_hop, 300000)
+        model.record_receipt(two_hop, 340000)
+        self.assertEqual(model.estimate(two_hop), 320000)
+        self.assertGreaterEqual(model.gas_limit(two_hop), 440000)
+        
+        # شكل غير معروف بنفس عدد الخطوات يستخدم أقرب شكل متعلم
+        other = model.shape(('sushiswap', 'uniswap_v2'), TestAMMQuoter.DAI)
+        self.assertEqual(model.estimate(other), 320000)
+        
+        print("✓ تم اختبار نموذج الغاز حسب شكل المسار")
+
+class TestTxTracker(unittest.IsolatedAsyncioTestCase):
+    """اختبارات متتبع المعاملات المعلقة"""
+    
+    ADDRESS = '0x' + 'cd' * 20
+    
+    async def test_confirm_replace_drop_and_speed_up(self):
+        """اختبار حسم المعاملات بالتضمين والاستبدال والإسقاط وإعادة البث"""
+        
+        class LocalChain:
+            """سلسلة محلية: رقم كتلة وإيصالات ومعاملات معروفة في mempool"""
+            
+            def __init__(self):
+                self.block = 100
+                self.mined_count = 0
+                self.receipts = {}
+                self.mempool = set()
+                self.batches = 0
+            
+            async def block_number(self):
+                return self.block
+            
+            async def batch(self, calls, raise_errors=True):
+                self.batches += 1
+                results = []
+                for method, params in calls:
+                    if method == 'eth_getTransactionCount':
+                        results.append(hex(self.mined_count))
+                    elif method == 'eth_getTransactionReceipt':
+                        results.append(self.receipts.get(params[0]))
+                    elif method == 'eth_getTransactionByHash':
+                        results.append({'hash': params[0]} if params[0] in self.mempool else None)
+                return results
+            
+        chain = LocalChain()
+        broadcast = []
+        
+        async def sender(transaction):
+            broadcast.append(transaction)
+            tx_hash = '0x%064x' % (1000 + len(broadcast))
+            chain.mempool.add(tx_hash)
+            return tx_hash
+            
+        nonce_manager = NonceManager()
+        nonce_manager.sync(5)
+        tracker = TxTracker(chain, nonce_manager, self.ADDRESS, sender, drop_after_blocks=3)
+        
+        settled = []
+        futures = {}
+        for _ in range(3):
+            nonce = nonce_manager.allocate()
+            transaction = {'nonce': nonce, 'gas': 100000, 'gasPrice': 10 ** 9, 'chainId': 1}
+            tx_hash = '0x%064x' % nonce
+            chain.mempool.add(tx_hash)
+            nonce_manager.mark_sent(nonce, tx_hash)
+            futures[nonce] = tracker.track(tx_hash, transaction, callback=settled.append)
+            
+        # الإسراع: نفس الـ nonce بسعر أعلى بنسبة لا تقل عن حد الاستبدال
+        new_hash = await tracker.speed_up(5)
+        self.assertEqual(broadcast[-1]['nonce'], 5)
+        self.assertGreaterEqual(broadcast[-1]['gasPrice'], int(10 ** 9 * 1.125))
+        self.assertEqual(nonce_manager.get_tx_hash(5), new_hash)
+        
+        # الإلغاء: تحويل فارغ للحساب نفسه
+        await tracker.cancel(7)
+        self.assertEqual(broadcast[-1]['to'], self.ADDRESS)
+        self.assertEqual(broadcast[-1]['gas'], 21000)
+        
+        # كتلة جديدة: الإصدار المسرع للـ 5 معدن، والـ 6 استُهلك بمعاملة خارجية
+        chain.block = 101
+        chain.mined_count = 7
+        chain.receipts[new_hash] = {
+            'transactionHash': new_hash, 'status': '0x1', 'blockNumber': hex(101), 'gasUsed': hex(90000)
+        }
+        results = await tracker.poll()
+        self.assertEqual(sorted(r['status'] for r in results), ['confirmed', 'replaced'])
+        self.assertEqual(futures[5].result()['tx_hash'], new_hash)
+        self.assertEqual(futures[5].result()['gas_used'], 90000)
+        self.assertEqual(futures[6].result()['status'], 'replaced')
+        
+        # نفس الكتلة: لا استعلام جديد
+        batches = chain.batches
+        self.assertEqual(await tracker.poll(), [])
+        self.assertEqual(chain.batches, batches)
+        
+        # الـ 7 يختفي من mempool: يُحسم كمسقط بعد drop_after_blocks ويُعاد الـ nonce
+        chain.mempool.clear()
+        for block in (102, 103, 104, 105):
+            chain.block = block
+            await tracker.poll()
+        self.assertEqual(futures[7].result()['status'], 'dropped')
+        self.assertEqual(tracker.pending_count(), 0)
+        self.assertEqual(len(settled), 3)
+        self.assertEqual(nonce_manager.allocate(), 7)
+        
+        print("✓ تم اختبار متتبع المعاملات المعلقة")
+
+class TestSimulator(unittest.IsolatedAsyncioTestCase):
+    """اختبارات محاكاة الفرص عبر eth_call"""
+    
+    async def test_concurrent_candidates_share_one_batch(self):
+        """اختبار تجميع عمليات المحاكاة المتزامنة في طلب واحد وفك الربح والغاز وسبب الارتداد"""
+        import asyncio
+        from eth_abi import encode
+        
+        contract = '0x' + '11' * 20
+        sender = '0x' + '22' * 20
+        revert_data = '0x08c379a0' + encode(['string'], ['الربح المتوقع أقل من الحد الأدنى']).hex()
+        
+        class LocalFork:
+            """نسخة متفرعة: الفرص بمبلغ أكبر من 10**18 ترتد"""
+            
+            def __init__(self):
+                self.batches = []
+            
+            async def block_number(self):
+                return 1234
+            
+            async def batch(self, calls, raise_errors=True):
+                self.batches.append(calls)
+                results = []
+                for method, (transaction, block_tag, overrides) in calls:
+                    amount_in = int(transaction['data'][2 + 8 + 64 * 2:2 + 8 + 64 * 3], 16)
+                    if amount_in > 10 ** 18:
+                        results.append(RPCError(3, 'execution reverted', revert_data))
+                    else:
+                        results.append('0x' + encode(['uint256', 'uint256'], [amount_in // 100, 250000]).hex())
+                return results
+        
+        rpc = LocalFork()
+        simulator = Simulator(rpc, contract, sender)
+        candidates = [{
+            'tokenA': TestAMMQuoter.WETH, 'tokenB': TestAMMQuoter.DAI, 'amountIn': amount,
+            'buyDex': Config.DEX_CONFIGS['uniswap_v2']['router_address'],
+            'sellDex': Config.DEX_CONFIGS['sushiswap']['router_address'], 'minProfit': 0
+        } for amount in (10 ** 17, 10 ** 18, 5 * 10 ** 18)]
+        
+        results = await asyncio.gather(*[simulator.simulate(params) for params in candidates])
+        
+        # طلب دفعي واحد على نفس الكتلة مع رصيد المرسل في تجاوزات الحالة
+        self.assertEqual(len(rpc.batches), 1)
+        method, (transaction, block_tag, overrides) = rpc.batches[0][0]
+        self.assertEqual((method, block_tag), ('eth_call', hex(1234)))
+        self.assertIn('balance', overrides[simulator.sender])
+        
+        self.assertTrue(results[0]['success'])
+        self.assertEqual(results[0]['profit'], 10 ** 15)
+        self.assertGreater(results[0]['gas_used'], 250000 + 21000)
+        self.assertEqual(results[1]['block_number'], 1234)
+        self.assertFalse(results[2]['success'])
+        self.assertEqual(results[2]['revert_reason'], 'الربح المتوقع أقل من الحد الأدنى')
+        self.assertEqual(decode_revert_reason('0x4e487b71' + encode(['uint256'], [0x11]).hex()), 'Panic(0x11)')
+        
+        # استدعاءات التنفيذ الكاملة تُجمع مع الفرص في نفس الدفعة ولا تعيد ربحاً
+        execute_ok = bytes.fromhex('816be2cf') + encode(['uint256', 'uint256', 'uint256'], [0, 0, 10 ** 17])
+        execute_reverted = bytes.fromhex('816be2cf') + encode(['uint256', 'uint256', 'uint256'], [0, 0, 10 ** 19])
+        results = await asyncio.gather(
+            simulator.simulate_call(execute_ok),
+            simulator.simulate_call(execute_reverted),
+            simulator.simulate(candidates[0])
+        )
+        self.assertEqual(len(rpc.batches), 2)
+        self.assertEqual(len(rpc.batches[1]), 3)
+        self.assertEqual(results[0], {'success': True, 'profit': None, 'gas_used': None,
+                                      'revert_reason': None, 'block_number': 1234})
+        self.assertFalse(results[1]['success'])
+        self.assertEqual(results[1]['revert_reason'], 'الربح المتوقع أقل من الحد الأدنى')
+        self.assertEqual(results[2]['profit'], 10 ** 15)
+        
+        print("✓ تم اختبار محاكاة الفرص الدفعية")
+
+class TestEventIndexer(unittest.IsolatedAsyncioTestCase):
+    """اختبارات فهرس أحداث العقد"""
+    
+    async def test_chunked_logs_resume_and_pnl(self):
+        """اختبار النطاقات المجزأة وتقسيم النطاق المرفوض والاستئناف والأرباح المحققة"""
+        contract = '0x' + 'ab' * 20
+        weth = TestAMMQuoter.WETH.lower()
+        topics = {name: topic for topic, name in EVENT_TOPICS.items()}
+        
+        def word(value):
+            return hex(value)[2:].rjust(64, '0')
+        
+        def log(block, tx_hash, index, name, data):
+            return {
+                'address': contract, 'blockNumber': hex(block), 'transactionHash': tx_hash,
+                'logIndex': hex(index), 'topics': [topics[name], '0x' + weth[2:].rjust(64, '0')],
+                'data': '0x' + ''.join(data)
+            }
+        
+        class LocalChain:
+            """سجلات عقد في ثلاث معاملات، والعقدة ترفض النطاقات الأكبر من 40 كتلة"""
+            
+            def __init__(self):
+                self.head = 112
+                self.ranges = []
+                self.logs = [
+                    log(10, '0x01', 0, 'ArbitrageExecuted', [word(10 ** 18), word(3 * 10 ** 16), word(1), word(2)]),
+                    log(10, '0x01', 1, 'FlashLoanExecuted', [word(10 ** 18), word(5 * 10 ** 14)]),
+                    log(70, '0x02', 4, 'RouteExecuted', [word(2 * 10 ** 18), word(10 ** 16), word(3)]),
+                    log(70, '0x02', 5, 'FlashLoanExecuted', [word(2 * 10 ** 18), word(10 ** 15)]),
+                    log(150, '0x03', 0, 'BatchExecuted', [word(10 ** 18), word(10 ** 16), word(2)])
+                ]
+            
+            async def block_number(self):
+                return self.head
+            
+            async def call(self, method, params):
+                query = params[0]
+                from_block, to_block = int(query['fromBlock'], 16), int(query['toBlock'], 16)
+                self.ranges.append((from_block, to_block))
+                if to_block - from_block + 1 > 40:
+                    raise RPCError(-32005, 'query returned more than 10000 results')
+                return [l for l in self.logs if from_block <= int(l['blockNumber'], 16) <= to_block]
+        
+        chain = LocalChain()
+        indexer = EventIndexer(chain, contract, ':memory:', start_block=0, max_block_range=100,
+                               confirmations=12)
+        
+        # حتى الكتلة 100 المؤكدة: النطاق يُقسم إلى النصف ثم يستمر
+        self.assertEqual(await indexer.sync(), 4)
+        self.assertEqual(indexer.last_block, 100)
+        self.assertEqual(chain.ranges[:3], [(0, 99), (0, 49), (0, 24)])
+        self.assertEqual(indexer.events('ArbitrageExecuted')[0]['details'],
+                         'buyDex=0x' + '0' * 39 + '1,sellDex=0x' + '0' * 39 + '2')
+        
+        # الاستئناف من نقطة الحفظ دون إعادة أي نطاق
+        chain.head = 170
+        chain.ranges = []
+        self.assertEqual(await indexer.sync(), 1)
+        self.assertEqual(chain.ranges[0][0], 101)
+        
+        pnl = indexer.realized_pnl()[weth]
+        self.assertEqual(pnl['trades'], 3)
+        self.assertEqual(pnl['gross_profit'], 5 * 10 ** 16)
+        self.assertEqual(pnl['net_profit'], 5 * 10 ** 16 - 15 * 10 ** 14)
+        
+        report = indexer.reconcile({'0x01': 3 * 10 ** 16, '0x02': 2 * 10 ** 16, '0x09': 10 ** 16})
+        self.assertEqual(report['missing_onchain'], ['0x09'])
+        self.assertEqual(report['missing_local'], ['0x03'])
+        self.assertEqual(report['mismatched'], [('0x02', 2 * 10 ** 16, 10 ** 16)])
+        indexer.close()
+        
+        # بدون كتلة بداية ونقطة استئناف: البدء من آخر كتلة مؤكدة لا من كتلة البداية
+        chain.ranges = []
+        indexer = EventIndexer(chain, contract, ':memory:', max_block_range=100, confirmations=12)
+        self.assertEqual(await indexer.sync(), 0)
+        self.assertEqual(chain.ranges, [(158, 158)])
+        self.assertEqual(indexer.last_block, 158)
+        indexer.close()
+        
+        print("✓ تم اختبار فهرس أحداث العقد")
+
+class TestChainRegistry(unittest.IsolatedAsyncioTestCase):
+    """اختبارات دفاتر العناوين والدورات المتوازية لعدة شبكات"""
+    
+    async def test_chain_address_books_and_block_cycles(self):
+        """اختبار مدير لكل شبكة بعناوينها ودورة مستقلة لكل شبكة عند الكتل الجديدة"""
+        import asyncio
+        
+        with self.assertRaises(ValueError):
+            get_chain('solana')
+        self.assertEqual(CHAINS['ethereum']['tokens']['USDC'], '0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48')
+        
+        # مدير Polygon: رموز ومنصات الشبكة ورسوم أولوية دنيا
+        polygon = FlashLoanManager('polygon')
+        self.assertEqual(set(polygon.dex_routers), {'quickswap', 'sushiswap'})
+        self.assertEqual(polygon.amm_quoter.resolve_dex(polygon.dex_routers['quickswap']), 'quickswap')
+        self.assertEqual(polygon.token_addresses['USDC'], CHAINS['polygon']['tokens']['USDC'])
+        self.assertIsNone(polygon.amm_quoter.resolve_dex(CHAINS['ethereum']['dex_configs']['uniswap_v2']['router_address']))
+        oracle = GasOracle(rpc=None, min_priority_fee=CHAINS['polygon']['min_priority_fee'])
+        oracle.priority_fees = {90: 10 ** 9}
+        self.assertEqual(oracle.priority_fee('fast'), 30 * 10 ** 9)
+        
+        class LocalChainManager:
+            """مدير شبكة تنتج كتلة جديدة كل فحصين"""
+            
+            def __init__(self, chain, poll_interval):
+                self.chain = {'poll_interval': poll_interval}
+                self.rpc = object()
+                self.polls = 0
+                self.reserve_cache = type('Cache', (), {'last_block': None})()
+                self.chain_name = chain
+            
+            async def update_reserves(self):
+                self.polls += 1
+                self.reserve_cache.last_block = self.polls // 2
+            
+            async def index_events(self):
+                # فهرسة أولى طويلة (مسح نطاقات السجلات) لا تؤخر دورة الشبكة
+                self.indexed = getattr(self, 'indexed', 0) + 1
+                await asyncio.sleep(3600)
+            
+            def get_realized_pnl(self):
+                return {'0xweth': {'net_profit': self.polls}}
+        
+        registry = ChainRegistry(chains=[])
+        registry.managers = {
+            'ethereum': LocalChainManager('ethereum', 0.004),
+            'arbitrum': LocalChainManager('arbitrum', 0.001)
+        }
+        blocks = {'ethereum': [], 'arbitrum': []}
+        
+        async def on_block(chain, manager):
+            blocks[chain].append(manager.reserve_cache.last_block)
+            if len(blocks['ethereum']) >= 3:
+                registry.stop()
+                
+        await asyncio.wait_for(registry.run(on_block), timeout=5)
+        
+        # كل كتلة تُعالج مرة واحدة، والشبكة الأسرع تتقدم دون انتظار الأبطأ
+        self.assertEqual(blocks['ethereum'], [0, 1, 2])
+        self.assertEqual(blocks['arbitrum'], sorted(set(blocks['arbitrum'])))
+        self.assertGreater(len(blocks['arbitrum']), len(blocks['ethereum']))
+        
+        # فهرسة كل شبكة في الخلفية وتُلغى عند الإيقاف
+        self.assertEqual({chain: manager.indexed for chain, manager in registry.managers.items()},
+                         {'ethereum': 1, 'arbitrum': 1})
+        
+        # الأرباح المحققة من عقد كل شبكة لا من Ethereum فقط
+        self.assertEqual(registry.realized_pnl(), {
+            chain: {'0xweth': {'net_profit': manager.polls}} for chain, manager in registry.managers.items()
+        })
+        
+        print("✓ تم اختبار مديري القروض السريعة لعدة شبكات")
+
+class TestTokenRegistry(unittest.IsolatedAsyncioTestCase):
+    """اختبارات سجل بيانات الرموز والتحويلات العشرية"""
+    
+    async def test_decimals_cache_and_fixed_point(self):
+        """اختبار تحميل الخانات مرة واحدة وحفظها على القرص والتحويل الصحيح"""
+        import tempfile
+        from decimal import Decimal
+        
+        tokens = {'WETH': TestAMMQuoter.WETH, 'USDC': CHAINS['ethereum']['tokens']['USDC']}
+        metadata = {TestAMMQuoter.WETH.lower(): (18, 'WETH'), tokens['USDC'].lower(): (6, 'USDC')}
+        
+        class LocalMulticall:
+            """decimals() و symbol() من بيانات ثابتة"""
+            
+            def __init__(self):
+                self.requests = 0
+            
+            async def call(self, specs):
+                self.requests += 1
+                decimals, symbol = zip(*(metadata[target.lower()] for target, _, _, _ in specs))
+                return [
+                    decimals[i] if signature == 'decimals()' else symbol[i]
+                    for i, (_, signature, _, _) in enumerate(specs)
+                ]
+        
+        # تحويلات دقيقة بدون أخطاء الأعداد العائمة
+        self.assertEqual(to_base_units(0.1, 18), 10 ** 17)
+        self.assertEqual(to_base_units('1.2345678', 6), 1234567)
+        self.assertEqual(from_base_units(1500000, 6), Decimal('1.5'))
+        
+        with tempfile.TemporaryDirectory() as directory:
+            cache_path = os.path.join(directory, 'tokens.json')
+            multicall = LocalMulticall()
+            registry = TokenRegistry('ethereum', tokens, multicall, cache_path=cache_path)
+            
+            # خانات غير معروفة قبل التحميل: رفض بدلاً من افتراض 18
+            with self.assertRaises(KeyError):
+                registry.to_units('USDC', 1)
+                
+            self.assertEqual(await registry.ensure_loaded(), 2)
+            self.assertEqual(multicall.requests, 1)
+            self.assertEqual(registry.to_units('USDC', '2500.5'), 2500500000)
+            self.assertEqual(registry.to_units(tokens['USDC'].lower(), 1), 10 ** 6)
+            self.assertEqual(registry.from_units('WETH', 3 * 10 ** 16), Decimal('0.03'))
+            
+            # تحميل ثانٍ بدون RPC، ونسخة جديدة تقرأ الخانات من القرص
+            await registry.ensure_loaded()
+            self.assertEqual(multicall.requests, 1)
+            cached = TokenRegistry('ethereum', tokens, cache_path=cache_path)
+            self.assertTrue(cached.loaded)
+            self.assertEqual(cached.decimals('USDC'), 6)
+            self.assertFalse(TokenRegistry('polygon', {}, cache_path=cache_path).tokens)
+        
+        print("✓ تم اختبار سجل بيانات الرموز")
+
+class TestV3Quoter(unittest.TestCase):
+    """اختبارات محاكي مجمعات Uniswap V3"""
+    
+    TOKEN0 = '0x' + '11' * 20
+    TOKEN1 = '0x' + '22' * 20
+    POOL = '0x' + '33' * 20
+    DEX = 'uniswap_v3_3000'
+    
+    @staticmethod
+    def _word(value):
+        return hex(value % (1 << 256))[2:].rjust(64, '0')
+    
+    def _log(self, topic, topics, data, index=0):
+        return {
+            'address': self.POOL, 'blockNumber': '0x1', 'logIndex': hex(index),
+            'topics': [topic] + ['0x' + self._word(t) for t in topics],
+            'data': '0x' + ''.join(self._word(d) for d in data)
+        }
+    
+    def _cache(self):
+        cache = V3PoolCache(None, None, {'uniswap_v3': Config.DEX_CONFIGS['uniswap_v3']}, fee_tiers=(3000,))
+        key = (self.DEX, self.TOKEN0, self.TOKEN1)
+        cache.pools[key] = {
+            'address': self.POOL, 'fee': 3000, 'tick_spacing': 60, 'sqrt_price_x96': 2 ** 96, 'tick': 0,
+            'liquidity': 0, 'words': cache._word_range(0, 60), 'bitmap': {}, 'ticks': {}
+        }
+        cache.pool_index[self.POOL] = key
+        return cache, cache.pools[key]
+    
+    def test_tick_math_and_swap_step(self):
+        """اختبار TickMath وخطوة التبادل مقابل متجهات اختبار العقود"""
+        self.assertEqual(get_sqrt_ratio_at_tick(0), 2 ** 96)
+        self.assertEqual(get_sqrt_ratio_at_tick(MIN_TICK), MIN_SQRT_RATIO)
+        self.assertEqual(get_sqrt_ratio_at_tick(MAX_TICK), MAX_SQRT_RATIO)
+        for tick in (-200000, -1, 1, 887271):
+            self.assertEqual(get_tick_at_sqrt_ratio(get_sqrt_ratio_at_tick(tick)), tick)
+            self.assertEqual(get_tick_at_sqrt_ratio(get_sqrt_ratio_at_tick(tick) - 1), tick - 1)
+        
+        # SwapMath.spec: دخل محدد يتوقف عند السعر المستهدف، ودخل يُستهلك بالكامل
+        price, target = 79228162514264337593543950336, 79623317895830914510639640423
+        self.assertEqual(compute_swap_step(price, target, 2 * 10 ** 18, 10 ** 18, 600),
+                         (target, 9975124224178055, 9925619580021728, 5988667735148))
+        _, amount_in, amount_out, fee = compute_swap_step(
+            price, 250541448375047931186413801569, 2 * 10 ** 18, 10 ** 18, 600
+        )
+        self.assertEqual((amount_in, amount_out, fee), (999400000000000000, 666399946655997866, 600000000000000))
+        
+        print("✓ تم اختبار TickMath وخطوات التبادل")
+    
+    def test_pool_events_and_tick_crossing(self):
+        """اختبار تحديث الخريطة والسيولة من الأحداث وعبور الـ ticks"""
+        from amm_quoter import get_amount_out
+        cache, pool = self._cache()
+        owner = int(self.POOL, 16)
+        
+        cache.apply_logs([
+            self._log(MINT_TOPIC, [owner, -600, 600], [owner, 10 ** 21, 0, 0], 0),
+            self._log(MINT_TOPIC, [owner, 60, 1200], [owner, 10 ** 21, 0, 0], 1)
+        ])
+        self.assertEqual(pool['liquidity'], 10 ** 21)
+        self.assertEqual(pool['ticks'][60], [10 ** 21, 10 ** 21])
+        self.assertEqual(pool['ticks'][600], [10 ** 21, -10 ** 21])
+        self.assertEqual(pool['bitmap'][-1], 1 << 246)  # tick -600 = الضغط -10
+        
+        # داخل النطاق الحالي: مطابق تقريباً لمجمع V2 بالاحتياطيات الافتراضية
+        reserves = cache.get_reserves(self.DEX, self.TOKEN1, self.TOKEN0)
+        small = cache.quote(self.DEX, 10 ** 15, self.TOKEN1, self.TOKEN0)
+        self.assertLessEqual(abs(small - get_amount_out(10 ** 15, *reserves)), 2)
+        
+        # عبور tick 60 يضاعف السيولة، فالمخرجات أكبر من نطاق واحد
+        crossing = cache.quote(self.DEX, 5 * 10 ** 18, self.TOKEN1, self.TOKEN0)
+        cache.apply_logs([self._log(BURN_TOPIC, [owner, 60, 1200], [10 ** 21, 0, 0])])
+        self.assertNotIn(60, pool['ticks'])
+        self.assertEqual(pool['bitmap'][0], 1 << 10)  # يبقى tick 600 فقط
+        self.assertGreater(crossing, cache.quote(self.DEX, 5 * 10 ** 18, self.TOKEN1, self.TOKEN0))
+        
+        # تبادل يتجاوز الكلمات المحملة يُرفض
+        with self.assertRaises(ValueError):
+            cache.quote(self.DEX, 10 ** 30, self.TOKEN1, self.TOKEN0)
+            
+        # Swap يضبط السعر والسيولة والـ tick مباشرة
+        cache.apply_logs([self._log(SWAP_TOPIC, [owner, owner],
+                                    [10 ** 18, -10 ** 18, get_sqrt_ratio_at_tick(-100), 10 ** 21, -100])])
+        self.assertEqual(pool['tick'], -100)
+        self.assertEqual(pool['sqrt_price_x96'], get_sqrt_ratio_at_tick(-100))
+        self.assertEqual(cache.pop_changed()[0], {(self.DEX, self.TOKEN0, self.TOKEN1)})
+        
+        print("✓ تم اختبار أحداث مجمعات V3 وعبور الـ ticks")
+    
+    def test_v3_pools_join_route_search(self):
+        """اختبار مسار دائري يمر بمجمع V3 ومجمع V2"""
+        cache, pool = self._cache()
+        owner = int(self.POOL, 16)
+        cache.apply_logs([self._log(MINT_TOPIC, [owner, -600, 600], [owner, 10 ** 21, 0, 0])])
+        
+        quoter = AMMQuoter(v3_source=cache)
+        quoter.set_reserves('uniswap_v2', self.TOKEN0, self.TOKEN1, 1000 * 10 ** 18, 1030 * 10 ** 18)
+        self.assertEqual(quoter.resolve_dex(self.DEX), self.DEX)
+        self.assertEqual(quoter.fee(self.DEX), (997000, 1000000))
+        
+        finder = RouteFinder(quoter, [self.TOKEN0])
+        finder.rebuild()
+        best = finder.best_routes(limit=1)[0]
+        self.assertEqual({dex for dex, _, _ in best['route']}, {'uniswap_v2', self.DEX})
+        self.assertGreater(best['expected_profit'], 0)
+        self.assertEqual(
+            finder.route_output(best['route'], best['amount_in']),
+            best['amount_in'] + flash_loan_fee(best['amount_in']) + best['expected_profit']
+        )
+        
+        print("✓ تم اختبار المسارات عبر مجمعات V3")
+
+class TestFlashLoanProviders(unittest.IsolatedAsyncioTestCase):
+    """اختبارات اختيار أرخص مصدر للقرض السريع"""
+    
+    POOL = '0x' + '11' * 20
+    COLLECTOR = '0x' + '22' * 20
+    A_WETH = '0x' + '33' * 20
+    PAIR = '0x' + '44' * 20
+    
+    def providers(self):
+        """مزودون لـ WETH و DAI: Aave يقرض WETH فقط، والخزنة تملك 50 WETH"""
+        weth, dai = TestAMMQuoter.WETH.lower(), TestAMMQuoter.DAI.lower()
+        chain = CHAINS['ethereum']
+        flash_enabled = (1 << AAVE_ACTIVE_BIT) | (1 << AAVE_FLASHLOAN_ENABLED_BIT)
+        reserve_data = {
+            weth: (flash_enabled,) + (0,) * 7 + (self.A_WETH,) + ('0x' + '00' * 20,) * 3 + (0,) * 3,
+            dai: (1 << AAVE_ACTIVE_BIT,) + (0,) * 7 + ('0x' + '55' * 20,) + ('0x' + '00' * 20,) * 3 + (0,) * 3
+        }
+        balances = {
+            (weth, self.A_WETH.lower()): 1000 * 10 ** 18,
+            (weth, chain['balancer_vault'].lower()): 50 * 10 ** 18
+        }
+        
+        class LocalMulticall:
+            """استجابات ثابتة لكل (العنوان، التوقيع)"""
+            
+            def __init__(self):
+                self.requests = 0
+                self.cache_block = 100
+            
+            async def call(self, specs, block=None):
+                self.requests += 1
+                answers = {
+                    'getPool()': lambda target, args: TestFlashLoanProviders.POOL,
+                    'getReserveData(address)': lambda target, args: reserve_data[args[0]],
+                    'getProtocolFeesCollector()': lambda target, args: TestFlashLoanProviders.COLLECTOR,
+                    'balanceOf(address)': lambda target, args: balances.get((target.lower(), args[0].lower()), 0),
+                    'FLASHLOAN_PREMIUM_TOTAL()': lambda target, args: 5,
+                    'getFlashLoanFeePercentage()': lambda target, args: 0
+                }
+                return [answers[signature](target, args) for target, signature, args, _ in specs]
+        
+        pairs = ReserveCache(rpc=None)
+        key = ('uniswap_v2',) + tuple(sorted((weth, dai)))
+        pairs.pairs[key] = self.PAIR
+        pairs.reserves[key] = (2000000 * 10 ** 18, 1000 * 10 ** 18) if key[1] == dai else (1000 * 10 ** 18, 2000000 * 10 ** 18)
+        return FlashLoanProviders(LocalMulticall(), chain, [weth, dai], pairs=pairs), key
+    
+    async def test_cheapest_source_per_amount(self):
+        """اختبار اختيار المزود حسب الرسوم والسيولة المخزنة لكل كتلة"""
+        weth, dai = TestAMMQuoter.WETH, TestAMMQuoter.DAI
+        providers, pair_key = self.providers()
+        
+        # قبل أول تحديث: Aave بالرسوم الافتراضية كما في السابق
+        self.assertEqual(providers.select(weth, 10 ** 18)['name'], 'aave')
+        
+        # تغير أرخص معدل للأصلين (WETH إلى Balancer، و DAI إلى الزوج)
+        changed = await providers.refresh(100)
+        self.assertEqual(changed, {weth.lower(), dai.lower()})
+        requests = providers.multicall.requests
+        self.assertEqual(await providers.refresh(100), set())
+        self.assertEqual(providers.multicall.requests, requests)
+        
+        # Balancer بدون رسوم حتى حدود سيولة الخزنة، ثم Aave
+        source = providers.select(weth, 10 * 10 ** 18)
+        self.assertEqual((source['name'], source['fee']), ('balancer', 0))
+        source = providers.select(weth, 80 * 10 ** 18)
+        self.assertEqual((source['name'], source['fee']), ('aave', aave_premium(80 * 10 ** 18, 5)))
+        
+        # DAI: القروض السريعة معطلة في Aave، فالزوج هو المصدر الوحيد ما لم يمر به المسار
+        source = providers.select(dai, 10 ** 18)
+        self.assertEqual((source['name'], source['lender']), ('v2_pair', self.PAIR))
+        self.assertIsNone(providers.select(dai, 10 ** 18, exclude={pair_key}))
+        self.assertIsNone(providers.select(weth, 2000 * 10 ** 18))
+        
+        # أقل سداد يجتاز فحص K في الزوج بعد رسوم 0.3% على الدخل
+        reserve, amount = 1000 * 10 ** 18, 12345678901234567
+        for repay, passes in ((amount + v2_flash_fee(amount), True), (amount + v2_flash_fee(amount) - 1, False)):
+            balance = reserve - amount + repay
+            self.assertEqual(balance * 1000 - repay * 3 >= reserve * 1000, passes)
+        
+        print("✓ تم اختبار اختيار مزود القرض السريع")
+    
+    async def test_route_priced_with_cheapest_fee(self):
+        """اختبار تسعير المسار برسوم أرخص مصدر وحد السيولة المتاحة"""
+        weth, dai = TestAMMQuoter.WETH, TestAMMQuoter.DAI
+        quoter = AMMQuoter()
+        quoter.set_reserves('uniswap_v2', weth, dai, 1000 * 10 ** 18, 2000000 * 10 ** 18)
+        quoter.set_reserves('sushiswap', weth, dai, 1000 * 10 ** 18, 2100000 * 10 ** 18)
+        
+        providers, _ = self.providers()
+        await providers.refresh(100)
+        finder = RouteFinder(quoter, [weth])
+        finder.flash_providers = providers
+        finder.update()
+        
+        # القرض من الخزنة بدون رسوم ولا يتجاوز سيولتها
+        best = finder.best_routes(limit=1)[0]
+        self.assertLessEqual(best['amount_in'], providers.max_available(weth, {RouteFinder.pool_key(hop) for hop in best['route']}))
+        self.assertEqual(finder.route_output(best['route'], best['amount_in']),
+                         best['amount_in'] + finder.loan_fee(weth.lower(), best['amount_in']) + best['expected_profit'])
+        self.assertEqual(finder.loan_fee(weth.lower(), 10 ** 18), 0)
+        
+        print("✓ تم اختبار تسعير المسارات برسوم أرخص مصدر")
+
+class TestPriceBoard(unittest.IsolatedAsyncioTestCase):
+    """اختبارات لوحة الأسعار الموحدة للمنصات المركزية والمجمعات"""
+    
+    async def manager(self):
+        """شبكة Ethereum محلية بمجمعين WETH/USDT (السعر 2000 على Uniswap و 2100 على SushiSwap)"""
+        weth, usdt = TestAMMQuoter.WETH, CHAINS['ethereum']['tokens']['USDT']
+        metadata = {weth.lower(): (18, 'WETH'), usdt.lower(): (6, 'USDT')}
+        
+        class LocalMulticall:
+            """decimals() و symbol() من بيانات ثابتة"""
+            
+            async def call(self, specs):
+                return [
+                    metadata[target.lower()][0 if signature == 'decimals()' else 1]
+                    for target, signature, _, _ in specs
+                ]
+        
+        class LocalChainManager:
+            """سجل الرموز ومحاكي AMM كما في مدير الشبكة"""
+            
+            def __init__(self):
+                self.token_registry = TokenRegistry('ethereum', {'WETH': weth, 'USDT': usdt},
+                                                    LocalMulticall(), cache_path='')
+                self.amm_quoter = AMMQuoter()
+        
+        manager = LocalChainManager()
+        await manager.token_registry.ensure_loaded()
+        manager.amm_quoter.set_reserves('uniswap_v2', weth, usdt, 1000 * 10 ** 18, 2000000 * 10 ** 6)
+        manager.amm_quoter.set_reserves('sushiswap', weth, usdt, 1000 * 10 ** 18, 2100000 * 10 ** 6)
+        return manager
+    
+    async def test_dex_quotes_from_reserves(self):
+        """اختبار أسعار المجمعات القابلة للتنفيذ بالحجم المرجعي"""
+        manager = await self.manager()
+        venues = OnchainVenues({'ethereum': manager}, symbols=['ETH/USDT', 'BTC/USDT'], notional=1000)
+        
+        # ETH -> WETH، و BTC بلا مجمعات
+        base, quote = venues.token_pair(manager, 'ETH/USDT')
+        self.assertEqual(base, TestAMMQuoter.WETH.lower())
+        prices = venues.quote_pool(manager, 'uniswap_v2', base, quote)
+        
+        # سعر الشراء يتضمن رسوم 0.3% والانزلاق، وسعر البيع أقل منه بعد رحلة ذهاب وعودة
+        self.assertAlmostEqual(prices['ask'], 2000 * 1000 / 997, delta=2)
+        self.assertLess(prices['bid'], 2000)
+        self.assertAlmostEqual(prices['size'] * prices['ask'], 1000, places=6)
+        
+        board = PriceBoard(FeeModel())
+        self.assertEqual(venues.publish(board, 'ethereum'), 2)
+        self.assertEqual(board.venue('uniswap_v2@ethereum')['kind'], VENUE_DEX)
+        self.assertEqual(board.fee_model.get_fee('uniswap_v2@ethereum', 'ETH/USDT'), 0.0)
+        self.assertEqual(set(board.as_prices()['ETH/USDT']), {'uniswap_v2@ethereum', 'sushiswap@ethereum'})
+        
+        print("✓ تم اختبار أسعار المجمعات من الاحتياطيات")
+    
+    async def test_cex_and_dex_spreads_in_one_pass(self):
+        """اختبار كشف فروق مركزية↔مركزية ومركزية↔مجمع ومجمع↔مجمع في مرور واحد"""
+        manager = await self.manager()
+        board = PriceBoard(FeeModel())
+        OnchainVenues({'ethereum': manager}, symbols=['ETH/USDT']).publish(board, 'ethereum')
+        board.publish_tickers({'ETH/USDT': {
+            'binance': {'bid': 1999.0, 'ask': 2000.0, 'timestamp': None},
+            'kraken': {'bid': 2030.0, 'ask': 2031.0, 'timestamp': None}
+        }})
+        # مجمع أرخص على شبكة أخرى: لا فرصة مجمع↔مجمع بين الشبكتين
+        board.register_venue('quickswap@polygon', VENUE_DEX, 'polygon', 'quickswap')
+        board.publish('quickswap@polygon', 'ETH/USDT', 1900.0, 1901.0)
+        
+        opportunities = {opp['kind']: opp for opp in board.find_opportunities(0.5)}
+        self.assertEqual(set(opportunities), {PAIR_CEX_CEX, PAIR_CEX_DEX, PAIR_DEX_DEX})
+        
+        # الشراء من Binance بعد رسوم 0.1% والبيع في Kraken بعد 0.26%
+        cex = opportunities[PAIR_CEX_CEX]
+        self.assertEqual((cex['buy_exchange'], cex['sell_exchange']), ('binance', 'kraken'))
+        self.assertAlmostEqual(cex['net_profit_percentage'], (2030 * 0.9974 / (2000 * 1.001) - 1) * 100)
+        
+        dex = opportunities[PAIR_DEX_DEX]
+        self.assertEqual((dex['chain'], dex['buy_dex'], dex['sell_dex']), ('ethereum', 'uniswap_v2', 'sushiswap'))
+        self.assertEqual(opportunities[PAIR_CEX_DEX]['buy_exchange'], 'quickswap@polygon')
+        
+        # المسار الدائري للفرصة: اقتراض USDT والشراء من المجمع الأرخص
+        base, quote = OnchainVenues({'ethereum': manager}).token_pair(manager, 'ETH/USDT')
+        route = ((dex['buy_dex'], quote, base), (dex['sell_dex'], base, quote))
+        plan = RouteFinder(manager.amm_quoter, [quote]).evaluate(route)
+        self.assertGreater(plan['expected_profit'], 0)
+        self.assertEqual(RouteFinder(manager.amm_quoter, [quote]).route_output(route, plan['amount_in']),
+                         plan['amount_in'] + flash_loan_fee(plan['amount_in']) + plan['expected_profit'])
+        
+        # العروض القديمة لا تدخل الكشف
+        board.max_age = -1
+        self.assertEqual(board.find_opportunities(0.5), [])
+        
+        print("✓ تم اختبار كشف الفروق بين المنصات المركزية والمجمعات")
+
+@unittest.skipUnless(local_node_available(), "العقدة المحلية غير متاحة")
+class TestLocalNode(unittest.IsolatedAsyncioTestCase):
+    """اختبارات تكامل مع عقدة hardhat/anvil محلية"""
+    
+    async def asyncSetUp(self):
+        """إنشاء عميل العقدة المحلية"""
+        self.client = AsyncRPCClient(LOCAL_NODE_URL)
+    
+    async def asyncTearDown(self):
+        """إغلاق العميل"""
+        await self.client.close()
+    
+    async def test_batch_reads(self):
+        """اختبار قراءة حالة الشبكة في طلب دفعي واحد"""
+        chain_id, block_number, gas_price = await self.client.batch([
+            ('eth_chainId', []),
+            ('eth_blockNumber', []),
+            ('eth_gasPrice', [])
+        ])
+        
+        self.assertEqual(int(chain_id, 16), await self.client.chain_id())
+        self.assertGreaterEqual(int(block_number, 16), 0)
+        self.assertGreaterEqual(int(gas_price, 16), 0)
+        
+        print("✓ تم اختبار القراءة الدفعية من العقدة المحلية")
+    
+    def test_quoter_matches_router_on_fork(self):
+        """اختبار مطابقة المحاكي لـ getAmountsOut على نسخة متفرعة من الشبكة الرئيسية"""
+        from web3 import Web3
+        
+        w3 = Web3(Web3.HTTPProvider(LOCAL_NODE_URL))
+        router_address = Web3.to_checksum_address(Config.DEX_CONFIGS['uniswap_v2']['router_address'])
+        if not w3.eth.get_code(router_address):
+            self.skipTest("العقدة المحلية ليست نسخة متفرعة من الشبكة الرئيسية")
+            
+        factory = w3.eth.contract(
+            address=Web3.to_checksum_address(Config.DEX_CONFIGS['uniswap_v2']['factory_address']),
+            abi=[{"inputs": [{"type": "address", "name": ""}, {"type": "address", "name": ""}],
+                  "name": "getPair", "outputs": [{"type": "address", "name": ""}],
+                  "stateMutability": "view", "type": "function"}]
+        )
+        pair = w3.eth.contract(
+            address=factory.functions.getPair(TestAMMQuoter.WETH, TestAMMQuoter.DAI).call(),
+            abi=[{"inputs": [], "name": "getReserves",
+                  "outputs": [{"type": "uint112", "name": ""}, {"type": "uint112", "name": ""},
+                              {"type": "uint32", "name": ""}],
+                  "stateMutability": "view", "type": "function"},
+                 {"inputs": [], "name": "token0", "outputs": [{"type": "address", "name": ""}],
+                  "stateMutability": "view", "type": "function"}]
+        )
+        router = w3.eth.contract(
+            address=router_address,
+            abi=[{"inputs": [{"type": "uint256", "name": ""}, {"type": "address[]", "name": ""}],
+                  "name": "getAmountsOut", "outputs": [{"type": "uint256[]", "name": ""}],
+                  "stateMutability": "view", "type": "function"}]
+        )
+        
+        reserve0, reserve1, _ = pair.functions.getReserves().call()
+        token0 = pair.functions.token0().call()
+        quoter = AMMQuoter()
+        quoter.set_reserves('uniswap_v2', token0,
+                            TestAMMQuoter.DAI if token0 == TestAMMQuoter.WETH else TestAMMQuoter.WETH,
+                            reserve0, reserve1)
+        
+        for amount_in in (10 ** 15, 10 ** 18, 50 * 10 ** 18):
+            on_chain = router.functions.getAmountsOut(amount_in, [TestAMMQuoter.WETH, TestAMMQuoter.DAI]).call()
+            self.assertEqual(quoter.quote('uniswap_v2', amount_in, TestAMMQuoter.WETH, TestAMMQuoter.DAI),
+                             on_chain[1])
+            
+        print("✓ تم اختبار مطابقة المحاكي للموجه على الشبكة المتفرعة")
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
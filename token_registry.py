@@ -0,0 +1,161 @@
+"""
+سجل بيانات الرموز (الرمز، الخانات العشرية، العنوان) لكل شبكة مع تحويلات عشرية صحيحة
+"""
+
+import json
+import logging
+import os
+from decimal import Decimal, ROUND_DOWN
+from typing import Dict, Iterable, Optional, Union
+
+from config import Config
+from multicall import Multicall
+
+Amount = Union[Decimal, int, float, str]
+
+def to_base_units(amount: Amount, decimals: int) -> int:
+    """
+    تحويل مبلغ عشري إلى وحدات الرمز الأساسية (تقريب نحو الصفر)
+    
+    الأعداد العشرية العائمة تُحوّل عبر تمثيلها النصي لتجنب أخطاء التمثيل الثنائي.
+    """
+    if isinstance(amount, float):
+        amount = repr(amount)
+    value = Decimal(amount).scaleb(decimals)
+    return int(value.to_integral_value(rounding=ROUND_DOWN))
+
+def from_base_units(units: int, decimals: int) -> Decimal:
+    """تحويل وحدات الرمز الأساسية إلى مبلغ عشري دقيق"""
+    return Decimal(int(units)).scaleb(-decimals)
+
+class TokenRegistry:
+    """
+    بيانات رموز شبكة واحدة تُقرأ من السلسلة مرة واحدة وتُخزن على القرص
+    
+    الرموز المعروفة من دفتر عناوين الشبكة، وتُقرأ decimals و symbol لكل رمز
+    غير مخزن في eth_call واحد عبر Multicall. التحويلات ترفض الرموز مجهولة
+    الخانات بدلاً من افتراض 18 خانة.
+    """
+    
+    def __init__(self, chain: str, tokens: Dict[str, str], multicall: Optional[Multicall] = None,
+                 cache_path: Optional[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.chain = chain
+        self.multicall = multicall
+        self.cache_path = cache_path if cache_path is not None else Config.TOKEN_CACHE_PATH
+        
+        self.tokens = {}  # العنوان (أحرف صغيرة) -> {'symbol', 'decimals', 'address'}
+        self.symbols = {}  # الرمز -> العنوان (أحرف صغيرة)
+        for symbol, address in tokens.items():
+            self._add(address, symbol, None)
+        self.load_cache()
+    
+    def _add(self, address: str, symbol: Optional[str], decimals: Optional[int]):
+        """إضافة أو تحديث رمز"""
+        key = address.lower()
+        token = self.tokens.setdefault(key, {'symbol': symbol, 'decimals': None, 'address': address})
+        if symbol and not token['symbol']:
+            token['symbol'] = symbol
+        if decimals is not None:
+            token['decimals'] = decimals
+        if token['symbol']:
+            self.symbols.setdefault(token['symbol'], key)
+    
+    def load_cache(self) -> int:
+        """تحميل البيانات المخزنة على القرص لهذه الشبكة"""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return 0
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f).get(self.chain, {})
+            for token in cached.values():
+                self._add(token['address'], token.get('symbol'), token.get('decimals'))
+            return len(cached)
+        except Exception as e:
+            self.logger.error(f"خطأ في تحميل ذاكرة الرموز: {e}")
+            return 0
+    
+    def save_cache(self):
+        """حفظ رموز هذه الشبكة مع الإبقاء على بيانات الشبكات الأخرى"""
+        if not self.cache_path:
+            return
+        try:
+            cached = {}
+            if os.path.exists(self.cache_path):
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    cached = json.load(f)
+            cached[self.chain] = {
+                key: token for key, token in self.tokens.items() if token['decimals'] is not None
+            }
+            with open(self.cache_path, 'w', encoding='utf-8') as f:
+                json.dump(cached, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            self.logger.error(f"خطأ في حفظ ذاكرة الرموز: {e}")
+    
+    @property
+    def loaded(self) -> bool:
+        """التحقق من معرفة خانات جميع الرموز"""
+        return all(token['decimals'] is not None for token in self.tokens.values())
+    
+    async def ensure_loaded(self, addresses: Iterable[str] = ()) -> int:
+        """قراءة بيانات الرموز غير المعروفة من السلسلة (بدون RPC إذا كانت كلها مخزنة)"""
+        for address in addresses:
+            self._add(address, None, None)
+            
+        missing = [token['address'] for token in self.tokens.values() if token['decimals'] is None]
+        if not missing or not self.multicall:
+            return 0
+            
+        try:
+            specs = []
+            for address in missing:
+                specs.append((address, 'decimals()', [], ['uint8']))
+                specs.append((address, 'symbol()', [], ['string']))
+            results = await self.multicall.call(specs)
+            
+            loaded = 0
+            for i, address in enumerate(missing):
+                decimals, symbol = results[2 * i], results[2 * i + 1]
+                if decimals is None:
+                    self.logger.warning(f"تعذر قراءة خانات الرمز {address}")
+                    continue
+                self._add(address, symbol, decimals)
+                loaded += 1
+                
+            if loaded:
+                self.save_cache()
+                self.logger.info(f"تم تحميل بيانات {loaded} رمز على {self.chain}")
+            return loaded
+            
+        except Exception as e:
+            self.logger.error(f"خطأ في تحميل بيانات الرموز: {e}")
+            return 0
+    
+    def resolve(self, token: str) -> Optional[Dict]:
+        """بيانات رمز بالرمز أو العنوان"""
+        key = self.symbols.get(token, token.lower())
+        return self.tokens.get(key)
+    
+    def address(self, token: str) -> Optional[str]:
+        """عنوان رمز بالرمز أو العنوان"""
+        info = self.resolve(token)
+        return info['address'] if info else None
+    
+    def addresses(self) -> Dict[str, str]:
+        """الرمز -> العنوان لجميع الرموز المعروفة"""
+        return {symbol: self.tokens[key]['address'] for symbol, key in self.symbols.items()}
+    
+    def decimals(self, token: str) -> int:
+        """خانات الرمز العشرية (KeyError إذا لم تكن معروفة)"""
+        info = self.resolve(token)
+        if info is None or info['decimals'] is None:
+            raise KeyError(f"خانات الرمز غير معروفة: {token}")
+        return info['decimals']
+    
+    def to_units(self, token: str, amount: Amount) -> int:
+        """مبلغ عشري -> وحدات الرمز الأساسية"""
+        return to_base_units(amount, self.decimals(token))
+    
+    def from_units(self, token: str, units: int) -> Decimal:
+        """وحدات الرمز الأساسية -> مبلغ عشري"""
+        return from_base_units(units, self.decimals(token))
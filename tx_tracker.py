@@ -0,0 +1,270 @@
+"""
+متتبع المعاملات المعلقة دون انتظار التضمين
+"""
+
+import asyncio
+import inspect
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from async_rpc import AsyncRPCClient
+from nonce_manager import NonceManager
+
+class TxTracker:
+    """
+    تتبع المعاملات المرسلة في الخلفية بعد إعادة التحكم فوراً للمستدعي
+    
+    يستعلم عن إيصالات جميع المعاملات المعلقة مرة لكل كتلة جديدة في طلب دفعي
+    واحد، ويحسم كل معاملة بإحدى الحالات: confirmed أو failed (تم التضمين)،
+    replaced (استُهلك الـ nonce بمعاملة أخرى) أو dropped (اختفت من mempool).
+    الإسراع والإلغاء بإعادة البث بنفس الـ nonce وسعر غاز أعلى.
+    """
+    
+    STATUS_PENDING = 'pending'
+    STATUS_CONFIRMED = 'confirmed'
+    STATUS_FAILED = 'failed'
+    STATUS_REPLACED = 'replaced'
+    STATUS_DROPPED = 'dropped'
+    
+    # الحد الأدنى لرفع سعر الغاز الذي تقبله العقد للاستبدال (10%)
+    MIN_REPLACEMENT_BUMP = 1.1
+    
+    def __init__(self, rpc: AsyncRPCClient, nonce_manager: NonceManager, address: str,
+                 sender: Callable[[Dict], Awaitable[str]], poll_interval: float = 1.0,
+                 drop_after_blocks: int = 25):
+        self.logger = logging.getLogger(__name__)
+        self.rpc = rpc
+        self.nonce_manager = nonce_manager
+        self.address = address
+        self.sender = sender  # توقيع وبث معاملة جاهزة وإعادة الهاش
+        self.poll_interval = poll_interval
+        self.drop_after_blocks = drop_after_blocks
+        
+        self.transactions = {}  # nonce -> سجل المعاملة المعلقة
+        self.last_block = None
+        self._task = None
+    
+    def track(self, tx_hash: str, transaction: Dict, callback: Optional[Callable] = None,
+              label: str = '') -> Optional[asyncio.Future]:
+        """تسجيل معاملة مرسلة وإعادة Future يُحسم عند تضمينها أو إسقاطها"""
+        try:
+            future = asyncio.get_running_loop().create_future()
+        except RuntimeError:
+            # استدعاء من سياق متزامن: النتيجة عبر الاستدعاء الراجع فقط
+            future = None
+            
+        nonce = transaction['nonce']
+        self.transactions[nonce] = {
+            'nonce': nonce,
+            'tx_hash': tx_hash,
+            'hashes': [tx_hash],  # جميع الإصدارات المبثوثة بهذا الـ nonce
+            'transaction': dict(transaction),
+            'label': label,
+            'status': self.STATUS_PENDING,
+            'last_seen_block': self.last_block,
+            'future': future,
+            'callbacks': [callback] if callback else []
+        }
+        return future
+    
+    def get(self, nonce: int) -> Optional[Dict]:
+        """سجل معاملة معلقة"""
+        return self.transactions.get(nonce)
+    
+    def pending_count(self) -> int:
+        """عدد المعاملات غير المحسومة"""
+        return len(self.transactions)
+    
+    def start(self):
+        """تشغيل الاستعلام الدوري في الخلفية (مرة واحدة)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    async def stop(self):
+        """إيقاف الاستعلام الدوري"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self):
+        """حلقة الخلفية: استعلام عند كل كتلة جديدة"""
+        while True:
+            try:
+                if self.transactions:
+                    await self.poll()
+            except Exception as e:
+                self.logger.error(f"خطأ في تتبع المعاملات: {e}")
+            await asyncio.sleep(self.poll_interval)
+    
+    async def poll(self) -> List[Dict]:
+        """فحص المعاملات المعلقة مرة لكل كتلة جديدة وإعادة ما تم حسمه"""
+        if not self.transactions:
+            return []
+            
+        block_number = await self.rpc.block_number()
+        if block_number == self.last_block:
+            return []
+        self.last_block = block_number
+        
+        # الإيصالات لجميع الإصدارات وعدد معاملات الحساب المعدنة في طلب واحد
+        entries = list(self.transactions.values())
+        hashes = [(entry, tx_hash) for entry in entries for tx_hash in entry['hashes']]
+        results = await self.rpc.batch(
+            [('eth_getTransactionCount', [self.address, 'latest'])] +
+            [('eth_getTransactionReceipt', [tx_hash]) for _, tx_hash in hashes],
+            raise_errors=False
+        )
+        latest_count = int(results[0], 16) if isinstance(results[0], str) else None
+        
+        receipts = {}
+        for (entry, tx_hash), receipt in zip(hashes, results[1:]):
+            if isinstance(receipt, dict):
+                receipts[entry['nonce']] = receipt
+                
+        settled = []
+        unresolved = []
+        for entry in entries:
+            receipt = receipts.get(entry['nonce'])
+            if receipt is not None:
+                status = self.STATUS_CONFIRMED if int(receipt.get('status', '0x0'), 16) == 1 else self.STATUS_FAILED
+                entry['tx_hash'] = receipt['transactionHash']
+                self.nonce_manager.confirm(entry['nonce'])
+                settled.append(self._settle(entry, status, receipt))
+            elif latest_count is not None and latest_count > entry['nonce']:
+                # الـ nonce استُهلك بمعاملة لا نعرفها
+                self.nonce_manager.confirm(entry['nonce'])
+                settled.append(self._settle(entry, self.STATUS_REPLACED))
+            else:
+                unresolved.append(entry)
+                
+        settled.extend(await self._check_dropped(unresolved))
+        
+        for entry in settled:
+            await self._notify(entry)
+        return [entry['record'] for entry in settled]
+    
+    async def _check_dropped(self, entries: List[Dict]) -> List[Dict]:
+        """كشف المعاملات التي لم تعد العقدة تعرفها بعد عدد من الكتل"""
+        if entries and self.last_block is not None:
+            for entry in entries:
+                if entry['last_seen_block'] is None:
+                    entry['last_seen_block'] = self.last_block
+                    
+        stale = [e for e in entries if self.last_block - e['last_seen_block'] >= self.drop_after_blocks]
+        if not stale:
+            return []
+            
+        hashes = [(entry, tx_hash) for entry in stale for tx_hash in entry['hashes']]
+        results = await self.rpc.batch(
+            [('eth_getTransactionByHash', [tx_hash]) for _, tx_hash in hashes], raise_errors=False
+        )
+        
+        known = set()
+        for (entry, _), result in zip(hashes, results):
+            if isinstance(result, dict):
+                known.add(entry['nonce'])
+                
+        dropped = []
+        for entry in stale:
+            if entry['nonce'] in known:
+                entry['last_seen_block'] = self.last_block
+            else:
+                # الـ nonce لم يُستهلك: يُعاد لأول معاملة قادمة لسد الفجوة
+                self.nonce_manager.release(entry['nonce'])
+                dropped.append(self._settle(entry, self.STATUS_DROPPED))
+        return dropped
+    
+    def _settle(self, entry: Dict, status: str, receipt: Optional[Dict] = None) -> Dict:
+        """حسم معاملة وإزالتها من القائمة المعلقة (يُعاد السجل مع النتيجة)"""
+        self.transactions.pop(entry['nonce'], None)
+        entry['status'] = status
+        
+        record = {
+            'status': status,
+            'success': status == self.STATUS_CONFIRMED,
+            'nonce': entry['nonce'],
+            'tx_hash': entry['tx_hash'],
+            'label': entry['label'],
+            'receipt': receipt,
+            'block_number': int(receipt['blockNumber'], 16) if receipt else None,
+            'gas_used': int(receipt['gasUsed'], 16) if receipt else None
+        }
+        entry['record'] = record
+        
+        log = self.logger.info if record['success'] else self.logger.warning
+        log(f"المعاملة {entry['label'] or entry['nonce']}: {status} ({entry['tx_hash']})")
+        return entry
+    
+    async def _notify(self, entry: Dict):
+        """حسم الـ Future وتشغيل الاستدعاءات الراجعة"""
+        record = entry['record']
+        future = entry['future']
+        if future is not None and not future.done():
+            future.set_result(record)
+            
+        for callback in entry['callbacks']:
+            try:
+                result = callback(record)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                self.logger.error(f"خطأ في استدعاء نتيجة المعاملة: {e}")
+    
+    def _bump_fees(self, transaction: Dict, bump: float) -> Dict:
+        """رفع رسوم المعاملة بنسبة لا تقل عن حد الاستبدال"""
+        bump = max(bump, self.MIN_REPLACEMENT_BUMP)
+        bumped = dict(transaction)
+        for field in ('gasPrice', 'maxFeePerGas', 'maxPriorityFeePerGas'):
+            if field in bumped:
+                bumped[field] = int(bumped[field] * bump) + 1
+        return bumped
+    
+    async def _rebroadcast(self, nonce: int, transaction: Dict, label: str) -> Optional[str]:
+        """بث إصدار جديد بنفس الـ nonce وإضافته لسجل المعاملة"""
+        entry = self.transactions.get(nonce)
+        if entry is None:
+            return None
+            
+        try:
+            tx_hash = await self.sender(transaction)
+        except Exception as e:
+            self.logger.error(f"فشل في {label} المعاملة {nonce}: {e}")
+            return None
+            
+        entry['transaction'] = transaction
+        entry['hashes'].append(tx_hash)
+        entry['tx_hash'] = tx_hash
+        self.nonce_manager.mark_sent(nonce, tx_hash)
+        self.logger.info(f"تم {label} المعاملة {nonce}: {tx_hash}")
+        return tx_hash
+    
+    async def speed_up(self, nonce: int, bump: float = 1.125) -> Optional[str]:
+        """إعادة بث نفس المعاملة بسعر غاز أعلى"""
+        entry = self.transactions.get(nonce)
+        if entry is None:
+            return None
+        return await self._rebroadcast(nonce, self._bump_fees(entry['transaction'], bump), 'تسريع')
+    
+    async def cancel(self, nonce: int, bump: float = 1.125) -> Optional[str]:
+        """استبدال المعاملة بتحويل فارغ للحساب نفسه بسعر غاز أعلى"""
+        entry = self.transactions.get(nonce)
+        if entry is None:
+            return None
+            
+        original = self._bump_fees(entry['transaction'], bump)
+        transaction = {
+            'from': self.address,
+            'to': self.address,
+            'value': 0,
+            'data': b'',
+            'gas': 21000,
+            'nonce': nonce
+        }
+        for field in ('chainId', 'gasPrice', 'maxFeePerGas', 'maxPriorityFeePerGas'):
+            if field in original:
+                transaction[field] = original[field]
+        return await self._rebroadcast(nonce, transaction, 'إلغاء')
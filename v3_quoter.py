@@ -0,0 +1,550 @@
+"""
+محاكي Uniswap V3 (سيولة مركزة) لتسعير المجمعات محلياً بحساب صحيح مطابق للعقود
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from web3 import Web3
+
+from config import Config
+from async_rpc import AsyncRPCClient
+from multicall import Multicall
+
+# حدود TickMath
+MIN_TICK = -887272
+MAX_TICK = 887272
+MIN_SQRT_RATIO = 4295128739
+MAX_SQRT_RATIO = 1461446703485210103287273052203988822378723970342
+
+Q96 = 1 << 96
+MAX_UINT160 = (1 << 160) - 1
+MAX_UINT256 = (1 << 256) - 1
+FEE_DENOMINATOR = 1000000
+
+# مضاعفات sqrt(1.0001)^(-2^i) بصيغة Q128 (من TickMath.getSqrtRatioAtTick)
+_TICK_RATIOS = (
+    (0x2, 0xfff97272373d413259a46990580e213a),
+    (0x4, 0xfff2e50f5f656932ef12357cf3c7fdcc),
+    (0x8, 0xffe5caca7e10e4e61c3624eaa0941cd0),
+    (0x10, 0xffcb9843d60f6159c9db58835c926644),
+    (0x20, 0xff973b41fa98c081472e6896dfb254c0),
+    (0x40, 0xff2ea16466c96a3843ec78b326b52861),
+    (0x80, 0xfe5dee046a99a2a811c461f1969c3053),
+    (0x100, 0xfcbe86c7900a88aedcffc83b479aa3a4),
+    (0x200, 0xf987a7253ac413176f2b074cf7815e54),
+    (0x400, 0xf3392b0822b70005940c7a398e4b70f3),
+    (0x800, 0xe7159475a2c29b7443b29c7fa6e889d9),
+    (0x1000, 0xd097f3bdfd2022b8845ad8f792aa5825),
+    (0x2000, 0xa9f746462d870fdf8a65dc1f90e061e5),
+    (0x4000, 0x70d869a156d2a1b890bb3df62baf32f7),
+    (0x8000, 0x31be135f97d08fd981231505542fcfa6),
+    (0x10000, 0x9aa508b5b7a84e1c677de54f3e99bc9),
+    (0x20000, 0x5d6af8dedb81196699c329225ee604),
+    (0x40000, 0x2216e584f5fa1ea926041bedfe98),
+    (0x80000, 0x48a170391f7dc42444e8fa2)
+)
+
+# أحداث المجمع التي تغير حالة السيولة والسعر
+SWAP_TOPIC = '0x' + Web3.keccak(
+    text='Swap(address,address,int256,int256,uint160,uint128,int24)'
+).hex().replace('0x', '')
+MINT_TOPIC = '0x' + Web3.keccak(
+    text='Mint(address,address,int24,int24,uint128,uint256,uint256)'
+).hex().replace('0x', '')
+BURN_TOPIC = '0x' + Web3.keccak(
+    text='Burn(address,int24,int24,uint128,uint256,uint256)'
+).hex().replace('0x', '')
+
+ZERO_ADDRESS = '0x' + '0' * 40
+
+# منصات V3 التي يوفر مصنعها getPool بنفس واجهة Uniswap V3
+V3_DEXES = ('uniswap_v3',)
+
+def mul_div(a: int, b: int, denominator: int) -> int:
+    """FullMath.mulDiv"""
+    return a * b // denominator
+
+def mul_div_rounding_up(a: int, b: int, denominator: int) -> int:
+    """FullMath.mulDivRoundingUp"""
+    return -(-a * b // denominator)
+
+def div_rounding_up(a: int, b: int) -> int:
+    """UnsafeMath.divRoundingUp"""
+    return -(-a // b)
+
+def get_sqrt_ratio_at_tick(tick: int) -> int:
+    """sqrt(1.0001^tick) بصيغة Q64.96 (مطابق لـ TickMath.getSqrtRatioAtTick)"""
+    abs_tick = abs(tick)
+    if abs_tick > MAX_TICK:
+        raise ValueError("T")
+        
+    ratio = 0xfffcb933bd6fad37aa2d162d1a594001 if abs_tick & 0x1 else 0x100000000000000000000000000000000
+    for bit, multiplier in _TICK_RATIOS:
+        if abs_tick & bit:
+            ratio = (ratio * multiplier) >> 128
+            
+    if tick > 0:
+        ratio = MAX_UINT256 // ratio
+    return (ratio >> 32) + (0 if ratio % (1 << 32) == 0 else 1)
+
+def get_tick_at_sqrt_ratio(sqrt_price_x96: int) -> int:
+    """أكبر tick يحقق getSqrtRatioAtTick(tick) <= السعر (مطابق لـ TickMath.getTickAtSqrtRatio)"""
+    if not MIN_SQRT_RATIO <= sqrt_price_x96 < MAX_SQRT_RATIO:
+        raise ValueError("R")
+        
+    low, high = MIN_TICK, MAX_TICK
+    while low < high:
+        middle = (low + high + 1) // 2
+        if get_sqrt_ratio_at_tick(middle) <= sqrt_price_x96:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+def get_amount0_delta(sqrt_a: int, sqrt_b: int, liquidity: int, round_up: bool) -> int:
+    """كمية token0 بين سعرين (SqrtPriceMath.getAmount0Delta)"""
+    if sqrt_a > sqrt_b:
+        sqrt_a, sqrt_b = sqrt_b, sqrt_a
+    numerator1 = liquidity << 96
+    numerator2 = sqrt_b - sqrt_a
+    if round_up:
+        return div_rounding_up(mul_div_rounding_up(numerator1, numerator2, sqrt_b), sqrt_a)
+    return mul_div(numerator1, numerator2, sqrt_b) // sqrt_a
+
+def get_amount1_delta(sqrt_a: int, sqrt_b: int, liquidity: int, round_up: bool) -> int:
+    """كمية token1 بين سعرين (SqrtPriceMath.getAmount1Delta)"""
+    if sqrt_a > sqrt_b:
+        sqrt_a, sqrt_b = sqrt_b, sqrt_a
+    if round_up:
+        return mul_div_rounding_up(liquidity, sqrt_b - sqrt_a, Q96)
+    return mul_div(liquidity, sqrt_b - sqrt_a, Q96)
+
+def get_next_sqrt_price_from_input(sqrt_price_x96: int, liquidity: int, amount_in: int,
+                                   zero_for_one: bool) -> int:
+    """السعر بعد إضافة كمية دخل (SqrtPriceMath.getNextSqrtPriceFromInput)"""
+    if sqrt_price_x96 <= 0 or liquidity <= 0:
+        raise ValueError("INSUFFICIENT_LIQUIDITY")
+        
+    if zero_for_one:
+        # getNextSqrtPriceFromAmount0RoundingUp مع نفس فرع الفيضان في 256 بت
+        if amount_in == 0:
+            return sqrt_price_x96
+        numerator1 = liquidity << 96
+        product = amount_in * sqrt_price_x96
+        if product <= MAX_UINT256 and numerator1 + product <= MAX_UINT256:
+            return mul_div_rounding_up(numerator1, sqrt_price_x96, numerator1 + product)
+        return div_rounding_up(numerator1, numerator1 // sqrt_price_x96 + amount_in)
+        
+    # getNextSqrtPriceFromAmount1RoundingDown
+    if amount_in <= MAX_UINT160:
+        quotient = (amount_in << 96) // liquidity
+    else:
+        quotient = mul_div(amount_in, Q96, liquidity)
+    return sqrt_price_x96 + quotient
+
+def compute_swap_step(sqrt_price_current: int, sqrt_price_target: int, liquidity: int,
+                      amount_remaining: int, fee_pips: int) -> Tuple[int, int, int, int]:
+    """
+    خطوة تبادل بكمية دخل محددة داخل نطاق سيولة واحد (SwapMath.computeSwapStep)
+    
+    تعيد (السعر التالي، الدخل، الخرج، الرسوم).
+    """
+    zero_for_one = sqrt_price_current >= sqrt_price_target
+    amount_remaining_less_fee = mul_div(amount_remaining, FEE_DENOMINATOR - fee_pips, FEE_DENOMINATOR)
+    
+    if zero_for_one:
+        amount_in = get_amount0_delta(sqrt_price_target, sqrt_price_current, liquidity, True)
+    else:
+        amount_in = get_amount1_delta(sqrt_price_current, sqrt_price_target, liquidity, True)
+        
+    if amount_remaining_less_fee >= amount_in:
+        sqrt_price_next = sqrt_price_target
+    else:
+        sqrt_price_next = get_next_sqrt_price_from_input(
+            sqrt_price_current, liquidity, amount_remaining_less_fee, zero_for_one
+        )
+        
+    reached_target = sqrt_price_next == sqrt_price_target
+    if zero_for_one:
+        if not reached_target:
+            amount_in = get_amount0_delta(sqrt_price_next, sqrt_price_current, liquidity, True)
+        amount_out = get_amount1_delta(sqrt_price_next, sqrt_price_current, liquidity, False)
+    else:
+        if not reached_target:
+            amount_in = get_amount1_delta(sqrt_price_current, sqrt_price_next, liquidity, True)
+        amount_out = get_amount0_delta(sqrt_price_current, sqrt_price_next, liquidity, False)
+        
+    if not reached_target:
+        fee_amount = amount_remaining - amount_in
+    else:
+        fee_amount = mul_div_rounding_up(amount_in, fee_pips, FEE_DENOMINATOR - fee_pips)
+    return sqrt_price_next, amount_in, amount_out, fee_amount
+
+def next_initialized_tick_within_one_word(bitmap: Dict[int, int], tick: int, tick_spacing: int,
+                                          lte: bool) -> Tuple[int, bool]:
+    """أقرب tick مهيأ داخل نفس كلمة الخريطة (TickBitmap.nextInitializedTickWithinOneWord)"""
+    compressed = tick // tick_spacing  # تقريب نحو سالب اللانهاية كما في العقد
+    
+    if lte:
+        word_pos, bit_pos = compressed >> 8, compressed % 256
+        masked = bitmap.get(word_pos, 0) & ((1 << bit_pos) - 1 + (1 << bit_pos))
+        if masked:
+            return (compressed - (bit_pos - (masked.bit_length() - 1))) * tick_spacing, True
+        return (compressed - bit_pos) * tick_spacing, False
+        
+    compressed += 1
+    word_pos, bit_pos = compressed >> 8, compressed % 256
+    masked = bitmap.get(word_pos, 0) & ~((1 << bit_pos) - 1) & MAX_UINT256
+    if masked:
+        return (compressed + ((masked & -masked).bit_length() - 1 - bit_pos)) * tick_spacing, True
+    return (compressed + (255 - bit_pos)) * tick_spacing, False
+
+def swap_exact_input(pool: Dict, zero_for_one: bool, amount_in: int) -> int:
+    """
+    كمية المخرجات لتبادل بكمية دخل محددة عبر عبور الـ ticks (مطابق لـ QuoterV2 بدون حد سعر)
+    
+    حالة المجمع لا تتغير. يُرفض التبادل إذا تجاوز كلمات الخريطة المحملة لأن
+    السيولة خارجها غير معروفة.
+    """
+    if amount_in <= 0:
+        raise ValueError("INSUFFICIENT_INPUT_AMOUNT")
+        
+    sqrt_price_limit = MIN_SQRT_RATIO + 1 if zero_for_one else MAX_SQRT_RATIO - 1
+    sqrt_price = pool['sqrt_price_x96']
+    tick = pool['tick']
+    liquidity = pool['liquidity']
+    spacing = pool['tick_spacing']
+    min_word, max_word = pool['words']
+    
+    remaining = amount_in
+    amount_out = 0
+    while remaining != 0 and sqrt_price != sqrt_price_limit:
+        word_pos = ((tick // spacing) if zero_for_one else (tick // spacing + 1)) >> 8
+        if not min_word <= word_pos <= max_word:
+            raise ValueError("التبادل يتجاوز نطاق السيولة المحمل")
+            
+        tick_next, initialized = next_initialized_tick_within_one_word(
+            pool['bitmap'], tick, spacing, zero_for_one
+        )
+        tick_next = max(MIN_TICK, min(MAX_TICK, tick_next))
+        sqrt_price_next = get_sqrt_ratio_at_tick(tick_next)
+        
+        if zero_for_one:
+            target = sqrt_price_limit if sqrt_price_next < sqrt_price_limit else sqrt_price_next
+        else:
+            target = sqrt_price_limit if sqrt_price_next > sqrt_price_limit else sqrt_price_next
+            
+        sqrt_price_start = sqrt_price
+        sqrt_price, step_in, step_out, fee_amount = compute_swap_step(
+            sqrt_price, target, liquidity, remaining, pool['fee']
+        )
+        remaining -= step_in + fee_amount
+        amount_out += step_out
+        
+        if sqrt_price == sqrt_price_next:
+            if initialized:
+                liquidity_net = pool['ticks'][tick_next][1]
+                liquidity += -liquidity_net if zero_for_one else liquidity_net
+            tick = tick_next - 1 if zero_for_one else tick_next
+        elif sqrt_price != sqrt_price_start:
+            tick = get_tick_at_sqrt_ratio(sqrt_price)
+            
+    return amount_out
+
+def _signed(word: int, bits: int = 256) -> int:
+    """تحويل كلمة ABI إلى عدد بإشارة"""
+    return word - (1 << bits) if word >= 1 << (bits - 1) else word
+
+def _decode_words(data: str) -> List[int]:
+    """فك ترميز بيانات ABI إلى كلمات 32 بايت"""
+    data = data[2:] if data.startswith('0x') else data
+    return [int(data[i:i + 64], 16) for i in range(0, len(data), 64)]
+
+class V3PoolCache:
+    """
+    حالة مجمعات V3 المراقبة (السعر، السيولة النشطة، خريطة الـ ticks وصافي
+    السيولة لكل tick) محدثة من أحداث Swap و Mint و Burn
+    
+    تُحمل كلمات الخريطة حول السعر الحالي فقط (word_radius كلمة في كل اتجاه)،
+    والتبادل الذي يتجاوزها يُرفض بدلاً من تسعيره بسيولة غير معروفة. كل مستوى
+    رسوم مجمع منفصل باسم منصة خاص به مثل uniswap_v3_3000.
+    """
+    
+    FEE_TIERS = (100, 500, 3000, 10000)
+    
+    SLOT0_TYPES = ['uint160', 'int24', 'uint16', 'uint16', 'uint16', 'uint8', 'bool']
+    TICK_TYPES = ['uint128', 'int128', 'uint256', 'uint256', 'int56', 'uint160', 'uint32', 'bool']
+    
+    def __init__(self, rpc: AsyncRPCClient, multicall: Multicall, dex_configs: Optional[Dict] = None,
+                 fee_tiers: Tuple[int, ...] = FEE_TIERS, word_radius: int = 4,
+                 max_block_range: int = 2000):
+        self.logger = logging.getLogger(__name__)
+        self.rpc = rpc
+        self.multicall = multicall
+        dex_configs = dex_configs if dex_configs is not None else Config.DEX_CONFIGS
+        self.word_radius = word_radius
+        self.max_block_range = max_block_range
+        
+        # اسم المنصة لكل مستوى رسوم -> (المصنع، الرسوم)
+        self.labels = {
+            f"{dex}_{fee}": (config['factory_address'], fee)
+            for dex, config in dex_configs.items() if dex in V3_DEXES
+            for fee in fee_tiers
+        }
+        
+        self.watched = set()  # (token0, token1) بترتيب العناوين
+        self.pools = {}  # (المنصة، token0، token1) -> حالة المجمع
+        self.pool_index = {}  # عنوان المجمع -> مفتاح المجمع
+        
+        self.last_block = None
+        self.last_hash = None
+        self.changed = set()
+        self.full_refresh = False
+    
+    @staticmethod
+    def _sort_tokens(token_a: str, token_b: str) -> Tuple[str, str, bool]:
+        """ترتيب العنوانين كما في المصنع مع اتجاه الطلب"""
+        a, b = token_a.lower(), token_b.lower()
+        return (a, b, False) if a < b else (b, a, True)
+    
+    def watch(self, token_a: str, token_b: str):
+        """إضافة زوج للمراقبة على جميع مستويات الرسوم"""
+        token0, token1, _ = self._sort_tokens(token_a, token_b)
+        self.watched.add((token0, token1))
+    
+    def is_v3(self, dex: str) -> bool:
+        """التحقق من أن اسم المنصة لمجمع V3"""
+        return dex in self.labels
+    
+    def fee(self, dex: str) -> Tuple[int, int]:
+        """معاملات الرسوم (البسط، المقام) بنفس صيغة منصات V2"""
+        fee = self.labels[dex][1]
+        return FEE_DENOMINATOR - fee, FEE_DENOMINATOR
+    
+    def get_pool(self, dex: str, token_a: str, token_b: str) -> Optional[Dict]:
+        """حالة مجمع (أو None إذا لم يكن معروفاً)"""
+        token0, token1, _ = self._sort_tokens(token_a, token_b)
+        return self.pools.get((dex, token0, token1))
+    
+    def pool_address(self, dex: str, token_a: str, token_b: str) -> Optional[str]:
+        """عنوان عقد المجمع"""
+        pool = self.get_pool(dex, token_a, token_b)
+        return pool['address'] if pool else None
+    
+    def list_pools(self) -> List[Tuple[str, str, str]]:
+        """مفاتيح المجمعات ذات السيولة النشطة"""
+        return [key for key, pool in self.pools.items() if pool['liquidity'] > 0]
+    
+    def get_reserves(self, dex: str, token_in: str, token_out: str) -> Optional[Tuple[int, int]]:
+        """
+        الاحتياطيات الافتراضية (الدخل، الخرج) للنطاق الحالي: x = L/√P و y = L·√P
+        
+        تقريب V2 صالح حتى أول tick، ويُستخدم فقط لنقطة البداية التحليلية للبحث.
+        """
+        pool = self.get_pool(dex, token_in, token_out)
+        if pool is None or pool['liquidity'] <= 0:
+            return None
+        reserve0 = (pool['liquidity'] << 96) // pool['sqrt_price_x96']
+        reserve1 = (pool['liquidity'] * pool['sqrt_price_x96']) >> 96
+        _, _, flipped = self._sort_tokens(token_in, token_out)
+        return (reserve1, reserve0) if flipped else (reserve0, reserve1)
+    
+    def quote(self, dex: str, amount_in: int, token_in: str, token_out: str) -> int:
+        """كمية المخرجات لتبادل واحد عبر عبور الـ ticks"""
+        pool = self.get_pool(dex, token_in, token_out)
+        if pool is None:
+            raise KeyError(f"مجمع غير متوفر: {dex} {token_in}/{token_out}")
+        return swap_exact_input(pool, token_in.lower() < token_out.lower(), amount_in)
+    
+    def pop_changed(self) -> Tuple[set, bool]:
+        """المجمعات المحدثة منذ آخر استدعاء، وهل أُعيد تحميل الكل"""
+        changed, full_refresh = self.changed, self.full_refresh
+        self.changed = set()
+        self.full_refresh = False
+        return changed, full_refresh
+    
+    def _word_range(self, tick: int, spacing: int) -> Tuple[int, int]:
+        """كلمات الخريطة المحملة حول السعر الحالي (ضمن حدود TickMath)"""
+        center = (tick // spacing) >> 8
+        return (max((MIN_TICK // spacing) >> 8, center - self.word_radius),
+                min((MAX_TICK // spacing) >> 8, center + self.word_radius))
+    
+    async def bootstrap(self) -> int:
+        """اكتشاف المجمعات من المصانع وتحميل حالتها عند كتلة واحدة عبر Multicall"""
+        try:
+            keys = [
+                (dex, token0, token1)
+                for dex in self.labels for token0, token1 in sorted(self.watched)
+            ]
+            addresses = await self.multicall.call([
+                (self.labels[dex][0], 'getPool(address,address,uint24)',
+                 [Web3.to_checksum_address(token0), Web3.to_checksum_address(token1), self.labels[dex][1]],
+                 ['address'])
+                for dex, token0, token1 in keys
+            ])
+            block = self.multicall.cache_block
+            
+            found = [
+                (key, address.lower()) for key, address in zip(keys, addresses)
+                if address and address.lower() != ZERO_ADDRESS
+            ]
+            
+            # السعر والسيولة وتباعد الـ ticks عند نفس الكتلة
+            specs = []
+            for _, address in found:
+                specs.append((address, 'slot0()', [], self.SLOT0_TYPES))
+                specs.append((address, 'liquidity()', [], ['uint128']))
+                specs.append((address, 'tickSpacing()', [], ['int24']))
+            results = await self.multicall.call(specs, block=block)
+            
+            pools = {}
+            for i, (key, address) in enumerate(found):
+                slot0, liquidity, spacing = results[3 * i:3 * i + 3]
+                if slot0 is None or liquidity is None or spacing is None:
+                    continue
+                pools[key] = {
+                    'address': address,
+                    'fee': self.labels[key[0]][1],
+                    'tick_spacing': spacing,
+                    'sqrt_price_x96': slot0[0],
+                    'tick': slot0[1],
+                    'liquidity': liquidity,
+                    'words': self._word_range(slot0[1], spacing),
+                    'bitmap': {},
+                    'ticks': {}
+                }
+                
+            # كلمات الخريطة حول السعر الحالي
+            words = [
+                (key, word) for key, pool in pools.items()
+                for word in range(pool['words'][0], pool['words'][1] + 1)
+            ]
+            results = await self.multicall.call([
+                (pools[key]['address'], 'tickBitmap(int16)', [word], ['uint256']) for key, word in words
+            ], block=block)
+            
+            initialized = []
+            for (key, word), value in zip(words, results):
+                if not value:
+                    continue
+                pools[key]['bitmap'][word] = value
+                spacing = pools[key]['tick_spacing']
+                initialized.extend(
+                    (key, ((word << 8) + bit) * spacing) for bit in range(256) if value >> bit & 1
+                )
+                
+            # صافي السيولة لكل tick مهيأ
+            results = await self.multicall.call([
+                (pools[key]['address'], 'ticks(int24)', [tick], self.TICK_TYPES) for key, tick in initialized
+            ], block=block)
+            for (key, tick), info in zip(initialized, results):
+                if info is not None:
+                    pools[key]['ticks'][tick] = [info[0], info[1]]
+                    
+            head = await self.rpc.call('eth_getBlockByNumber', [hex(block), False])
+            self.pools = pools
+            self.pool_index = {pool['address']: key for key, pool in pools.items()}
+            self.last_block = block
+            self.last_hash = head['hash']
+            self.full_refresh = True
+            
+            self.logger.info(f"تم تحميل {len(pools)} مجمع V3 عند الكتلة {block}")
+            return len(pools)
+            
+        except Exception as e:
+            self.logger.error(f"خطأ في تهيئة مجمعات V3: {e}")
+            return 0
+    
+    def _update_position(self, pool: Dict, tick_lower: int, tick_upper: int, delta: int):
+        """تعديل سيولة نطاق (Mint موجب، Burn سالب) وتحديث الخريطة"""
+        for tick, net in ((tick_lower, delta), (tick_upper, -delta)):
+            gross, liquidity_net = pool['ticks'].get(tick, (0, 0))
+            updated = gross + delta
+            if (gross == 0) != (updated == 0):
+                compressed = tick // pool['tick_spacing']
+                word = compressed >> 8
+                pool['bitmap'][word] = pool['bitmap'].get(word, 0) ^ (1 << (compressed % 256))
+            if updated == 0:
+                pool['ticks'].pop(tick, None)
+            else:
+                pool['ticks'][tick] = [updated, liquidity_net + net]
+                
+        if tick_lower <= pool['tick'] < tick_upper:
+            pool['liquidity'] += delta
+    
+    def apply_logs(self, logs: List[Dict]) -> int:
+        """تطبيق أحداث Swap و Mint و Burn مرتبة"""
+        applied = 0
+        for log in sorted(logs, key=lambda l: (int(l['blockNumber'], 16), int(l['logIndex'], 16))):
+            if log.get('removed'):
+                continue
+            key = self.pool_index.get(log['address'].lower())
+            topics = log.get('topics') or []
+            if key is None or not topics:
+                continue
+                
+            pool = self.pools[key]
+            topic = topics[0].lower()
+            words = _decode_words(log['data'])
+            if topic == SWAP_TOPIC:
+                # amount0, amount1, sqrtPriceX96, liquidity, tick
+                pool['sqrt_price_x96'] = words[2]
+                pool['liquidity'] = words[3]
+                pool['tick'] = _signed(words[4])
+            elif topic == MINT_TOPIC:
+                # sender, amount, amount0, amount1 (owner و tickLower و tickUpper مفهرسة)
+                self._update_position(pool, _signed(int(topics[2], 16)), _signed(int(topics[3], 16)), words[1])
+            elif topic == BURN_TOPIC:
+                # amount, amount0, amount1
+                if words[0] == 0:
+                    continue
+                self._update_position(pool, _signed(int(topics[2], 16)), _signed(int(topics[3], 16)), -words[0])
+            else:
+                continue
+                
+            self.changed.add(key)
+            applied += 1
+            
+        return applied
+    
+    async def poll(self) -> int:
+        """معالجة الكتل الجديدة منذ آخر تحديث (إعادة التحميل عند إعادة تنظيم السلسلة)"""
+        try:
+            if self.last_block is None:
+                await self.bootstrap()
+                return 0
+                
+            head, last = await self.rpc.batch([
+                ('eth_getBlockByNumber', ['latest', False]),
+                ('eth_getBlockByNumber', [hex(self.last_block), False])
+            ])
+            if last is None or last.get('hash') != self.last_hash:
+                self.logger.warning("إعادة تنظيم السلسلة: إعادة تحميل مجمعات V3")
+                await self.bootstrap()
+                return 0
+                
+            head_number = int(head['number'], 16)
+            if head_number <= self.last_block or not self.pool_index:
+                return 0
+                
+            applied = 0
+            from_block = self.last_block + 1
+            while from_block <= head_number:
+                to_block = min(head_number, from_block + self.max_block_range - 1)
+                logs = await self.rpc.call('eth_getLogs', [{
+                    'fromBlock': hex(from_block),
+                    'toBlock': hex(to_block),
+                    'address': list(self.pool_index),
+                    'topics': [[SWAP_TOPIC, MINT_TOPIC, BURN_TOPIC]]
+                }])
+                applied += self.apply_logs(logs)
+                from_block = to_block + 1
+                
+            self.last_block = head_number
+            self.last_hash = head['hash']
+            return applied
+            
+        except Exception as e:
+            self.logger.error(f"خطأ في تحديث مجمعات V3: {e}")
+            return 0